@@ -3,39 +3,170 @@ import json
 import logging
 import datetime
 from botocore.exceptions import ClientError
-from app.core.aws_client import aws_client_manager
+from app.config import settings
+from app.core.aws_client import aws_client_manager, AWSServiceUnavailable
+from app.core.summary_cache import SummaryCache, profile_key, quantize_risk_profile
 
 logger = logging.getLogger(__name__)
 
 
 class ClinicalSupportAgent:
-    def __init__(self):
+    def __init__(self, cache: SummaryCache = None):
         self.name = "Tarang Clinical Support Agent"
         self.role = "Generates evidence summaries for clinicians via AWS Bedrock"
         self.model_id = "anthropic.claude-3-sonnet-20240229-v1:0"
         self.region = os.getenv("AWS_REGION", "us-east-1")
 
-        # Use centralized AWS client manager
-        self.bedrock = aws_client_manager.get_bedrock_client()
-        if self.bedrock:
-            logger.info(f"Bedrock client initialized via AWSClientManager (region={self.region})")
-        else:
-            logger.warning("Bedrock client unavailable. Will use rule-based fallback.")
+        # Bedrock client from the centralized AWS client manager, resolved on first use
+        self._bedrock = None
+        self._bedrock_pinned = False
+
+        # Bedrock summaries keyed by quantized risk profile (None disables caching)
+        self.cache = cache if cache is not None else SummaryCache.from_settings(settings)
 
-    def generate_summary(self, patient_data: dict, risk_results: dict):
+    @property
+    def bedrock(self):
+        """
+        The guarded Bedrock client, or None while credentials are unvalidated or
+        invalid (callers then use the rule-based fallback). Constructing the
+        agent never touches the network.
+        """
+        if self._bedrock is None and not self._bedrock_pinned:
+            self._bedrock = aws_client_manager.get_bedrock_client()
+            if self._bedrock is not None:
+                logger.info(f"Bedrock client initialized via AWSClientManager (region={self.region})")
+        return self._bedrock
+
+    @bedrock.setter
+    def bedrock(self, client):
+        # An explicitly assigned client (or None) is kept as is
+        self._bedrock = client
+        self._bedrock_pinned = True
+
+    @bedrock.deleter
+    def bedrock(self):
+        self._bedrock = None
+        self._bedrock_pinned = False
+
+    def generate_summary(self, patient_data: dict, risk_results: dict, use_bedrock: bool = True):
         """
         Synthesizes multimodal screening data into clinical insights.
         Uses AWS Bedrock (Claude 3 Sonnet) with rule-based fallback.
+        Pass use_bedrock=False for bulk paths where one LLM call per record is too slow.
         """
-        if self.bedrock:
+        if self.bedrock and use_bedrock:
             try:
-                return self._generate_via_bedrock(patient_data, risk_results)
+                return self.generate_bedrock_summary(patient_data, risk_results)
+            except AWSServiceUnavailable as e:
+                # Breaker open, no free slot or budget spent: fall back without waiting on Bedrock
+                logger.warning(f"Bedrock skipped ({e}). Using rule-based summary.")
             except Exception as e:
                 logger.error(f"Bedrock inference failed: {e}. Falling back to rule-based.")
 
         return self._generate_rule_based(patient_data, risk_results)
 
-    def _generate_via_bedrock(self, patient_data: dict, risk_results: dict):
+    def cached_summary(self, risk_results: dict):
+        """The cached Bedrock summary for this risk profile, or None (never calls Bedrock)."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(profile_key(quantize_risk_profile(risk_results), self.model_id))
+        if cached is not None:
+            cached["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
+        return cached
+
+    def generate_bedrock_summary(self, patient_data: dict, risk_results: dict, check_cache: bool = True):
+        """
+        Bedrock summary without the rule-based fallback; raises on failure.
+        With the summary cache enabled, repeated risk profiles are served from it
+        and Bedrock is asked about the quantized profile without identifying
+        data, so one answer fits every screening with that key. Pass
+        check_cache=False when cached_summary() was already consulted.
+        """
+        if self.cache is None:
+            return self._generate_via_bedrock(patient_data, risk_results)
+
+        profile = quantize_risk_profile(risk_results)
+        key = profile_key(profile, self.model_id)
+        if check_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
+                return cached
+
+        result = self._generate_via_bedrock({"name": "Patient"}, profile)
+        self.cache.set(key, result)
+        return result
+
+    def stream_summary(self, patient_data: dict, risk_results: dict, stopped=lambda: False):
+        """
+        Blocking generator behind the streaming summary endpoint. Yields
+        ("token", text) for every Bedrock text delta, ("finding", index, text)
+        and ("field", name, value) as soon as each schema value is complete,
+        and finally ("complete", summary). Cached summaries and the rule-based
+        fallback are replayed through the same events (without tokens).
+        Stops early, closing the Bedrock stream, once stopped() is true.
+        """
+        from app.core.summary_stream import SummaryStreamParser
+
+        result = None
+        if self.bedrock:
+            prompt_patient, prompt_risk, key = patient_data, risk_results, None
+            if self.cache is not None:
+                prompt_risk = quantize_risk_profile(risk_results)
+                key = profile_key(prompt_risk, self.model_id)
+                prompt_patient = {"name": "Patient"}
+                result = self.cache.get(key)
+                if result is not None:
+                    result["timestamp"] = datetime.datetime.utcnow().isoformat() + "Z"
+
+            if result is None:
+                parser = SummaryStreamParser()
+                chunks = []
+                try:
+                    response = self.bedrock.invoke_model_with_response_stream(
+                        modelId=self.model_id,
+                        contentType="application/json",
+                        accept="application/json",
+                        body=self._request_body(prompt_patient, prompt_risk)
+                    )
+                    stream = response["body"]
+                    try:
+                        for event in stream:
+                            if stopped():
+                                return
+                            chunk = json.loads(event.get("chunk", {}).get("bytes", b"{}"))
+                            if chunk.get("type") != "content_block_delta":
+                                continue
+                            text = chunk.get("delta", {}).get("text", "")
+                            chunks.append(text)
+                            yield ("token", text)
+                            yield from parser.feed(text)
+                    finally:
+                        close = getattr(stream, "close", None)
+                        if close:
+                            close()
+                    result = self._parse_summary_text("".join(chunks))
+                    if key is not None:
+                        self.cache.set(key, result)
+                    yield ("complete", result)
+                    return
+                except AWSServiceUnavailable as e:
+                    logger.warning(f"Bedrock skipped ({e}). Using rule-based summary.")
+                    yield ("error", "Bedrock is unavailable; using the rule-based summary")
+                except Exception as e:
+                    logger.error(f"Bedrock streaming failed: {e}. Falling back to rule-based.")
+                    yield ("error", "Bedrock generation failed; falling back to the rule-based summary")
+
+        if result is None:
+            result = self._generate_rule_based(patient_data, risk_results)
+        for index, finding in enumerate(result.get("key_findings", [])):
+            yield ("finding", index, finding)
+        for name in ("summary_title", "clinical_recommendation", "agent_status"):
+            if name in result:
+                yield ("field", name, result[name])
+        yield ("complete", result)
+
+    def _request_body(self, patient_data: dict, risk_results: dict) -> str:
         system_prompt = (
             "You are an expert developmental pediatrician creating a clinical summary "
             "from autism screening data. Analyze the provided patient data and risk results, "
@@ -55,7 +186,7 @@ class ClinicalSupportAgent:
             "Generate a clinical evidence summary with key findings and a recommendation."
         )
 
-        body = json.dumps({
+        return json.dumps({
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 1024,
             "system": system_prompt,
@@ -65,16 +196,7 @@ class ClinicalSupportAgent:
             "temperature": 0.3
         })
 
-        response = self.bedrock.invoke_model(
-            modelId=self.model_id,
-            contentType="application/json",
-            accept="application/json",
-            body=body
-        )
-
-        response_body = json.loads(response["body"].read())
-        raw_text = response_body["content"][0]["text"]
-
+    def _parse_summary_text(self, raw_text: str) -> dict:
         # Parse JSON from response (handle markdown code blocks)
         cleaned = raw_text.strip()
         if cleaned.startswith("```"):
@@ -88,6 +210,17 @@ class ClinicalSupportAgent:
 
         return result
 
+    def _generate_via_bedrock(self, patient_data: dict, risk_results: dict):
+        response = self.bedrock.invoke_model(
+            modelId=self.model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=self._request_body(patient_data, risk_results)
+        )
+
+        response_body = json.loads(response["body"].read())
+        return self._parse_summary_text(response_body["content"][0]["text"])
+
     def _generate_rule_based(self, patient_data: dict, risk_results: dict):
         """Original rule-based fallback logic."""
         risk_score = risk_results.get("risk_score", 0)
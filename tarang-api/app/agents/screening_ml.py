@@ -5,32 +5,77 @@ Uses a trained machine learning model on real UCI ASD screening data.
 """
 
 import os
+import sys
 import math
+from typing import Callable
 import numpy as np
+from app.config import settings
+from app.core.batching import MicroBatcher
+from app.core.model_registry import ActiveModel, ModelBundle, ModelRegistry, ModelSwapper
+from app.core.startup import startup_timer
 
-# Try to load the trained model
-MODEL_AVAILABLE = False
-ML_MODEL = None
-FEATURE_COLS = []
-MODEL_DATA = {}
+# Get the directory where this file is located (app/agents/)
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Go up one level to app/, then into models/
+MODEL_PATH = os.path.join(CURRENT_DIR, '..', 'models', 'asd_screening_model.joblib')
 
-try:
-    import joblib
-    # Get the directory where this file is located (app/agents/)
-    CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-    # Go up one level to app/, then into models/
-    MODEL_PATH = os.path.join(CURRENT_DIR, '..', 'models', 'asd_screening_model.joblib')
-    
-    if os.path.exists(MODEL_PATH):
-        MODEL_DATA = joblib.load(MODEL_PATH)
-        ML_MODEL = MODEL_DATA['model']
-        FEATURE_COLS = MODEL_DATA['feature_columns']
-        MODEL_AVAILABLE = True
-        print(f"✓ Loaded ML model: {MODEL_DATA['model_type']} (accuracy: {MODEL_DATA['accuracy']:.3f})")
-    else:
-        print(f"Model file not found at: {MODEL_PATH}")
-except Exception as e:
-    print(f"ML model not available: {e}")
+
+def load_bundle(model_path: str, version: str = None) -> ModelBundle:
+    """Load a model artifact with the runtimes enabled in settings."""
+    return ModelBundle.load(
+        model_path,
+        version,
+        load_mode=settings.MODEL_LOAD_MODE,
+        use_flat_forest=settings.INFERENCE_FLAT_FOREST,
+        use_score_table=settings.INFERENCE_SCORE_TABLE
+    )
+
+
+# Try to load the trained model: the registry's active version, else the bundled artifact
+MODEL_REGISTRY = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+_bundle = None
+with startup_timer.phase("model_load"):
+    try:
+        _active_version = MODEL_REGISTRY.active_version()
+        if _active_version:
+            _bundle = load_bundle(MODEL_REGISTRY.artifact_path(_active_version), _active_version)
+    except Exception as e:
+        print(f"Model registry not available: {e}")
+
+    if _bundle is None or not _bundle.available:
+        _bundle = load_bundle(MODEL_PATH)
+
+# Every ScreeningAgent in this process serves whatever bundle is active here
+ACTIVE_MODEL = ActiveModel(_bundle)
+MODEL_SWAPPER = ModelSwapper(ACTIVE_MODEL, MODEL_REGISTRY, load_bundle)
+
+
+def _process_rss_bytes() -> int:
+    """Resident set size of this process (current on Linux, peak elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def model_footprint() -> dict:
+    """Where the screening model lives in memory, for /health."""
+    bundle = ACTIVE_MODEL.current
+    return {
+        "available": bundle.available,
+        "version": bundle.version,
+        "load_mode": bundle.load_source,
+        "model_type": bundle.metadata.get('model_type') if bundle.available else None,
+        "flat_forest_bytes": bundle.flat_forest.nbytes if bundle.flat_forest is not None else 0,
+        "flat_forest_shared": bundle.flat_forest.is_memory_mapped if bundle.flat_forest is not None else False,
+        "score_table_bytes": bundle.score_table.nbytes if bundle.score_table is not None else 0,
+        "sklearn_loaded": 'sklearn' in sys.modules,
+        "pid": os.getpid(),
+        "process_rss_bytes": _process_rss_bytes(),
+    }
 
 
 class ScreeningAgent:
@@ -44,7 +89,50 @@ class ScreeningAgent:
     def __init__(self):
         self.name = "Tarang ML Screening Agent"
         self.role = "Flags early risk signals using trained ML model on real clinical data"
-        self.model_available = MODEL_AVAILABLE
+        self.active_model = ACTIVE_MODEL
+        self._ml_enabled = True
+        
+        # Optional ShadowEvaluator scoring a candidate model on the same traffic
+        self.shadow = None
+        
+        # Coalesces concurrent /screening/process predictions on this worker
+        self.batcher = None
+        if settings.INFERENCE_MICRO_BATCHING:
+            self.batcher = MicroBatcher(
+                self._predict_feature_batch,
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+                name="screening_inference"
+            )
+    
+    @property
+    def model_available(self) -> bool:
+        return self._ml_enabled and self.active_model.current.available
+    
+    @model_available.setter
+    def model_available(self, enabled: bool):
+        self._ml_enabled = enabled
+    
+    @property
+    def model_version(self):
+        """Version of the model currently being served (None for rule-based scoring)."""
+        bundle = self._current_bundle()
+        return bundle.version if bundle is not None else None
+    
+    def _current_bundle(self):
+        """Snapshot of the serving model, or None for rule-based scoring.
+        Each request uses one snapshot so a hot swap never mixes versions."""
+        bundle = self.active_model.current
+        return bundle if self._ml_enabled and bundle.available else None
+    
+    def _model_info(self, bundle) -> dict:
+        return {
+            "ml_available": bundle is not None,
+            "model_type": bundle.metadata.get('model_type', 'N/A') if bundle is not None else 'N/A',
+            "model_accuracy": bundle.metadata.get('accuracy', 0) if bundle is not None else 0,
+            "model_version": bundle.version if bundle is not None else None,
+            "dataset_source": "UCI ML Repository - ASD Screening Data"
+        }
     
     def _prepare_ml_features(self, video_metrics: dict, questionnaire_responses: dict) -> dict:
         """
@@ -75,22 +163,36 @@ class ScreeningAgent:
         
         return features
     
-    def _predict_with_ml(self, features: dict) -> tuple:
+    def _predict_with_ml(self, features: dict, bundle=None) -> tuple:
         """Run ML model prediction"""
-        if not self.model_available:
+        bundle = bundle or self._current_bundle()
+        if bundle is None:
             return None, None
         
         try:
+            # O(1) lookup; out-of-range ages fall through to the model
+            if bundle.score_table is not None:
+                table_probability = bundle.score_table.lookup(features)
+                if table_probability is not None:
+                    risk_probability = np.float64(table_probability)
+                    prediction = bundle.score_table.classes[int(risk_probability > 0.5)]
+                    return prediction, risk_probability
+            
             # Prepare feature vector in correct order
             feature_vector = []
-            for col in FEATURE_COLS:
+            for col in bundle.feature_columns:
                 feature_vector.append(features.get(col, 0))
             
+            if bundle.flat_forest is not None:
+                risk_probability = np.float64(bundle.flat_forest.predict_row(feature_vector))
+                prediction = bundle.flat_forest.classes_[int(risk_probability > 0.5)]
+                return prediction, risk_probability
+            
             X = np.array([feature_vector])
             
             # Get prediction and probability
-            prediction = ML_MODEL.predict(X)[0]
-            proba = ML_MODEL.predict_proba(X)[0]
+            prediction = bundle.model.predict(X)[0]
+            proba = bundle.model.predict_proba(X)[0]
             
             risk_probability = proba[1] if len(proba) > 1 else proba[0]
             
@@ -100,6 +202,40 @@ class ScreeningAgent:
             print(f"ML prediction error: {e}")
             return None, None
     
+    def _feature_matrix(self, features_list: list, feature_columns: list) -> np.ndarray:
+        """Stack prepared feature dicts into one (N, F) matrix in feature_columns order"""
+        return np.array(
+            [[features.get(col, 0) for col in feature_columns] for features in features_list],
+            dtype=float
+        ).reshape(len(features_list), len(feature_columns))
+    
+    def _predict_batch_with_ml(self, features_list: list, bundle) -> tuple:
+        """Run a single vectorized ML prediction over prepared feature dicts"""
+        if bundle is None or not features_list:
+            return None, None
+        
+        try:
+            X = self._feature_matrix(features_list, bundle.feature_columns)
+            model = bundle.flat_forest if bundle.flat_forest is not None else bundle.model
+            
+            if bundle.score_table is not None:
+                # Table hits are free; only out-of-range rows reach the model
+                risk_probabilities, hit = bundle.score_table.lookup_matrix(X)
+                if not hit.all():
+                    proba = model.predict_proba(X[~hit])
+                    risk_probabilities[~hit] = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+                predictions = bundle.score_table.classes[(risk_probabilities > 0.5).astype(int)]
+                return predictions, risk_probabilities
+            
+            proba = model.predict_proba(X)
+            predictions = model.classes_[np.argmax(proba, axis=1)]
+            risk_probabilities = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+            return predictions, risk_probabilities
+        
+        except Exception as e:
+            print(f"ML batch prediction error: {e}")
+            return None, None
+    
     def analyze_signals(self, video_metrics: dict, questionnaire_score: int, 
                        questionnaire_responses: dict = None, eeg_mock: dict = None):
         """
@@ -115,9 +251,67 @@ class ScreeningAgent:
             questionnaire_responses = self._score_to_responses(questionnaire_score)
         
         # 1. ML Model Prediction (if available)
+        bundle = self._current_bundle()
+        ml_features = self._prepare_ml_features(video_metrics, questionnaire_responses)
+        ml_prediction, ml_probability = self._predict_with_ml(ml_features, bundle)
+        
+        return self._fuse_signals(video_metrics, questionnaire_score, eeg_mock, ml_probability, bundle)
+    
+    async def analyze_signals_async(self, video_metrics: dict, questionnaire_score: int,
+                                    questionnaire_responses: dict = None, eeg_mock: dict = None,
+                                    defer: Callable = None):
+        """
+        Same result as analyze_signals, but the ML prediction goes through the
+        worker's micro-batcher so concurrent requests share one predict_proba call.
+        
+        In shadow mode the same features are offered to the candidate model;
+        `defer` (e.g. BackgroundTasks.add_task) postpones that until after the
+        response has been sent.
+        """
+        if not self.model_available:
+            return self.analyze_signals(video_metrics, questionnaire_score, questionnaire_responses, eeg_mock)
+        
+        if questionnaire_responses is None:
+            questionnaire_responses = self._score_to_responses(questionnaire_score)
+        
         ml_features = self._prepare_ml_features(video_metrics, questionnaire_responses)
-        ml_prediction, ml_probability = self._predict_with_ml(ml_features)
+        if self.batcher is not None:
+            ml_prediction, ml_probability, bundle = await self.batcher.submit(ml_features)
+        else:
+            bundle = self._current_bundle()
+            ml_prediction, ml_probability = self._predict_with_ml(ml_features, bundle)
+        
+        result = self._fuse_signals(video_metrics, questionnaire_score, eeg_mock, ml_probability, bundle)
         
+        if self.shadow is not None and ml_probability is not None:
+            sample = {
+                "features": ml_features,
+                "video_metrics": video_metrics,
+                "questionnaire_score": questionnaire_score,
+                "eeg_mock": eeg_mock,
+                "primary_bundle": bundle,
+                "primary_probability": ml_probability,
+                "primary_risk": float(result["risk_score"]),
+                "primary_interpretation": result["interpretation"],
+            }
+            if defer is not None:
+                defer(self.shadow.offer, sample)
+            else:
+                self.shadow.offer(sample)
+        
+        return result
+    
+    def _predict_feature_batch(self, features_list: list) -> list:
+        """MicroBatcher callback: one vectorized prediction for queued feature dicts"""
+        bundle = self._current_bundle()
+        predictions, probabilities = self._predict_batch_with_ml(features_list, bundle)
+        if probabilities is None:
+            return [(None, None, None)] * len(features_list)
+        return [(prediction, probability, bundle) for prediction, probability in zip(predictions, probabilities)]
+    
+    def _fuse_signals(self, video_metrics: dict, questionnaire_score: int,
+                      eeg_mock: dict, ml_probability, bundle=None) -> dict:
+        """Steps 2-7 of analyze_signals: modality scores, fusion, confidence, interpretation"""
         # 2. Computer Vision Score
         v_eye = video_metrics.get("eye_contact", 0.0)
         v_motor = video_metrics.get("motor_coordination", 0.0)
@@ -209,14 +403,114 @@ class ScreeningAgent:
             },
             "interpretation": interpretation,
             "fusion_method": fusion_method,
-            "model_info": {
-                "ml_available": self.model_available,
-                "model_type": MODEL_DATA.get('model_type', 'N/A') if self.model_available else 'N/A',
-                "model_accuracy": MODEL_DATA.get('accuracy', 0) if self.model_available else 0,
-                "dataset_source": "UCI ML Repository - ASD Screening Data"
-            }
+            "model_info": self._model_info(bundle)
         }
     
+    def analyze_batch(self, submissions: list) -> list:
+        """
+        Vectorized counterpart of analyze_signals for N submissions.
+        Each submission is a dict with video_metrics, questionnaire_score and
+        optional questionnaire_responses / eeg_mock. Builds one feature matrix,
+        calls predict_proba once and runs the fusion as numpy array operations.
+        """
+        if not submissions:
+            return []
+        
+        # 1. ML Model Prediction (single call for the whole batch)
+        features_list = []
+        for item in submissions:
+            responses = item.get("questionnaire_responses")
+            if responses is None:
+                responses = self._score_to_responses(item.get("questionnaire_score", 0))
+            features_list.append(self._prepare_ml_features(item.get("video_metrics", {}), responses))
+        
+        bundle = self._current_bundle()
+        _, ml_probability = self._predict_batch_with_ml(features_list, bundle)
+        
+        # 2-4. Vision, questionnaire and physiological scores as arrays
+        v_eye = np.array([item.get("video_metrics", {}).get("eye_contact", 0.0) for item in submissions], dtype=float)
+        v_motor = np.array([item.get("video_metrics", {}).get("motor_coordination", 0.0) for item in submissions], dtype=float)
+        video_score = (v_eye * 0.45) + (v_motor * 0.55)
+        
+        q_raw = np.clip(np.array([item.get("questionnaire_score", 0) for item in submissions], dtype=float), 0, 20)
+        q_norm = q_raw / 20.0
+        
+        eeg_score = np.array(
+            [(item.get("eeg_mock") or {}).get("alpha_theta_ratio", 0.0) for item in submissions],
+            dtype=float
+        )
+        
+        dissonance = np.abs(video_score - q_norm)
+        
+        # 5-6. Hybrid fusion + confidence analysis (same weights as analyze_signals)
+        if ml_probability is not None:
+            ml_probability = ml_probability.astype(float)
+            final_risk = (
+                ml_probability * 0.50 +
+                video_score * 0.30 +
+                q_norm * 0.15 +
+                eeg_score * 0.05
+            )
+            fusion_method = "ML_Hybrid_Fusion"
+            
+            ml_vision_diff = np.abs(ml_probability - video_score)
+            high = (ml_vision_diff < 0.15) & (dissonance < 0.25)
+            medium = ~high & (ml_vision_diff < 0.3) & (dissonance < 0.4)
+            labels = ("High (ML + Vision Aligned)", "Medium (Partial Alignment)", "Low (Signal Dissonance)")
+        else:
+            boosted = video_score > 0.80
+            w_video = np.where(boosted, 0.50 + 0.1, 0.50)
+            w_questionnaire = np.where(boosted, 0.40 - 0.1, 0.40)
+            final_risk = (
+                video_score * w_video +
+                q_norm * w_questionnaire +
+                eeg_score * 0.10
+            )
+            fusion_method = "Rule_Based_Fusion"
+            
+            high = dissonance < 0.25
+            medium = ~high & (dissonance < 0.5)
+            labels = ("High (Signals Aligned)", "Medium (Partial Dissonance)", "Low (High Dissonance)")
+        
+        low = ~high & ~medium
+        final_risk = np.where(low, (final_risk + 0.5) / 2, final_risk)  # Safety dampening
+        confidence = np.select([high, medium], labels[:2], default=labels[2])
+        
+        # 7. Interpretation
+        interpretation = np.select(
+            [final_risk > 0.7, final_risk > 0.4],
+            ["High Risk", "Moderate Risk"],
+            default="Low Risk"
+        )
+        
+        ml_component = ml_probability if ml_probability is not None else np.zeros(len(submissions))
+        model_info = self._model_info(bundle)
+        
+        # Match analyze_signals rounding: ML-derived values are numpy scalars there
+        def ml_round(value, digits):
+            if ml_probability is not None:
+                return float(round(value, digits))
+            return round(float(value), digits)
+        
+        results = []
+        for i in range(len(submissions)):
+            results.append({
+                "risk_score": ml_round(final_risk[i] * 100, 2),
+                "confidence": str(confidence[i]),
+                "dissonance_factor": round(float(dissonance[i]), 3),
+                "breakdown": {
+                    "ml_model": ml_round(ml_component[i] * 100, 2),
+                    "behavioral": round(float(video_score[i]) * 100, 2),
+                    "questionnaire": round(float(q_norm[i]) * 100, 2),
+                    "physiological": round(float(eeg_score[i]) * 100, 2)
+                },
+                "interpretation": str(interpretation[i]),
+                "fusion_method": fusion_method,
+                "model_info": dict(model_info)
+            })
+        
+        return results
+    
     def _score_to_responses(self, total_score: int) -> dict:
         """Convert a total questionnaire score to estimated individual responses"""
         # Distribute score across 10 questions
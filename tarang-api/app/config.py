@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60  # 1 hour for better security
+    # HMAC key for the blind indexes on encrypted PII (app/core/blind_index.py); derived from SECRET_KEY when empty
+    BLIND_INDEX_KEY: str = os.getenv("BLIND_INDEX_KEY", "")
     
     # CORS
     ALLOWED_ORIGINS: Union[str, List[str]] = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,https://tarang-autism.vercel.app").split(",")
@@ -23,6 +25,73 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
+    # Inference micro-batching (per worker)
+    INFERENCE_MICRO_BATCHING: bool = os.getenv("INFERENCE_MICRO_BATCHING", "true").lower() == "true"
+    INFERENCE_BATCH_WINDOW_MS: float = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+    INFERENCE_MAX_BATCH_SIZE: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))
+    INFERENCE_FLAT_FOREST: bool = os.getenv("INFERENCE_FLAT_FOREST", "true").lower() == "true"
+    INFERENCE_SCORE_TABLE: bool = os.getenv("INFERENCE_SCORE_TABLE", "true").lower() == "true"
+    # "mmap" maps the exported forest arrays (shared across workers); "joblib" unpickles the sklearn model
+    MODEL_LOAD_MODE: str = os.getenv("MODEL_LOAD_MODE", "mmap").lower()
+    # Versioned model artifacts + manifest; workers poll it and hot swap the active version (0 disables polling)
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "registry"))
+    MODEL_REGISTRY_POLL_SECONDS: float = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "15"))
+    
+    # Execution pools: CPU-heavy agent calls in worker processes, blocking I/O in threads (per API worker)
+    EXECUTION_POOLS_ENABLED: bool = os.getenv("EXECUTION_POOLS_ENABLED", "true").lower() == "true"
+    CPU_POOL_WORKERS: int = int(os.getenv("CPU_POOL_WORKERS", "2"))
+    CPU_POOL_MAX_QUEUE: int = int(os.getenv("CPU_POOL_MAX_QUEUE", "32"))
+    CPU_POOL_START_METHOD: str = os.getenv("CPU_POOL_START_METHOD", "forkserver")
+    IO_POOL_WORKERS: int = int(os.getenv("IO_POOL_WORKERS", "16"))
+    IO_POOL_MAX_QUEUE: int = int(os.getenv("IO_POOL_MAX_QUEUE", "256"))
+    
+    # Shadow evaluation of the registry's "shadow" candidate on live screening traffic
+    SHADOW_QUEUE_SIZE: int = int(os.getenv("SHADOW_QUEUE_SIZE", "256"))
+    SHADOW_SAMPLE_RATE: float = float(os.getenv("SHADOW_SAMPLE_RATE", "1.0"))
+    SHADOW_LOG_PATH: str = os.getenv("SHADOW_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "shadow_log.jsonl"))
+    SHADOW_LOG_MAX_MB: float = float(os.getenv("SHADOW_LOG_MAX_MB", "64"))
+    SHADOW_SUMMARY_LIMIT: int = int(os.getenv("SHADOW_SUMMARY_LIMIT", "10000"))
+    
+    # Bedrock clinical summaries cached by quantized risk profile; a Redis URL shares them across workers
+    SUMMARY_CACHE_ENABLED: bool = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1024"))
+    SUMMARY_CACHE_TTL_SECONDS: float = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", "86400"))
+    SUMMARY_CACHE_REDIS_URL: str = os.getenv("SUMMARY_CACHE_REDIS_URL", "")
+    
+    # "sync" waits for Bedrock in /screening/process; "background" answers with the rule-based
+    # summary and upgrades the stored session afterwards (stale-while-revalidate)
+    CLINICAL_SUMMARY_MODE: str = os.getenv("CLINICAL_SUMMARY_MODE", "sync").lower()
+    SUMMARY_UPGRADE_TIMEOUT_SECONDS: float = float(os.getenv("SUMMARY_UPGRADE_TIMEOUT_SECONDS", "8"))
+    SUMMARY_UPGRADE_CONCURRENCY: int = int(os.getenv("SUMMARY_UPGRADE_CONCURRENCY", "4"))
+    SUMMARY_UPGRADE_MAX_PENDING: int = int(os.getenv("SUMMARY_UPGRADE_MAX_PENDING", "64"))
+    
+    # AWS resilience: timeouts, retries, per-service concurrency and circuit breakers (app/core/aws_client.py)
+    AWS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AWS_CONNECT_TIMEOUT_SECONDS", "2"))
+    AWS_BEDROCK_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_BEDROCK_READ_TIMEOUT_SECONDS", "20"))
+    AWS_POLLY_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_POLLY_READ_TIMEOUT_SECONDS", "5"))
+    AWS_DEFAULT_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_DEFAULT_READ_TIMEOUT_SECONDS", "10"))
+    AWS_MAX_ATTEMPTS: int = int(os.getenv("AWS_MAX_ATTEMPTS", "2"))
+    AWS_BEDROCK_MAX_CONCURRENCY: int = int(os.getenv("AWS_BEDROCK_MAX_CONCURRENCY", "8"))
+    AWS_POLLY_MAX_CONCURRENCY: int = int(os.getenv("AWS_POLLY_MAX_CONCURRENCY", "16"))
+    AWS_DEFAULT_MAX_CONCURRENCY: int = int(os.getenv("AWS_DEFAULT_MAX_CONCURRENCY", "10"))
+    AWS_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("AWS_BREAKER_FAILURE_THRESHOLD", "5"))
+    AWS_BREAKER_RESET_SECONDS: float = float(os.getenv("AWS_BREAKER_RESET_SECONDS", "30"))
+    # Local stand-in for Bedrock/Polly/S3/STS (python -m app.core.aws_standin); empty uses real AWS
+    AWS_STANDIN_URL: str = os.getenv("AWS_STANDIN_URL", "")
+    # Budget for all AWS calls made while serving one HTTP request (0 disables)
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))
+    
+    # Polly audio cached on disk by (text, voice, engine, language), LRU-evicted by total size
+    POLLY_AUDIO_CACHE_ENABLED: bool = os.getenv("POLLY_AUDIO_CACHE_ENABLED", "true").lower() == "true"
+    POLLY_AUDIO_CACHE_DIR: str = os.getenv("POLLY_AUDIO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "audio_cache"))
+    POLLY_AUDIO_CACHE_MAX_MB: float = float(os.getenv("POLLY_AUDIO_CACHE_MAX_MB", "512"))
+    POLLY_STREAM_CHUNK_BYTES: int = int(os.getenv("POLLY_STREAM_CHUNK_BYTES", "16384"))
+    # Sentences synthesized at once per request in /polly/synthesize mode="sentences"
+    POLLY_SEGMENT_CONCURRENCY: int = int(os.getenv("POLLY_SEGMENT_CONCURRENCY", "4"))
+    # Upper bounds on one mode="sentences" request: every sentence is a billed Polly call (413 above them)
+    POLLY_MAX_REQUEST_CHARS: int = int(os.getenv("POLLY_MAX_REQUEST_CHARS", "20000"))
+    POLLY_MAX_SENTENCES: int = int(os.getenv("POLLY_MAX_SENTENCES", "100"))
+    
     # Demo Mode (gates synthetic fallback data)
     DEMO_MODE: bool = os.getenv("DEMO_MODE", "false").lower() == "true"
 
@@ -0,0 +1,225 @@
+"""
+Polly Audio Cache for TARANG
+============================
+Synthesized speech on local disk, content-addressed by the inputs that
+determine the audio: sha256 over (text, voice, engine, language, format).
+
+    <root>/<key[:2]>/<key>.mp3    committed entries, never rewritten
+    <root>/tmp/                   in-progress writes, renamed into place
+                                  (swept when older than STALE_TMP_SECONDS)
+
+Entries are written through a writer while the audio streams to the first
+client and only become visible once complete, so readers never see a
+partial file. Total size is capped: least recently used files are evicted
+first (recency is the file mtime, touched on every hit, so it survives
+restarts). Each worker keeps its own index and adopts files written by
+other workers sharing the directory on first lookup.
+
+Because an entry's bytes never change for its key, the key doubles as a
+strong ETag.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every stored clip (e.g. a change in how text is sent to Polly)
+AUDIO_CACHE_VERSION = 1
+AUDIO_SUFFIX = ".mp3"
+# A temp file untouched this long was left by a crashed write; younger ones may be
+# another worker's (or the warm-up CLI's) stream in progress
+STALE_TMP_SECONDS = 3600
+
+
+def audio_key(text: str, voice_id: str, engine: str, language: str, output_format: str = "mp3") -> str:
+    payload = json.dumps([AUDIO_CACHE_VERSION, output_format, voice_id, engine, language, text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def audio_etag(key: str) -> str:
+    return f'"{key}"'
+
+
+def is_audio_key(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+class AudioCacheWriter:
+    """Streams one clip into a temp file; commit() publishes it, abort() discards it."""
+
+    def __init__(self, cache: "AudioCache", key: str):
+        self.cache = cache
+        self.key = key
+        self.size = 0
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.tmp_dir, suffix=AUDIO_SUFFIX)
+        self._file = os.fdopen(fd, "wb")
+        self._closed = False
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Optional[str]:
+        if self._closed:
+            return None
+        self._closed = True
+        self._file.close()
+        if self.size == 0:
+            os.unlink(self.tmp_path)
+            return None
+        return self.cache._commit(self.key, self.tmp_path, self.size)
+
+    def abort(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+class AudioCache:
+    """Size-bounded LRU of audio files on disk."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> size, least recently used first
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("audio_cache_hits_total", "Speech served from the audio cache")
+        self.misses = metrics.counter("audio_cache_misses_total", "Speech not in the audio cache")
+        self.evictions = metrics.counter("audio_cache_evictions_total", "Audio files evicted for space")
+        self.size_bytes = metrics.gauge("audio_cache_bytes", "Bytes of audio held by this worker's cache index")
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["AudioCache"]:
+        if not settings.POLLY_AUDIO_CACHE_ENABLED:
+            return None
+        return cls(settings.POLLY_AUDIO_CACHE_DIR, int(settings.POLLY_AUDIO_CACHE_MAX_MB * 1024 * 1024))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + AUDIO_SUFFIX)
+
+    def _ensure_loaded(self):
+        # Scanned on first use rather than at import, so startup never walks the cache
+        if self._loaded:
+            return
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for name in os.listdir(self.tmp_dir):
+            tmp_path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.stat(tmp_path).st_mtime < stale_before:
+                    os.unlink(tmp_path)   # left behind by a crashed write
+            except OSError:
+                pass
+        found = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if shard == "tmp" or not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                key = name[:-len(AUDIO_SUFFIX)]
+                if not name.endswith(AUDIO_SUFFIX) or not is_audio_key(key):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(shard_dir, name))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, key, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._loaded = True
+        self._evict()
+        logger.info(f"Audio cache at {self.root}: {len(self._entries)} clips, {self._bytes} bytes")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Path of the cached clip (marked recently used), or None."""
+        path = self.path(key)
+        with self._lock:
+            self._ensure_loaded()
+            try:
+                os.utime(path)
+            except OSError:
+                if key in self._entries:
+                    self._bytes -= self._entries.pop(key)
+                    self.size_bytes.set(self._bytes)
+                self.misses.inc()
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Written by another worker sharing the directory
+                self._entries[key] = os.path.getsize(path)
+                self._bytes += self._entries[key]
+                self._evict()
+            self.hits.inc()
+            return path
+
+    def writer(self, key: str) -> AudioCacheWriter:
+        with self._lock:
+            self._ensure_loaded()
+        return AudioCacheWriter(self, key)
+
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        writer = self.writer(key)
+        try:
+            writer.write(data)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def _commit(self, key: str, tmp_path: str, size: int) -> Optional[str]:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # Swept as stale while the write stalled: the clip is simply not cached
+            logger.warning(f"Audio cache temp file for {key} vanished before commit")
+            return None
+        with self._lock:
+            self._bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._bytes += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.unlink(self.path(key))
+            except OSError:
+                pass
+            self.evictions.inc()
+        self.size_bytes.set(self._bytes)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clips": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits.value,
+                "misses": self.misses.value,
+                "evictions": self.evictions.value,
+            }
@@ -1,20 +1,368 @@
 """
 AWS Client Manager for TARANG
 Centralizes boto3 client initialization with error handling and credential validation.
+
+Every client handed out is wrapped in a per-service resilience guard:
+- botocore connect/read timeouts and retry attempts per service, instead of
+  the 60s defaults that let a degraded dependency hold a worker for minutes;
+- a request deadline (request_deadline(), set per HTTP request) that travels
+  with the call through contextvars: no AWS call starts once it is spent, and
+  every attempt botocore sends (retries included) gets at most the remaining
+  budget as its read timeout;
+- bounded concurrency per service: a call that cannot get a slot within the
+  remaining budget is refused instead of queueing. A call whose response
+  streams (Bedrock response streams, Polly AudioStream, S3 bodies) keeps its
+  slot, and has its breaker verdict recorded, only once the stream has been
+  read to the end or closed;
+- a circuit breaker: after N consecutive dependency failures the service is
+  short-circuited for reset_seconds, then one half-open probe decides whether
+  it closes again.
+Refusals raise AWSServiceUnavailable subclasses immediately, so callers fall
+back (rule-based summaries, 503 + Retry-After for speech) without waiting.
+Metrics are aws_<service>_* on /system/metrics.
+
+Credentials are checked with one STS call on a background thread (started
+at app startup or by the first client request). Until it answers, the
+client getters return None instead of blocking, so importing the app and
+serving the first requests never wait on the network; callers already
+treat None as "service unavailable" and fall back.
+
+With AWS_STANDIN_URL set, every client (and the credential probe) talks to
+the local stand-in server in app/core/aws_standin.py instead of AWS.
 """
+import contextlib
+import contextvars
 import os
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Callable, Optional
 import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.config import Config
+from botocore.eventstream import EventStream
+from botocore.response import StreamingBody
+from botocore.exceptions import (
+    ClientError, IncompleteReadError, NoCredentialsError, ConnectionError as BotoConnectionError, ReadTimeoutError,
+    ResponseStreamingError
+)
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.startup import startup_timer
 
 logger = logging.getLogger(__name__)
 
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# ClientError codes that mean the dependency is degraded, not that our request was bad
+DEPENDENCY_ERROR_CODES = {
+    "ThrottlingException", "Throttling", "TooManyRequestsException", "ServiceUnavailable",
+    "ServiceUnavailableException", "InternalServerException", "InternalFailure", "ServiceFailureException",
+    "ModelTimeoutException", "ModelNotReadyException", "ModelStreamErrorException", "RequestTimeout", "SlowDown",
+}
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("aws_request_deadline", default=None)
+
+
+class AWSServiceUnavailable(RuntimeError):
+    """An AWS call was refused without being attempted."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AWSServiceUnavailable):
+    """The service's breaker is open."""
+
+
+class DeadlineExceededError(AWSServiceUnavailable):
+    """The request's time budget is spent."""
+
+
+class ConcurrencyLimitError(AWSServiceUnavailable):
+    """Every concurrency slot for the service stayed busy for the remaining budget."""
+
+
+@contextlib.contextmanager
+def request_deadline(seconds: Optional[float]):
+    """Bound AWS calls made inside the block (nested deadlines only tighten)."""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current request deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clamp_to_deadline(request, **kwargs):
+    """botocore before-send hook: bound each attempt's read timeout by the remaining request budget."""
+    budget = remaining_budget()
+    if budget is None:
+        return
+    if budget <= 0:
+        raise DeadlineExceededError("Request deadline exceeded before sending")
+    context = getattr(request, "context", None)
+    if context is None:
+        return
+    read_timeout = getattr(context.get("client_config"), "read_timeout", None)
+    context["read_timeout"] = budget if read_timeout is None else min(budget, read_timeout)
+
+
+def is_dependency_failure(error: Exception) -> bool:
+    if isinstance(error, (BotoConnectionError, ReadTimeoutError, ResponseStreamingError, IncompleteReadError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code", "")
+        code = code[:1].upper() + code[1:]   # event stream errors arrive as e.g. "throttlingException"
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return code in DEPENDENCY_ERROR_CODES or status >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open single probe -> closed/open."""
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.state_gauge = metrics.gauge(f"aws_{name}_breaker_state", "0 closed, 1 half-open, 2 open")
+        self.opened = metrics.counter(f"aws_{name}_breaker_opened_total", "Times the breaker tripped open")
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - self.clock())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and self.retry_after() <= 0:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                logger.info(f"AWS {self.name} circuit closed")
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"AWS {self.name} circuit opened after {self.failures} failures")
+                    self.opened.inc()
+                self.opened_at = self.clock()
+                self._set_state(self.OPEN)
+
+    def release_probe(self):
+        """A half-open probe ended without a verdict (e.g. a caller error); let another through."""
+        with self._lock:
+            self._probing = False
+
+    def _set_state(self, state: str):
+        self.state = state
+        self.state_gauge.set({self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[state])
+
+
+class GuardedStream:
+    """
+    A streaming response body that holds its call's concurrency slot until it
+    has been read to the end, failed or been closed; finish(error) then
+    releases the slot and records the breaker verdict.
+    """
+
+    def __init__(self, stream, finish: Callable[[Optional[Exception]], None]):
+        self._stream = stream
+        self._finish = finish
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._stream, name)
+
+    def read(self, amt=None):
+        try:
+            data = self._stream.read(amt)
+        except Exception as e:
+            self._finish(e)
+            raise
+        if amt is None or not data:
+            self._finish(None)
+        return data
+
+    def _iterate(self, iterator):
+        try:
+            yield from iterator
+        except Exception as e:
+            self._finish(e)
+            raise
+        finally:
+            self._finish(None)   # read to the end, or abandoned by the consumer
+
+    def __iter__(self):
+        return self._iterate(iter(self._stream))
+
+    def iter_chunks(self, *args, **kwargs):
+        return self._iterate(self._stream.iter_chunks(*args, **kwargs))
+
+    def iter_lines(self, *args, **kwargs):
+        return self._iterate(self._stream.iter_lines(*args, **kwargs))
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._finish(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self._finish(None)
+
+
+class ServiceGuard:
+    """Deadline check, concurrency slot and breaker around one AWS service's calls."""
+
+    def __init__(self, name: str, max_concurrency: int, breaker: CircuitBreaker, max_queue_wait: float = 1.0):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.breaker = breaker
+        self.max_queue_wait = max_queue_wait
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.in_flight = metrics.gauge(f"aws_{name}_in_flight", "Calls in flight")
+        self.calls = metrics.counter(f"aws_{name}_calls_total", "Calls attempted")
+        self.failures = metrics.counter(f"aws_{name}_failures_total", "Calls failed by the dependency")
+        self.short_circuited = metrics.counter(f"aws_{name}_short_circuited_total", "Calls refused by the open breaker")
+        self.limited = metrics.counter(f"aws_{name}_concurrency_rejected_total", "Calls refused: no free slot")
+        self.deadline_exceeded = metrics.counter(f"aws_{name}_deadline_exceeded_total", "Calls refused: budget spent")
+        self.latency = metrics.histogram(f"aws_{name}_latency_ms", LATENCY_BUCKETS_MS, "Attempted call latency")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            self.deadline_exceeded.inc()
+            raise DeadlineExceededError(f"Request deadline exceeded before calling {self.name}")
+        if not self.breaker.allow():
+            self.short_circuited.inc()
+            raise CircuitOpenError(f"{self.name} circuit is open", retry_after=self.breaker.retry_after())
+
+        wait = self.max_queue_wait if budget is None else min(self.max_queue_wait, budget)
+        if not self._slots.acquire(timeout=wait):
+            self.limited.inc()
+            self.breaker.release_probe()
+            raise ConcurrencyLimitError(f"{self.name} concurrency limit ({self.max_concurrency}) reached")
+
+        self.calls.inc()
+        self.in_flight.inc()
+        finish = self._finisher(time.perf_counter())
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            finish(e)
+            raise
+        if isinstance(result, dict):
+            for name, value in result.items():
+                if isinstance(value, (StreamingBody, EventStream)):
+                    # The call is not over until its body has been read
+                    result[name] = GuardedStream(value, finish)
+                    return result
+        finish(None)
+        return result
+
+    def _finisher(self, started: float) -> Callable[[Optional[Exception]], None]:
+        """Ends one call exactly once: latency, slot, and the breaker verdict for its outcome."""
+        lock = threading.Lock()
+        finished = [False]
+
+        def finish(error: Optional[Exception]):
+            with lock:
+                if finished[0]:
+                    return
+                finished[0] = True
+            try:
+                if error is None:
+                    self.breaker.record_success()
+                elif isinstance(error, DeadlineExceededError):
+                    self.deadline_exceeded.inc()
+                    self.breaker.release_probe()
+                elif is_dependency_failure(error):
+                    self.failures.inc()
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release_probe()
+            finally:
+                self.latency.observe((time.perf_counter() - started) * 1000)
+                self.in_flight.dec()
+                self._slots.release()
+        return finish
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.state,
+            "retry_after_seconds": round(self.breaker.retry_after(), 1) if self.breaker.state == CircuitBreaker.OPEN else 0,
+            "consecutive_failures": self.breaker.failures,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight.value,
+        }
+
+
+class GuardedClient:
+    """boto3 client proxy that routes every API method through the service guard."""
+
+    def __init__(self, client, guard: ServiceGuard):
+        self._client = client
+        self._guard = guard
+
+    @property
+    def guard(self) -> ServiceGuard:
+        return self._guard
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("_") or name in ("get_paginator", "get_waiter", "can_paginate"):
+            return attr
+
+        def guarded(*args, **kwargs):
+            return self._guard.call(attr, *args, **kwargs)
+        return guarded
+
 
 class AWSClientManager:
     """
     Singleton manager for AWS service clients.
-    Initializes clients lazily and validates credentials on first use.
+    Initializes clients lazily; credentials are validated in the background.
     """
     
     _instance: Optional['AWSClientManager'] = None
@@ -36,51 +384,144 @@ class AWSClientManager:
         self._transcribe_client = None
         self._healthlake_client = None
         self._credentials_valid = None
+        self._validation_thread = None
+        self._validation_lock = threading.Lock()
+        self._guards = {}
+        self._guard_lock = threading.Lock()
         
         self._initialized = True
         logger.info(f"AWSClientManager initialized (region={self.region})")
+        if settings.AWS_STANDIN_URL:
+            logger.warning(f"AWS clients point at the local stand-in {settings.AWS_STANDIN_URL}")
     
-    def _validate_credentials(self) -> bool:
+    def service_limits(self, service: str) -> dict:
+        """Timeouts, retries and concurrency for a service (Bedrock generates for seconds; the rest are quick)."""
+        read_timeouts = {
+            "bedrock": settings.AWS_BEDROCK_READ_TIMEOUT_SECONDS,
+            "polly": settings.AWS_POLLY_READ_TIMEOUT_SECONDS,
+        }
+        concurrency = {
+            "bedrock": settings.AWS_BEDROCK_MAX_CONCURRENCY,
+            "polly": settings.AWS_POLLY_MAX_CONCURRENCY,
+        }
+        return {
+            "connect_timeout": settings.AWS_CONNECT_TIMEOUT_SECONDS,
+            "read_timeout": read_timeouts.get(service, settings.AWS_DEFAULT_READ_TIMEOUT_SECONDS),
+            "max_attempts": settings.AWS_MAX_ATTEMPTS,
+            "max_concurrency": concurrency.get(service, settings.AWS_DEFAULT_MAX_CONCURRENCY),
+        }
+
+    def guard(self, service: str) -> ServiceGuard:
+        with self._guard_lock:
+            if service not in self._guards:
+                limits = self.service_limits(service)
+                breaker = CircuitBreaker(
+                    service,
+                    failure_threshold=settings.AWS_BREAKER_FAILURE_THRESHOLD,
+                    reset_seconds=settings.AWS_BREAKER_RESET_SECONDS
+                )
+                self._guards[service] = ServiceGuard(service, limits["max_concurrency"], breaker)
+            return self._guards[service]
+
+    def _endpoint_kwargs(self) -> dict:
+        """Client arguments that point at the local stand-in (app/core/aws_standin.py) when AWS_STANDIN_URL is set."""
+        if not settings.AWS_STANDIN_URL:
+            return {}
+        return {
+            "endpoint_url": settings.AWS_STANDIN_URL,
+            "aws_access_key_id": "standin",
+            "aws_secret_access_key": "standin",
+        }
+
+    def _create_client(self, service: str, boto_service: str):
+        limits = self.service_limits(service)
+        config = Config(
+            connect_timeout=limits["connect_timeout"],
+            read_timeout=limits["read_timeout"],
+            retries={"total_max_attempts": limits["max_attempts"], "mode": "standard"},
+            max_pool_connections=limits["max_concurrency"],
+            s3={"addressing_style": "path"} if settings.AWS_STANDIN_URL else None,
+        )
+        client = boto3.client(boto_service, region_name=self.region, config=config, **self._endpoint_kwargs())
+        client.meta.events.register("before-send", clamp_to_deadline)
+        return GuardedClient(client, self.guard(service))
+
+    def resilience_stats(self) -> dict:
+        with self._guard_lock:
+            guards = dict(self._guards)
+        return {service: guard.stats() for service, guard in guards.items()}
+
+    def _probe_credentials(self) -> bool:
         """
         Validates AWS credentials by making a lightweight STS call.
         Returns True if credentials are valid, False otherwise.
         """
-        if self._credentials_valid is not None:
-            return self._credentials_valid
-            
         try:
-            sts = boto3.client('sts', region_name=self.region)
+            sts = boto3.client('sts', region_name=self.region, config=Config(
+                connect_timeout=settings.AWS_CONNECT_TIMEOUT_SECONDS,
+                read_timeout=settings.AWS_DEFAULT_READ_TIMEOUT_SECONDS,
+                retries={"total_max_attempts": 1}
+            ), **self._endpoint_kwargs())
             sts.get_caller_identity()
-            self._credentials_valid = True
             logger.info("AWS credentials validated successfully")
             return True
         except NoCredentialsError:
             logger.error("AWS credentials not found. Set AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY.")
-            self._credentials_valid = False
             return False
         except ClientError as e:
             logger.error(f"AWS credential validation failed: {e}")
-            self._credentials_valid = False
             return False
         except Exception as e:
             logger.error(f"Unexpected error validating AWS credentials: {e}")
-            self._credentials_valid = False
             return False
+
+    def _run_validation(self):
+        with startup_timer.phase("aws_probe"):
+            self._credentials_valid = self._probe_credentials()
+
+    def start_credential_validation(self) -> threading.Thread:
+        """Start the background STS check once; later calls return the same thread."""
+        with self._validation_lock:
+            if self._validation_thread is None:
+                self._validation_thread = threading.Thread(
+                    target=self._run_validation, name="aws-credential-probe", daemon=True
+                )
+                self._validation_thread.start()
+            return self._validation_thread
+
+    def wait_for_credentials(self, timeout: Optional[float] = None) -> bool:
+        """Block until the credential check finishes (for CLI tools, not request paths)."""
+        if self._credentials_valid is None:
+            if timeout is None:
+                timeout = settings.AWS_CONNECT_TIMEOUT_SECONDS + settings.AWS_DEFAULT_READ_TIMEOUT_SECONDS
+            self.start_credential_validation().join(timeout)
+        return bool(self._credentials_valid)
+
+    def credential_status(self) -> str:
+        if self._credentials_valid is None:
+            return "pending" if self._validation_thread is not None else "unchecked"
+        return "valid" if self._credentials_valid else "invalid"
+
+    def _validate_credentials(self) -> bool:
+        """
+        Never blocks: True once the background check has passed, False while it
+        is running or after it failed.
+        """
+        if self._credentials_valid is None:
+            self.start_credential_validation()
+        return bool(self._credentials_valid)
     
     def get_bedrock_client(self):
         """
-        Returns a boto3 client for Amazon Bedrock Runtime.
-        Returns None if credentials are invalid.
+        Returns a guarded boto3 client for Amazon Bedrock Runtime.
+        Returns None if credentials are invalid or not yet validated.
         """
         if not self._validate_credentials():
             return None
             
         if self._bedrock_client is None:
             try:
-                self._bedrock_client = boto3.client(
-                    'bedrock-runtime',
-                    region_name=self.region
-                )
+                self._bedrock_client = self._create_client('bedrock', 'bedrock-runtime')
                 logger.info("Bedrock client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Bedrock client: {e}")
@@ -90,18 +531,15 @@ class AWSClientManager:
     
     def get_polly_client(self):
         """
-        Returns a boto3 client for Amazon Polly.
-        Returns None if credentials are invalid.
+        Returns a guarded boto3 client for Amazon Polly.
+        Returns None if credentials are invalid or not yet validated.
         """
         if not self._validate_credentials():
             return None
             
         if self._polly_client is None:
             try:
-                self._polly_client = boto3.client(
-                    'polly',
-                    region_name=self.region
-                )
+                self._polly_client = self._create_client('polly', 'polly')
                 logger.info("Polly client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Polly client: {e}")
@@ -111,18 +549,15 @@ class AWSClientManager:
     
     def get_s3_client(self):
         """
-        Returns a boto3 client for Amazon S3.
-        Returns None if credentials are invalid.
+        Returns a guarded boto3 client for Amazon S3.
+        Returns None if credentials are invalid or not yet validated.
         """
         if not self._validate_credentials():
             return None
             
         if self._s3_client is None:
             try:
-                self._s3_client = boto3.client(
-                    's3',
-                    region_name=self.region
-                )
+                self._s3_client = self._create_client('s3', 's3')
                 logger.info("S3 client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize S3 client: {e}")
@@ -132,18 +567,15 @@ class AWSClientManager:
     
     def get_transcribe_client(self):
         """
-        Returns a boto3 client for Amazon Transcribe.
-        Returns None if credentials are invalid.
+        Returns a guarded boto3 client for Amazon Transcribe.
+        Returns None if credentials are invalid or not yet validated.
         """
         if not self._validate_credentials():
             return None
             
         if self._transcribe_client is None:
             try:
-                self._transcribe_client = boto3.client(
-                    'transcribe',
-                    region_name=self.region
-                )
+                self._transcribe_client = self._create_client('transcribe', 'transcribe')
                 logger.info("Transcribe client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize Transcribe client: {e}")
@@ -153,18 +585,15 @@ class AWSClientManager:
     
     def get_healthlake_client(self):
         """
-        Returns a boto3 client for AWS HealthLake.
-        Returns None if credentials are invalid.
+        Returns a guarded boto3 client for AWS HealthLake.
+        Returns None if credentials are invalid or not yet validated.
         """
         if not self._validate_credentials():
             return None
             
         if self._healthlake_client is None:
             try:
-                self._healthlake_client = boto3.client(
-                    'healthlake',
-                    region_name=self.region
-                )
+                self._healthlake_client = self._create_client('healthlake', 'healthlake')
                 logger.info("HealthLake client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize HealthLake client: {e}")
@@ -0,0 +1,539 @@
+"""
+Local AWS Stand-in for TARANG
+=============================
+A single local HTTP server that answers the AWS calls the API makes, in
+each service's wire protocol, so the real boto3 clients (and with them the
+timeouts, retries, breakers and caches in app/core/aws_client.py) can be
+exercised and load tested on a machine with no network:
+
+    bedrock  POST /model/{id}/invoke                      Claude-style JSON summary
+             POST /model/{id}/invoke-with-response-stream event stream of text deltas
+    polly    POST /v1/speech                              silent MP3 sized to the text
+    sts      POST /  Action=GetCallerIdentity             fixed identity
+    s3       PUT/GET/HEAD/DELETE /{bucket}/{key}           in-memory objects
+
+Point the API at it with AWS_STANDIN_URL=http://127.0.0.1:4566; every
+client AWSClientManager hands out (and the credential probe) then talks to
+the stand-in with dummy credentials.
+
+Each service has its own behavior: a latency distribution sampled per
+request, and rates of server errors, throttling responses and hangs (the
+request is held for hang_seconds, past any sane read timeout). Sampling
+uses a per-service RNG derived from --seed, so runs are reproducible.
+Behavior can be changed while running and counters read back:
+
+    GET  /_standin/stats     per-service requests, outcomes and latency percentiles
+                             (over the last LATENCY_SAMPLES requests; max over all)
+    POST /_standin/config    {"seed": 7, "services": {"polly": {"throttle_rate": 0.2}}}
+    POST /_standin/reset     clear counters and stored S3 objects
+
+Latency specs (milliseconds): fixed:MS, uniform:LO:HI, normal:MEAN:SD,
+lognormal:MEDIAN:SIGMA, exponential:MEAN.
+
+Usage:
+    python -m app.core.aws_standin                                  # http://127.0.0.1:4566, no faults
+    python -m app.core.aws_standin --config standin.json            # {"seed": ..., "services": {...}}
+    python -m app.core.aws_standin --seed 7 --latency bedrock=lognormal:900:0.4 \\
+        --throttle-rate bedrock=0.05 --latency polly=fixed:120 --error-rate polly=0.01 --hang-rate polly=0.01
+"""
+import argparse
+import base64
+import binascii
+import collections
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+SERVICES = ("bedrock", "polly", "sts", "s3")
+OUTCOMES = ("ok", "error", "throttled", "hung")
+# Latency samples kept per service for percentiles, so long load tests use constant memory
+LATENCY_SAMPLES = 10_000
+
+STS_NAMESPACE = "https://sts.amazonaws.com/doc/2011-06-15/"
+STANDIN_ACCOUNT = "000000000000"
+
+# One silent MPEG-1 Layer III frame: 32 kbps, 32 kHz, mono, 36 ms
+SILENT_MP3_FRAME = b"\xff\xfb\x18\xc0" + b"\x00" * 140
+SPOKEN_CHARS_PER_SECOND = 15
+
+
+class LatencyModel:
+    """A latency distribution in milliseconds, parsed from "kind:param[:param]"."""
+
+    ARITY = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind: str = "fixed", params=(0.0,)):
+        if kind not in self.ARITY:
+            raise ValueError(f"Unknown latency distribution {kind!r} (use {', '.join(self.ARITY)})")
+        if len(params) != self.ARITY[kind]:
+            raise ValueError(f"{kind} latency takes {self.ARITY[kind]} parameter(s)")
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, *params = spec.strip().split(":")
+        return cls(kind, params)
+
+    def sample_ms(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(max(p[0], 1e-9)), p[1])
+        else:
+            value = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+    def __str__(self):
+        return ":".join([self.kind] + [f"{p:g}" for p in self.params])
+
+
+class ServiceBehavior:
+    """How one stand-in service responds: latency plus fault rates (fractions of requests)."""
+
+    FIELDS = ("latency", "error_rate", "throttle_rate", "hang_rate", "hang_seconds", "stream_chunk_ms")
+
+    def __init__(self, latency: Optional[LatencyModel] = None, error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 hang_rate: float = 0.0, hang_seconds: float = 60.0, stream_chunk_ms: float = 0.0):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        # Gap between Bedrock stream events, like token generation time
+        self.stream_chunk_ms = stream_chunk_ms
+
+    def update(self, values: dict):
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown behavior setting {name!r}")
+            setattr(self, name, LatencyModel.parse(value) if name == "latency" else float(value))
+
+    def as_dict(self) -> dict:
+        return {name: str(getattr(self, name)) if name == "latency" else getattr(self, name) for name in self.FIELDS}
+
+
+class StandinState:
+    """Behaviors, seeded RNGs, counters and the S3 object store shared by all request threads."""
+
+    def __init__(self, seed: int = 0):
+        self._lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.behaviors = {service: ServiceBehavior() for service in SERVICES}
+        self.objects = {}
+        self.reseed(seed)
+        self.reset()
+
+    def reseed(self, seed: int):
+        self.seed = seed
+        self._rngs = {service: random.Random(f"{seed}:{service}") for service in SERVICES}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {service: {"requests": 0, **{o: 0 for o in OUTCOMES}, "max_latency_ms": 0.0,
+                                     "latency_ms": collections.deque(maxlen=LATENCY_SAMPLES)}
+                           for service in SERVICES}
+            self.objects = {}
+
+    def configure(self, config: dict):
+        with self._lock:
+            if "seed" in config:
+                self.reseed(int(config["seed"]))
+            for service, values in (config.get("services") or {}).items():
+                if service not in self.behaviors:
+                    raise ValueError(f"Unknown service {service!r} (use {', '.join(SERVICES)})")
+                self.behaviors[service].update(values)
+
+    def config(self) -> dict:
+        return {"seed": self.seed, "services": {s: b.as_dict() for s, b in self.behaviors.items()}}
+
+    def decide(self, service: str) -> tuple:
+        """(delay seconds, outcome) for the next request to a service."""
+        with self._lock:
+            behavior, rng = self.behaviors[service], self._rngs[service]
+            delay_ms = behavior.latency.sample_ms(rng)
+            roll = rng.random()
+            if roll < behavior.hang_rate:
+                outcome = "hung"
+            elif roll < behavior.hang_rate + behavior.throttle_rate:
+                outcome = "throttled"
+            elif roll < behavior.hang_rate + behavior.throttle_rate + behavior.error_rate:
+                outcome = "error"
+            else:
+                outcome = "ok"
+            stats = self._stats[service]
+            stats["requests"] += 1
+            stats[outcome] += 1
+            stats["latency_ms"].append(delay_ms)
+            stats["max_latency_ms"] = max(stats["max_latency_ms"], delay_ms)
+        return delay_ms / 1000.0, outcome
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {}
+            for service, stats in self._stats.items():
+                samples = sorted(stats["latency_ms"])
+                row = {key: value for key, value in stats.items() if key not in ("latency_ms", "max_latency_ms")}
+                if samples:
+                    row["latency_ms"] = {
+                        "p50": round(samples[len(samples) // 2], 2),
+                        "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+                        "max": round(stats["max_latency_ms"], 2),
+                    }
+                report[service] = row
+            return {"services": report, "objects": len(self.objects), "config": self.config()}
+
+
+def event_stream_message(headers: dict, payload: bytes) -> bytes:
+    """One application/vnd.amazon.eventstream message (string headers only)."""
+    encoded = b""
+    for name, value in headers.items():
+        name_bytes, value_bytes = name.encode(), value.encode()
+        encoded += struct.pack(">B", len(name_bytes)) + name_bytes + b"\x07" + struct.pack(">H", len(value_bytes)) + value_bytes
+    prelude = struct.pack(">II", 16 + len(encoded) + len(payload), len(encoded))
+    message = prelude + struct.pack(">I", binascii.crc32(prelude)) + encoded + payload
+    return message + struct.pack(">I", binascii.crc32(message))
+
+
+def silent_mp3(text: str) -> bytes:
+    seconds = max(0.5, len(text) / SPOKEN_CHARS_PER_SECOND)
+    return SILENT_MP3_FRAME * int(math.ceil(seconds / 0.036))
+
+
+def standin_summary(request_body: dict) -> str:
+    """A schema-valid clinical summary that reflects the risk score in the prompt."""
+    prompt = "".join(m.get("content", "") for m in request_body.get("messages", []) if isinstance(m.get("content"), str))
+    match = re.search(r'"risk_score":\s*([0-9.]+)', prompt)
+    risk = float(match.group(1)) if match else 0.0
+    if risk > 70:
+        recommendation = "Refer to a pediatric neurologist for a formal diagnostic assessment."
+    elif risk > 40:
+        recommendation = "Repeat the screening in 4 weeks and consult a developmental specialist."
+    else:
+        recommendation = "Continue routine developmental monitoring."
+    return json.dumps({
+        "summary_title": f"Screening Summary (risk {risk:g})",
+        "key_findings": [
+            f"Composite risk score of {risk:g} from the multimodal screening.",
+            "Behavioral and questionnaire signals were reviewed together.",
+        ],
+        "clinical_recommendation": recommendation,
+        "agent_status": "Bedrock Claude 3 Sonnet",
+    }, indent=2)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "TarangAWSStandin/1.0"
+
+    @property
+    def state(self) -> StandinState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown out a load test
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_HEAD(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    # --- plumbing ---
+
+    def _read_body(self) -> bytes:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            body = b""
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            body = self._decode_aws_chunked(body)
+        return body
+
+    @staticmethod
+    def _decode_aws_chunked(body: bytes) -> bytes:
+        decoded, position = b"", 0
+        while position < len(body):
+            line_end = body.index(b"\r\n", position)
+            size = int(body[position:line_end].split(b";")[0], 16)
+            if size == 0:
+                break
+            decoded += body[line_end + 2:line_end + 2 + size]
+            position = line_end + 2 + size + 2
+        return decoded
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload, headers: dict = None):
+        self._send(status, json.dumps(payload).encode(), headers=headers)
+
+    def _route(self, path: str, body: bytes) -> str:
+        if path.startswith("/model/"):
+            return "bedrock"
+        if path == "/v1/speech":
+            return "polly"
+        if self.command == "POST" and path == "/" and b"Action=" in body:
+            return "sts"
+        return "s3"
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        body = self._read_body()
+        if url.path.startswith("/_standin/"):
+            return self._control(url.path, body)
+
+        service = self._route(url.path, body)
+        delay, outcome = self.state.decide(service)
+        if delay:
+            time.sleep(delay)
+        if outcome == "hung":
+            # Hold the request past the client's read timeout; released early when the server stops
+            self.state.stopping.wait(self.state.behaviors[service].hang_seconds)
+            outcome = "error"
+        if outcome != "ok":
+            return self._fault(service, outcome)
+        getattr(self, f"_{service}")(url, body)
+
+    def _control(self, path: str, body: bytes):
+        try:
+            if path == "/_standin/stats":
+                return self._send_json(200, self.state.stats())
+            if path == "/_standin/config" and self.command == "POST":
+                self.state.configure(json.loads(body or b"{}"))
+                return self._send_json(200, self.state.config())
+            if path == "/_standin/config":
+                return self._send_json(200, self.state.config())
+            if path == "/_standin/reset" and self.command == "POST":
+                self.state.reset()
+                return self._send_json(200, {"reset": True})
+        except ValueError as e:
+            return self._send_json(400, {"message": str(e)})
+        self._send_json(404, {"message": "Unknown stand-in control path"})
+
+    def _fault(self, service: str, outcome: str):
+        throttled = outcome == "throttled"
+        if service in ("bedrock", "polly"):
+            code = "ThrottlingException" if throttled else (
+                "InternalServerException" if service == "bedrock" else "ServiceFailureException")
+            message = "Rate exceeded" if throttled else "Stand-in injected failure"
+            return self._send_json(429 if throttled else 500, {"message": message}, headers={"x-amzn-ErrorType": code})
+        if service == "sts":
+            code, status = ("Throttling", 400) if throttled else ("InternalFailure", 500)
+            body = (f'<ErrorResponse xmlns="{STS_NAMESPACE}"><Error><Type>Sender</Type><Code>{code}</Code>'
+                    f'<Message>Stand-in injected {outcome}</Message></Error>'
+                    f'<RequestId>{uuid.uuid4()}</RequestId></ErrorResponse>')
+            return self._send(status, body.encode(), "text/xml")
+        code, status = ("SlowDown", 503) if throttled else ("InternalError", 500)
+        body = f"<Error><Code>{code}</Code><Message>Stand-in injected {outcome}</Message></Error>"
+        self._send(status, body.encode(), "application/xml")
+
+    # --- services ---
+
+    def _bedrock(self, url, body: bytes):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"message": "Malformed input request"},
+                                   headers={"x-amzn-ErrorType": "ValidationException"})
+        text = standin_summary(request)
+        usage = {"input_tokens": len(body) // 4, "output_tokens": len(text) // 4}
+        if not url.path.endswith("/invoke-with-response-stream"):
+            return self._send_json(200, {
+                "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant",
+                "content": [{"type": "text", "text": text}], "stop_reason": "end_turn", "usage": usage,
+            })
+
+        events = [{"type": "message_start", "message": {"role": "assistant", "usage": usage}},
+                  {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}]
+        events += [{"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[i:i + 12]}}
+                   for i in range(0, len(text), 12)]
+        events += [{"type": "content_block_stop", "index": 0}, {"type": "message_stop"}]
+
+        gap = self.state.behaviors["bedrock"].stream_chunk_ms / 1000.0
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+        self.end_headers()
+        for event in events:
+            payload = json.dumps({"bytes": base64.b64encode(json.dumps(event).encode()).decode()}).encode()
+            message = event_stream_message(
+                {":event-type": "chunk", ":content-type": "application/json", ":message-type": "event"}, payload
+            )
+            self.wfile.write(f"{len(message):x}\r\n".encode() + message + b"\r\n")
+            self.wfile.flush()
+            if gap:
+                time.sleep(gap)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _polly(self, url, body: bytes):
+        request = json.loads(body or b"{}")
+        text = request.get("Text", "")
+        if not text:
+            return self._send_json(400, {"message": "Text is required"},
+                                   headers={"x-amzn-ErrorType": "InvalidSsmlException"})
+        self._send(200, silent_mp3(text), "audio/mpeg", headers={"x-amzn-RequestCharacters": str(len(text))})
+
+    def _sts(self, url, body: bytes):
+        action = parse_qs(body.decode()).get("Action", [""])[0]
+        if action != "GetCallerIdentity":
+            return self._fault("sts", "error")
+        body = (f'<GetCallerIdentityResponse xmlns="{STS_NAMESPACE}"><GetCallerIdentityResult>'
+                f'<Arn>arn:aws:iam::{STANDIN_ACCOUNT}:user/standin</Arn><UserId>STANDIN</UserId>'
+                f'<Account>{STANDIN_ACCOUNT}</Account></GetCallerIdentityResult>'
+                f'<ResponseMetadata><RequestId>{uuid.uuid4()}</RequestId></ResponseMetadata>'
+                f'</GetCallerIdentityResponse>')
+        self._send(200, body.encode(), "text/xml")
+
+    def _s3(self, url, body: bytes):
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        objects = self.state.objects
+        if not key:
+            if self.command == "GET":
+                contents = "".join(f"<Contents><Key>{k}</Key><Size>{len(v[0])}</Size></Contents>"
+                                   for (b, k), v in sorted(objects.items()) if b == bucket)
+                return self._send(200, f"<ListBucketResult><Name>{bucket}</Name>{contents}</ListBucketResult>".encode(),
+                                  "application/xml")
+            return self._send(200, b"", "application/xml")   # CreateBucket / HeadBucket / DeleteBucket
+
+        if self.command == "PUT":
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            objects[(bucket, key)] = (body, self.headers.get("Content-Type", "binary/octet-stream"), etag)
+            return self._send(200, b"", "application/xml", headers={"ETag": etag})
+        if self.command == "DELETE":
+            objects.pop((bucket, key), None)
+            return self._send(204, b"", "application/xml")
+        if (bucket, key) not in objects:
+            body = f"<Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message><Key>{key}</Key></Error>"
+            return self._send(404, body.encode(), "application/xml")
+        data, content_type, etag = objects[(bucket, key)]
+        self._send(200, data, content_type, headers={"ETag": etag})
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple, state: StandinState = None):
+        super().__init__(address, StandinHandler)
+        self.state = state or StandinState()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.state.stopping.set()
+        self.shutdown()
+        self.server_close()
+
+
+def start_standin(host: str = "127.0.0.1", port: int = 0, config: dict = None) -> StandinServer:
+    """Serve the stand-in on a background thread (port 0 picks a free port); stop with server.stop()."""
+    server = StandinServer((host, port))
+    if config:
+        server.state.configure(config)
+    threading.Thread(target=server.serve_forever, name="aws-standin", daemon=True).start()
+    return server
+
+
+def _service_values(pairs, name: str, cast=float) -> dict:
+    """{"polly": {name: value}} from repeated SERVICE=VALUE flags."""
+    services = {}
+    for pair in pairs or []:
+        service, _, value = pair.partition("=")
+        if not value:
+            raise ValueError(f"Expected SERVICE=VALUE, got {pair!r}")
+        services.setdefault(service, {})[name] = cast(value)
+    return services
+
+
+def main():
+    """Run the stand-in in the foreground."""
+    parser = argparse.ArgumentParser(description="Local stand-in for Bedrock, Polly, S3 and STS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4566)
+    parser.add_argument("--config", help='JSON file: {"seed": 7, "services": {"bedrock": {"latency": ...}}}')
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible latencies and faults")
+    parser.add_argument("--latency", action="append", metavar="SERVICE=SPEC", help="e.g. bedrock=lognormal:900:0.4")
+    parser.add_argument("--error-rate", action="append", metavar="SERVICE=RATE")
+    parser.add_argument("--throttle-rate", action="append", metavar="SERVICE=RATE")
+    parser.add_argument("--hang-rate", action="append", metavar="SERVICE=RATE")
+    parser.add_argument("--hang-seconds", action="append", metavar="SERVICE=SECONDS")
+    parser.add_argument("--stream-chunk-ms", action="append", metavar="SERVICE=MS", help="gap between Bedrock stream events")
+    args = parser.parse_args()
+
+    config = {"services": {}}
+    try:
+        if args.config:
+            with open(args.config) as f:
+                config = json.load(f)
+            config.setdefault("services", {})
+        if args.seed is not None:
+            config["seed"] = args.seed
+        for flag, name, cast in (("latency", "latency", str), ("error_rate", "error_rate", float),
+                                 ("throttle_rate", "throttle_rate", float), ("hang_rate", "hang_rate", float),
+                                 ("hang_seconds", "hang_seconds", float), ("stream_chunk_ms", "stream_chunk_ms", float)):
+            for service, values in _service_values(getattr(args, flag), name, cast).items():
+                config["services"].setdefault(service, {}).update(values)
+        server = StandinServer((args.host, args.port))
+        server.state.configure(config)
+    except (OSError, ValueError) as e:
+        print(f"✗ {e}")
+        return 1
+
+    print(f"✓ AWS stand-in listening on {server.url} (set AWS_STANDIN_URL={server.url})")
+    for service, behavior in server.state.config()["services"].items():
+        print(f"  {service:<8} " + "  ".join(f"{k}={v}" for k, v in behavior.items()))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Async Micro-Batcher for TARANG
+Coalesces concurrent single-row inference calls on one worker into a
+single vectorized call, bounded by a time window and a max batch size.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, List, Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250]
+
+
+class MicroBatcher:
+    """
+    Gathers submitted items until `max_wait_ms` has elapsed since the first
+    one arrived or `max_batch_size` items are queued, then calls
+    `batch_fn(items)` once and resolves each caller's future with its result.
+
+    The queue and worker task are bound lazily to the running event loop, so
+    one instance can be created at import time and used from any worker.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        name: str = "inference"
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.name = name
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batch_size_histogram = metrics.histogram(
+            f"{name}_batch_size", BATCH_SIZE_BUCKETS, "Items per flushed micro-batch"
+        )
+        self.queue_wait_histogram = metrics.histogram(
+            f"{name}_queue_wait_ms", QUEUE_WAIT_BUCKETS_MS, "Time an item waited before its batch ran"
+        )
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its slot in the next flushed batch."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._flush(batch)
+
+    def _flush(self, batch: list):
+        now = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            self.queue_wait_histogram.observe((now - enqueued_at) * 1000.0)
+        self.batch_size_histogram.observe(len(batch))
+
+        try:
+            results = self.batch_fn([item for item, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Micro-batch '{self.name}' failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # Callers that disconnected leave a cancelled future behind
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,132 @@
+"""
+Blind Indexes for Encrypted PII
+===============================
+Patient.name, Patient.phone, Patient.address and User.full_name are stored
+AES-encrypted with a random IV, so SQL cannot compare them. Each of them has
+a blind index column beside it: a keyed HMAC-SHA256 of the normalized
+plaintext. Equal values give equal indexes, so an equality lookup or a join
+is an indexed comparison of HMACs, with no decryption and without the key
+ever reaching the database.
+
+    db.query(Patient).filter(Patient.name_bidx == blind_index("Asha  Rao", "name"))
+
+Values are normalized first (NFKC, case folded, whitespace collapsed; digits
+only for phone numbers), so lookups are case-insensitive. Every field kind
+hashes under its own subkey; names share one so a patient name, a user's
+full name and a screening's plaintext patient_name can be joined.
+
+The key is BLIND_INDEX_KEY, or one derived from the PII SECRET_KEY when it is
+unset. Indexes are kept up to date on every ORM write (attribute events in
+app/database.py); rows written before that, or after a key change, are
+filled in by the backfill.
+
+Usage:
+    python -m app.core.blind_index              # index rows that have a value but no blind index
+    python -m app.core.blind_index --rebuild    # recompute every row (after changing BLIND_INDEX_KEY)
+"""
+import argparse
+import functools
+import hashlib
+import hmac
+import logging
+import sys
+import unicodedata
+from typing import Dict, Optional
+
+from sqlalchemy import and_, or_, select, update
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("name", "phone", "address")
+BACKFILL_CHUNK = 1000
+
+
+@functools.lru_cache(maxsize=None)
+def _field_key(field: str) -> bytes:
+    from app.config import settings
+    from app.database import SECRET_KEY
+
+    if field not in FIELDS:
+        raise ValueError(f"Unknown blind index field: {field}")
+    root = settings.BLIND_INDEX_KEY.encode() if settings.BLIND_INDEX_KEY else \
+        hmac.new(SECRET_KEY.encode(), b"tarang blind index", hashlib.sha256).digest()
+    return hmac.new(root, f"field:{field}".encode(), hashlib.sha256).digest()
+
+
+def normalize(value: str, field: str) -> str:
+    if field == "phone":
+        return "".join(ch for ch in value if ch.isdigit())
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+
+def blind_index(value: Optional[str], field: str) -> Optional[str]:
+    """Hex HMAC of the normalized value; None for a missing or blank value."""
+    if value is None:
+        return None
+    normalized = normalize(str(value), field)
+    if not normalized:
+        return None
+    return hmac.new(_field_key(field), normalized.encode(), hashlib.sha256).hexdigest()
+
+
+def backfill_blind_indexes(db, rebuild: bool = False) -> Dict[str, int]:
+    """
+    Fill the blind index columns from the plaintext, BACKFILL_CHUNK rows per
+    statement; only rows missing an index unless rebuild. Returns rows updated per table.
+    """
+    from app.database import BLIND_INDEXES
+
+    by_model = {}
+    for column, index_column, field in BLIND_INDEXES:
+        by_model.setdefault(column.class_, []).append((column, index_column, field))
+
+    updated = {}
+    for model, indexes in by_model.items():
+        values = [column for column, _, _ in indexes]
+        if rebuild:
+            pending = or_(*(column.isnot(None) for column in values))
+        else:
+            pending = or_(*(and_(column.isnot(None), index_column.is_(None)) for column, index_column, _ in indexes))
+        count, last_id = 0, 0
+        while True:
+            rows = db.execute(
+                select(model.id, *values).where(pending, model.id > last_id).order_by(model.id).limit(BACKFILL_CHUNK)
+            ).all()
+            if not rows:
+                break
+            db.execute(update(model), [
+                dict({"id": row[0]}, **{index_column.key: blind_index(value, field)
+                                        for value, (_, index_column, field) in zip(row[1:], indexes)})
+                for row in rows
+            ])
+            db.commit()
+            count += len(rows)
+            last_id = rows[-1][0]
+        updated[model.__tablename__] = count
+    return updated
+
+
+def main():
+    """Backfill blind index columns on the configured database."""
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="TARANG blind index backfill")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every row, e.g. after a key change")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        updated = backfill_blind_indexes(db, rebuild=args.rebuild)
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Blind index backfill failed: {e}")
+        return 1
+    finally:
+        db.close()
+    for table, count in updated.items():
+        print(f"✓ {table}: {count} rows indexed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+CPU-bound Agent Tasks for TARANG
+================================
+Entry points executed inside cpu_pool worker processes. Each child builds
+its own agents on first use, and only plain dicts, lists and bytes cross
+the process boundary.
+
+Screening calls carry the model version the API worker is serving, so a
+child follows hot swaps instead of scoring with the version it booted with.
+"""
+from typing import List, Optional, Tuple
+
+_agents = {}
+_unresolvable_versions = set()
+
+
+def _screening_agent(model_version: Optional[str] = None):
+    from app.agents.screening_ml import ScreeningAgent, ACTIVE_MODEL, MODEL_REGISTRY, load_bundle
+
+    if model_version and model_version != ACTIVE_MODEL.current.version and model_version not in _unresolvable_versions:
+        try:
+            bundle = load_bundle(MODEL_REGISTRY.artifact_path(model_version), model_version)
+            if bundle.available:
+                ACTIVE_MODEL.swap(bundle)
+            else:
+                _unresolvable_versions.add(model_version)
+        except KeyError:
+            # Not a registry version (e.g. the bundled artifact); keep what we have
+            _unresolvable_versions.add(model_version)
+
+    if "screening" not in _agents:
+        _agents["screening"] = ScreeningAgent()
+    return _agents["screening"]
+
+
+def analyze_signals(video_metrics: dict, questionnaire_score: int, questionnaire_responses: dict = None,
+                    eeg_mock: dict = None, model_version: Optional[str] = None) -> dict:
+    agent = _screening_agent(model_version)
+    return agent.analyze_signals(video_metrics, questionnaire_score, questionnaire_responses, eeg_mock)
+
+
+def analyze_batch(submissions: List[dict], model_version: Optional[str] = None) -> List[dict]:
+    return _screening_agent(model_version).analyze_batch(submissions)
+
+
+def render_clinical_pdf(session_data: dict) -> bytes:
+    from app.reports import ReportGenerator
+    return ReportGenerator.generate_clinical_pdf(session_data).getvalue()
+
+
+def predict_outcome(scores: List[float]) -> Tuple[dict, Optional[dict]]:
+    if "outcome" not in _agents:
+        from app.agents.outcome import OutcomeAgent
+        _agents["outcome"] = OutcomeAgent()
+    agent = _agents["outcome"]
+    prediction = agent.predict_trajectory(scores)
+    return prediction, agent.generate_intervention_alert(prediction)
@@ -0,0 +1,130 @@
+"""
+Columnar Dataset Snapshots for TARANG
+=====================================
+Caches the preprocessed training set so retraining does not refetch and
+re-encode the UCI datasets every time. A snapshot is one uncompressed .npz
+holding one array per feature column plus the target, named by the sha256
+of its content:
+
+    app/models/snapshots/
+        index.json              {"uci:419,426|preprocess-v2": {"hash": "...", ...}}
+        3f9c...e1.npz           A1_Score, ..., total_score, __target__, __features__
+
+index.json maps a data source (and preprocessing version) to the snapshot it
+last produced. Identical content always lands in the same file, so a
+refresh that returns unchanged data writes nothing, and the hash recorded in
+the model metadata identifies exactly which rows a model was trained on.
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'snapshots')
+TARGET_KEY = '__target__'
+FEATURES_KEY = '__features__'
+
+
+class DatasetSnapshot:
+    """Feature columns and target of one preprocessed training set."""
+
+    def __init__(self, columns: dict, target: np.ndarray, feature_columns: list, source: str = None):
+        self.feature_columns = list(feature_columns)
+        self.columns = {name: np.ascontiguousarray(columns[name]) for name in self.feature_columns}
+        self.target = np.ascontiguousarray(target)
+        self.source = source
+        self.content_hash = self.hash_content(self.columns, self.target, self.feature_columns)
+
+    @classmethod
+    def from_frame(cls, X: pd.DataFrame, y, source: str = None) -> "DatasetSnapshot":
+        columns = {}
+        for name in X.columns:
+            array = X[name].to_numpy()
+            # Nullable/object columns would be pickled and hash by pointer; the models only take numbers
+            columns[name] = array.astype(float) if array.dtype.kind == 'O' else array
+        return cls(columns, np.asarray(y), list(X.columns), source)
+
+    @staticmethod
+    def hash_content(columns: dict, target: np.ndarray, feature_columns: list) -> str:
+        digest = hashlib.sha256()
+        for name, array in [(name, columns[name]) for name in feature_columns] + [(TARGET_KEY, target)]:
+            digest.update(f"{name}|{array.dtype.str}|{array.shape}\n".encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    @property
+    def rows(self) -> int:
+        return len(self.target)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns, columns=self.feature_columns)
+
+    def save(self, path: str):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **self.columns, **{TARGET_KEY: self.target,
+                                             FEATURES_KEY: np.array(self.feature_columns)})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, source: str = None) -> "DatasetSnapshot":
+        with np.load(path, allow_pickle=False) as data:
+            feature_columns = [str(name) for name in data[FEATURES_KEY]]
+            return cls({name: data[name] for name in feature_columns}, data[TARGET_KEY], feature_columns, source)
+
+
+class SnapshotStore:
+    """Content-addressed snapshot files plus a source -> hash index."""
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR):
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.join(self.root, 'index.json')
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.root, f"{content_hash}.npz")
+
+    def _read_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: dict):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, source: str) -> Optional[DatasetSnapshot]:
+        """The snapshot last stored for this source, or None if missing or corrupt."""
+        entry = self._read_index().get(source)
+        if not entry:
+            return None
+        path = self.path_for(entry["hash"])
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = DatasetSnapshot.load(path, source)
+        except (OSError, KeyError, ValueError):
+            return None
+        return snapshot if snapshot.content_hash == entry["hash"] else None
+
+    def put(self, snapshot: DatasetSnapshot) -> bool:
+        """Store a snapshot and point its source at it; returns False if the content was already stored."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(snapshot.content_hash)
+        written = not os.path.exists(path)
+        if written:
+            snapshot.save(path)
+
+        index = self._read_index()
+        index[snapshot.source] = {
+            "hash": snapshot.content_hash,
+            "rows": snapshot.rows,
+            "features": snapshot.feature_columns,
+            "stored_at": pd.Timestamp.now().isoformat(),
+        }
+        self._write_index(index)
+        return written
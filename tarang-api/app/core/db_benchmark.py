@@ -0,0 +1,186 @@
+"""
+Sync vs Async Database Throughput for TARANG
+============================================
+The request handlers are all ``async def``. A query on a sync SessionLocal
+session holds the event loop for its whole round trip, so a worker serves one
+request at a time however many are in flight; on an AsyncSessionLocal session
+the handler awaits the database and the loop serves other requests meanwhile.
+
+This benchmark replays the hot endpoint reads (reports, clinician worklist,
+center analytics) as concurrent requests in one event loop, i.e. one worker,
+once per session kind, and reports requests per second and the longest
+event loop stall (how long any other request on the worker could
+not even be read).
+
+SQLite answers from the page cache in microseconds, far below a network round
+trip, so each request first waits --latency-ms inside the database (a SQL
+function on SQLite, pg_sleep on PostgreSQL) to stand in for the RDS round
+trip. Against a real remote PostgreSQL pass --latency-ms 0.
+
+Usage:
+    python -m app.core.db_benchmark
+    python -m app.core.db_benchmark --concurrency 64 --requests 4000
+    python -m app.core.db_benchmark --database-url postgresql://user:pw@host/scratch --latency-ms 0
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+# Endpoints ported to the async session (see hot_queries for the statements)
+BENCHMARK_ENDPOINTS = ("GET /reports", "GET /clinical/patients", "GET /analytics/center")
+
+
+def benchmark_statements() -> List:
+    from app.core.migrations import hot_queries
+
+    return [statement for endpoint, statement in hot_queries() if endpoint.startswith(BENCHMARK_ENDPOINTS)]
+
+
+def round_trip_statement(engine, latency_seconds: float):
+    """A statement that takes latency_seconds in the database, or None when there is no simulated latency."""
+    if latency_seconds <= 0:
+        return None
+    if engine.dialect.name == "postgresql":
+        return text(f"SELECT pg_sleep({latency_seconds})")
+
+    @event.listens_for(engine, "connect")
+    def install_round_trip(dbapi_connection, connection_record):
+        dbapi_connection.create_function("tarang_round_trip", 0, lambda: time.sleep(latency_seconds))
+
+    return text("SELECT tarang_round_trip()")
+
+
+async def _drive(request, statements: List, requests: int, concurrency: int) -> Dict[str, float]:
+    """Run requests through concurrency clients in this event loop; throughput and the longest loop stall."""
+    loop = asyncio.get_running_loop()
+    numbers = itertools.count()
+    tick = 0.001
+    due = loop.time() + tick
+    max_stall = 0.0
+
+    async def watch_loop():
+        nonlocal due, max_stall
+        while True:
+            await asyncio.sleep(tick)
+            max_stall = max(max_stall, loop.time() - due)
+            due = loop.time() + tick
+
+    async def client():
+        for n in numbers:
+            if n >= requests:
+                return
+            await request(statements[n % len(statements)])
+            await asyncio.sleep(0)   # the response write hands the loop back
+
+    watcher = asyncio.create_task(watch_loop())
+    await asyncio.sleep(tick)
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+    return {"requests_per_second": requests / elapsed, "max_loop_stall_ms": max(max_stall, 0.0) * 1000}
+
+
+async def _compare(database_url: str, requests: int, concurrency: int, latency_seconds: float) -> Dict[str, Dict]:
+    from app.database import get_async_database_engine
+
+    statements = benchmark_statements()
+    sync_engine = create_engine(database_url)
+    async_engine = get_async_database_engine(database_url)
+    Session = sessionmaker(bind=sync_engine, autoflush=False)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    sync_round_trip = round_trip_statement(sync_engine, latency_seconds)
+    async_round_trip = round_trip_statement(async_engine.sync_engine, latency_seconds)
+
+    async def sync_request(statement):
+        # What an async def handler on get_db does: every call blocks the loop
+        with Session() as db:
+            if sync_round_trip is not None:
+                db.execute(sync_round_trip)
+            db.execute(statement).all()
+
+    async def async_request(statement):
+        async with AsyncSession() as db:
+            if async_round_trip is not None:
+                await db.execute(async_round_trip)
+            (await db.execute(statement)).all()
+
+    try:
+        results = {}
+        for mode, request in (("sync", sync_request), ("async", async_request)):
+            await _drive(request, statements, concurrency, concurrency)   # warm pools and statement caches
+            results[mode] = await _drive(request, statements, requests, concurrency)
+        return results
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def run_benchmark(database_url: Optional[str] = None, sessions: int = 20_000, requests: int = 2_000,
+                  concurrency: int = 32, latency_ms: float = 2.0) -> Dict[str, Dict]:
+    """
+    Seed a scratch database (a temporary SQLite file by default) and compare
+    sync and async sessions; {"sync": {...}, "async": {...}, "gain": x}.
+    """
+    from app.core.migrations import current_version, migrate, seed_dataset
+
+    scratch = None
+    if database_url is None:
+        handle, scratch = tempfile.mkstemp(suffix=".db", prefix="tarang_benchmark_")
+        os.close(handle)
+        database_url = f"sqlite:///{scratch}"
+    engine = create_engine(database_url)
+    try:
+        if current_version(engine):
+            raise ValueError("Target database already has a schema: the benchmark seeds data, "
+                             "point it at an empty scratch database")
+        migrate(engine)
+        seed_dataset(engine, sessions=sessions)
+        engine.dispose()
+        results = asyncio.run(_compare(database_url, requests, concurrency, latency_ms / 1000))
+        results["gain"] = results["async"]["requests_per_second"] / results["sync"]["requests_per_second"]
+        return results
+    finally:
+        engine.dispose()
+        if scratch:
+            os.remove(scratch)
+
+
+def main():
+    """Print sync vs async throughput per worker on a scratch database."""
+    parser = argparse.ArgumentParser(description="TARANG sync vs async database throughput per worker")
+    parser.add_argument("--database-url", help="empty scratch database (default: temporary SQLite file)")
+    parser.add_argument("--sessions", type=int, default=20_000, help="screening sessions to seed")
+    parser.add_argument("--requests", type=int, default=2_000, help="requests per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight on the worker")
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated database round trip per request (0 against a remote database)")
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark(args.database_url, args.sessions, args.requests, args.concurrency, args.latency_ms)
+    except Exception as e:
+        print(f"✗ Benchmark failed: {e}")
+        return 1
+
+    print(f"{args.requests} requests, {args.concurrency} in flight, {args.latency_ms:g} ms round trip, one worker")
+    print(f"  {'session':<8} {'req/s':>8} {'max loop stall ms':>18}")
+    for mode in ("sync", "async"):
+        r = results[mode]
+        print(f"  {mode:<8} {r['requests_per_second']:>8.0f} {r['max_loop_stall_ms']:>18.1f}")
+    gain = results["gain"]
+    print(f"{'✓' if gain > 1 else '✗'} Async sessions serve {gain:.1f}x the requests per worker")
+    return 0 if gain > 1 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Execution Pools for TARANG
+==========================
+Keeps CPU-heavy agent calls and blocking I/O off a worker's event loop.
+
+    cpu_pool  bounded process pool for numpy/sklearn/reportlab work
+    io_pool   thread pool for blocking network and disk calls
+
+Both pools are created lazily on first use, i.e. inside each gunicorn
+worker after fork, never in the preloading master. Calls beyond a pool's
+queue limit fail fast with PoolSaturatedError instead of piling up. With
+EXECUTION_POOLS_ENABLED=false every call runs inline, as before.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WAIT_BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000]
+RUN_BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool already has max_queue calls queued or running."""
+
+
+class ExecutionPool:
+    """
+    Bounded wrapper around a concurrent.futures executor that reports queue
+    depth (accepted, not yet started), in-flight count, wait and run times.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int,
+                 enabled: bool = True, start_method: Optional[str] = None,
+                 initializer: Optional[Callable] = None):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(self.max_workers, max_queue)
+        self.enabled = enabled
+        self.start_method = start_method
+        self.initializer = initializer
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.queue_depth = metrics.gauge(f"{name}_queue_depth", "Calls accepted but not yet started")
+        self.in_flight = metrics.gauge(f"{name}_in_flight", "Calls currently executing")
+        self.rejected = metrics.counter(f"{name}_rejected_total", "Calls refused because the queue was full")
+        self.wait_histogram = metrics.histogram(f"{name}_wait_ms", WAIT_BUCKETS_MS, "Time queued before a worker picked the call up")
+        self.run_histogram = metrics.histogram(f"{name}_run_ms", RUN_BUCKETS_MS, "Execution time inside the pool")
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    methods = multiprocessing.get_all_start_methods()
+                    method = self.start_method if self.start_method in methods else methods[0]
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(method),
+                        initializer=self.initializer
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name,
+                        initializer=self.initializer
+                    )
+            return self._executor
+
+    def _reset_broken(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool and await its result."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        if self._pending >= self.max_queue:
+            self.rejected.inc()
+            raise PoolSaturatedError(f"{self.name} is saturated ({self._pending} calls pending)")
+
+        self._pending += 1
+        self._update_gauges()
+        submitted = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            call = functools.partial(_timed_call, fn, args, kwargs)
+            if self.kind == "thread":
+                # Carry contextvars (e.g. the request's AWS deadline) into the worker thread
+                call = functools.partial(contextvars.copy_context().run, call)
+            result, run_seconds = await asyncio.get_running_loop().run_in_executor(executor, call)
+            # perf_counter is per-process, so the wait is derived in the caller's clock
+            total_ms = (time.perf_counter() - submitted) * 1000
+            self.run_histogram.observe(run_seconds * 1000)
+            self.wait_histogram.observe(max(0.0, total_ms - run_seconds * 1000))
+            return result
+        except BrokenProcessPool:
+            logger.error(f"{self.name} lost a worker process; recreating the pool")
+            self._reset_broken(executor)
+            raise
+        finally:
+            self._pending -= 1
+            self._update_gauges()
+
+    def _update_gauges(self):
+        self.in_flight.set(min(self._pending, self.max_workers))
+        self.queue_depth.set(max(0, self._pending - self.max_workers))
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "enabled": self.enabled,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": max(0, self._pending - self.max_workers),
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _timed_call(fn, args, kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def _warm_cpu_worker():
+    # Import the agents once per child so the first call pays no import cost
+    import app.core.cpu_tasks  # noqa: F401
+
+
+# Singleton instances
+cpu_pool = ExecutionPool(
+    "cpu_pool",
+    kind="process",
+    max_workers=settings.CPU_POOL_WORKERS,
+    max_queue=settings.CPU_POOL_MAX_QUEUE,
+    enabled=settings.EXECUTION_POOLS_ENABLED,
+    start_method=settings.CPU_POOL_START_METHOD,
+    initializer=_warm_cpu_worker
+)
+io_pool = ExecutionPool(
+    "io_pool",
+    kind="thread",
+    max_workers=settings.IO_POOL_WORKERS,
+    max_queue=settings.IO_POOL_MAX_QUEUE,
+    enabled=settings.EXECUTION_POOLS_ENABLED
+)
@@ -0,0 +1,322 @@
+"""
+Flat-Array Forest Runtime for TARANG
+=====================================
+Converts a fitted sklearn RandomForestClassifier / GradientBoostingClassifier
+into contiguous numpy arrays and evaluates every tree at once, skipping
+sklearn's per-call validation and tree-by-tree Python dispatch.
+
+Layout (all trees concatenated, one entry per node):
+    feature    intp     split feature index (0 for leaves)
+    threshold  float64  split threshold (go left when x <= threshold)
+    left/right intp     global child indices (leaves point at themselves)
+    value      float64  leaf output (class-1 probability for RF,
+                        learning-rate-scaled raw score for GB)
+    roots      intp     global index of each tree's root node
+
+The arrays can be exported to a directory of .npy files and memory-mapped
+read-only, so gunicorn workers share one copy of the model through the page
+cache and never need to import sklearn or joblib:
+
+    python -m app.core.forest_runtime              # export next to the model file
+    python -m app.core.forest_runtime --if-stale   # skip if the export matches the model
+"""
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "threshold32", "left", "right", "value", "roots")
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'asd_screening_model.joblib')
+
+
+def forest_dir(model_path: str) -> str:
+    """Directory holding the exported arrays for a model artifact."""
+    base = model_path[:-len('.joblib')] if model_path.endswith('.joblib') else model_path
+    return base + '.forest'
+
+# Rows evaluated per chunk in the batched level walk
+ROW_CHUNK = 4096
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 <= each float64 threshold. For float32 features,
+    x <= floor32(t) holds exactly when x <= t, so comparisons can stay in
+    float32 without changing any split decision.
+    """
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    return np.where(too_high, np.nextafter(t32, np.float32(-np.inf)), t32)
+
+
+class FlatForest:
+    """Vectorized evaluator over a flattened binary tree ensemble."""
+
+    KIND_MEAN_PROBA = "mean_proba"   # RandomForest: average leaf probabilities
+    KIND_LOGIT_SUM = "logit_sum"     # GradientBoosting: sigmoid(init + sum(leaves))
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth: int, n_features: int, classes, kind: str, init_score: float = 0.0,
+                 threshold32=None, metadata: Optional[dict] = None):
+        # Index arrays are kept as intp so numpy gathers need no conversion
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.classes_ = np.asarray(classes)
+        self.kind = kind
+        self.init_score = float(init_score)
+        self.metadata = metadata or {}
+        if threshold32 is None:
+            threshold32 = _float32_floor(self.threshold)
+        self._threshold32 = np.ascontiguousarray(threshold32, dtype=np.float32)
+
+        # Read-only so pages shared across forked workers are never copied
+        for name in ARRAY_NAMES:
+            self._array(name).flags.writeable = False
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._array(name).nbytes for name in ARRAY_NAMES)
+
+    @property
+    def is_memory_mapped(self) -> bool:
+        return isinstance(self.feature.base, np.memmap) or isinstance(self.feature, np.memmap)
+
+    def _array(self, name: str) -> np.ndarray:
+        return self._threshold32 if name == "threshold32" else getattr(self, name)
+
+    def save(self, directory: str):
+        """Write every node array as its own .npy (mmap-able) plus a JSON header."""
+        tmp_dir = directory + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), self._array(name))
+
+        header = {
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "classes": [int(c) for c in self.classes_],
+            "kind": self.kind,
+            "init_score": self.init_score,
+            "metadata": self.metadata,
+        }
+        with open(os.path.join(tmp_dir, "forest.json"), 'w') as f:
+            json.dump(header, f, indent=2, default=str)
+
+        if os.path.isdir(directory):
+            for entry in os.listdir(directory):
+                os.remove(os.path.join(directory, entry))
+            os.rmdir(directory)
+        os.replace(tmp_dir, directory)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "FlatForest":
+        """Load an exported forest; with mmap=True arrays stay in the shared page cache."""
+        with open(os.path.join(directory, "forest.json")) as f:
+            header = json.load(f)
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in ARRAY_NAMES}
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            left=arrays["left"],
+            right=arrays["right"],
+            value=arrays["value"],
+            roots=arrays["roots"],
+            threshold32=arrays["threshold32"],
+            max_depth=header["max_depth"],
+            n_features=header["n_features"],
+            classes=header["classes"],
+            kind=header["kind"],
+            init_score=header["init_score"],
+            metadata=header.get("metadata", {}),
+        )
+
+    @classmethod
+    def from_estimator(cls, model) -> "FlatForest":
+        """Flatten a fitted binary RandomForestClassifier or GradientBoostingClassifier."""
+        model_type = type(model).__name__
+        classes = getattr(model, "classes_", None)
+        if classes is None or len(classes) != 2:
+            raise ValueError("FlatForest supports fitted binary classifiers only")
+
+        if model_type == "RandomForestClassifier":
+            trees = [est.tree_ for est in model.estimators_]
+            kind = cls.KIND_MEAN_PROBA
+            scale = 1.0
+        elif model_type == "GradientBoostingClassifier":
+            trees = [est.tree_ for est in model.estimators_[:, 0]]
+            kind = cls.KIND_LOGIT_SUM
+            scale = float(model.learning_rate)
+        else:
+            raise ValueError(f"Unsupported model type for FlatForest: {model_type}")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            n = tree.node_count
+            local = np.arange(n, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, local, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, local, tree.children_right) + offset)
+
+            if kind == cls.KIND_MEAN_PROBA:
+                counts = tree.value[:, 0, :]
+                totals = counts.sum(axis=1)
+                totals[totals == 0] = 1.0
+                values.append(counts[:, 1] / totals)
+            else:
+                values.append(tree.value[:, 0, 0] * scale)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        init_score = 0.0
+        if kind == cls.KIND_LOGIT_SUM:
+            # Constant prior = decision_function minus the summed tree outputs
+            probe = np.zeros((1, model.n_features_in_))
+            tree_sum = sum(est.predict(probe)[0] for est in model.estimators_[:, 0]) * scale
+            init_score = float(model.decision_function(probe)[0] - tree_sum)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots),
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            classes=classes,
+            kind=kind,
+            init_score=init_score,
+        )
+
+    def _single_leaf_values(self, x: np.ndarray) -> np.ndarray:
+        """Leaf outputs of every tree for one float32 row."""
+        # One branch decision per node, then a single gather per tree level
+        next_node = np.where(x.take(self.feature) <= self._threshold32, self.left, self.right)
+        node = self.roots
+        for _ in range(self.max_depth):
+            node = next_node.take(node)
+        return self.value.take(node)
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """(rows, trees) leaf outputs for a float32 matrix, walking all trees level by level."""
+        flat_x = X.ravel()
+        row_base = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            x_at_node = flat_x.take(row_base + self.feature.take(node))
+            node = np.where(x_at_node <= self._threshold32.take(node),
+                            self.left.take(node), self.right.take(node))
+        return self.value.take(node)
+
+    def _positive_proba(self, leaf_values: np.ndarray) -> np.ndarray:
+        if self.kind == self.KIND_MEAN_PROBA:
+            return leaf_values.sum(axis=-1) / self.n_trees
+        raw = self.init_score + leaf_values.sum(axis=-1)
+        return 1.0 / (1.0 + np.exp(-raw))
+
+    def predict_proba(self, X) -> np.ndarray:
+        """sklearn-compatible (rows, 2) probabilities."""
+        # sklearn trees evaluate on float32 features
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+
+        if len(X) == 1:
+            positive = np.atleast_1d(self._positive_proba(self._single_leaf_values(X[0])))
+        else:
+            positive = np.concatenate([
+                self._positive_proba(self._leaf_values(X[start:start + ROW_CHUNK]))
+                for start in range(0, len(X), ROW_CHUNK)
+            ])
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict_row(self, x) -> float:
+        """Class-1 probability for one feature vector, with no sklearn involvement."""
+        x = np.asarray(x, dtype=np.float32)
+        return float(self._positive_proba(self._single_leaf_values(x)))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def export_model(model_data: dict, model_path: str) -> FlatForest:
+    """Flatten a joblib model bundle and write it to forest_dir(model_path)."""
+    from app.core.score_table import file_sha256
+
+    metadata = {key: value for key, value in model_data.items() if key != 'model'}
+    metadata["model_sha256"] = file_sha256(model_path) if os.path.exists(model_path) else None
+    forest = FlatForest.from_estimator(model_data['model'])
+    forest.metadata = metadata
+    forest.save(forest_dir(model_path))
+    return forest
+
+
+def load_exported(model_path: str) -> Optional[FlatForest]:
+    """
+    Memory-map the exported forest for a model, or return None if it is missing
+    or was exported from a different model file. When the .joblib itself is not
+    deployed, the export is trusted as-is.
+    """
+    from app.core.score_table import file_sha256
+
+    directory = forest_dir(model_path)
+    if not os.path.exists(os.path.join(directory, "forest.json")):
+        return None
+    forest = FlatForest.load(directory, mmap=True)
+    if os.path.exists(model_path) and forest.metadata.get("model_sha256") != file_sha256(model_path):
+        return None
+    return forest
+
+
+def main():
+    """Export the deployed screening model to memory-mappable arrays."""
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    model_path = args[0] if args else DEFAULT_MODEL_PATH
+    if not os.path.exists(model_path):
+        print(f"Model file not found at: {model_path}")
+        return 1
+
+    if '--if-stale' in sys.argv and load_exported(model_path) is not None:
+        print("✓ Forest export is up to date")
+        return 0
+
+    import joblib
+
+    started = time.perf_counter()
+    forest = export_model(joblib.load(model_path), model_path)
+    elapsed = time.perf_counter() - started
+    print(f"✓ Forest exported: {forest.n_trees} trees, {forest.nbytes / 1e6:.2f} MB in {elapsed:.2f}s")
+    print(f"✓ Saved to: {forest_dir(model_path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
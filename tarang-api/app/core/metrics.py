@@ -0,0 +1,149 @@
+"""
+In-process metrics for TARANG
+Lightweight counters, gauges and bucketed histograms shared by the API's
+performance-sensitive paths. Snapshots are served from /system/metrics.
+"""
+import threading
+from typing import Dict, List, Optional
+
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """Point-in-time value that can go up and down."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus-style upper bounds).
+    Quantiles are estimated from the bucket upper bounds.
+    """
+
+    def __init__(self, name: str, buckets: List[float], description: str = ""):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self._count == 0:
+            return None
+        target = q * self._count
+        running = 0
+        for i, count in enumerate(self._counts):
+            running += count
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else self._max
+        return self._max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative[f"le_{bound:g}"] = running
+            cumulative["le_inf"] = self._count
+            return {
+                "type": "histogram",
+                "count": self._count,
+                "sum": round(self._sum, 4),
+                "mean": round(self._sum / self._count, 4) if self._count else None,
+                "max": round(self._max, 4),
+                "p50": self.quantile(0.50),
+                "p95": self.quantile(0.95),
+                "p99": self.quantile(0.99),
+                "buckets": cumulative,
+            }
+
+
+class MetricsRegistry:
+    """Get-or-create registry so modules can declare metrics at import time."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(name, lambda: Gauge(name, description))
+
+    def histogram(self, name: str, buckets: List[float], description: str = "") -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, buckets, description))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = list(self._metrics.items())
+        return {name: metric.snapshot() for name, metric in sorted(items)}
+
+
+# Singleton instance
+metrics = MetricsRegistry()
@@ -0,0 +1,483 @@
+"""
+Schema Migrations for TARANG
+============================
+Versioned, ordered schema steps. schema_migrations records every applied
+version, so a boot against a current database costs one SELECT: no
+create_all, no inspector round trips, no ALTERs.
+
+Each step is idempotent (it inspects before it creates), so a legacy
+database without schema_migrations, or a worker racing another one, replays
+them safely. To change the schema, declare the column / index / table on
+the model in app/database.py, then append a step here that creates it on
+existing databases; never edit or renumber an applied step.
+
+The --explain check seeds a scratch database with a large synthetic
+dataset, runs EXPLAIN on every hot endpoint query and fails when any of
+them reads one of the large tables with a sequential scan.
+
+Usage:
+    python -m app.core.migrations                        # apply pending steps to the configured database
+    python -m app.core.migrations --status               # applied and pending versions
+    python -m app.core.migrations --explain              # query-plan check on a temporary seeded SQLite file
+    python -m app.core.migrations --explain --database-url postgresql://.../scratch --sessions 200000
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, insert, inspect, or_, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset
+
+# Models are imported inside the functions: app.database runs init_db() -> migrate() at import time
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------------------------------------------
+# Steps
+# -----------------------------------------------------------------------------
+
+def _create_tables(engine):
+    from app.database import Base
+
+    # Fresh databases get every table with its declared indexes here
+    Base.metadata.create_all(bind=engine)
+
+
+# Columns added to tables that predate them (create_all won't ALTER)
+LEGACY_COLUMNS = [
+    ("screening_sessions", "patient_id", "INTEGER"),
+    ("screening_sessions", "dissonance_factor", "FLOAT"),
+    ("screening_sessions", "interpretation", "VARCHAR"),
+    ("screening_sessions", "model_version", "VARCHAR"),
+    ("screening_sessions", "clinical_summary", "JSON"),
+    ("screening_sessions", "summary_status", "VARCHAR"),
+    ("screening_sessions", "modality", "VARCHAR"),
+    ("patients", "parent_user_id", "INTEGER"),
+    ("patients", "clinician_id", "INTEGER"),
+]
+
+
+def _add_columns(engine, columns):
+    inspector = inspect(engine)
+    existing = {}
+    with engine.begin() as conn:
+        for table, column, col_type in columns:
+            if table not in existing:
+                existing[table] = {c["name"] for c in inspector.get_columns(table)}
+            if column not in existing[table]:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}"))
+
+
+def _add_legacy_columns(engine):
+    _add_columns(engine, LEGACY_COLUMNS)
+
+
+# Composite indexes behind the hot endpoint queries (declared on the models)
+HOT_PATH_INDEXES = (
+    "ix_screening_sessions_created",
+    "ix_screening_sessions_patient_created",
+    "ix_screening_sessions_name_created",
+    "ix_screening_sessions_modality_created",
+    "ix_community_posts_org_safe_created",
+    "ix_community_posts_safe_created",
+    "ix_appointments_clinician_created",
+    "ix_appointments_patient_created",
+    "ix_appointments_clinician_start",
+    "ix_patients_org_id_id",
+    "ix_patients_parent_user_id",
+    "ix_patient_summaries_org_risk",
+)
+
+
+def _create_indexes(engine, names):
+    from app.database import Base
+
+    declared = {index.name: index for table in Base.metadata.tables.values() for index in table.indexes}
+    inspector = inspect(engine)
+    existing = {}
+    for name in names:
+        index = declared[name]
+        table = index.table.name
+        if table not in existing:
+            existing[table] = {ix["name"] for ix in inspector.get_indexes(table)}
+        if name not in existing[table]:
+            index.create(bind=engine)
+
+
+def _create_hot_path_indexes(engine):
+    _create_indexes(engine, HOT_PATH_INDEXES)
+
+
+def _backfill_derived_data(engine):
+    """patient_summaries, daily_org_screening_stats and screening_sessions.modality from history."""
+    from app.core.org_stats import rebuild_daily_stats
+    from app.core.patient_summary import rebuild_summaries
+    from app.database import DailyOrgScreeningStats, Patient, PatientSummary, ScreeningSession, screening_modality
+
+    db = sessionmaker(bind=engine)()
+    try:
+        if db.query(PatientSummary.patient_id).first() is None and db.query(Patient.id).first() is not None:
+            logger.info(f"Backfilled {rebuild_summaries(db)} patient summaries")
+            db.commit()
+        if db.query(DailyOrgScreeningStats.org_id).first() is None and \
+                db.query(ScreeningSession.id).first() is not None:
+            logger.info(f"Backfilled {rebuild_daily_stats(db)} daily org screening stats rows")
+            db.commit()
+        while True:
+            pending = db.query(ScreeningSession.id, ScreeningSession.breakdown).filter(
+                ScreeningSession.modality.is_(None)
+            ).limit(1000).all()
+            if not pending:
+                break
+            db.execute(update(ScreeningSession), [
+                {"id": session_id, "modality": screening_modality(breakdown)} for session_id, breakdown in pending
+            ])
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# Keyed-HMAC columns beside the encrypted PII (app.core.blind_index) and their lookup indexes
+BLIND_INDEX_COLUMNS = [
+    ("patients", "name_bidx", "VARCHAR(64)"),
+    ("patients", "phone_bidx", "VARCHAR(64)"),
+    ("patients", "address_bidx", "VARCHAR(64)"),
+    ("users", "full_name_bidx", "VARCHAR(64)"),
+    ("screening_sessions", "patient_name_bidx", "VARCHAR(64)"),
+]
+BLIND_INDEX_INDEXES = (
+    "ix_patients_org_name_bidx",
+    "ix_patients_org_phone_bidx",
+    "ix_patients_address_bidx",
+    "ix_users_full_name_bidx",
+    "ix_screening_sessions_name_bidx_created",
+)
+
+
+def _add_blind_indexes(engine):
+    from app.core.blind_index import backfill_blind_indexes
+
+    _add_columns(engine, BLIND_INDEX_COLUMNS)
+    _create_indexes(engine, BLIND_INDEX_INDEXES)
+    db = sessionmaker(bind=engine)()
+    try:
+        updated = backfill_blind_indexes(db)
+        if any(updated.values()):
+            logger.info(f"Backfilled blind indexes: {updated}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "create tables", _create_tables),
+    (2, "legacy columns", _add_legacy_columns),
+    (3, "hot path indexes", _create_hot_path_indexes),
+    (4, "backfill summaries, daily stats and modality", _backfill_derived_data),
+    (5, "blind indexes on encrypted PII", _add_blind_indexes),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+
+def current_version(engine) -> int:
+    """Highest applied version; 0 when schema_migrations does not exist yet."""
+    from app.database import SchemaMigration
+
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+    except Exception:
+        return 0
+
+
+def migrate(engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending steps up to target (default: latest); returns the versions applied."""
+    from app.database import SchemaMigration
+
+    target = LATEST_VERSION if target is None else target
+    if current_version(engine) >= target:
+        return []
+
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    applied = []
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql":
+            # One migrating worker at a time; the others wait, then find nothing pending
+            lock_conn.execute(text("SELECT pg_advisory_lock(hashtext('tarang_schema_migrations'))"))
+        try:
+            with engine.connect() as conn:
+                done = set(conn.execute(select(SchemaMigration.version)).scalars())
+            for version, name, step in MIGRATIONS:
+                if version > target or version in done:
+                    continue
+                started = time.perf_counter()
+                step(engine)
+                with engine.begin() as conn:
+                    conn.execute(insert(SchemaMigration).values(
+                        version=version, name=name, applied_at=datetime.datetime.utcnow()
+                    ))
+                applied.append(version)
+                logger.info(f"Applied migration {version} ({name}) in {time.perf_counter() - started:.2f}s")
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext('tarang_schema_migrations'))"))
+                lock_conn.commit()
+    return applied
+
+
+def migration_status(engine) -> List[dict]:
+    from app.database import SchemaMigration
+
+    applied = {}
+    if current_version(engine):
+        with engine.connect() as conn:
+            applied = {row.version: row.applied_at for row in conn.execute(select(SchemaMigration))}
+    return [{"version": version, "name": name, "applied_at": applied.get(version)}
+            for version, name, _ in MIGRATIONS]
+
+
+# -----------------------------------------------------------------------------
+# Query-plan check
+# -----------------------------------------------------------------------------
+
+# Tables that grow with usage: a sequential scan of any of them fails the check
+LARGE_TABLES = ("screening_sessions", "patients", "appointments", "community_posts",
+                "patient_summaries", "daily_org_screening_stats")
+
+SEED_EPOCH = datetime.datetime(2025, 1, 1)
+
+
+def seed_dataset(engine, sessions: int = 50_000, seed: int = 0) -> Dict[str, int]:
+    """Synthetic orgs, users, patients, sessions, posts and appointments; ANALYZEd for the planner."""
+    from app.core.blind_index import blind_index
+    from app.database import Appointment, CommunityPost, Organization, Patient, ScreeningSession, User, \
+        screening_modality
+
+    rng = random.Random(seed)
+    orgs, clinicians, parents = 20, 200, 2_000
+    patients, posts, appointments = max(sessions // 20, 50), max(sessions // 10, 50), max(sessions // 10, 50)
+    days = 365
+
+    def at(day_span=days):
+        return SEED_EPOCH + datetime.timedelta(seconds=rng.randrange(day_span * 86_400))
+
+    with engine.begin() as conn:
+        conn.execute(insert(Organization), [{"id": i + 1, "name": f"Org {i + 1}", "license_key": f"LIC-{i + 1}"}
+                                            for i in range(orgs)])
+        conn.execute(insert(User), [
+            {"id": i + 1, "email": f"user{i + 1}@seed.test", "hashed_password": "x", "full_name": f"User {i + 1}",
+             "full_name_bidx": blind_index(f"User {i + 1}", "name"),
+             "role": "CLINICIAN" if i < clinicians else "PARENT", "org_id": i % orgs + 1, "is_active": True}
+            for i in range(clinicians + parents)
+        ])
+        conn.execute(insert(Patient), [
+            {"id": i + 1, "external_id": f"PID-{i + 1}", "name": f"Child {i + 1}", "date_of_birth": SEED_EPOCH,
+             "name_bidx": blind_index(f"Child {i + 1}", "name"),
+             "org_id": i % orgs + 1, "parent_user_id": clinicians + rng.randrange(parents) + 1,
+             "clinician_id": rng.randrange(clinicians) + 1}
+            for i in range(patients)
+        ])
+        rows = []
+        name_indexes = [blind_index(f"Child {n}", "name") for n in range(997)]
+        for i in range(sessions):
+            breakdown = {"behavioral": rng.randrange(100), "questionnaire": rng.randrange(100)}
+            rows.append({"id": i + 1, "patient_id": rng.randrange(patients) + 1, "patient_name": f"Child {i % 997}",
+                         "patient_name_bidx": name_indexes[i % 997],
+                         "risk_score": rng.uniform(0, 100), "confidence": "High", "breakdown": breakdown,
+                         "modality": screening_modality(breakdown), "clinical_recommendation": "Follow up",
+                         "created_at": at()})
+            if len(rows) == 5_000:
+                conn.execute(insert(ScreeningSession), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(ScreeningSession), rows)
+        conn.execute(insert(CommunityPost), [
+            {"id": i + 1, "author": "seed", "content": f"post {i}", "is_safe": int(rng.random() > 0.05),
+             "org_id": rng.randrange(orgs) + 1 if rng.random() > 0.1 else None, "created_at": at()}
+            for i in range(posts)
+        ])
+        conn.execute(insert(Appointment), [
+            {"id": i + 1, "patient_id": rng.randrange(patients) + 1, "clinician_id": rng.randrange(clinicians) + 1,
+             "start_time": at(), "end_time": at(), "status": "confirmed", "created_at": at()}
+            for i in range(appointments)
+        ])
+
+    # Projections the way a live database has them, then statistics for the planner
+    _backfill_derived_data(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return {"organizations": orgs, "users": clinicians + parents, "patients": patients, "screening_sessions": sessions,
+            "community_posts": posts, "appointments": appointments}
+
+
+def hot_queries() -> List[Tuple[str, object]]:
+    """(endpoint, statement) as the endpoints issue them, with representative parameters."""
+    from app.core.blind_index import blind_index
+    from app.database import Appointment, CommunityPost, DailyOrgScreeningStats, Patient, PatientSummary, \
+        ScreeningSession, User
+
+    org_id, clinician_id, parent_id, patient_id = 3, 7, 250, 42
+    cursor_at = SEED_EPOCH + datetime.timedelta(days=200)
+    after = encode_cursor((cursor_at, 10_000))
+    page = DEFAULT_PAGE_SIZE
+
+    def sessions_page(*criteria, cursor=None):
+        return keyset(select(ScreeningSession).where(*criteria), (ScreeningSession.created_at, ScreeningSession.id),
+                      cursor, page)
+
+    org_patients = select(Patient.id).where(Patient.org_id == org_id)
+    children = select(Patient.id).where(Patient.parent_user_id == parent_id)
+    parent_email = f"user{parent_id}@seed.test"
+    parent = select(User.id).where(User.email == parent_email).scalar_subquery()
+    return [
+        ("GET /reports (clinician)", sessions_page(ScreeningSession.patient_id.in_(org_patients))),
+        ("GET /reports (clinician, next page)",
+         sessions_page(ScreeningSession.patient_id.in_(org_patients), cursor=after)),
+        ("GET /reports (parent)", sessions_page(or_(
+            ScreeningSession.patient_id.in_(select(Patient.id).where(Patient.parent_user_id == parent)),
+            ScreeningSession.patient_name == parent_email,
+            ScreeningSession.patient_name_bidx == select(User.full_name_bidx).where(User.email == parent_email)
+            .scalar_subquery(),
+        ))),
+        ("GET /reports?modality", sessions_page(ScreeningSession.modality == "Dev. Log")),
+        ("GET /analytics/prediction", select(ScreeningSession).where(ScreeningSession.patient_id == patient_id)
+         .order_by(ScreeningSession.created_at)),
+        ("GET /clinical/patients", keyset(
+            select(PatientSummary, Patient.external_id, Patient.name)
+            .join(Patient, Patient.id == PatientSummary.patient_id).where(PatientSummary.org_id == org_id),
+            (PatientSummary.risk_rank, PatientSummary.patient_id), None, 20)),
+        ("GET /patients", keyset(select(Patient).where(Patient.org_id == org_id), (Patient.id,), None, page)),
+        ("GET /patients?name", keyset(select(Patient).where(
+            Patient.org_id == org_id, Patient.name_bidx == blind_index("Child 43", "name")
+        ), (Patient.id,), None, page)),
+        ("GET /community", keyset(
+            select(CommunityPost).where(CommunityPost.is_safe == 1,
+                                        or_(CommunityPost.org_id == org_id, CommunityPost.org_id.is_(None))),
+            (CommunityPost.created_at, CommunityPost.id), None, page)),
+        ("GET /appointments (clinician)", keyset(
+            select(Appointment).where(Appointment.clinician_id == clinician_id),
+            (Appointment.created_at, Appointment.id), None, page)),
+        ("GET /appointments (parent)", keyset(
+            select(Appointment).where(Appointment.patient_id.in_(children)),
+            (Appointment.created_at, Appointment.id), None, page)),
+        ("Clinician schedule", select(Appointment).where(
+            Appointment.clinician_id == clinician_id, Appointment.start_time >= cursor_at
+        ).order_by(Appointment.start_time)),
+        ("GET /analytics/center (patients)", select(func.count(Patient.id)).where(Patient.org_id == org_id)),
+        ("GET /analytics/center (rollup)", select(DailyOrgScreeningStats).where(
+            DailyOrgScreeningStats.org_id == org_id, DailyOrgScreeningStats.day >= cursor_at.date()
+        ).order_by(DailyOrgScreeningStats.day)),
+    ]
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def explain(engine, statement) -> Tuple[List[str], List[str]]:
+    """(plan lines, large tables read by a sequential scan)."""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            lines = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+            scans = [m.group(1) for m in map(_SQLITE_SCAN.match, lines) if m]
+        else:
+            lines = [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+            scans = [m.group(1) for line in lines for m in _PG_SEQ_SCAN.finditer(line)]
+    return lines, [table for table in scans if table in LARGE_TABLES]
+
+
+def check_query_plans(engine) -> List[dict]:
+    """EXPLAIN every hot query; each result has endpoint, plan and seq_scans (empty when indexed)."""
+    results = []
+    for endpoint, statement in hot_queries():
+        plan, seq_scans = explain(engine, statement)
+        results.append({"endpoint": endpoint, "plan": plan, "seq_scans": seq_scans})
+    return results
+
+
+def run_explain_check(database_url: Optional[str], sessions: int) -> int:
+    scratch = None
+    if database_url is None:
+        handle, scratch = tempfile.mkstemp(suffix=".db", prefix="tarang_explain_")
+        os.close(handle)
+        database_url = f"sqlite:///{scratch}"
+    engine = create_engine(database_url)
+    try:
+        if current_version(engine):
+            print("✗ Target database already has a schema: --explain seeds data, point it at an empty scratch database")
+            return 1
+        migrate(engine)
+        started = time.perf_counter()
+        counts = seed_dataset(engine, sessions=sessions)
+        print(f"Seeded {counts['screening_sessions']} sessions, {counts['patients']} patients, "
+              f"{counts['appointments']} appointments, {counts['community_posts']} posts "
+              f"({engine.dialect.name}, {time.perf_counter() - started:.1f}s)")
+
+        failures = 0
+        for result in check_query_plans(engine):
+            ok = not result["seq_scans"]
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {result['endpoint']}")
+            if not ok:
+                print(f"    sequential scan of {', '.join(result['seq_scans'])}")
+                for line in result["plan"]:
+                    print(f"    {line}")
+        print(f"{'✓ All hot queries use indexes' if not failures else f'✗ {failures} hot queries scan a large table'}")
+        return 1 if failures else 0
+    finally:
+        engine.dispose()
+        if scratch:
+            os.unlink(scratch)
+
+
+def main():
+    """Apply migrations, report their status, or check hot-query plans."""
+    parser = argparse.ArgumentParser(description="TARANG schema migrations")
+    parser.add_argument("--status", action="store_true", help="list applied and pending versions")
+    parser.add_argument("--explain", action="store_true", help="seed a scratch database and EXPLAIN the hot queries")
+    parser.add_argument("--database-url", help="scratch database for --explain (default: temporary SQLite file)")
+    parser.add_argument("--sessions", type=int, default=50_000, help="screening sessions to seed for --explain")
+    args = parser.parse_args()
+
+    if args.explain:
+        return run_explain_check(args.database_url, args.sessions)
+
+    from app.database import engine
+
+    if args.status:
+        for row in migration_status(engine):
+            state = f"applied {row['applied_at']:%Y-%m-%d %H:%M}" if row["applied_at"] else "pending"
+            print(f"  {row['version']:>3}  {row['name']:<48} {state}")
+        return 0
+
+    try:
+        applied = migrate(engine)
+    except Exception as e:
+        print(f"✗ Migration failed: {e}")
+        return 1
+    print(f"✓ Schema at version {current_version(engine)}"
+          + (f" (applied {', '.join(map(str, applied))})" if applied else " (nothing to do)"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+"""
+Model Registry for TARANG
+=========================
+Versioned screening model artifacts plus a manifest naming the active one:
+
+    app/models/registry/
+        manifest.json                     {"active": "v2", "versions": {...}}
+        v1/asd_screening_model.joblib     (+ .forest/ and .table.* exports)
+        v2/asd_screening_model.joblib
+
+Each worker keeps its model in an ActiveModel slot. A swap loads and warms
+the new version off the event loop, then replaces the slot's reference in a
+single assignment; requests already running finish on the bundle they
+started with, and the old version keeps serving if the new one fails.
+
+Usage:
+    python -m app.core.model_registry list
+    python -m app.core.model_registry register <model.joblib> [--version v3] [--activate]
+    python -m app.core.model_registry activate <version>
+    python -m app.core.model_registry shadow <version|none>
+"""
+import asyncio
+import datetime
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from app.core.forest_runtime import FlatForest, export_model, forest_dir, load_exported
+from app.core.score_table import ScoreTable, file_sha256
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = "asd_screening_model.joblib"
+MANIFEST_NAME = "manifest.json"
+WARMUP_ROWS = 64
+
+
+class ModelBundle:
+    """One loaded model version and the runtimes derived from it."""
+
+    def __init__(self, version: Optional[str], model=None, feature_columns: Optional[list] = None,
+                 metadata: Optional[dict] = None, flat_forest: Optional[FlatForest] = None,
+                 score_table: Optional[ScoreTable] = None, load_source: Optional[str] = None,
+                 model_path: Optional[str] = None):
+        self.version = version
+        self.model = model
+        self.feature_columns = feature_columns or []
+        self.metadata = metadata or {}
+        self.flat_forest = flat_forest
+        self.score_table = score_table
+        self.load_source = load_source
+        self.model_path = model_path
+        self.loaded_at = datetime.datetime.utcnow().isoformat() + "Z"
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    @classmethod
+    def load(cls, model_path: str, version: Optional[str] = None, load_mode: str = "mmap",
+             use_flat_forest: bool = True, use_score_table: bool = True) -> "ModelBundle":
+        """
+        Load a model artifact. Returns an unavailable bundle (rule-based
+        scoring only) when nothing can be loaded.
+        """
+        started = time.perf_counter()
+        model = flat_forest = None
+        metadata = {}
+        load_source = None
+
+        # mmap mode: map the exported node arrays read-only. Workers forked from a
+        # preloading gunicorn master share these pages and never import sklearn.
+        if load_mode == "mmap":
+            try:
+                flat_forest = load_exported(model_path)
+                if flat_forest is not None:
+                    model, metadata, load_source = flat_forest, flat_forest.metadata, "mmap"
+                else:
+                    print(f"Forest export missing or stale at {forest_dir(model_path)}, loading joblib "
+                          f"(export with: python -m app.core.forest_runtime)")
+            except Exception as e:
+                print(f"Forest export not available, loading joblib: {e}")
+
+        if model is None:
+            try:
+                import joblib
+
+                if os.path.exists(model_path):
+                    metadata = joblib.load(model_path)
+                    model = metadata['model']
+                    metadata = {key: value for key, value in metadata.items() if key != 'model'}
+                    load_source = "joblib"
+                else:
+                    print(f"Model file not found at: {model_path}")
+            except Exception as e:
+                print(f"ML model not available: {e}")
+
+        if model is None:
+            return cls(version, model_path=model_path)
+
+        feature_columns = metadata['feature_columns']
+        if version is None:
+            # Unregistered artifact: every retrain writes the same 'version' field, so pin it to the file hash
+            digest = metadata.get('model_sha256') or (file_sha256(model_path) if os.path.exists(model_path) else None)
+            version = f"{metadata.get('version', '0')}+{digest[:12]}" if digest else metadata.get('version')
+        verb = "Mapped" if load_source == "mmap" else "Loaded"
+        print(f"✓ {verb} ML model {version}: {metadata.get('model_type')} "
+              f"(accuracy: {metadata.get('accuracy', 0):.3f}) in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        # Flattened numpy copy of the ensemble for fast single-row scoring
+        if flat_forest is None and use_flat_forest:
+            try:
+                flat_forest = FlatForest.from_estimator(model)
+                print(f"✓ Flat forest runtime ready: {flat_forest.n_trees} trees, {flat_forest.n_nodes} nodes")
+            except Exception as e:
+                print(f"Flat forest runtime not available, using sklearn: {e}")
+
+        # Read-only, memory-mapped probabilities for the whole discrete feature space
+        score_table = None
+        if use_score_table:
+            try:
+                score_table = ScoreTable.load(model_path, feature_columns)
+                if score_table is not None:
+                    print(f"✓ Score table mapped: {score_table.meta['entries']} entries")
+                else:
+                    print("Score table missing or stale (build with: python -m app.core.score_table)")
+            except Exception as e:
+                print(f"Score table not available: {e}")
+
+        return cls(version, model, feature_columns, metadata, flat_forest, score_table, load_source, model_path)
+
+    def warmup_matrix(self, rows: int = WARMUP_ROWS, seed: int = 0) -> np.ndarray:
+        """Plausible AQ-10 shaped rows in feature order: binary answers/flags, ages, derived totals."""
+        rng = np.random.default_rng(seed)
+        X = rng.integers(0, 2, (rows, len(self.feature_columns))).astype(float)
+        score_positions = [i for i, col in enumerate(self.feature_columns) if col.endswith('_Score')]
+        for i, col in enumerate(self.feature_columns):
+            if col == 'age':
+                X[:, i] = rng.integers(1, 80, rows)
+            elif col == 'total_score':
+                X[:, i] = X[:, score_positions].sum(axis=1)
+        return X
+
+    def warm(self, rows: int = WARMUP_ROWS) -> float:
+        """
+        Score sample rows through every runtime so the first real request pays
+        no page faults or lazy init. Raises if the model produces invalid output.
+        """
+        if not self.available:
+            return 0.0
+        started = time.perf_counter()
+        X = self.warmup_matrix(rows)
+
+        scorer = self.flat_forest if self.flat_forest is not None else self.model
+        proba = scorer.predict_proba(X)
+        if proba.shape != (rows, len(scorer.classes_)) or not np.all(np.isfinite(proba)):
+            raise ValueError(f"Model {self.version} produced invalid probabilities during warm-up")
+        if self.flat_forest is not None:
+            self.flat_forest.predict_row(X[0])
+        if self.score_table is not None:
+            self.score_table.lookup_matrix(X)
+        return (time.perf_counter() - started) * 1000
+
+
+class ActiveModel:
+    """Holds the bundle a worker is serving; swapping is one reference assignment."""
+
+    def __init__(self, bundle: ModelBundle):
+        self._bundle = bundle
+
+    @property
+    def current(self) -> ModelBundle:
+        return self._bundle
+
+    def swap(self, bundle: ModelBundle) -> ModelBundle:
+        previous, self._bundle = self._bundle, bundle
+        return previous
+
+
+class ModelRegistry:
+    """Versioned artifacts on disk and the manifest that names the active version."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    def manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {"active": None, "versions": {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def active_version(self) -> Optional[str]:
+        return self.manifest().get("active")
+
+    def shadow_version(self) -> Optional[str]:
+        """Candidate scored in shadow mode alongside the active version, if any."""
+        return self.manifest().get("shadow")
+
+    def artifact_path(self, version: str) -> str:
+        if version not in self.manifest()["versions"]:
+            raise KeyError(f"Unknown model version: {version}")
+        return os.path.join(self.root, version, ARTIFACT_NAME)
+
+    def register(self, source_path: str, version: Optional[str] = None, activate: bool = False) -> str:
+        """
+        Copy an artifact into the registry, export its forest arrays and score
+        table (so a swap only has to map them) and record it in the manifest.
+        """
+        import joblib
+
+        manifest = self.manifest()
+        version = version or f"v{len(manifest['versions']) + 1}"
+        if version in manifest["versions"]:
+            raise ValueError(f"Model version {version} is already registered")
+
+        version_dir = os.path.join(self.root, version)
+        os.makedirs(version_dir, exist_ok=True)
+        artifact = os.path.join(version_dir, ARTIFACT_NAME)
+        shutil.copyfile(source_path, artifact)
+
+        model_data = joblib.load(artifact)
+        export_model(model_data, artifact)
+        try:
+            ScoreTable.build(model_data['model'], model_data['feature_columns'], artifact)
+        except ValueError as e:
+            logger.warning(f"Score table not built for {version}: {e}")
+
+        manifest["versions"][version] = {
+            "model_type": model_data.get('model_type'),
+            "accuracy": model_data.get('accuracy'),
+            "training_date": model_data.get('training_date'),
+            "sha256": file_sha256(artifact),
+            "registered_at": datetime.datetime.utcnow().isoformat() + "Z",
+        }
+        if activate or manifest.get("active") is None:
+            manifest["active"] = version
+        self._write_manifest(manifest)
+        return version
+
+    def activate(self, version: str):
+        manifest = self.manifest()
+        if version not in manifest["versions"]:
+            raise KeyError(f"Unknown model version: {version}")
+        manifest["active"] = version
+        self._write_manifest(manifest)
+
+    def set_shadow(self, version: Optional[str]):
+        manifest = self.manifest()
+        if version is not None and version not in manifest["versions"]:
+            raise KeyError(f"Unknown model version: {version}")
+        manifest["shadow"] = version
+        self._write_manifest(manifest)
+
+
+class ModelSwapper:
+    """
+    Loads registry versions in the background and swaps them into an
+    ActiveModel. At most one swap runs per worker; the event loop never
+    blocks on loading or warm-up.
+    """
+
+    def __init__(self, slot: ActiveModel, registry: ModelRegistry,
+                 loader: Callable[[str, str], ModelBundle]):
+        self.slot = slot
+        self.registry = registry
+        self.loader = loader
+        self._task: Optional[asyncio.Task] = None
+        self.status = {"state": "idle", "version": slot.current.version}
+
+    @property
+    def swapping(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _load_and_warm(self, version: str):
+        bundle = self.loader(self.registry.artifact_path(version), version)
+        if not bundle.available:
+            raise RuntimeError(f"Model {version} could not be loaded")
+        return bundle, bundle.warm()
+
+    async def swap_to(self, version: str) -> dict:
+        """Load, warm and activate `version` on this worker; returns the final status."""
+        previous = self.slot.current.version
+        if version == previous:
+            self.status = {"state": "idle", "version": previous}
+            return self.status
+
+        started = time.perf_counter()
+        self.status = {"state": "loading", "version": previous, "target": version,
+                       "started_at": datetime.datetime.utcnow().isoformat() + "Z"}
+        try:
+            loop = asyncio.get_running_loop()
+            bundle, warmup_ms = await loop.run_in_executor(None, self._load_and_warm, version)
+        except Exception as e:
+            logger.error(f"Model swap to {version} failed, still serving {previous}: {e}")
+            self.status = dict(self.status, state="failed", error=str(e))
+            return self.status
+
+        self.slot.swap(bundle)
+        self.status = {
+            "state": "swapped",
+            "version": version,
+            "previous": previous,
+            "load_source": bundle.load_source,
+            "warmup_ms": round(warmup_ms, 2),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "finished_at": datetime.datetime.utcnow().isoformat() + "Z",
+        }
+        logger.info(f"Model swapped {previous} -> {version} in {self.status['duration_ms']}ms")
+        return self.status
+
+    def trigger(self, version: str) -> asyncio.Task:
+        """Start a background swap unless one is already running."""
+        if self.swapping:
+            raise RuntimeError(f"A swap to {self.status.get('target')} is already in progress")
+        self._task = asyncio.get_running_loop().create_task(self.swap_to(version))
+        return self._task
+
+    async def watch(self, interval_seconds: float):
+        """Follow manifest changes made through another worker or the CLI."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                active = self.registry.active_version()
+                if active and active != self.slot.current.version and not self.swapping:
+                    if self.status.get("state") == "failed" and self.status.get("target") == active:
+                        continue
+                    self.trigger(active)
+            except Exception as e:
+                logger.warning(f"Model registry poll failed: {e}")
+
+
+def main():
+    """Manage registered screening model versions."""
+    from app.config import settings
+
+    registry = ModelRegistry(settings.MODEL_REGISTRY_DIR)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    command = args[0] if args else "list"
+
+    if command == "list":
+        manifest = registry.manifest()
+        for version, info in manifest["versions"].items():
+            marker = "*" if version == manifest["active"] else ("s" if version == manifest.get("shadow") else " ")
+            print(f"{marker} {version}  {info.get('model_type')}  accuracy={info.get('accuracy')}  "
+                  f"registered={info.get('registered_at')}")
+        if not manifest["versions"]:
+            print(f"No models registered in {registry.root}")
+        return 0
+
+    if command == "register" and len(args) > 1:
+        version = None
+        if '--version' in sys.argv:
+            version = sys.argv[sys.argv.index('--version') + 1]
+            args.remove(version)
+        version = registry.register(args[1], version=version, activate='--activate' in sys.argv)
+        print(f"✓ Registered {version} (active: {registry.active_version()})")
+        return 0
+
+    if command == "activate" and len(args) > 1:
+        registry.activate(args[1])
+        print(f"✓ Active model set to {args[1]}; workers pick it up on their next registry poll")
+        return 0
+
+    if command == "shadow" and len(args) > 1:
+        version = None if args[1].lower() == "none" else args[1]
+        registry.set_shadow(version)
+        print(f"✓ Shadow model set to {version}; workers pick it up on their next registry poll")
+        return 0
+
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Daily Organization Screening Stats for TARANG
+=============================================
+daily_org_screening_stats holds one row per (organization, UTC day):
+screenings that day and how many fell in each risk bucket. Center
+analytics read it, so any date range costs O(days) however many sessions
+were stored.
+
+- record_daily_stats: add newly inserted sessions to their rows, inside
+  the screening's transaction (one upsert per touched day)
+- shift_daily_stats: move rescored sessions between risk buckets with
+  relative UPDATEs, so it can run alongside record_daily_stats (rescoring)
+- rebuild_daily_stats: recompute rows from screening_sessions with one
+  GROUP BY (org, day) query of conditional sums; for backfill
+- daily_stats: the rows of one organization over a date range
+
+Sessions count for the organization of their patient; sessions without a
+patient, or whose patient has no organization, are not counted.
+
+Usage:
+    python -m app.core.org_stats                                    # rebuild every row
+    python -m app.core.org_stats --start 2026-01-01 --end 2026-01-31
+"""
+import argparse
+import datetime
+import sys
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+
+from app.core.pagination import day_bounds
+from app.database import DailyOrgScreeningStats, Patient, ScreeningSession, dialect_insert
+
+# Risk buckets on the stored 0-100 risk_score
+LOW_RISK_BELOW = 40.0
+HIGH_RISK_FROM = 80.0
+BUCKETS = ("low_risk", "medium_risk", "high_risk")
+# Longest date range center analytics will report per day
+MAX_ANALYTICS_DAYS = 366
+
+
+def risk_bucket(risk_score: Optional[float]) -> Optional[str]:
+    """Bucket column for a score; None for unscored sessions (counted only in screenings)."""
+    if risk_score is None:
+        return None
+    if risk_score < LOW_RISK_BELOW:
+        return "low_risk"
+    if risk_score >= HIGH_RISK_FROM:
+        return "high_risk"
+    return "medium_risk"
+
+
+def _upsert_increments(db, rows: List[dict]):
+    stmt = dialect_insert(db, DailyOrgScreeningStats)
+    if hasattr(stmt, "on_conflict_do_update"):
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["org_id", "day"],
+            set_={column: getattr(DailyOrgScreeningStats, column) + getattr(stmt.excluded, column)
+                  for column in ("screenings",) + BUCKETS},
+        )
+        db.execute(stmt.values(rows))
+        return
+    for row in rows:
+        key = (DailyOrgScreeningStats.org_id == row["org_id"]) & (DailyOrgScreeningStats.day == row["day"])
+        updated = db.query(DailyOrgScreeningStats).filter(key).update(
+            {getattr(DailyOrgScreeningStats, column): getattr(DailyOrgScreeningStats, column) + row[column]
+             for column in ("screenings",) + BUCKETS},
+            synchronize_session=False,
+        )
+        if not updated:
+            db.add(DailyOrgScreeningStats(**row))
+    db.flush()
+
+
+def record_daily_stats(db, sessions: List[dict]):
+    """
+    Add newly inserted sessions (patient_id, risk_score, created_at) to their
+    organization's day rows inside the caller's transaction.
+    """
+    patient_ids = {s["patient_id"] for s in sessions if s.get("patient_id")}
+    if not patient_ids:
+        return
+    orgs = dict(db.execute(
+        select(Patient.id, Patient.org_id).where(Patient.id.in_(patient_ids), Patient.org_id.is_not(None))
+    ).all())
+
+    rows = OrderedDict()
+    now = datetime.datetime.utcnow()
+    for s in sessions:
+        org_id = orgs.get(s.get("patient_id"))
+        if org_id is None:
+            continue
+        day = (s.get("created_at") or now).date()
+        row = rows.setdefault((org_id, day), dict(org_id=org_id, day=day, screenings=0,
+                                                  **{bucket: 0 for bucket in BUCKETS}))
+        row["screenings"] += 1
+        bucket = risk_bucket(s.get("risk_score"))
+        if bucket:
+            row[bucket] += 1
+    if rows:
+        # Sorted keys: concurrent writers lock rows in the same order
+        _upsert_increments(db, [rows[key] for key in sorted(rows)])
+
+
+def shift_daily_stats(db, changes: List[dict]) -> int:
+    """
+    Move rewritten sessions (patient_id, created_at, old_risk_score,
+    new_risk_score) from their old risk bucket to the new one, inside the
+    caller's transaction. Each day row gets one relative UPDATE, so
+    screenings recorded concurrently are never overwritten. Days
+    without a row were never counted and are left alone. Returns rows updated.
+    """
+    patient_ids = {c["patient_id"] for c in changes if c.get("patient_id")}
+    if not patient_ids:
+        return 0
+    orgs = dict(db.execute(
+        select(Patient.id, Patient.org_id).where(Patient.id.in_(patient_ids), Patient.org_id.is_not(None))
+    ).all())
+
+    deltas = {}
+    for c in changes:
+        org_id = orgs.get(c.get("patient_id"))
+        old, new = risk_bucket(c.get("old_risk_score")), risk_bucket(c.get("new_risk_score"))
+        if org_id is None or c.get("created_at") is None or old == new:
+            continue
+        row = deltas.setdefault((org_id, c["created_at"].date()), dict.fromkeys(BUCKETS, 0))
+        if old:
+            row[old] -= 1
+        if new:
+            row[new] += 1
+
+    # Sorted keys: concurrent writers lock rows in the same order
+    values = [dict(b_org=org_id, b_day=day, **{f"b_{bucket}": row[bucket] for bucket in BUCKETS})
+              for (org_id, day), row in sorted(deltas.items()) if any(row.values())]
+    if not values:
+        return 0
+    db.connection().execute(
+        update(DailyOrgScreeningStats)
+        .where(DailyOrgScreeningStats.org_id == bindparam("b_org"), DailyOrgScreeningStats.day == bindparam("b_day"))
+        .values({bucket: getattr(DailyOrgScreeningStats, bucket) + bindparam(f"b_{bucket}") for bucket in BUCKETS}),
+        values,
+    )
+    return len(values)
+
+
+def aggregate_query(start: Optional[datetime.date] = None, end: Optional[datetime.date] = None):
+    """(org_id, day, screenings, low, medium, high) from screening_sessions, one row per org and day."""
+    risk = ScreeningSession.risk_score
+    day = func.date(ScreeningSession.created_at)
+    query = (
+        select(
+            Patient.org_id,
+            day.label("day"),
+            func.count(ScreeningSession.id),
+            func.sum(case((risk < LOW_RISK_BELOW, 1), else_=0)),
+            func.sum(case(((risk >= LOW_RISK_BELOW) & (risk < HIGH_RISK_FROM), 1), else_=0)),
+            func.sum(case((risk >= HIGH_RISK_FROM, 1), else_=0)),
+        )
+        .join(Patient, Patient.id == ScreeningSession.patient_id)
+        .where(Patient.org_id.is_not(None))
+        .group_by(Patient.org_id, day)
+    )
+    lower, upper = day_bounds(start, end)
+    if lower is not None:
+        query = query.where(ScreeningSession.created_at >= lower)
+    if upper is not None:
+        query = query.where(ScreeningSession.created_at < upper)
+    return query
+
+
+def rebuild_daily_stats(db, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> int:
+    """Replace the rows of [start, end] (all days when open) inside the caller's transaction; returns rows written."""
+    stale = delete(DailyOrgScreeningStats)
+    if start is not None:
+        stale = stale.where(DailyOrgScreeningStats.day >= start)
+    if end is not None:
+        stale = stale.where(DailyOrgScreeningStats.day <= end)
+    db.execute(stale)
+
+    columns = ["org_id", "day", "screenings"] + list(BUCKETS)
+    rows = [dict(zip(columns, row)) for row in db.execute(aggregate_query(start, end))]
+    for row in rows:
+        if isinstance(row["day"], str):     # SQLite date() returns text
+            row["day"] = datetime.date.fromisoformat(row["day"])
+    if rows:
+        db.execute(dialect_insert(db, DailyOrgScreeningStats), rows)
+    return len(rows)
+
+
+def daily_stats(db, org_id: int, start: Optional[datetime.date] = None,
+                end: Optional[datetime.date] = None) -> List[DailyOrgScreeningStats]:
+    """One organization's rows in [start, end], oldest first; days without screenings have no row."""
+    query = select(DailyOrgScreeningStats).where(DailyOrgScreeningStats.org_id == org_id)
+    if start is not None:
+        query = query.where(DailyOrgScreeningStats.day >= start)
+    if end is not None:
+        query = query.where(DailyOrgScreeningStats.day <= end)
+    return db.execute(query.order_by(DailyOrgScreeningStats.day)).scalars().all()
+
+
+def main():
+    """Recompute daily_org_screening_stats from screening history."""
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily organization screening rollup")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first day (YYYY-MM-DD, default: all)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last day (YYYY-MM-DD, default: all)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_daily_stats(db, args.start, args.end)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Rebuild failed: {e}")
+        return 1
+    finally:
+        db.close()
+    print(f"✓ Rebuilt {count} daily org screening stats rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
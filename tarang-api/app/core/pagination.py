@@ -0,0 +1,91 @@
+"""
+Keyset Pagination for TARANG
+============================
+List endpoints page with opaque cursors instead of OFFSET: a cursor encodes
+the sort key of the last row sent, and the next page is the rows strictly
+after it in (created_at, id) order (or any other unique key). With a
+composite index on the filter columns followed by the key, every page is
+one index range read of limit + 1 rows, however deep the client pages.
+
+    query = keyset(db.query(CommunityPost), (CommunityPost.created_at, CommunityPost.id), cursor, limit)
+    posts, next_cursor = split_page(query.all(), limit, lambda p: (p.created_at, p.id))
+
+Cursors are URL-safe base64 of the JSON key values, datetimes kept exact.
+The next page's cursor goes in the X-Next-Cursor response header, so list
+bodies stay plain JSON arrays.
+"""
+import base64
+import binascii
+import datetime
+import json
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(key: Sequence) -> str:
+    """Opaque cursor for a row's sort key."""
+    raw = json.dumps([_encode_value(v) for v in key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Sort key of size values from encode_cursor; ValueError when it is not one."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = [_decode_value(v) for v in json.loads(raw)]
+    except (binascii.Error, KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if len(key) != size or any(v is None or isinstance(v, (list, dict)) for v in key):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def keyset(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = True):
+    """
+    Order query (ORM Query or select) by columns, skip to after cursor and fetch
+    limit + 1 rows, so split_page can tell whether another page follows.
+    """
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, len(columns)))
+        position = tuple_(*columns)
+        query = query.where(position < after if descending else position > after)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: List, limit: int, key: Callable) -> Tuple[List, Optional[str]]:
+    """(page rows, cursor of the next page or None) from a keyset() result."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def set_next_cursor(response, next_cursor: Optional[str]):
+    """Advertise the next page on the response; the last page has no header."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def day_bounds(start: Optional[datetime.date], end: Optional[datetime.date]):
+    """[start 00:00, day after end 00:00) datetimes for filtering a timestamp column by date; None when open."""
+    lower = datetime.datetime.combine(start, datetime.time()) if start else None
+    upper = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time()) if end else None
+    return lower, upper
@@ -0,0 +1,222 @@
+"""
+Patient Summary Projection for TARANG
+=====================================
+patient_summaries holds, per patient, what the clinician worklist shows:
+latest risk score and session time, session count and trend. It is written
+in the same transaction as the screening that changes it, so GET
+/clinical/patients reads one page of projection rows (joined to patients
+on the primary key) instead of one latest-session query per patient.
+
+- ensure_summaries: empty rows for new patients, so they are listed before
+  their first screening
+- record_screenings: fold new sessions into the rows, one UPDATE each; the
+  previous latest score moves to previous_risk_score, which gives the trend
+- rebuild_summaries: recompute rows from screening_sessions, for backfill
+  and after stored scores are rewritten (rescoring)
+- worklist_page: one keyset page of an organization's patients, sorted by
+  risk_rank (the latest score, -1 before any screening) then patient id
+
+Usage:
+    python -m app.core.patient_summary                    # rebuild every patient's row
+    python -m app.core.patient_summary --patients 12 40   # rebuild selected patients
+"""
+import argparse
+import datetime
+import sys
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, bindparam, case, exists, func, literal, select, update
+
+from app.core.pagination import keyset, split_page
+from app.database import Patient, PatientSummary, ScreeningSession, dialect_insert
+
+# Risk-point change between consecutive screenings that counts as a trend
+TREND_DELTA = 5.0
+# risk_rank of patients without a scored screening: sorts below every score
+NO_RISK = -1.0
+WORKLIST_SORTS = ("risk_desc", "risk_asc")
+
+
+def trend_for(latest: Optional[float], previous: Optional[float]) -> Optional[str]:
+    """Direction of the latest score against the one before it (higher risk is worse)."""
+    if latest is None:
+        return None
+    if previous is None:
+        return "baseline"
+    if latest - previous > TREND_DELTA:
+        return "worsening"
+    if previous - latest > TREND_DELTA:
+        return "improving"
+    return "stable"
+
+
+def _insert_ignoring_conflicts(db, select_stmt, columns: List[str]):
+    # Two transactions may create the same patient's row: let the loser skip it
+    stmt = dialect_insert(db, PatientSummary).from_select(columns, select_stmt)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        stmt = stmt.on_conflict_do_nothing(index_elements=["patient_id"])
+    db.execute(stmt)
+
+
+def ensure_summaries(db, patient_ids: Optional[Iterable[int]] = None):
+    """Create empty rows for patients that have none (all patients when patient_ids is None)."""
+    query = select(
+        Patient.id, Patient.org_id, literal(0), literal(NO_RISK), literal(datetime.datetime.utcnow())
+    ).where(~exists().where(PatientSummary.patient_id == Patient.id))
+    if patient_ids is not None:
+        patient_ids = sorted(set(patient_ids))
+        if not patient_ids:
+            return
+        query = query.where(Patient.id.in_(patient_ids))
+    _insert_ignoring_conflicts(db, query, ["patient_id", "org_id", "session_count", "risk_rank", "updated_at"])
+
+
+_RISK = bindparam("p_risk", type_=Float)
+
+_RECORD = (
+    update(PatientSummary)
+    .where(PatientSummary.patient_id == bindparam("p_id"))
+    .values(
+        # SET expressions read the old row, so previous_* and trend see the prior latest
+        previous_risk_score=PatientSummary.latest_risk_score,
+        trend=case(
+            (_RISK.is_(None), PatientSummary.trend),
+            (PatientSummary.latest_risk_score.is_(None), "baseline"),
+            (_RISK - PatientSummary.latest_risk_score > TREND_DELTA, "worsening"),
+            (PatientSummary.latest_risk_score - _RISK > TREND_DELTA, "improving"),
+            else_="stable",
+        ),
+        latest_risk_score=_RISK,
+        risk_rank=func.coalesce(_RISK, NO_RISK),
+        latest_session_id=bindparam("p_session_id"),
+        latest_session_at=bindparam("p_created_at"),
+        session_count=PatientSummary.session_count + 1,
+        updated_at=bindparam("p_now"),
+    )
+)
+
+
+def record_screenings(db, sessions: List[dict]):
+    """
+    Fold newly inserted sessions into their patients' rows, in list order, inside
+    the caller's transaction. Each item needs patient_id, risk_score, id and
+    created_at; sessions without a patient are ignored. Rows are only ever
+    updated in place, so concurrent screenings of one patient serialize on it.
+    """
+    sessions = [s for s in sessions if s.get("patient_id")]
+    if not sessions:
+        return
+    ensure_summaries(db, [s["patient_id"] for s in sessions])
+    now = datetime.datetime.utcnow()
+    # Core executemany: one statement, one parameter set per session
+    db.connection().execute(_RECORD, [
+        {
+            "p_id": s["patient_id"],
+            "p_risk": s["risk_score"],
+            "p_session_id": s["id"],
+            "p_created_at": s.get("created_at") or now,
+            "p_now": now,
+        }
+        for s in sessions
+    ])
+
+
+def rebuild_summaries(db, patient_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute rows from screening_sessions inside the caller's transaction; returns rows written."""
+    if patient_ids is not None:
+        patient_ids = sorted(set(pid for pid in patient_ids if pid))
+        if not patient_ids:
+            return 0
+    ensure_summaries(db, patient_ids)
+
+    rows = {}
+    query = select(PatientSummary.patient_id)
+    if patient_ids is not None:
+        query = query.where(PatientSummary.patient_id.in_(patient_ids))
+    for (pid,) in db.execute(query):
+        rows[pid] = {"b_id": pid, "b_count": 0, "b_latest": None, "b_previous": None,
+                     "b_session_id": None, "b_at": None}
+
+    history = (
+        select(ScreeningSession.patient_id, ScreeningSession.id, ScreeningSession.risk_score,
+               ScreeningSession.created_at)
+        .where(ScreeningSession.patient_id.is_not(None))
+        .order_by(ScreeningSession.patient_id, ScreeningSession.created_at, ScreeningSession.id)
+    )
+    if patient_ids is not None:
+        history = history.where(ScreeningSession.patient_id.in_(patient_ids))
+    for pid, session_id, risk_score, created_at in db.execute(history).yield_per(1000):
+        row = rows.get(pid)
+        if row is None:
+            continue  # session of a patient that no longer exists
+        row["b_count"] += 1
+        row["b_previous"], row["b_latest"] = row["b_latest"], risk_score
+        row["b_session_id"], row["b_at"] = session_id, created_at
+
+    if not rows:
+        return 0
+    now = datetime.datetime.utcnow()
+    values = [
+        dict(row, b_trend=trend_for(row["b_latest"], row["b_previous"]),
+             b_rank=row["b_latest"] if row["b_latest"] is not None else NO_RISK, b_now=now)
+        for row in rows.values()
+    ]
+    db.connection().execute(
+        update(PatientSummary).where(PatientSummary.patient_id == bindparam("b_id")).values(
+            session_count=bindparam("b_count"),
+            latest_risk_score=bindparam("b_latest"),
+            previous_risk_score=bindparam("b_previous"),
+            risk_rank=bindparam("b_rank"),
+            latest_session_id=bindparam("b_session_id"),
+            latest_session_at=bindparam("b_at"),
+            trend=bindparam("b_trend"),
+            updated_at=bindparam("b_now"),
+        ),
+        values,
+    )
+    return len(values)
+
+
+def worklist_page(db, org_id, limit: int = 20, cursor: Optional[str] = None,
+                  sort: str = "risk_desc") -> Tuple[list, Optional[str]]:
+    """
+    One page of (PatientSummary, external_id, name) for an organization and the
+    cursor of the next page (None on the last one). Served by
+    ix_patient_summaries_org_risk whatever the history size.
+    """
+    if sort not in WORKLIST_SORTS:
+        raise ValueError(f"sort must be one of {', '.join(WORKLIST_SORTS)}")
+    query = (
+        select(PatientSummary, Patient.external_id, Patient.name)
+        .join(Patient, Patient.id == PatientSummary.patient_id)
+        .where(PatientSummary.org_id == org_id)
+    )
+    query = keyset(query, (PatientSummary.risk_rank, PatientSummary.patient_id), cursor, limit,
+                   descending=sort == "risk_desc")
+    return split_page(db.execute(query).all(), limit, lambda row: (row[0].risk_rank, row[0].patient_id))
+
+
+def main():
+    """Recompute patient_summaries from screening history."""
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the patient summary projection")
+    parser.add_argument("--patients", type=int, nargs="+", help="patient ids (default: every patient)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_summaries(db, args.patients)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Rebuild failed: {e}")
+        return 1
+    finally:
+        db.close()
+    print(f"✓ Rebuilt {count} patient summaries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
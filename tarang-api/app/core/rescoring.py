@@ -0,0 +1,255 @@
+"""
+Rescoring Backfill for TARANG
+=============================
+Re-runs historical screening_sessions through the currently served
+screening model after a retrain. Rows are streamed in keyset-paginated
+chunks (id > last_id ORDER BY id), their analyze_signals inputs are rebuilt
+from the stored breakdown, each chunk is rescored with one
+ScreeningAgent.analyze_batch call and written back with a single
+executemany UPDATE that also records the model version. The chunk's
+patients get their patient_summaries rows recomputed, and each rewritten
+session moves between the risk buckets of its daily_org_screening_stats
+row (relative updates, safe next to live screenings), in the same commit.
+
+Progress is checkpointed after every committed chunk, so an interrupted
+run resumes where it stopped. --rate caps throughput so the backfill can
+share the database with production traffic. clinical_recommendation text
+is left as written at screening time.
+
+Usage:
+    python -m app.core.rescoring                           # rows not yet scored by the current model
+    python -m app.core.rescoring --rate 200 --chunk-size 250
+    python -m app.core.rescoring --all --reset             # every row, ignoring the checkpoint
+    python -m app.core.rescoring --dry-run --limit 1000    # report score deltas, write nothing
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import or_, select, update
+
+from app.core.org_stats import shift_daily_stats
+from app.core.patient_summary import rebuild_summaries
+from app.database import ScreeningSession, screening_modality
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'rescore_checkpoint.json'
+)
+
+
+def inputs_from_breakdown(breakdown) -> Optional[dict]:
+    """
+    Rebuild an analyze_signals submission from a stored breakdown (percentages).
+    Vision enters the fusion only as 0.45 * eye + 0.55 * motor, so setting both
+    to the stored behavioral score reproduces it exactly.
+    """
+    if isinstance(breakdown, str):
+        try:
+            breakdown = json.loads(breakdown)
+        except ValueError:
+            return None
+    if not isinstance(breakdown, dict) or "behavioral" not in breakdown or "questionnaire" not in breakdown:
+        return None
+
+    try:
+        video_score = float(breakdown["behavioral"]) / 100.0
+        questionnaire_score = int(round(float(breakdown["questionnaire"]) / 100.0 * 20))
+        physiological = float(breakdown.get("physiological") or 0) / 100.0
+    except (TypeError, ValueError):
+        return None
+
+    return {
+        "video_metrics": {"eye_contact": video_score, "motor_coordination": video_score},
+        "questionnaire_score": questionnaire_score,
+        "eeg_mock": {"alpha_theta_ratio": physiological} if physiological else None,
+    }
+
+
+class RescoreBackfill:
+    """Keyset-paginated, checkpointed, throttled rescoring of screening_sessions."""
+
+    def __init__(self, session_factory, agent, chunk_size: int = 500, rows_per_second: Optional[float] = None,
+                 checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH, only_stale: bool = True,
+                 dry_run: bool = False, limit: Optional[int] = None,
+                 sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.monotonic):
+        self.session_factory = session_factory
+        self.agent = agent
+        self.chunk_size = max(1, chunk_size)
+        self.rows_per_second = rows_per_second if rows_per_second and rows_per_second > 0 else None
+        self.checkpoint_path = checkpoint_path
+        self.only_stale = only_stale
+        self.dry_run = dry_run
+        self.limit = limit
+        self.sleep = sleep
+        self.clock = clock
+
+    def load_checkpoint(self, model_version: str) -> dict:
+        """Resume state for this model version, or a fresh one."""
+        fresh = {"model_version": model_version, "last_id": 0, "processed": 0, "updated": 0,
+                 "skipped": 0, "completed": False,
+                 "started_at": datetime.datetime.utcnow().isoformat() + "Z"}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return fresh
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("model_version") != model_version or checkpoint.get("completed"):
+            return fresh
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: dict):
+        if not self.checkpoint_path or self.dry_run:
+            return
+        checkpoint["updated_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _fetch_chunk(self, db, last_id: int, model_version: str, size: int) -> list:
+        query = (
+            select(ScreeningSession.id, ScreeningSession.patient_id, ScreeningSession.created_at,
+                   ScreeningSession.breakdown, ScreeningSession.risk_score)
+            .where(ScreeningSession.id > last_id)
+            .order_by(ScreeningSession.id)
+            .limit(size)
+        )
+        if self.only_stale:
+            query = query.where(or_(ScreeningSession.model_version.is_(None),
+                                    ScreeningSession.model_version != model_version))
+        return db.execute(query).all()
+
+    def _throttle(self, started: float, rows_this_run: int):
+        if self.rows_per_second is None:
+            return
+        ahead = rows_this_run / self.rows_per_second - (self.clock() - started)
+        if ahead > 0:
+            self.sleep(ahead)
+
+    def run(self) -> dict:
+        model_version = self.agent.model_version
+        if model_version is None:
+            raise RuntimeError("No ML model is loaded; refusing to overwrite scores with rule-based results")
+
+        checkpoint = self.load_checkpoint(model_version)
+        started = self.clock()
+        rows_this_run = 0
+        total_delta = 0.0
+
+        while self.limit is None or rows_this_run < self.limit:
+            size = self.chunk_size if self.limit is None else min(self.chunk_size, self.limit - rows_this_run)
+            db = self.session_factory()
+            try:
+                rows = self._fetch_chunk(db, checkpoint["last_id"], model_version, size)
+                if not rows:
+                    checkpoint["completed"] = True
+                    break
+
+                submissions, targets = [], []
+                for row in rows:
+                    submission = inputs_from_breakdown(row.breakdown)
+                    if submission is None:
+                        checkpoint["skipped"] += 1
+                        continue
+                    submissions.append(submission)
+                    targets.append(row)
+
+                updates, changes = [], []
+                for row, result in zip(targets, self.agent.analyze_batch(submissions)):
+                    total_delta += abs(result["risk_score"] - (row.risk_score or 0.0))
+                    changes.append({"patient_id": row.patient_id, "created_at": row.created_at,
+                                    "old_risk_score": row.risk_score, "new_risk_score": result["risk_score"]})
+                    updates.append({
+                        "id": row.id,
+                        "risk_score": result["risk_score"],
+                        "confidence": result["confidence"],
+                        "dissonance_factor": result["dissonance_factor"],
+                        "interpretation": result["interpretation"],
+                        "breakdown": result["breakdown"],
+                        "modality": screening_modality(result["breakdown"]),
+                        "model_version": model_version,
+                    })
+
+                if updates and not self.dry_run:
+                    db.execute(update(ScreeningSession), updates)
+                    # Latest scores and trends on the worklist, and the risk buckets of
+                    # the sessions' days, follow the rewritten sessions
+                    rebuild_summaries(db, {row.patient_id for row in targets})
+                    shift_daily_stats(db, changes)
+                    db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+            checkpoint["last_id"] = rows[-1].id
+            checkpoint["processed"] += len(rows)
+            checkpoint["updated"] += len(updates)
+            rows_this_run += len(rows)
+            self.save_checkpoint(checkpoint)
+            self._throttle(started, rows_this_run)
+
+        self.save_checkpoint(checkpoint)
+        elapsed = self.clock() - started
+        return dict(
+            checkpoint,
+            dry_run=self.dry_run,
+            rows_this_run=rows_this_run,
+            mean_abs_delta=round(total_delta / rows_this_run, 4) if rows_this_run else 0.0,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(rows_this_run / elapsed, 1) if elapsed > 0 else None,
+        )
+
+
+def main():
+    """Rescore stored screening sessions with the currently served model."""
+    parser = argparse.ArgumentParser(description="Rescore screening_sessions with the current screening model")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per keyset page and bulk UPDATE")
+    parser.add_argument("--rate", type=float, default=None, help="target rows/sec (default: unthrottled)")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many rows (resume later)")
+    parser.add_argument("--all", action="store_true", help="also rescore rows already on the current model")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true", help="compute score deltas without writing")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="checkpoint file path")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    from app.agents.screening_ml import ScreeningAgent
+
+    backfill = RescoreBackfill(
+        SessionLocal,
+        ScreeningAgent(),
+        chunk_size=args.chunk_size,
+        rows_per_second=args.rate,
+        checkpoint_path=args.checkpoint,
+        only_stale=not args.all,
+        dry_run=args.dry_run,
+        limit=args.limit
+    )
+    if args.reset:
+        backfill.reset_checkpoint()
+
+    try:
+        stats = backfill.run()
+    except RuntimeError as e:
+        print(f"✗ {e}")
+        return 1
+
+    state = "complete" if stats["completed"] else f"paused at id {stats['last_id']} (rerun to resume)"
+    print(f"✓ Rescoring {state}: model {stats['model_version']}, {stats['rows_this_run']} rows this run "
+          f"({stats['updated']} updated, {stats['skipped']} skipped total), "
+          f"mean |Δrisk| {stats['mean_abs_delta']}, {stats['rows_per_second']} rows/s"
+          + (" [dry run]" if stats["dry_run"] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
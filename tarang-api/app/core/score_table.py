@@ -0,0 +1,230 @@
+"""
+Precomputed Score Table for TARANG
+===================================
+The screening model's inputs are almost entirely discrete: ten binary AQ-10
+answers, three binary flags, an integer age and a total score derived from
+the answers. This module enumerates that whole space once, stores the model's
+class-1 probability for every point in a read-only memory-mapped .npy file
+and turns inference into a single array lookup.
+
+Index layout (bit-packed):
+    bits 0..12   binary columns in feature order (A1..A10, gender, jaundice, family history)
+    bits 13..19  age (0..127)
+
+Usage:
+    python -m app.core.score_table              # build next to the model file
+    python -m app.core.score_table --if-stale   # skip if the current table matches the model
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+AGE_BITS = 7
+AGE_COLUMN = "age"
+TOTAL_COLUMN = "total_score"
+BUILD_CHUNK = 65536
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'asd_screening_model.joblib')
+
+
+def table_paths(model_path: str) -> Tuple[str, str]:
+    """(array path, metadata path) stored alongside a model artifact."""
+    base = model_path[:-len('.joblib')] if model_path.endswith('.joblib') else model_path
+    return base + '.table.npy', base + '.table.json'
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ScoreTable:
+    """O(1) probability lookup over the enumerated discrete feature space."""
+
+    def __init__(self, table: np.ndarray, meta: dict):
+        self.table = table
+        self.meta = meta
+        self.feature_columns = meta["feature_columns"]
+        self.binary_columns = meta["binary_columns"]
+        self.score_columns = meta["score_columns"]
+        self.classes = np.asarray(meta["classes"])
+        self.age_max = (1 << AGE_BITS) - 1
+        self.age_shift = len(self.binary_columns)
+
+        positions = {col: i for i, col in enumerate(self.feature_columns)}
+        self._binary_positions = np.array([positions[c] for c in self.binary_columns], dtype=np.intp)
+        self._score_positions = np.array([positions[c] for c in self.score_columns], dtype=np.intp)
+        self._age_position = positions[AGE_COLUMN]
+        self._total_position = positions[TOTAL_COLUMN]
+        self._bit_weights = (1 << np.arange(len(self.binary_columns))).astype(np.int64)
+
+    @staticmethod
+    def layout_for(feature_columns: list) -> dict:
+        """Split FEATURE_COLS into binary / age / derived-total roles, or raise if unsupported."""
+        if AGE_COLUMN not in feature_columns or TOTAL_COLUMN not in feature_columns:
+            raise ValueError("Score table requires 'age' and 'total_score' features")
+        binary_columns = [c for c in feature_columns if c not in (AGE_COLUMN, TOTAL_COLUMN)]
+        score_columns = [c for c in binary_columns if c.startswith('A') and c.endswith('_Score')]
+        if len(binary_columns) + AGE_BITS > 30:
+            raise ValueError(f"Feature space too large to enumerate ({len(binary_columns)} binary columns)")
+        return {"binary_columns": binary_columns, "score_columns": score_columns}
+
+    @classmethod
+    def build(cls, model, feature_columns: list, model_path: str, n_jobs: int = 1) -> "ScoreTable":
+        """
+        Enumerate every (answers, flags, age) combination and write the table files.
+        Chunks are independent; n_jobs > 1 (or -1) scores them on a thread pool.
+        """
+        from joblib import Parallel, delayed
+        from app.core.forest_runtime import FlatForest
+
+        layout = cls.layout_for(feature_columns)
+        n_binary = len(layout["binary_columns"])
+        size = 1 << (n_binary + AGE_BITS)
+
+        try:
+            scorer = FlatForest.from_estimator(model)
+        except ValueError:
+            scorer = model
+
+        positions = {col: i for i, col in enumerate(feature_columns)}
+        binary_positions = [positions[c] for c in layout["binary_columns"]]
+        score_bits = [layout["binary_columns"].index(c) for c in layout["score_columns"]]
+
+        table_path, meta_path = table_paths(model_path)
+        table = np.lib.format.open_memmap(table_path + '.tmp', mode='w+', dtype=np.float64, shape=(size,))
+
+        def fill(start):
+            index = np.arange(start, min(start + BUILD_CHUNK, size), dtype=np.int64)
+            bits = (index[:, None] >> np.arange(n_binary)) & 1
+            X = np.zeros((len(index), len(feature_columns)), dtype=np.float64)
+            X[:, binary_positions] = bits
+            X[:, positions[AGE_COLUMN]] = index >> n_binary
+            X[:, positions[TOTAL_COLUMN]] = bits[:, score_bits].sum(axis=1)
+            proba = scorer.predict_proba(X)
+            table[index] = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+
+        Parallel(n_jobs=n_jobs, prefer="threads")(delayed(fill)(start) for start in range(0, size, BUILD_CHUNK))
+
+        table.flush()
+        del table
+        os.replace(table_path + '.tmp', table_path)
+
+        meta = {
+            "feature_columns": list(feature_columns),
+            "binary_columns": layout["binary_columns"],
+            "score_columns": layout["score_columns"],
+            "age_bits": AGE_BITS,
+            "classes": [int(c) for c in model.classes_],
+            "model_sha256": file_sha256(model_path) if os.path.exists(model_path) else None,
+            "entries": size,
+        }
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        return cls(np.load(table_path, mmap_mode='r'), meta)
+
+    @classmethod
+    def load(cls, model_path: str, feature_columns: list) -> Optional["ScoreTable"]:
+        """Memory-map the table for this model, or return None if missing or stale."""
+        table_path, meta_path = table_paths(model_path)
+        if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("feature_columns") != list(feature_columns):
+            return None
+        if meta.get("age_bits") != AGE_BITS or meta.get("model_sha256") != file_sha256(model_path):
+            return None
+
+        table = np.load(table_path, mmap_mode='r')
+        if table.shape != (meta["entries"],):
+            return None
+        return cls(table, meta)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    def index_of(self, features: dict) -> Optional[int]:
+        """Bit-packed index for a feature dict, or None if it lies outside the table."""
+        index = 0
+        total = 0
+        for bit, col in enumerate(self.binary_columns):
+            value = features.get(col, 0)
+            if value == 1:
+                index |= 1 << bit
+            elif value != 0:
+                return None
+        for col in self.score_columns:
+            total += features.get(col, 0)
+
+        age = features.get(AGE_COLUMN, 0)
+        try:
+            if age != int(age) or not 0 <= age <= self.age_max:
+                return None
+        except (TypeError, ValueError):
+            return None
+        if features.get(TOTAL_COLUMN, total) != total:
+            return None
+        return index | (int(age) << self.age_shift)
+
+    def lookup(self, features: dict) -> Optional[float]:
+        """Class-1 probability, or None when the caller must fall back to the model."""
+        index = self.index_of(features)
+        if index is None:
+            return None
+        return float(self.table[index])
+
+    def lookup_matrix(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized lookup for a FEATURE_COLS-ordered matrix: (probabilities, hit mask)."""
+        X = np.asarray(X, dtype=np.float64)
+        binary = X[:, self._binary_positions]
+        age = X[:, self._age_position]
+
+        hit = np.all((binary == 0) | (binary == 1), axis=1)
+        hit &= (age == np.floor(age)) & (age >= 0) & (age <= self.age_max)
+        hit &= X[:, self._total_position] == X[:, self._score_positions].sum(axis=1)
+
+        index = binary.astype(np.int64) @ self._bit_weights
+        index |= np.where(hit, age, 0).astype(np.int64) << self.age_shift
+        probabilities = np.where(hit, self.table[np.where(hit, index, 0)], np.nan)
+        return probabilities, hit
+
+
+def main():
+    """Build the score table for the deployed screening model."""
+    import joblib
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    model_path = args[0] if args else DEFAULT_MODEL_PATH
+    if not os.path.exists(model_path):
+        print(f"Model file not found at: {model_path}")
+        return 1
+
+    model_data = joblib.load(model_path)
+    if '--if-stale' in sys.argv and ScoreTable.load(model_path, model_data['feature_columns']) is not None:
+        print("✓ Score table is up to date")
+        return 0
+
+    started = time.perf_counter()
+    table = ScoreTable.build(model_data['model'], model_data['feature_columns'], model_path)
+    elapsed = time.perf_counter() - started
+
+    table_path, _ = table_paths(model_path)
+    print(f"✓ Score table built: {table.meta['entries']} entries, {table.nbytes / 1e6:.1f} MB in {elapsed:.1f}s")
+    print(f"✓ Saved to: {table_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Shadow Model Evaluation for TARANG
+==================================
+Scores live screening traffic with a candidate model without touching
+responses. The request path only enqueues a sample (O(1), dropped when the
+bounded queue is full); a background task drains the queue in batches,
+re-scores each batch with the primary and the candidate in a worker thread
+(timing both the same way) and appends one compact JSON line per sample:
+
+    {"ts": 1760000000.1, "pv": "v1", "cv": "v2", "pp": 0.62, "cp": 0.58,
+     "pr": 55.1, "cr": 53.2, "pi": "Moderate Risk", "ci": "Moderate Risk",
+     "pms": 0.004, "cms": 0.011}
+
+pp/cp are model probabilities, pr/ci the fused risk and interpretation,
+pms/cms per-row scoring latency in ms. Lines are shorter than PIPE_BUF and
+written with O_APPEND, so every gunicorn worker can share one file.
+Past max_log_bytes the file is renamed to <log_path>.1 (one generation is
+kept), and summaries read only the newest summary_limit samples, backwards
+from the end of the log, so neither grows with total traffic.
+The candidate is the manifest's "shadow" version, followed by every worker.
+"""
+import asyncio
+import collections
+import json
+import logging
+import os
+import random
+import time
+from typing import Optional
+
+import numpy as np
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SHADOW_BATCH_SIZE = 64
+SHADOW_SUMMARY_LIMIT = 10_000
+TAIL_BLOCK_BYTES = 65536
+
+
+class ShadowEvaluator:
+    """Bounded, best-effort candidate scoring alongside the primary model."""
+
+    def __init__(self, agent, registry, loader, log_path: str, queue_size: int = 256,
+                 sample_rate: float = 1.0, batch_size: int = SHADOW_BATCH_SIZE, max_log_bytes: int = 0,
+                 summary_limit: int = SHADOW_SUMMARY_LIMIT):
+        self.agent = agent
+        self.registry = registry
+        self.loader = loader
+        self.log_path = log_path
+        self.queue_size = max(1, queue_size)
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.batch_size = max(1, batch_size)
+        self.max_log_bytes = max(0, max_log_bytes)
+        self.summary_limit = max(1, summary_limit)
+        self.candidate = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.offered = metrics.counter("shadow_offered_total", "Samples offered to the shadow queue")
+        self.dropped = metrics.counter("shadow_dropped_total", "Samples dropped because the shadow queue was full")
+        self.scored = metrics.counter("shadow_scored_total", "Samples scored by the candidate model")
+
+    @property
+    def candidate_version(self) -> Optional[str]:
+        return self.candidate.version if self.candidate is not None else None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker = loop.create_task(self._run())
+
+    def offer(self, sample: dict) -> bool:
+        """Queue a sample for the candidate; never blocks, drops when full."""
+        if self.candidate is None or random.random() >= self.sample_rate:
+            return False
+        self.offered.inc()
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(sample)
+            return True
+        except asyncio.QueueFull:
+            self.dropped.inc()
+            return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await loop.run_in_executor(None, self._score_and_log, batch)
+            except Exception as e:
+                logger.warning(f"Shadow scoring failed for {len(batch)} samples: {e}")
+
+    def _timed_probabilities(self, features_list: list, bundle) -> tuple:
+        started = time.perf_counter()
+        _, probabilities = self.agent._predict_batch_with_ml(features_list, bundle)
+        per_row_ms = (time.perf_counter() - started) * 1000 / len(features_list)
+        return probabilities, per_row_ms
+
+    def _score_and_log(self, batch: list):
+        candidate = self.candidate
+        if candidate is None:
+            return
+
+        lines = []
+        # A hot swap can put two primary versions in one batch; time each against the candidate
+        by_primary = collections.defaultdict(list)
+        for sample in batch:
+            by_primary[id(sample["primary_bundle"])].append(sample)
+
+        for samples in by_primary.values():
+            features_list = [s["features"] for s in samples]
+            primary = samples[0]["primary_bundle"]
+            _, primary_ms = self._timed_probabilities(features_list, primary)
+            candidate_probabilities, candidate_ms = self._timed_probabilities(features_list, candidate)
+            if candidate_probabilities is None:
+                continue
+
+            for sample, probability in zip(samples, candidate_probabilities):
+                fused = self.agent._fuse_signals(
+                    sample["video_metrics"], sample["questionnaire_score"], sample["eeg_mock"], probability, candidate
+                )
+                lines.append(json.dumps({
+                    "ts": round(time.time(), 3),
+                    "pv": primary.version,
+                    "cv": candidate.version,
+                    "pp": round(float(sample["primary_probability"]), 6),
+                    "cp": round(float(probability), 6),
+                    "pr": sample["primary_risk"],
+                    "cr": float(fused["risk_score"]),
+                    "pi": sample["primary_interpretation"],
+                    "ci": fused["interpretation"],
+                    "pms": round(primary_ms, 5),
+                    "cms": round(candidate_ms, 5),
+                }, separators=(",", ":")))
+
+        if lines:
+            self._append(lines)
+            self.scored.inc(len(lines))
+
+    def _append(self, lines: list):
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            for line in lines:
+                os.write(fd, (line + "\n").encode())
+            if self.max_log_bytes and os.fstat(fd).st_size >= self.max_log_bytes:
+                self._rotate(fd)
+        finally:
+            os.close(fd)
+
+    def _rotate(self, fd: int):
+        try:
+            # Another worker may have rotated first: only move the file this fd still names
+            if os.stat(self.log_path).st_ino == os.fstat(fd).st_ino:
+                os.replace(self.log_path, self.log_path + ".1")
+        except OSError as e:
+            logger.warning(f"Shadow log rotation failed: {e}")
+
+    def _tail_records(self, candidate_version: Optional[str], limit: int) -> list:
+        """The newest `limit` records (of candidate_version), oldest first, read backwards from the end."""
+        records = []
+
+        def take(line: bytes) -> bool:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return False
+            if candidate_version is None or record.get("cv") == candidate_version:
+                records.append(record)
+            return len(records) >= limit
+
+        for path in (self.log_path, self.log_path + ".1"):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                position = f.seek(0, os.SEEK_END)
+                partial = b""
+                done = False
+                while position > 0 and not done:
+                    size = min(TAIL_BLOCK_BYTES, position)
+                    position -= size
+                    f.seek(position)
+                    lines = (f.read(size) + partial).split(b"\n")
+                    partial = lines.pop(0)   # may start in the previous block
+                    done = any(take(line) for line in reversed(lines) if line)
+                if not done and partial:
+                    done = take(partial)
+            if done:
+                break
+        records.reverse()
+        return records
+
+    def load_candidate(self, version: Optional[str]):
+        """Load (or clear with None) the candidate; blocking, run it off the event loop."""
+        if version is None:
+            self.candidate = None
+            return
+        bundle = self.loader(self.registry.artifact_path(version), version)
+        if not bundle.available:
+            raise RuntimeError(f"Shadow model {version} could not be loaded")
+        bundle.warm()
+        self.candidate = bundle
+
+    async def set_candidate(self, version: Optional[str]):
+        await asyncio.get_running_loop().run_in_executor(None, self.load_candidate, version)
+        logger.info(f"Shadow candidate set to {version}")
+
+    async def watch(self, interval_seconds: float):
+        """Follow the manifest's shadow version, like ModelSwapper follows the active one."""
+        failed = None
+        while True:
+            try:
+                version = self.registry.shadow_version()
+                if version != self.candidate_version and version != failed:
+                    try:
+                        await self.set_candidate(version)
+                        failed = None
+                    except Exception as e:
+                        failed = version
+                        logger.error(f"Shadow candidate {version} failed to load: {e}")
+            except Exception as e:
+                logger.warning(f"Shadow registry poll failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def worker_stats(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "candidate": self.candidate_version,
+            "sample_rate": self.sample_rate,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "offered": self.offered.value,
+            "dropped": self.dropped.value,
+            "scored": self.scored.value,
+        }
+
+    def summary(self, candidate_version: Optional[str] = None, limit: Optional[int] = None) -> dict:
+        """Agreement, score deltas and latency cost over the newest `limit` (default summary_limit) samples."""
+        candidate_version = candidate_version or self.candidate_version
+        records = self._tail_records(candidate_version, limit if limit and limit > 0 else self.summary_limit)
+
+        summary = {"candidate": candidate_version, "samples": len(records), "worker": self.worker_stats()}
+        if not records:
+            return summary
+
+        pp = np.array([r["pp"] for r in records])
+        cp = np.array([r["cp"] for r in records])
+        risk_delta = np.array([r["cr"] - r["pr"] for r in records])
+        pms = np.array([r["pms"] for r in records])
+        cms = np.array([r["cms"] for r in records])
+        transitions = collections.Counter(f"{r['pi']} -> {r['ci']}" for r in records if r["pi"] != r["ci"])
+
+        summary.update({
+            "primary_versions": sorted({r["pv"] for r in records if r["pv"]}),
+            "window": {"first": records[0]["ts"], "last": records[-1]["ts"]},
+            "agreement": {
+                "class_rate": round(float(np.mean((pp > 0.5) == (cp > 0.5))), 4),
+                "interpretation_rate": round(float(np.mean([r["pi"] == r["ci"] for r in records])), 4),
+                "interpretation_changes": dict(transitions.most_common()),
+            },
+            "probability_delta": {
+                "mean": round(float(np.mean(cp - pp)), 5),
+                "mean_abs": round(float(np.mean(np.abs(cp - pp))), 5),
+                "p95_abs": round(float(np.percentile(np.abs(cp - pp), 95)), 5),
+            },
+            "risk_score_delta": {
+                "mean": round(float(np.mean(risk_delta)), 3),
+                "mean_abs": round(float(np.mean(np.abs(risk_delta))), 3),
+                "p95_abs": round(float(np.percentile(np.abs(risk_delta), 95)), 3),
+            },
+            "latency_ms_per_row": {
+                "primary_p50": round(float(np.percentile(pms, 50)), 5),
+                "primary_p95": round(float(np.percentile(pms, 95)), 5),
+                "candidate_p50": round(float(np.percentile(cms, 50)), 5),
+                "candidate_p95": round(float(np.percentile(cms, 95)), 5),
+                "candidate_to_primary_ratio": round(float(np.mean(cms) / np.mean(pms)), 3) if np.mean(pms) > 0 else None,
+            },
+        })
+        return summary
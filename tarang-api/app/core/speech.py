@@ -0,0 +1,156 @@
+"""
+Speech Synthesis Helpers for TARANG
+===================================
+Shared by /polly/synthesize and anything that fills the audio cache:
+the language -> Polly voice mapping, the cache key of a prompt, and
+streaming Polly's AudioStream to a caller while it is written to the cache.
+
+Long texts can be spoken sentence by sentence (mode="sentences"): each
+sentence is its own cached clip, sentences are synthesized concurrently and
+the MP3 segments are returned in order, so playback starts after the first
+sentence and sentences shared between prompts are synthesized once.
+"""
+import asyncio
+import collections
+import hashlib
+import itertools
+import logging
+import re
+from typing import Callable, Iterator, List, Optional
+
+from app.core.audio_cache import AudioCache, audio_key
+
+logger = logging.getLogger(__name__)
+
+# Map language codes to Polly voice IDs
+VOICE_MAP = {
+    "en-IN": "Aditi",      # Female English (Indian)
+    "hi-IN": "Aditi",      # Female Hindi
+    "ta-IN": "Aditi",      # Fallback to Aditi for Tamil
+    "te-IN": "Aditi",      # Fallback to Aditi for Telugu
+    "bn-IN": "Aditi",      # Fallback to Aditi for Bengali
+    "kn-IN": "Aditi",      # Fallback to Aditi for Kannada
+    "mr-IN": "Aditi",      # Fallback to Aditi for Marathi
+    "gu-IN": "Aditi",      # Fallback to Aditi for Gujarati
+}
+NEURAL_LANGUAGES = {"en-IN", "hi-IN"}
+
+# Polly's limit on billed characters per SynthesizeSpeech request
+POLLY_MAX_TEXT_CHARS = 3000
+
+# Sentence ends: . ! ? followed by whitespace, or the Devanagari danda / double danda
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[\u0964\u0965])\s*")
+
+
+def voice_for(language: str) -> tuple:
+    """(voice_id, engine) used to speak a language."""
+    return VOICE_MAP.get(language, "Aditi"), "neural" if language in NEURAL_LANGUAGES else "standard"
+
+
+def speech_key(text: str, language: str) -> str:
+    voice_id, engine = voice_for(language)
+    return audio_key(text, voice_id, engine, language)
+
+
+def start_synthesis(polly_client, text: str, language: str):
+    """Blocking SynthesizeSpeech call; returns the unread AudioStream (or None)."""
+    voice_id, engine = voice_for(language)
+    response = polly_client.synthesize_speech(Text=text, OutputFormat="mp3", VoiceId=voice_id, Engine=engine)
+    return response.get("AudioStream")
+
+
+def iter_audio(audio_stream, writer=None, chunk_size: int = 16384,
+               stopped: Callable[[], bool] = lambda: False) -> Iterator[bytes]:
+    """
+    Yield an AudioStream in chunks, teeing them into a cache writer. The
+    clip is committed only if the stream was read to the end; a consumer
+    that stops early or a read error leaves nothing in the cache.
+    """
+    complete = False
+    try:
+        for chunk in audio_stream.iter_chunks(chunk_size):
+            if stopped():
+                return
+            if writer is not None:
+                writer.write(chunk)
+            yield chunk
+        complete = True
+    except Exception as e:
+        logger.warning(f"Polly audio stream failed: {e}")
+        raise
+    finally:
+        audio_stream.close()
+        if writer is not None:
+            if complete:
+                writer.commit()
+            else:
+                writer.abort()
+
+
+
+def split_sentences(text: str, max_chars: int = POLLY_MAX_TEXT_CHARS) -> List[str]:
+    """Sentences of text, with any sentence over max_chars cut at word boundaries."""
+    sentences = []
+    for sentence in SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def sequence_key(segment_keys: List[str]) -> str:
+    """Cache key of the clip made by concatenating segments (also its ETag)."""
+    return hashlib.sha256(("segments:" + ",".join(segment_keys)).encode("ascii")).hexdigest()
+
+
+def synthesize_segment(polly_client, cache: Optional[AudioCache], text: str, language: str) -> bytes:
+    """One sentence's MP3 bytes, from the cache or a blocking Polly call that is then cached."""
+    key = speech_key(text, language)
+    if cache is not None:
+        path = cache.lookup(key)
+        if path:
+            try:
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                pass  # evicted between lookup and read
+    audio_stream = start_synthesis(polly_client, text, language)
+    if audio_stream is None:
+        raise RuntimeError("Polly returned no audio")
+    try:
+        data = audio_stream.read()
+    finally:
+        audio_stream.close()
+    if cache is not None:
+        cache.put(key, data)
+    return data
+
+
+async def synthesize_in_order(texts: List[str], synthesize: Callable, run_io: Callable, concurrency: int = 4):
+    """
+    Async iterator over synthesize(text) for each text, in order. Calls run in
+    a sliding window of `concurrency` texts: the next one starts as the oldest
+    is handed out, so at most `concurrency` calls are running or waiting to be
+    consumed. Closing the iterator early leaves the rest of the texts unstarted.
+    """
+    pending = iter(texts)
+    window = collections.deque(
+        asyncio.ensure_future(run_io(synthesize, text)) for text in itertools.islice(pending, max(1, concurrency))
+    )
+    try:
+        while window:
+            result = await window.popleft()
+            for text in itertools.islice(pending, 1):
+                window.append(asyncio.ensure_future(run_io(synthesize, text)))
+            yield result
+    finally:
+        for task in window:
+            if not task.done():
+                task.cancel()
+            task.add_done_callback(lambda f: f.cancelled() or f.exception())
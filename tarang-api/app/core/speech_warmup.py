@@ -0,0 +1,204 @@
+"""
+Speech Warm-up for TARANG
+=========================
+Pre-synthesizes the fixed phrases the app reads aloud into the Polly audio
+cache, so the first play of a standard prompt is a cache read:
+
+- therapy activities from TherapyPlanningAgent.create_plan
+- progress alerts from OutcomeAgent.generate_intervention_alert
+- rule-based findings and recommendations from ClinicalSupportAgent
+
+The catalog is produced by calling those agents with representative
+inputs, so it follows their wording when it changes. Every phrase is
+warmed in every voice_map language, both as one clip (mode="single") and
+sentence by sentence plus the joined clip (mode="sentences"). Distinct
+texts go to Polly in parallel; clips already in the cache are not
+synthesized again, so reruns are cheap.
+
+Usage:
+    python -m app.core.speech_warmup                      # warm the whole catalog, then report coverage
+    python -m app.core.speech_warmup --languages en-IN hi-IN --concurrency 4
+    python -m app.core.speech_warmup --report-only        # coverage of the current cache, no Polly calls
+"""
+import argparse
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+from app.core.audio_cache import AudioCache
+from app.core.speech import VOICE_MAP, sequence_key, speech_key, split_sentences, synthesize_segment
+
+# Labels OutcomeAgent.predict_trajectory can return
+OUTCOME_TRENDS = (
+    "Initializing", "Stabilizing", "Improving (Accelerated)", "Improving (Steady)",
+    "Regressing (Urgent)", "Regressing (Mild)", "Plateaued",
+)
+
+
+def phrase_catalog() -> Dict[str, List[str]]:
+    """Distinct phrases per source, in a stable order."""
+    from app.agents.clinical import ClinicalSupportAgent
+    from app.agents.outcome import OutcomeAgent
+    from app.agents.therapy import TherapyPlanningAgent
+
+    catalog = OrderedDict((source, OrderedDict()) for source in ("therapy", "alerts", "clinical"))
+
+    therapy = TherapyPlanningAgent()
+    for behavioral in (100, 0):
+        plan = therapy.create_plan({"breakdown": {"behavioral": behavioral}})
+        for activity in plan["suggested_activities"]:
+            catalog["therapy"][activity["title"]] = None
+            catalog["therapy"][activity["goal"]] = None
+        catalog["therapy"][plan["focus_area"]] = None
+
+    outcome = OutcomeAgent()
+    for trend in OUTCOME_TRENDS:
+        catalog["alerts"][outcome.generate_intervention_alert({"trend": trend})] = None
+
+    # Rule-based text only: no Bedrock client or summary cache involved
+    clinical = ClinicalSupportAgent(cache=None)
+    everything_flagged = {"risk_score": 85, "breakdown": {"behavioral": 100, "questionnaire": 100},
+                          "dissonance_factor": 1.0}
+    for finding in clinical._generate_rule_based({}, everything_flagged)["key_findings"]:
+        catalog["clinical"][finding] = None
+    for interpretation, risk_score in (("High Risk", 85), ("Moderate Risk", 55), ("Low Risk", 20)):
+        for confidence in ("High", "Low"):
+            summary = clinical._generate_rule_based({}, {
+                "risk_score": risk_score, "interpretation": interpretation, "confidence": confidence
+            })
+            catalog["clinical"][summary["clinical_recommendation"]] = None
+
+    return OrderedDict((source, list(phrases)) for source, phrases in catalog.items())
+
+
+def _clip_keys(phrase: str, language: str) -> tuple:
+    """(single-clip key, [sentence keys], joined-sentences key) for one phrase."""
+    sentence_keys = [speech_key(sentence, language) for sentence in split_sentences(phrase)]
+    return speech_key(phrase, language), sentence_keys, sequence_key(sentence_keys)
+
+
+def coverage_report(cache: AudioCache, catalog: Dict[str, List[str]], languages: List[str]) -> dict:
+    """Share of (phrase, language) pairs whose single and sentence clips are all cached."""
+    report = {"sources": OrderedDict(), "languages": OrderedDict((language, [0, 0]) for language in languages)}
+    total = covered = 0
+    for source, phrases in catalog.items():
+        source_covered = 0
+        for phrase in phrases:
+            for language in languages:
+                single, sentences, joined = _clip_keys(phrase, language)
+                ok = all(cache.lookup(key) for key in [single, joined] + sentences)
+                source_covered += ok
+                report["languages"][language][0] += ok
+                report["languages"][language][1] += 1
+        pairs = len(phrases) * len(languages)
+        report["sources"][source] = {"phrases": len(phrases), "covered": source_covered, "pairs": pairs}
+        total += pairs
+        covered += source_covered
+    report["covered"], report["pairs"] = covered, total
+    report["coverage"] = round(covered / total, 4) if total else 1.0
+    return report
+
+
+def warm_audio_cache(polly_client, cache: AudioCache, catalog: Dict[str, List[str]], languages: List[str],
+                     concurrency: int = 8) -> dict:
+    """Synthesize every missing clip of the catalog; returns counts of what was done."""
+    # Every distinct text Polly may need: whole phrases and their sentences
+    texts = OrderedDict()
+    for phrases in catalog.values():
+        for phrase in phrases:
+            for language in languages:
+                texts[(phrase, language)] = None
+                for sentence in split_sentences(phrase):
+                    texts[(sentence, language)] = None
+
+    stats = {"texts": len(texts), "already_cached": 0, "synthesized": 0, "failed": 0, "joined": 0, "errors": []}
+    missing = [item for item in texts if not cache.lookup(speech_key(*item))]
+    stats["already_cached"] = len(texts) - len(missing)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="speech-warmup") as pool:
+        futures = {pool.submit(synthesize_segment, polly_client, cache, text, language): (text, language)
+                   for text, language in missing}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                stats["synthesized"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                text, language = futures[future]
+                stats["errors"].append(f"{language} {text[:40]!r}: {e}")
+
+    # mode="sentences" clips are the cached sentences joined: no Polly calls
+    for phrases in catalog.values():
+        for phrase in phrases:
+            for language in languages:
+                _, sentence_keys, joined = _clip_keys(phrase, language)
+                if cache.lookup(joined):
+                    continue
+                paths = [cache.lookup(key) for key in sentence_keys]
+                if not all(paths):
+                    continue
+                audio = b""
+                for path in paths:
+                    with open(path, "rb") as f:
+                        audio += f.read()
+                cache.put(joined, audio)
+                stats["joined"] += 1
+    return stats
+
+
+def print_report(report: dict):
+    print(f"Coverage: {report['covered']}/{report['pairs']} phrase-language pairs ({report['coverage']:.1%})")
+    for source, row in report["sources"].items():
+        print(f"  {source:<10} {row['phrases']:>3} phrases  {row['covered']:>4}/{row['pairs']:<4}")
+    print("  " + "  ".join(f"{language} {covered}/{pairs}"
+                           for language, (covered, pairs) in report["languages"].items()))
+
+
+def main():
+    """Fill the audio cache with the phrase catalog and report coverage."""
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Pre-synthesize the therapy / alert / clinical phrase catalog")
+    parser.add_argument("--languages", nargs="+", default=list(VOICE_MAP), help="language codes (default: all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Polly calls in flight")
+    parser.add_argument("--report-only", action="store_true", help="report cache coverage without synthesizing")
+    args = parser.parse_args()
+
+    unknown = [language for language in args.languages if language not in VOICE_MAP]
+    if unknown:
+        print(f"✗ Unknown languages: {', '.join(unknown)} (known: {', '.join(VOICE_MAP)})")
+        return 1
+
+    cache = AudioCache.from_settings(settings)
+    if cache is None:
+        print("✗ POLLY_AUDIO_CACHE_ENABLED is false: nothing to warm")
+        return 1
+
+    catalog = phrase_catalog()
+    print(f"Phrase catalog: {sum(len(p) for p in catalog.values())} phrases x {len(args.languages)} languages")
+
+    failed = 0
+    if not args.report_only:
+        from app.core.aws_client import aws_client_manager
+
+        if not aws_client_manager.wait_for_credentials():
+            print("✗ Amazon Polly unavailable: check AWS credentials")
+            return 1
+        started = time.perf_counter()
+        stats = warm_audio_cache(aws_client_manager.get_polly_client(), cache, catalog, args.languages,
+                                 concurrency=args.concurrency)
+        failed = stats["failed"]
+        print(f"{'✓' if not failed else '✗'} Warmed {stats['texts']} texts in {time.perf_counter() - started:.1f}s: "
+              f"{stats['synthesized']} synthesized, {stats['already_cached']} already cached, "
+              f"{stats['joined']} sentence clips joined, {failed} failed")
+        for error in stats["errors"][:10]:
+            print(f"  ✗ {error}")
+
+    print_report(coverage_report(cache, catalog, args.languages))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
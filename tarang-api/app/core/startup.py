@@ -0,0 +1,64 @@
+"""
+Startup Phase Timing for TARANG
+===============================
+Records how long each cold-start phase of a worker takes, so a slow
+container start can be attributed instead of guessed at:
+
+    import       app.main module body (includes the phases below that run at import)
+    model_load   loading the active screening model bundle
+    db_init      create_all + column migrations
+    aws_probe    background STS credential check (never on the startup path)
+
+Phases are logged as they finish, summarized once the app starts serving,
+and returned under "startup" on /health.
+"""
+import contextlib
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self._phases = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self._phases[name] = round(seconds, 4)
+        logger.info(f"Startup phase {name} took {seconds:.3f}s")
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, self.clock() - started)
+
+    def mark(self, name: str):
+        """Record a phase that began when this timer was created."""
+        self.record(name, self.clock() - self.started)
+
+    def get(self, name: str) -> Optional[float]:
+        with self._lock:
+            return self._phases.get(name)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return dict(self._phases)
+
+    def report(self) -> str:
+        phases = self.as_dict()
+        line = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in phases.items())
+        logger.info(f"Startup phases: {line or 'none recorded'}")
+        return line
+
+
+# Created on first import, i.e. as early in the process as app.main pulls it in
+startup_timer = StartupTimer()
@@ -0,0 +1,183 @@
+"""
+Clinical Summary Cache for TARANG
+=================================
+Bedrock summaries depend on the risk profile, not on who was screened, and
+many screenings produce near-identical profiles. The cache key is the sha256
+of a canonical, quantized profile:
+
+    {"interpretation": "Moderate Risk", "confidence": "Low (Signal Dissonance)",
+     "risk_score": 55, "dissonance_factor": 0.1,
+     "breakdown": {"behavioral": 40, "ml_model": 90, "physiological": 0, "questionnaire": 40}}
+
+plus the Bedrock model id and PROMPT_VERSION. ClinicalSupportAgent prompts
+Bedrock with this same quantized profile and without the patient's name, so a
+cached summary is exactly what Bedrock would have been asked for the next
+matching screening and never carries another patient's identity.
+
+Entries live in a per-worker LRU (max entries + TTL). With a Redis URL they
+are also written to Redis under tarang:summary:<hash> with the same TTL, so a
+summary generated by one worker serves every worker; Redis errors degrade to
+the local cache rather than failing the request.
+"""
+import collections
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump when the Bedrock prompt changes so old summaries are not served for the new prompt
+PROMPT_VERSION = 1
+REDIS_KEY_PREFIX = "tarang:summary:"
+
+RISK_SCORE_STEP = 5
+BREAKDOWN_STEP = 10
+DISSONANCE_STEP = 0.1
+
+
+def _quantize(value, step):
+    try:
+        return round(round(float(value) / step) * step, 4)
+    except (TypeError, ValueError):
+        return None
+
+
+def quantize_risk_profile(risk_results: dict) -> dict:
+    """The fields of risk_results a summary depends on, rounded to cache-friendly bands."""
+    breakdown = risk_results.get("breakdown") or {}
+    if isinstance(breakdown, str):
+        try:
+            breakdown = json.loads(breakdown)
+        except ValueError:
+            breakdown = {}
+    profile = {
+        "interpretation": risk_results.get("interpretation"),
+        "confidence": risk_results.get("confidence"),
+        "risk_score": _quantize(risk_results.get("risk_score", 0), RISK_SCORE_STEP),
+        "dissonance_factor": _quantize(risk_results.get("dissonance_factor", 0), DISSONANCE_STEP),
+        "breakdown": {name: _quantize(value, BREAKDOWN_STEP) for name, value in sorted(breakdown.items())},
+    }
+    # Whole numbers print as 55, not 55.0, in both the key and the prompt
+    for container in (profile, profile["breakdown"]):
+        for name, value in container.items():
+            if isinstance(value, float) and value.is_integer() and name != "dissonance_factor":
+                container[name] = int(value)
+    return profile
+
+
+def profile_key(profile: dict, model_id: str) -> str:
+    canonical = json.dumps({"v": PROMPT_VERSION, "model": model_id, "profile": profile},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class SummaryCache:
+    """Thread-safe LRU with TTL, optionally backed by Redis shared across workers."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, redis_client=None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("summary_cache_hits_total", "Clinical summaries served from the cache")
+        self.shared_hits = metrics.counter("summary_cache_shared_hits_total", "Cache hits served by the shared backend")
+        self.misses = metrics.counter("summary_cache_misses_total", "Clinical summary cache misses")
+        self.evictions = metrics.counter("summary_cache_evictions_total", "Entries evicted by LRU or TTL")
+        self.backend_errors = metrics.counter("summary_cache_backend_errors_total", "Shared cache backend errors")
+        self.size = metrics.gauge("summary_cache_entries", "Entries in this worker's summary cache")
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["SummaryCache"]:
+        if not settings.SUMMARY_CACHE_ENABLED:
+            return None
+        redis_client = None
+        if settings.SUMMARY_CACHE_REDIS_URL:
+            try:
+                import redis
+                redis_client = redis.Redis.from_url(
+                    settings.SUMMARY_CACHE_REDIS_URL, socket_timeout=0.25, socket_connect_timeout=0.25
+                )
+            except Exception as e:
+                logger.warning(f"Shared summary cache unavailable ({e}); using the per-worker cache only")
+        return cls(settings.SUMMARY_CACHE_MAX_ENTRIES, settings.SUMMARY_CACHE_TTL_SECONDS, redis_client)
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.evictions.inc()
+                self.size.set(len(self._entries))
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: dict, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions.inc()
+            self.size.set(len(self._entries))
+
+    def get(self, key: str) -> Optional[dict]:
+        """A copy of the cached summary, or None."""
+        value = self._get_local(key)
+        if value is None and self.redis is not None:
+            try:
+                raw = self.redis.get(REDIS_KEY_PREFIX + key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    ttl = self.redis.ttl(REDIS_KEY_PREFIX + key)
+                    self._set_local(key, value, ttl if ttl and ttl > 0 else self.ttl_seconds)
+                    self.shared_hits.inc()
+            except Exception as e:
+                self.backend_errors.inc()
+                logger.warning(f"Shared summary cache read failed: {e}")
+
+        if value is None:
+            self.misses.inc()
+            return None
+        self.hits.inc()
+        return json.loads(json.dumps(value))
+
+    def set(self, key: str, value: dict):
+        self._set_local(key, value, self.ttl_seconds)
+        if self.redis is not None:
+            try:
+                self.redis.setex(REDIS_KEY_PREFIX + key, int(self.ttl_seconds), json.dumps(value, default=str))
+            except Exception as e:
+                self.backend_errors.inc()
+                logger.warning(f"Shared summary cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size.set(0)
+
+    def stats(self) -> dict:
+        lookups = self.hits.value + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "shared_backend": self.redis is not None,
+            "hits": self.hits.value,
+            "shared_hits": self.shared_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": round(self.hits.value / lookups, 4) if lookups else None,
+            "evictions": self.evictions.value,
+        }
@@ -0,0 +1,142 @@
+"""
+Streaming Clinical Summaries for TARANG
+=======================================
+Helpers for GET /reports/{id}/summary/stream:
+
+- SummaryStreamParser consumes Bedrock text deltas and reports each value of
+  the summary schema the moment its closing quote arrives, so key_findings
+  reach the client one by one while the model is still generating.
+- stream_blocking() drives a blocking iterator (boto3's event stream) in the
+  I/O pool and hands its items to the event loop as they arrive, at most
+  max_buffered ahead of the consumer.
+- sse_event() formats one server-sent event.
+"""
+import asyncio
+import concurrent.futures
+import json
+import threading
+from typing import Callable, Iterator
+
+TOP_LEVEL_FIELDS = ("summary_title", "clinical_recommendation", "agent_status")
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class SummaryStreamParser:
+    """
+    Incremental scanner for {"summary_title": str, "key_findings": [str, ...],
+    "clinical_recommendation": str, "agent_status": str}. Text before the first
+    "{" (e.g. a markdown fence) is ignored. feed() returns completed items:
+
+        ("finding", index, text)  one key_findings entry
+        ("field", name, value)    one top-level string field
+    """
+
+    def __init__(self):
+        self.started = False
+        self.stack = []           # open containers: "{" or "["
+        self.in_string = False
+        self.escape = False
+        self.buffer = []
+        self.expect_key = False
+        self.key = None           # current top-level key
+        self.findings = 0
+
+    def feed(self, text: str) -> list:
+        events = []
+        for char in text:
+            if not self.started:
+                if char != "{":
+                    continue
+                self.started = True
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self._string_done(json.loads('"' + "".join(self.buffer) + '"'), events)
+                    continue
+                self.buffer.append(char)
+                continue
+
+            if char == '"':
+                self.in_string, self.buffer = True, []
+            elif char in "{[":
+                self.stack.append(char)
+                self.expect_key = char == "{"
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+            elif char == ":":
+                self.expect_key = False
+            elif char == ",":
+                self.expect_key = bool(self.stack) and self.stack[-1] == "{"
+        return events
+
+    def _string_done(self, value: str, events: list):
+        if self.stack == ["{"]:
+            if self.expect_key:
+                self.key = value
+            elif self.key in TOP_LEVEL_FIELDS:
+                events.append(("field", self.key, value))
+        elif self.stack == ["{", "["] and self.key == "key_findings":
+            events.append(("finding", self.findings, value))
+            self.findings += 1
+
+
+async def stream_blocking(iterator_factory: Callable[[Callable[[], bool]], Iterator], run_io,
+                          max_buffered: int = 8):
+    """
+    Async iterator over a blocking iterator run by run_io (e.g. io_pool.run).
+    iterator_factory receives a stopped() callable so the producer can close
+    its upstream stream when the consumer goes away (client disconnect).
+    The producer blocks while max_buffered items wait for the consumer, so a
+    slow client slows the upstream read instead of buffering it in memory.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max(1, max_buffered))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # Wait for room, giving up once the consumer has gone away
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.25)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def pump():
+        try:
+            for item in iterator_factory(stop.is_set):
+                if stop.is_set() or not put(item):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+
+    producer = asyncio.ensure_future(run_io(pump))
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        if producer.done():
+            producer.exception()
+        else:
+            producer.add_done_callback(lambda f: f.cancelled() or f.exception())
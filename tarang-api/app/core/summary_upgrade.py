@@ -0,0 +1,187 @@
+"""
+Background Clinical Summary Upgrades for TARANG
+===============================================
+Stale-while-revalidate for screening summaries. With
+CLINICAL_SUMMARY_MODE=background, /screening/process answers with the
+rule-based summary (or a cached Bedrock one) and stores the session with
+summary_status="pending". The upgrader then calls Bedrock off the request
+path and rewrites the session's clinical_recommendation / clinical_summary
+with summary_status="bedrock", or "rule_based" if Bedrock failed, timed out
+or the upgrader was at capacity.
+
+Limits (per worker):
+- timeout_seconds: how long an upgrade waits for a Bedrock slot and the
+  call together; it is then abandoned and the rule-based text stands.
+- max_concurrency: Bedrock calls in flight. A slot is held until the
+  underlying thread really finishes, so timeouts cannot pile up threads.
+- max_pending: upgrades queued or running; beyond it new sessions keep the
+  rule-based summary.
+
+Clients read the result from GET /reports/{id}/detail or wait on
+/ws/reports/{id}/summary, which is notified in-process and falls back to
+polling the row, so it works whichever worker ran the upgrade.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import update
+
+from app.core.aws_client import request_deadline
+from app.core.metrics import metrics
+from app.database import ScreeningSession
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PENDING = "pending"
+SUMMARY_BEDROCK = "bedrock"
+SUMMARY_RULE_BASED = "rule_based"
+
+
+def summary_status_for(summary: dict) -> str:
+    return SUMMARY_RULE_BASED if summary.get("agent_status") == "Rule-Based Fallback" else SUMMARY_BEDROCK
+
+
+def store_summary(session_factory, session_id: int, summary: Optional[dict], status: str):
+    """Write a final summary (or just its status, when summary is None) to a screening session."""
+    values = {"summary_status": status}
+    if summary is not None:
+        values.update(clinical_recommendation=summary.get("clinical_recommendation"), clinical_summary=summary)
+    db = session_factory()
+    try:
+        db.execute(update(ScreeningSession).where(ScreeningSession.id == session_id).values(**values))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class SummaryUpgrader:
+    """Bounded background Bedrock calls that upgrade stored rule-based summaries."""
+
+    def __init__(self, agent, session_factory, run_io: Callable, timeout_seconds: float = 8.0,
+                 max_concurrency: int = 4, max_pending: int = 64):
+        self.agent = agent
+        self.session_factory = session_factory
+        self.run_io = run_io
+        self.timeout_seconds = timeout_seconds
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max(1, max_pending)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._tasks = set()
+        self._waiters = {}
+
+        self.completed = metrics.counter("summary_upgrade_completed_total", "Summaries upgraded to Bedrock")
+        self.failed = metrics.counter("summary_upgrade_failed_total", "Upgrades that kept the rule-based summary")
+        self.timeouts = metrics.counter("summary_upgrade_timeout_total", "Upgrades abandoned at the timeout")
+        self.rejected = metrics.counter("summary_upgrade_rejected_total", "Sessions not upgraded: upgrader at capacity")
+        self.latency = metrics.histogram("summary_upgrade_seconds", [0.5, 1, 2, 4, 8, 16, 32],
+                                         "Time from scheduling to the stored upgrade")
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def has_capacity(self) -> bool:
+        """Whether a new session could be upgraded right now (schedule() decides, and counts rejections)."""
+        return self.agent.bedrock is not None and self.pending < self.max_pending
+
+    def schedule(self, session_id: int, patient_data: dict, risk_results: dict) -> bool:
+        """
+        Start upgrading a stored session; False if the upgrader is at capacity,
+        in which case the caller must mark the session's summary final.
+        """
+        if self.agent.bedrock is None:
+            return False
+        if self.pending >= self.max_pending:
+            self.rejected.inc()
+            return False
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots, self._loop = asyncio.Semaphore(self.max_concurrency), loop
+        task = loop.create_task(self._upgrade(session_id, patient_data, risk_results))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _call_bedrock(self, patient_data: dict, risk_results: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        # Waiting for a slot spends the same budget, so queued upgrades cannot wait indefinitely
+        await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout_seconds)
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            self._slots.release()
+            raise asyncio.TimeoutError()
+        # The deadline travels into the I/O thread, so the AWS guard refuses calls that could not finish in time
+        with request_deadline(remaining):
+            call = asyncio.ensure_future(self.run_io(
+                self.agent.generate_bedrock_summary, patient_data, risk_results, check_cache=False
+            ))
+        # Keep the slot until the thread is done, even if we stop waiting for it
+        call.add_done_callback(lambda _: self._slots.release())
+        call.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return await asyncio.wait_for(asyncio.shield(call), timeout=remaining)
+
+    async def _upgrade(self, session_id: int, patient_data: dict, risk_results: dict):
+        started = time.perf_counter()
+        summary, status = None, SUMMARY_RULE_BASED
+        try:
+            summary = await self._call_bedrock(patient_data, risk_results)
+            status = SUMMARY_BEDROCK
+        except asyncio.TimeoutError:
+            self.timeouts.inc()
+            logger.warning(f"Bedrock summary for session {session_id} timed out after {self.timeout_seconds}s")
+        except Exception as e:
+            logger.warning(f"Bedrock summary for session {session_id} failed: {e}")
+
+        try:
+            await self.run_io(store_summary, self.session_factory, session_id, summary, status)
+        except Exception as e:
+            logger.error(f"Could not store upgraded summary for session {session_id}: {e}")
+            status = SUMMARY_RULE_BASED
+
+        (self.completed if status == SUMMARY_BEDROCK else self.failed).inc()
+        self.latency.observe(time.perf_counter() - started)
+        self._notify(session_id, {"session_id": session_id, "summary_status": status, "clinical_summary": summary})
+
+    def _notify(self, session_id: int, event: dict):
+        for future in self._waiters.pop(session_id, []):
+            if not future.done():
+                future.set_result(event)
+
+    async def wait_for_upgrade(self, session_id: int, timeout: float) -> Optional[dict]:
+        """The upgrade event if this worker finishes the session within timeout, else None."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(session_id, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(session_id)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[session_id]
+
+    async def drain(self):
+        """Wait for in-flight upgrades (shutdown)."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "completed": self.completed.value,
+            "failed": self.failed.value,
+            "timeouts": self.timeouts.value,
+            "rejected": self.rejected.value,
+        }
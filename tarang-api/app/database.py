@@ -1,12 +1,20 @@
-from sqlalchemy import create_engine, Column, String, Float, Integer, JSON, DateTime, ForeignKey, Boolean, text
+from sqlalchemy import create_engine, event, insert, Column, String, Float, Integer, JSON, Date, DateTime, ForeignKey, Boolean, Index
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy_utils import EncryptedType
 from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine
 import datetime
+import json
 import os
 import logging
 
+from app.core.blind_index import blind_index
+from app.core.startup import startup_timer
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -55,6 +63,14 @@ def construct_database_url():
     return "sqlite:///./tarang.db", False
 
 
+def postgres_ssl_mode():
+    """libpq sslmode from DB_SSL (None when SSL is off)."""
+    db_ssl = os.getenv("DB_SSL", "false").lower()
+    if db_ssl in ["true", "require", "verify-full", "verify-ca"]:
+        return db_ssl if db_ssl != "true" else "require"
+    return None
+
+
 def get_database_engine():
     """
     Creates SQLAlchemy engine with appropriate configuration for the database type.
@@ -67,9 +83,8 @@ def get_database_engine():
         connect_args = {}
         
         # SSL Configuration for AWS RDS
-        db_ssl = os.getenv("DB_SSL", "false").lower()
-        if db_ssl in ["true", "require", "verify-full", "verify-ca"]:
-            ssl_mode = db_ssl if db_ssl != "true" else "require"
+        ssl_mode = postgres_ssl_mode()
+        if ssl_mode:
             connect_args["sslmode"] = ssl_mode
             logger.info(f"🔒 PostgreSQL SSL enabled: sslmode={ssl_mode}")
         
@@ -96,8 +111,68 @@ def get_database_engine():
         return engine, database_url
 
 
-# Initialize database engine
+# libpq connection parameters that psycopg2 accepts in the URL query but asyncpg.connect() rejects
+LIBPQ_ONLY_PARAMS = (
+    "sslmode", "sslrootcert", "sslcert", "sslkey", "sslcrl", "sslpassword", "sslcompression",
+    "connect_timeout", "options", "application_name", "client_encoding",
+    "keepalives", "keepalives_idle", "keepalives_interval", "keepalives_count",
+)
+
+
+def async_database_url(database_url):
+    """
+    The same database through its asyncio driver: asyncpg for PostgreSQL, aiosqlite for SQLite.
+    libpq-only query parameters are dropped; asyncpg_connect_args carries over the ones that map.
+    """
+    url = make_url(database_url)
+    drivers = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+    if url.get_backend_name() not in drivers:
+        raise ValueError(f"No asyncio driver configured for {url.get_backend_name()}")
+    if url.get_backend_name() == "postgresql":
+        url = url.difference_update_query(LIBPQ_ONLY_PARAMS)
+    return url.set(drivername=drivers[url.get_backend_name()])
+
+
+def asyncpg_connect_args(database_url):
+    """asyncpg.connect() arguments for the libpq URL parameters and DB_SSL (the URL's sslmode wins)."""
+    query = make_url(database_url).query
+    connect_args = {}
+    ssl_mode = query.get("sslmode") or postgres_ssl_mode()
+    if ssl_mode:
+        connect_args["ssl"] = ssl_mode   # asyncpg takes the libpq mode names
+    if query.get("connect_timeout"):
+        connect_args["timeout"] = float(query["connect_timeout"])
+    if query.get("application_name"):
+        connect_args["server_settings"] = {"application_name": query["application_name"]}
+    dropped = sorted(set(query) & set(LIBPQ_ONLY_PARAMS) - {"sslmode", "connect_timeout", "application_name"})
+    if dropped:
+        logger.warning(f"⚠️ Ignoring libpq-only DATABASE_URL parameters on the async engine: {', '.join(dropped)}")
+    return connect_args
+
+
+def get_async_database_engine(database_url):
+    """
+    asyncio engine for the request handlers, so a query awaits the database
+    instead of blocking the event loop. Same pool sizing as the sync engine,
+    which stays in use for Celery, the CLIs and the remaining sync endpoints.
+    """
+    url = async_database_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        return create_async_engine(
+            url,
+            connect_args=asyncpg_connect_args(database_url),
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            pool_recycle=3600,
+            echo=False
+        )
+    return create_async_engine(url)
+
+
+# Initialize database engines
 engine, DATABASE_URL = get_database_engine()
+async_engine = get_async_database_engine(DATABASE_URL)
 
 # SECRET_KEY must be set in production for PII encryption
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -110,6 +185,8 @@ if not SECRET_KEY:
         raise ValueError("SECRET_KEY environment variable must be set for production database")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit: reloading an expired attribute would need I/O outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -129,6 +206,7 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     full_name = Column(EncryptedType(String, SECRET_KEY, AesEngine, 'pkcs5'))
+    full_name_bidx = Column(String(64), nullable=True, index=True)  # blind_index(full_name, "name")
     role = Column(String, default="parent")  # parent, clinician, admin
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
     is_active = Column(Boolean, default=True)
@@ -138,12 +216,25 @@ class User(Base):
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        # GET /patients: one org, keyset on id
+        Index("ix_patients_org_id_id", "org_id", "id"),
+        # A parent's children (reports, appointments)
+        Index("ix_patients_parent_user_id", "parent_user_id"),
+        # Equality lookups by name / phone within an org, on the blind indexes
+        Index("ix_patients_org_name_bidx", "org_id", "name_bidx", "id"),
+        Index("ix_patients_org_phone_bidx", "org_id", "phone_bidx", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     external_id = Column(String, unique=True, index=True) # Hospital PID
     name = Column(EncryptedType(String, SECRET_KEY, AesEngine, 'pkcs5'))
     date_of_birth = Column(DateTime)
     phone = Column(EncryptedType(String, SECRET_KEY, AesEngine, 'pkcs5'), nullable=True)
     address = Column(EncryptedType(String, SECRET_KEY, AesEngine, 'pkcs5'), nullable=True)
+    # Keyed HMACs of the normalized plaintext (app.core.blind_index), set on every write
+    name_bidx = Column(String(64), nullable=True)
+    phone_bidx = Column(String(64), nullable=True)
+    address_bidx = Column(String(64), nullable=True, index=True)
     org_id = Column(Integer, ForeignKey("organizations.id"))
     
     # Phase 2: Links to Parent and Clinician
@@ -159,6 +250,13 @@ class Patient(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # GET /appointments keysets on (created_at, id) per clinician / per patient
+        Index("ix_appointments_clinician_created", "clinician_id", "created_at", "id"),
+        Index("ix_appointments_patient_created", "patient_id", "created_at", "id"),
+        # A clinician's schedule by start time
+        Index("ix_appointments_clinician_start", "clinician_id", "start_time"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"))
     clinician_id = Column(Integer, ForeignKey("users.id"))
@@ -181,6 +279,11 @@ class ClinicCenter(Base):
 
 class CommunityPost(Base):
     __tablename__ = "community_posts"
+    __table_args__ = (
+        # GET /community: org posts (+ global ones) newest first; users without an org use the second
+        Index("ix_community_posts_org_safe_created", "org_id", "is_safe", "created_at", "id"),
+        Index("ix_community_posts_safe_created", "is_safe", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     author = Column(String)
     content = Column(String)
@@ -207,56 +310,141 @@ class TherapyProgress(Base):
     
     patient = relationship("Patient", back_populates="progress")
 
+def screening_modality(breakdown) -> str:
+    """Report type from the fusion breakdown: whichever of video / questionnaire dominated."""
+    if isinstance(breakdown, str):
+        try:
+            breakdown = json.loads(breakdown)
+        except ValueError:
+            breakdown = {}
+    if not isinstance(breakdown, dict):
+        breakdown = {}
+    b_score = breakdown.get("behavioral") or 0
+    q_score = breakdown.get("questionnaire") or 0
+    if b_score > q_score and b_score > 0:
+        return "Vision Stream"
+    if q_score > b_score and q_score > 0:
+        return "Dev. Log"
+    return "Hybrid Fusion"
+
+
+MODALITIES = ("Vision Stream", "Dev. Log", "Hybrid Fusion")
+
+
 class ScreeningSession(Base):
     __tablename__ = "screening_sessions"
+    __table_args__ = (
+        # GET /reports keysets on (created_at, id) under each of its filters
+        Index("ix_screening_sessions_created", "created_at", "id"),
+        Index("ix_screening_sessions_patient_created", "patient_id", "created_at", "id"),
+        Index("ix_screening_sessions_name_created", "patient_name", "created_at", "id"),
+        Index("ix_screening_sessions_modality_created", "modality", "created_at", "id"),
+        # Legacy name matches against an encrypted full name, joined on the blind index
+        Index("ix_screening_sessions_name_bidx_created", "patient_name_bidx", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=True)
     patient_name = Column(String) # For legacy/fallback
+    patient_name_bidx = Column(String(64), nullable=True)  # blind_index(patient_name, "name")
     risk_score = Column(Float)
     confidence = Column(String)
     dissonance_factor = Column(Float, nullable=True)
     interpretation = Column(String, nullable=True)
     breakdown = Column(JSON)
     clinical_recommendation = Column(String)
+    model_version = Column(String, nullable=True)  # Screening model that produced risk_score
+    clinical_summary = Column(JSON, nullable=True)  # Full summary (title, key findings, source)
+    summary_status = Column(String, nullable=True)  # pending | bedrock | rule_based
+    modality = Column(String, nullable=True)  # screening_modality(breakdown), stored so /reports can filter on it
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     
     patient = relationship("Patient", back_populates="sessions")
 
 
+# (plaintext attribute, blind index column, field kind): ORM writes keep the index in step;
+# Core inserts set it themselves and app.core.blind_index backfills older rows
+BLIND_INDEXES = [
+    (Patient.name, Patient.name_bidx, "name"),
+    (Patient.phone, Patient.phone_bidx, "phone"),
+    (Patient.address, Patient.address_bidx, "address"),
+    (User.full_name, User.full_name_bidx, "name"),
+    (ScreeningSession.patient_name, ScreeningSession.patient_name_bidx, "name"),
+]
+
+
+def _blind_index_writer(index_key, field):
+    def write_blind_index(target, value, oldvalue, initiator):
+        setattr(target, index_key, blind_index(value, field))
+    return write_blind_index
+
+
+for _column, _index_column, _field in BLIND_INDEXES:
+    event.listen(_column, "set", _blind_index_writer(_index_column.key, _field))
+
+
+class PatientSummary(Base):
+    """
+    Per-patient projection of screening history for the clinician worklist.
+    Written in the same transaction as every screening (app.core.patient_summary),
+    so the worklist never has to look at screening_sessions.
+    """
+    __tablename__ = "patient_summaries"
+    __table_args__ = (
+        # Worklist: one org, sorted by risk, keyset on (risk_rank, patient_id)
+        Index("ix_patient_summaries_org_risk", "org_id", "risk_rank", "patient_id"),
+    )
+
+    patient_id = Column(Integer, ForeignKey("patients.id"), primary_key=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
+    latest_risk_score = Column(Float, nullable=True)
+    previous_risk_score = Column(Float, nullable=True)
+    # latest_risk_score, or -1 before the first screening, so keyset pages never compare NULLs
+    risk_rank = Column(Float, nullable=False, default=-1.0)
+    latest_session_id = Column(Integer, nullable=True)
+    latest_session_at = Column(DateTime, nullable=True)
+    session_count = Column(Integer, nullable=False, default=0)
+    trend = Column(String, nullable=True)  # baseline | improving | stable | worsening
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class DailyOrgScreeningStats(Base):
+    """
+    Screenings per organization per UTC day, bucketed by risk. Incremented on
+    every screening insert (app.core.org_stats); center analytics read it
+    instead of counting screening_sessions.
+    """
+    __tablename__ = "daily_org_screening_stats"
+
+    org_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    screenings = Column(Integer, nullable=False, default=0)
+    low_risk = Column(Integer, nullable=False, default=0)
+    medium_risk = Column(Integer, nullable=False, default=0)
+    high_risk = Column(Integer, nullable=False, default=0)
+
+
+def dialect_insert(db, model):
+    """insert() for the session's database, with on_conflict_* on PostgreSQL and SQLite."""
+    insert_fn = {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(db.get_bind().dialect.name, insert)
+    return insert_fn(model)
+
+
+class SchemaMigration(Base):
+    """One row per applied app.core.migrations step."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String)
+    applied_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
 def init_db():
-    """Explicitly create tables + migrate missing columns for production."""
-    Base.metadata.create_all(bind=engine)
-    
-    # Migrate missing columns on existing tables (create_all won't ALTER)
-    if not DATABASE_URL.startswith("sqlite"):
-        _migrate_missing_columns()
-
-
-def _migrate_missing_columns():
-    """Add columns that exist in the ORM but not in the live database."""
-    migrations = [
-        ("screening_sessions", "patient_id", "INTEGER"),
-        ("screening_sessions", "dissonance_factor", "FLOAT"),
-        ("screening_sessions", "interpretation", "VARCHAR"),
-        ("patients", "parent_user_id", "INTEGER"),
-        ("patients", "clinician_id", "INTEGER"),
-    ]
-    
-    db = SessionLocal()
-    try:
-        for table, column, col_type in migrations:
-            try:
-                db.execute(
-                    text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {col_type}")
-                )
-            except Exception:
-                pass  # Column already exists or DB doesn't support IF NOT EXISTS
-        db.commit()
-    except Exception:
-        db.rollback()
-    finally:
-        db.close()
+    """Bring the schema to the latest migration version (one query when already current)."""
+    from app.core.migrations import migrate
+
+    with startup_timer.phase("db_init"):
+        migrate(engine)
 
 
 # Auto-init for development convenience (SQLite only)
@@ -1,8 +1,11 @@
-from fastapi import FastAPI, Body, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from app.core.startup import startup_timer  # first, so the import phase covers the whole module
+from fastapi import FastAPI, Body, Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect, BackgroundTasks
 from typing import List, Dict, Optional, Any
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from app.agents.screening_ml import ScreeningAgent  # ML-powered agent using real UCI data
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.agents.screening_ml import ScreeningAgent, MODEL_SWAPPER, MODEL_REGISTRY, load_bundle  # ML-powered agent using real UCI data
 from app.agents.clinical import ClinicalSupportAgent
 from app.agents.therapy import TherapyPlanningAgent
 from app.agents.outcome import OutcomeAgent
@@ -10,21 +13,37 @@ from app.agents.social import SocialAgent
 from app.agents.clinician import ClinicianAgent
 from app.agents.sre import SREAgent
 from app.agents.demo import DemoAgent
-from app.reports import ReportGenerator
+from app.core import cpu_tasks
+from app.core.execution import cpu_pool, io_pool, PoolSaturatedError
+from app.core.aws_client import AWSServiceUnavailable, aws_client_manager, request_deadline
+from app.core.shadow import ShadowEvaluator
+from app.core.summary_upgrade import (
+    SummaryUpgrader, SUMMARY_PENDING, SUMMARY_BEDROCK, SUMMARY_RULE_BASED, summary_status_for, store_summary
+)
+from app.core.summary_stream import sse_event, stream_blocking
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, day_bounds, keyset, set_next_cursor, split_page
+from app.core.patient_summary import ensure_summaries, record_screenings, worklist_page
+from app.core.org_stats import BUCKETS as RISK_BUCKETS, MAX_ANALYTICS_DAYS, daily_stats, record_daily_stats
+from app.core.blind_index import blind_index
+from app.core.audio_cache import AudioCache, audio_etag, is_audio_key
+from app.core.speech import (
+    POLLY_MAX_TEXT_CHARS, iter_audio, sequence_key, speech_key, split_sentences, start_synthesis,
+    synthesize_in_order, synthesize_segment
+)
 from app.fhir import FHIRMapper
 from app.schemas import (
-    ScreeningBase, CommunityPostCreate, AppointmentSchedule,
+    ScreeningBase, ScreeningBatchCreate, CommunityPostCreate, AppointmentSchedule,
     UserCreate, UserOut, Token, TokenData, OrganizationCreate, PatientCreate,
     TherapyProgressCreate, TherapyProgressOut, ClinicalPatientCreate,
     UserSearchOut, PatientLinkRequest, AppointmentCreate, AppointmentOut,
-    CenterAnalyticsOut
+    CenterAnalyticsOut, ModelSwapRequest, ShadowModelRequest
 )
 from app.security import (
     get_current_user, get_password_hash, verify_password, create_access_token
 )
 from app.database import (
-    SessionLocal, ScreeningSession, ClinicCenter, CommunityPost,
-    User, Organization, Patient, init_db, Appointment
+    SessionLocal, AsyncSessionLocal, ScreeningSession, ClinicCenter, CommunityPost,
+    User, Organization, Patient, init_db, Appointment, MODALITIES, screening_modality
 )
 from fastapi.security import OAuth2PasswordRequestForm
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -32,10 +51,13 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from starlette.requests import Request
 from starlette.responses import Response
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
 import uvicorn
 from app.config import settings
+import asyncio
+import io
 import json
+import os
 import re
 import logging
 import datetime
@@ -97,6 +119,36 @@ app = FastAPI(
 @app.on_event("startup")
 def on_startup():
     init_db()
+    # STS check runs in the background; AWS clients report unavailable until it passes
+    aws_client_manager.start_credential_validation()
+    startup_timer.report()
+
+@app.on_event("shutdown")
+async def drain_summary_upgrades():
+    # Let in-flight Bedrock upgrades land before the I/O pool goes away
+    try:
+        await asyncio.wait_for(summary_upgrader.drain(), timeout=settings.SUMMARY_UPGRADE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"{summary_upgrader.pending} summary upgrades abandoned at shutdown")
+
+@app.on_event("shutdown")
+def stop_execution_pools():
+    cpu_pool.shutdown(wait=False)
+    io_pool.shutdown(wait=False)
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    logger.warning(f"Execution pool saturated: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Server busy, retry shortly"}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_model_registry_watch():
+    # Each worker follows the registry manifest and hot swaps in the background
+    if settings.MODEL_REGISTRY_POLL_SECONDS > 0:
+        asyncio.get_running_loop().create_task(MODEL_SWAPPER.watch(settings.MODEL_REGISTRY_POLL_SECONDS))
+        asyncio.get_running_loop().create_task(shadow_evaluator.watch(settings.MODEL_REGISTRY_POLL_SECONDS))
+    elif MODEL_REGISTRY.shadow_version():
+        await shadow_evaluator.set_candidate(MODEL_REGISTRY.shadow_version())
 
 # CORS must be added FIRST so it wraps all responses (including error responses)
 _required_origins = ["https://tarang-autism.vercel.app", "https://tarang-autism.vercel.app/", "http://localhost:3000"]
@@ -135,6 +187,12 @@ async def limit_request_size(request: Request, call_next):
         return Response(content="Payload too large", status_code=413)
     return await call_next(request)
 
+# Time budget for the AWS calls made while serving a request (propagated via contextvars)
+@app.middleware("http")
+async def aws_request_deadline(request: Request, call_next):
+    with request_deadline(settings.REQUEST_DEADLINE_SECONDS or None):
+        return await call_next(request)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -143,9 +201,34 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """asyncio session for hot endpoints: queries are awaited, so other requests run meanwhile."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def record_projections(db: Session, persisted: List[dict]):
+    """Worklist projection and daily rollup for new sessions, in the caller's transaction."""
+    record_screenings(db, persisted)
+    record_daily_stats(db, persisted)
+
 # Initialize Agents
 screening_agent = ScreeningAgent()
+shadow_evaluator = ShadowEvaluator(
+    screening_agent, MODEL_REGISTRY, load_bundle, settings.SHADOW_LOG_PATH,
+    queue_size=settings.SHADOW_QUEUE_SIZE, sample_rate=settings.SHADOW_SAMPLE_RATE,
+    max_log_bytes=int(settings.SHADOW_LOG_MAX_MB * 1024 * 1024), summary_limit=settings.SHADOW_SUMMARY_LIMIT
+)
+screening_agent.shadow = shadow_evaluator
 clinical_agent = ClinicalSupportAgent()
+summary_upgrader = SummaryUpgrader(
+    clinical_agent, SessionLocal, io_pool.run,
+    timeout_seconds=settings.SUMMARY_UPGRADE_TIMEOUT_SECONDS,
+    max_concurrency=settings.SUMMARY_UPGRADE_CONCURRENCY,
+    max_pending=settings.SUMMARY_UPGRADE_MAX_PENDING
+)
+# Synthesized speech on disk, shared by the workers on this host (None when disabled)
+audio_cache = AudioCache.from_settings(settings)
 therapy_agent = TherapyPlanningAgent()
 outcome_agent = OutcomeAgent()
 social_agent = SocialAgent()
@@ -181,12 +264,24 @@ def health_check():
         polly_available = aws_client_manager.get_polly_client() is not None
         health_status["aws_services"] = {
             "bedrock": "available" if bedrock_available else "unavailable",
-            "polly": "available" if polly_available else "unavailable"
+            "polly": "available" if polly_available else "unavailable",
+            "credentials": aws_client_manager.credential_status(),
+            "resilience": aws_client_manager.resilience_stats()
         }
     except Exception as e:
         logger.warning(f"AWS health check failed: {e}")
         health_status["aws_services"] = "check_failed"
     
+    health_status["startup"] = startup_timer.as_dict()
+    
+    # Resident model footprint for this worker (shared pages when memory-mapped)
+    try:
+        from app.agents.screening_ml import model_footprint
+        health_status["model"] = model_footprint()
+    except Exception as e:
+        logger.warning(f"Model footprint check failed: {e}")
+        health_status["model"] = "check_failed"
+    
     return health_status
 
 # --- AUTH & TENANCY ROUTES ---
@@ -352,12 +447,13 @@ async def update_profile(
 @app.get("/users/dashboard")
 async def get_dashboard_data(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Get user's screening sessions
-    sessions = db.query(ScreeningSession).filter(
-        ScreeningSession.patient_name == current_user.sub
-    ).order_by(ScreeningSession.created_at.desc()).limit(10).all()
+    sessions = (await db.execute(
+        select(ScreeningSession).where(ScreeningSession.patient_name == current_user.sub)
+        .order_by(ScreeningSession.created_at.desc()).limit(10)
+    )).scalars().all()
     
     # Calculate stats
     total_screenings = len(sessions)
@@ -403,7 +499,11 @@ async def get_dashboard_data(
     # Phase 2: Care Team
     care_team = []
     primary_patient_id = None
-    user = db.query(User).filter(User.email == current_user.sub).first()
+    # Children and their clinicians are loaded up front: lazy loads cannot run on an async session
+    user = (await db.execute(
+        select(User).where(User.email == current_user.sub)
+        .options(selectinload(User.children).joinedload(Patient.clinician))
+    )).scalars().first()
     if user and user.role == "parent":
         for child in user.children:
             if child.clinician:
@@ -429,65 +529,51 @@ async def get_dashboard_data(
         "primary_patient_id": primary_patient_id
     }
 
-@app.get("/reports")
-async def get_reports(
-    current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    # Get user's screening sessions as reports
-    sessions = db.query(ScreeningSession).filter(
-        ScreeningSession.patient_name == current_user.sub
-    ).order_by(ScreeningSession.created_at.desc()).all()
-    
-    reports = []
-    for session in sessions:
-        reports.append({
-            "id": session.id,
-            "sid": f"#TR-{session.id + 8800}",
-            "date": session.created_at.strftime("%b %d, %Y"),
-            "type": "Clinical Fusion" if session.risk_score > 60 else "Gaze Baseline",
-            "patient": session.patient_name,
-            "risk": f"{session.risk_score:.1f}%" if session.risk_score else "N/A",
-            "status": "Available"
-        })
-    
-    return reports
-
 @app.get("/clinical/patients")
 async def get_clinical_patients(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: str = "risk_desc",
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Clinician worklist from the patient summary projection: one indexed query
+    per page whatever the screening history. The next page's cursor is sent
+    in the X-Next-Cursor header.
+    """
     # Only for clinicians/admins
     require_role(current_user, ["CLINICIAN", "ADMIN"])
-    
-    # Get patients from same organization
-    patients = db.query(Patient).filter(
-        Patient.org_id == current_user.org_id
-    ).limit(20).all()
-    
+
+    try:
+        rows, next_cursor = await db.run_sync(worklist_page, current_user.org_id, limit=limit, cursor=cursor, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor)
+
     result = []
-    for patient in patients:
-        # Get latest session for each patient
-        latest_session = db.query(ScreeningSession).filter(
-            ScreeningSession.patient_id == patient.id
-        ).order_by(ScreeningSession.created_at.desc()).first()
-        
+    for summary, external_id, name in rows:
+        risk_score = summary.latest_risk_score
         risk_level = "Low"
-        if latest_session and latest_session.risk_score:
-            if latest_session.risk_score > 70:
+        if risk_score:
+            if risk_score > 70:
                 risk_level = "High"
-            elif latest_session.risk_score > 50:
+            elif risk_score > 50:
                 risk_level = "Medium"
-        
+
         result.append({
-            "id": patient.external_id,
-            "name": patient.name,
+            "id": external_id,
+            "name": name,
             "risk": risk_level,
-            "stability": f"{latest_session.risk_score:.1f}%" if latest_session and latest_session.risk_score else "N/A",
+            "stability": f"{risk_score:.1f}%" if risk_score else "N/A",
+            "riskScore": risk_score,
+            "trend": summary.trend,
+            "sessions": summary.session_count,
+            "lastScreened": summary.latest_session_at.isoformat() if summary.latest_session_at else None,
             "nextDrill": "11:30"  # Placeholder
         })
-    
+
     return result
 
 @app.post("/clinical/patients")
@@ -532,6 +618,8 @@ async def create_clinical_patient(
         new_patient.clinician_id = doc_user.id
 
     db.add(new_patient)
+    db.flush()
+    ensure_summaries(db, [new_patient.id])
     db.commit()
     db.refresh(new_patient)
     
@@ -543,7 +631,8 @@ async def create_clinical_patient(
 async def process_screening_industrial(
     request: Request,
     payload: ScreeningBase,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     # Industrial isolation: Parents see only their sub-scoped data, 
@@ -558,8 +647,28 @@ async def process_screening_industrial(
     """
     try:
         # 1. Immediate Screen Result (Hybrid - Optimized Screening Agent)
-        risk_results = screening_agent.analyze_signals(video_metrics, questionnaire_score)
-        clinical_summary = clinical_agent.generate_summary({"name": patient_name}, risk_results)
+        if screening_agent.batcher is not None or shadow_evaluator.candidate is not None:
+            # Micro-batched in this worker: one vectorized call per window beats a process hop per request.
+            # Shadow samples are queued only after the response has been sent.
+            risk_results = await screening_agent.analyze_signals_async(
+                video_metrics, questionnaire_score, defer=background_tasks.add_task
+            )
+        else:
+            risk_results = await cpu_pool.run(
+                cpu_tasks.analyze_signals, video_metrics, questionnaire_score,
+                model_version=screening_agent.model_version
+            )
+        upgrade_summary = False
+        if settings.CLINICAL_SUMMARY_MODE == "background":
+            # Stale-while-revalidate: answer now, upgrade the stored summary via Bedrock afterwards
+            clinical_summary = clinical_agent.cached_summary(risk_results)
+            if clinical_summary is None:
+                clinical_summary = clinical_agent.generate_summary({"name": patient_name}, risk_results, use_bedrock=False)
+                upgrade_summary = summary_upgrader.has_capacity()
+        else:
+            # Bedrock call is blocking network I/O
+            clinical_summary = await io_pool.run(clinical_agent.generate_summary, {"name": patient_name}, risk_results)
+        summary_status = SUMMARY_PENDING if upgrade_summary else summary_status_for(clinical_summary)
         
         # 2. Persistence (optional - don't fail if DB is unavailable)
         session_id = None
@@ -586,10 +695,12 @@ async def process_screening_industrial(
             final_patient_id = patient_id
             if not final_patient_id or final_patient_id == 0:
                 # Try to find if 'patient_id' passed was actually a User ID (common frontend mixup)
-                possible_parent = db.query(User).filter(User.id == patient_id).first()
+                possible_parent = (await db.execute(select(User).where(User.id == patient_id))).scalars().first()
                 if possible_parent:
                     # Check if this parent has a child
-                    child = db.query(Patient).filter(Patient.parent_user_id == possible_parent.id).first()
+                    child = (await db.execute(
+                        select(Patient).where(Patient.parent_user_id == possible_parent.id)
+                    )).scalars().first()
                     if child:
                         final_patient_id = child.id
                     else:
@@ -601,7 +712,7 @@ async def process_screening_industrial(
                             parent_user_id=possible_parent.id
                         )
                         db.add(new_child)
-                        db.flush() # Get ID
+                        await db.flush() # Get ID
                         final_patient_id = new_child.id
                         logger.info(f"Auto-created child profile {final_patient_id} for user {possible_parent.id}")
 
@@ -613,16 +724,32 @@ async def process_screening_industrial(
                 dissonance_factor=risk_results.get("dissonance_factor"),
                 interpretation=risk_results.get("interpretation"),
                 breakdown=risk_results["breakdown"],
-                clinical_recommendation=clinical_summary["clinical_recommendation"]
+                modality=screening_modality(risk_results["breakdown"]),
+                clinical_recommendation=clinical_summary["clinical_recommendation"],
+                clinical_summary=clinical_summary,
+                summary_status=summary_status,
+                model_version=risk_results.get("model_info", {}).get("model_version")
             )
             db.add(db_session)
-            db.commit()
-            db.refresh(db_session)
+            await db.flush()
+            # Worklist projection and daily rollup move in the same transaction as the session
+            persisted = [{"id": db_session.id, "patient_id": db_session.patient_id,
+                          "risk_score": db_session.risk_score, "created_at": db_session.created_at}]
+            await db.run_sync(record_projections, persisted)
+            await db.commit()
+            await db.refresh(db_session)
             session_id = db_session.id
             logger.info("Persisted successfully", extra={"session_id": session_id})
+            if upgrade_summary and not summary_upgrader.schedule(session_id, {"name": patient_name}, risk_results):
+                # Filled up since has_capacity(): nothing will upgrade the row, so its summary is final
+                summary_status = SUMMARY_RULE_BASED
+                await db.execute(
+                    update(ScreeningSession).where(ScreeningSession.id == session_id).values(summary_status=summary_status)
+                )
+                await db.commit()
         except Exception as db_error:
             logger.error(f"❌ DB persistence failed: {str(db_error)}")
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=f"Database Persistence Failed: {str(db_error)}")
         
         # 3. Offload Heavy AI to Worker (optional)
@@ -639,100 +766,201 @@ async def process_screening_industrial(
             "session_id": session_id,
             "risk_results": risk_results,
             "clinical_summary": clinical_summary,
+            "summary_status": summary_status,
             "therapy_plan": therapy_agent.create_plan(risk_results),
             "async_status": async_status,
             "report_url": f"/reports/{session_id}/download" if session_id else None
         }
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Industrial processing failure: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 
+@app.post("/screening/batch")
+@limiter.limit("5/minute")
+async def process_screening_batch(
+    request: Request,
+    payload: ScreeningBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Bulk intake for a clinic day: one vectorized ML pass and one bulk insert
+    for every submission. Summaries use the rule-based engine so the batch
+    does not wait on one Bedrock call per record.
+    """
+    require_role(current_user, ["CLINICIAN", "ADMIN"])
+
+    try:
+        risk_batch = sanitize_numpy(await cpu_pool.run(
+            cpu_tasks.analyze_batch,
+            [
+                {"video_metrics": item.video_metrics, "questionnaire_score": item.questionnaire_score}
+                for item in payload.items
+            ],
+            model_version=screening_agent.model_version
+        ))
+    except PoolSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch processing failure: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+    rows = []
+    for item, risk_results in zip(payload.items, risk_batch):
+        clinical_summary = clinical_agent.generate_summary(
+            {"name": item.patient_name}, risk_results, use_bedrock=False
+        )
+        rows.append({
+            "patient_name": item.patient_name,
+            "patient_name_bidx": blind_index(item.patient_name, "name"),   # Core insert: no attribute events
+            "patient_id": item.patient_id or None,
+            "risk_score": risk_results["risk_score"],
+            "confidence": risk_results["confidence"],
+            "dissonance_factor": risk_results.get("dissonance_factor"),
+            "interpretation": risk_results.get("interpretation"),
+            "breakdown": risk_results["breakdown"],
+            "modality": screening_modality(risk_results["breakdown"]),
+            "clinical_recommendation": clinical_summary["clinical_recommendation"],
+            "clinical_summary": clinical_summary,
+            "summary_status": summary_status_for(clinical_summary),
+            "model_version": risk_results.get("model_info", {}).get("model_version")
+        })
+
+    try:
+        inserted = (await db.execute(
+            insert(ScreeningSession).returning(
+                ScreeningSession.id, ScreeningSession.created_at, sort_by_parameter_order=True
+            ),
+            rows
+        )).all()
+        persisted = [
+            dict(row, id=session_id, created_at=created_at)
+            for (session_id, created_at), row in zip(inserted, rows)
+        ]
+        await db.run_sync(record_projections, persisted)
+        await db.commit()
+        session_ids = [session_id for session_id, _ in inserted]
+    except Exception as db_error:
+        logger.error(f"❌ Batch persistence failed: {str(db_error)}")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database Persistence Failed: {str(db_error)}")
+
+    logger.info("Batch screening complete", extra={"count": len(session_ids)})
+
+    return {
+        "count": len(session_ids),
+        "results": [
+            {
+                "session_id": session_id,
+                "patient_name": row["patient_name"],
+                "risk_results": risk_results,
+                "clinical_recommendation": row["clinical_recommendation"],
+                "report_url": f"/reports/{session_id}/download"
+            }
+            for session_id, row, risk_results in zip(session_ids, rows, risk_batch)
+        ]
+    }
+
+
 @app.post("/reports/generate")
 async def generate_report_pdf(data: dict = Body(...), current_user: TokenData = Depends(get_current_user)):
     """
     Generates a PDF report on-the-fly from provided session data.
     """
     try:
-        pdf_buffer = ReportGenerator.generate_clinical_pdf(data)
+        pdf_bytes = await cpu_pool.run(cpu_tasks.render_clinical_pdf, data)
         return StreamingResponse(
-            pdf_buffer, 
+            io.BytesIO(pdf_bytes), 
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename=tarang_report_generated.pdf"}
         )
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"PDF Generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Report generation failed")
 
 @app.get("/reports")
 async def get_reports(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    min_risk: Optional[float] = None,
+    max_risk: Optional[float] = None,
+    modality: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """
-    Returns list of screening reports based on RBAC.
+    Returns screening reports based on RBAC, newest first, one keyset page at a
+    time (next page cursor in X-Next-Cursor). Date, risk and modality filters
+    run in SQL.
     """
+    if modality is not None and modality not in MODALITIES:
+        raise HTTPException(status_code=400, detail=f"modality must be one of {', '.join(MODALITIES)}")
+
     # Normalize role to uppercase for robust check
     role = current_user.role.upper() if current_user.role else ""
-    
+
+    query = select(ScreeningSession)
     if role in ["CLINICIAN", "ADMIN"]:
-        # Clinicians see ALL reports (Global/Org view)
-        # In a strict multi-tenant setup, we'd filter by Org, but for this demo/MVP, seeing all is better than seeing none.
-        sessions = db.query(ScreeningSession).order_by(ScreeningSession.created_at.desc()).all()
+        # Clinicians see their organization's reports (all reports when not in one)
+        if current_user.org_id:
+            query = query.filter(ScreeningSession.patient_id.in_(
+                select(Patient.id).where(Patient.org_id == current_user.org_id)
+            ))
     else:
         # Parents see their linked patients + legacy name matches
-        user = db.query(User).filter(User.email == current_user.sub).first()
-        children_ids = []
-        if user:
-            children_ids = [c.id for c in db.query(Patient).filter(Patient.parent_user_id == user.id).all()]
-        
-        from sqlalchemy import or_
-        
+        parent = select(User.id).where(User.email == current_user.sub).scalar_subquery()
+        parent_name = select(User.full_name_bidx).where(User.email == current_user.sub).scalar_subquery()
+
         # Hybrid Query: Match by Child ID OR Exact Email Match OR Full Name Match
-        # This covers all historical data inconsistencies
-        sessions = db.query(ScreeningSession).filter(
+        # This covers all historical data inconsistencies. The name match compares blind
+        # indexes, so it is one indexed query without loading and decrypting the user.
+        query = query.filter(
             or_(
-                ScreeningSession.patient_id.in_(children_ids) if children_ids else False,
+                ScreeningSession.patient_id.in_(select(Patient.id).where(Patient.parent_user_id == parent)),
                 ScreeningSession.patient_name == current_user.sub,
-                ScreeningSession.patient_name == (user.full_name if user else "")
+                ScreeningSession.patient_name_bidx == parent_name
             )
-        ).order_by(ScreeningSession.created_at.desc()).all()
-        
-        print(f"DEBUG: Reports - User: {current_user.sub}, Children: {children_ids}, Found Sessions: {len(sessions)}")
-    
-    result = []
-    for s in sessions:
-        # Robust parsing of breakdown (handle str or dict or None)
-        breakdown = s.breakdown or {}
-        if isinstance(breakdown, str):
-            try:
-                import json as _json
-                breakdown = _json.loads(breakdown)
-            except Exception:
-                breakdown = {}
-        
-        # Determine modality type from weights
-        modality = "Hybrid Fusion"
-        b_score = 0
-        q_score = 0
-        if isinstance(breakdown, dict):
-            b_score = breakdown.get("behavioral", 0)
-            q_score = breakdown.get("questionnaire", 0)
-            
-        if b_score > q_score and b_score > 0:
-            modality = "Vision Stream"
-        elif q_score > b_score and q_score > 0:
-            modality = "Dev. Log"
+        )
 
-        result.append({
+    lower, upper = day_bounds(start, end)
+    if lower is not None:
+        query = query.filter(ScreeningSession.created_at >= lower)
+    if upper is not None:
+        query = query.filter(ScreeningSession.created_at < upper)
+    if min_risk is not None:
+        query = query.filter(ScreeningSession.risk_score >= min_risk)
+    if max_risk is not None:
+        query = query.filter(ScreeningSession.risk_score <= max_risk)
+    if modality is not None:
+        query = query.filter(ScreeningSession.modality == modality)
+
+    try:
+        query = keyset(query, (ScreeningSession.created_at, ScreeningSession.id), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sessions, next_cursor = split_page((await db.execute(query)).scalars().all(), limit,
+                                       lambda s: (s.created_at, s.id))
+    set_next_cursor(response, next_cursor)
+
+    return [
+        {
             "id": s.id,
             "sid": f"RPT-{s.id:04d}",
             "date": s.created_at.strftime("%b %d, %Y"),
-            "type": modality,
+            "type": s.modality or screening_modality(s.breakdown),
             "risk": f"{int(s.risk_score)}%" if s.risk_score is not None else "N/A",
             "status": "Available" if s.clinical_recommendation else "Processing"
-        })
-    return result
+        }
+        for s in sessions
+    ]
 
 
 @app.get("/reports/{session_id}/download")
@@ -758,9 +986,9 @@ async def download_report(session_id: int, db: Session = Depends(get_db), curren
         "clinical_recommendation": session.clinical_recommendation
     }
     
-    pdf_buffer = ReportGenerator.generate_clinical_pdf(report_data)
+    pdf_bytes = await cpu_pool.run(cpu_tasks.render_clinical_pdf, report_data)
     return StreamingResponse(
-        pdf_buffer, 
+        io.BytesIO(pdf_bytes), 
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename=tarang_report_{session_id}.pdf"}
     )
@@ -793,9 +1021,132 @@ async def get_report_detail(
         "interpretation": session.interpretation,
         "breakdown": session.breakdown,
         "clinical_recommendation": session.clinical_recommendation,
+        "clinical_summary": session.clinical_summary,
+        "summary_status": session.summary_status,
         "created_at": session.created_at.isoformat() if session.created_at else None
     }
 
+@app.get("/reports/{session_id}/summary/stream")
+async def stream_report_summary(
+    session_id: int,
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Server-sent events for a session's clinical summary, generated with Bedrock
+    response streaming: start, token (raw text deltas), finding (each
+    key_findings entry once complete), field (title / recommendation / status),
+    error (Bedrock failed, rule-based follows) and complete (the persisted result).
+    Sessions that already hold a Bedrock summary replay it without a new call.
+    """
+    session = db.query(ScreeningSession).filter(ScreeningSession.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    patient = db.query(Patient).filter(Patient.id == session.patient_id).first() if session.patient_id else None
+    if patient and patient.org_id != current_user.org_id:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    patient_data = {"name": session.patient_name}
+    risk_results = {
+        "risk_score": session.risk_score,
+        "confidence": session.confidence,
+        "dissonance_factor": session.dissonance_factor,
+        "interpretation": session.interpretation,
+        "breakdown": session.breakdown,
+    }
+    stored = session.clinical_summary if session.summary_status == SUMMARY_BEDROCK else None
+
+    async def events():
+        yield sse_event("start", {"session_id": session_id})
+        summary = stored
+        if summary is None:
+            async for item in stream_blocking(
+                lambda stopped: clinical_agent.stream_summary(patient_data, risk_results, stopped), io_pool.run
+            ):
+                if item[0] == "token":
+                    yield sse_event("token", {"text": item[1]})
+                elif item[0] == "finding":
+                    yield sse_event("finding", {"index": item[1], "text": item[2]})
+                elif item[0] == "field":
+                    yield sse_event("field", {"name": item[1], "value": item[2]})
+                elif item[0] == "error":
+                    yield sse_event("error", {"detail": item[1]})
+                elif item[0] == "complete":
+                    summary = item[1]
+            await io_pool.run(store_summary, SessionLocal, session_id, summary, summary_status_for(summary))
+        else:
+            for index, finding in enumerate(summary.get("key_findings", [])):
+                yield sse_event("finding", {"index": index, "text": finding})
+        yield sse_event("complete", {
+            "session_id": session_id,
+            "summary_status": summary_status_for(summary),
+            "clinical_summary": summary,
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _summary_state(db: AsyncSession, session_id: int):
+    """(id, summary_status, clinical_summary, patient org_id) of a session, or None; read fresh each call."""
+    row = (await db.execute(
+        select(ScreeningSession.id, ScreeningSession.summary_status, ScreeningSession.clinical_summary, Patient.org_id)
+        .outerjoin(Patient, Patient.id == ScreeningSession.patient_id)
+        .where(ScreeningSession.id == session_id)
+    )).first()
+    await db.rollback()   # end the read so the connection returns to the pool between polls
+    return row
+
+@app.websocket("/ws/reports/{session_id}/summary")
+async def report_summary_updates(websocket: WebSocket, session_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Push channel for background summary upgrades (CLINICAL_SUMMARY_MODE=background).
+    Sends {"session_id", "summary_status", "clinical_summary"} once the summary is
+    final (bedrock or rule_based), then closes. Requires ?token=<JWT> from a user
+    in the patient's organization.
+    """
+    from app.security import decode_websocket_token
+    token = websocket.query_params.get("token")
+    current_user = decode_websocket_token(token) if token else None
+    if not current_user:
+        await websocket.close(code=1008, reason="Invalid authentication token")
+        return
+
+    row = await _summary_state(db, session_id)
+    if row is None:
+        await websocket.close(code=1008, reason="Session not found")
+        return
+    # Security: same check as the SSE and FHIR endpoints
+    if row.org_id is not None and row.org_id != current_user.org_id:
+        await websocket.close(code=1008, reason="Unauthorized")
+        return
+
+    await websocket.accept()
+    deadline = asyncio.get_running_loop().time() + settings.SUMMARY_UPGRADE_TIMEOUT_SECONDS * 2 + 5
+    try:
+        while True:
+            if row is None:
+                await websocket.close(code=1008, reason="Session not found")
+                return
+            event = {
+                "session_id": row.id,
+                "summary_status": row.summary_status,
+                "clinical_summary": row.clinical_summary,
+            }
+            if event["summary_status"] != SUMMARY_PENDING or asyncio.get_running_loop().time() >= deadline:
+                break
+            # Notified instantly when this worker runs the upgrade; re-read the row otherwise
+            event = await summary_upgrader.wait_for_upgrade(session_id, timeout=1.0)
+            if event:
+                break
+            row = await _summary_state(db, session_id)
+        await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/reports/{session_id}/fhir")
 async def export_fhir_report(
     session_id: int,
@@ -887,11 +1238,15 @@ async def screening_signaling(websocket: WebSocket, room_id: str):
 
 @app.get("/analytics/center", response_model=CenterAnalyticsOut)
 async def get_center_analytics(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Multitenant Analytics: Returns aggregate stats for the clinician's organization.
+    Without a date range, totals cover all time and weekly_activity the last 7 days;
+    with start and/or end, totals and the per-day activity cover that range.
     """
     require_role(current_user, ["CLINICIAN", "ADMIN"])
 
@@ -910,44 +1265,39 @@ async def get_center_analytics(
     if not current_user.org_id:
         raise HTTPException(status_code=400, detail="User not part of an organization")
 
-    # 1. Total Patients in Org
-    total_patients = db.query(Patient).filter(Patient.org_id == current_user.org_id).count()
-
-    # 2. Get all screenings for patients in this org
-    # Join ScreeningSession -> Patient -> org_id check
-    sessions_query = db.query(ScreeningSession).join(Patient).filter(Patient.org_id == current_user.org_id)
-    total_screenings = sessions_query.count()
-
-    # 3. High Risk Count (risk_score > 0.7 or similar logic, assuming 'risk_score' is float 0-1)
-    # Adjust threshold based on your ML model calibration
-    high_risk_count = sessions_query.filter(ScreeningSession.risk_score >= 0.8).count()
-
-    # 4. Risk Distribution
-    low_risk = sessions_query.filter(ScreeningSession.risk_score < 0.4).count()
-    med_risk = sessions_query.filter(ScreeningSession.risk_score >= 0.4, ScreeningSession.risk_score < 0.8).count()
-    
-    # 5. Weekly Activity (Last 7 days)
     today = datetime.datetime.utcnow().date()
-    weekly_activity = []
-    for i in range(7):
-        day = today - datetime.timedelta(days=6-i) # Start 6 days ago
-        count = sessions_query.filter(
-            ScreeningSession.created_at >= day,
-            ScreeningSession.created_at < day + datetime.timedelta(days=1)
-        ).count()
-        weekly_activity.append(count)
+    ranged = start is not None or end is not None
+    end = end or today
+    start = start or end - datetime.timedelta(days=6)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_ANALYTICS_DAYS} days")
+
+    total_patients = await db.scalar(select(func.count(Patient.id)).where(Patient.org_id == current_user.org_id))
+
+    # Daily rollup rows: O(days), not O(sessions)
+    rows = await db.run_sync(daily_stats, current_user.org_id, start if ranged else None, end if ranged else None)
+    totals = dict.fromkeys(("screenings",) + RISK_BUCKETS, 0)
+    per_day = {}
+    for row in rows:
+        per_day[row.day] = row.screenings
+        for column in totals:
+            totals[column] += getattr(row, column)
 
     return CenterAnalyticsOut(
         org_id=current_user.org_id,
         total_patients=total_patients,
-        total_screenings=total_screenings,
-        high_risk_count=high_risk_count,
+        total_screenings=totals["screenings"],
+        high_risk_count=totals["high_risk"],
         risk_distribution={
-            "Low": low_risk,
-            "Medium": med_risk,
-            "High": high_risk_count
+            "Low": totals["low_risk"],
+            "Medium": totals["medium_risk"],
+            "High": totals["high_risk"]
         },
-        weekly_activity=weekly_activity
+        weekly_activity=[per_day.get(start + datetime.timedelta(days=i), 0) for i in range((end - start).days + 1)],
+        start_date=start,
+        end_date=end
     )
 
 @app.get("/users/search", response_model=List[UserSearchOut])
@@ -1039,26 +1389,45 @@ async def create_appointment(
 
 @app.get("/appointments", response_model=List[AppointmentOut])
 async def get_appointments(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
     db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
+    """
+    The caller's appointments, most recently requested first, one keyset page at
+    a time (next page cursor in X-Next-Cursor); start/end filter on start_time.
+    """
     user = db.query(User).filter(User.email == current_user.sub).first()
     if not user:
         return []
         
     if user.role == "CLINICIAN":
-        apps = db.query(Appointment).filter(Appointment.clinician_id == user.id).all()
+        query = db.query(Appointment).filter(Appointment.clinician_id == user.id)
     elif user.role == "PARENT":
-        # Find children
-        children_ids = [c.id for c in user.children] # via backref
-        # OR query directly if backref is tricky in sync
-        # children = db.query(Patient).filter(Patient.parent_user_id == user.id).all()
-        # For robustness let's query:
-        apps = db.query(Appointment).join(Patient).filter(Patient.parent_user_id == user.id).all()
+        query = db.query(Appointment).filter(Appointment.patient_id.in_(
+            select(Patient.id).where(Patient.parent_user_id == user.id)
+        ))
     else:
-        apps = []
-        
-    # Hydrate names manually or via joinedload (keeping simple here)
+        return []
+
+    lower, upper = day_bounds(start, end)
+    if lower is not None:
+        query = query.filter(Appointment.start_time >= lower)
+    if upper is not None:
+        query = query.filter(Appointment.start_time < upper)
+    try:
+        query = keyset(query.options(joinedload(Appointment.clinician), joinedload(Appointment.patient)),
+                       (Appointment.created_at, Appointment.id), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    apps, next_cursor = split_page(query.all(), limit, lambda a: (a.created_at, a.id))
+    set_next_cursor(response, next_cursor)
+
+    # Names come with the page (joinedload): no query per appointment
     for app in apps:
         app.clinician_name = app.clinician.full_name if app.clinician else "Unknown"
         app.patient_name = app.patient.name if app.patient else "Unknown"
@@ -1114,8 +1483,7 @@ async def get_patient_prediction(
             else:
                 return {"patient": patient_name, "historical_count": 0, "prediction": None, "clinical_insight": None, "history": []}
             
-        prediction = outcome_agent.predict_trajectory(scores)
-        alert = outcome_agent.generate_intervention_alert(prediction)
+        prediction, alert = await cpu_pool.run(cpu_tasks.predict_outcome, scores)
         
         return sanitize_numpy({
             "patient": patient_name,
@@ -1124,6 +1492,8 @@ async def get_patient_prediction(
             "clinical_insight": alert,
             "history": scores
         })
+    except PoolSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Prediction endpoint error: {e}")
         return {"patient": patient_name, "historical_count": 0, "prediction": None, "clinical_insight": None, "history": [], "error": str(e)}
@@ -1154,24 +1524,39 @@ async def get_centers(
 
 @app.get("/community")
 async def get_community_posts(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
     db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
+    # Industrial: Filter posts by Organization (with safety for None org_id)
+    filters = [CommunityPost.is_safe == 1]
+    if current_user.org_id:
+        filters.append(or_(CommunityPost.org_id == current_user.org_id, CommunityPost.org_id == None))
+    lower, upper = day_bounds(start, end)
+    if lower is not None:
+        filters.append(CommunityPost.created_at >= lower)
+    if upper is not None:
+        filters.append(CommunityPost.created_at < upper)
     try:
-        from sqlalchemy import or_
-        # Industrial: Filter posts by Organization (with safety for None org_id)
-        filters = [CommunityPost.is_safe == 1]
-        if current_user.org_id:
-            filters.append(or_(CommunityPost.org_id == current_user.org_id, CommunityPost.org_id == None))
-        
-        posts = db.query(CommunityPost).filter(*filters).order_by(CommunityPost.created_at.desc()).all()
+        query = keyset(db.query(CommunityPost).filter(*filters),
+                       (CommunityPost.created_at, CommunityPost.id), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        posts, next_cursor = split_page(query.all(), limit, lambda p: (p.created_at, p.id))
         if not posts:
-            if settings.DEMO_MODE:
+            if settings.DEMO_MODE and not cursor:
                 return [
                     {"id": 1, "author": "Sarah M.", "content": "Just finished our first 'Gaze Baseline' screening. The data visualization really helped me explain Arvid's behavior to his teacher.", "is_safe": 1},
                     {"id": 2, "author": "David K.", "content": "Does anyone have tips for sensory-friendly routine apps that sync with Tarang?", "is_safe": 1}
                 ]
             return []
+        set_next_cursor(response, next_cursor)
         return posts
     except Exception as e:
         logger.warning(f"Failed to fetch community posts: {e}")
@@ -1236,6 +1621,79 @@ async def start_tele_session(
 async def get_system_health():
     return sre_agent.get_system_health()
 
+@app.get("/system/metrics")
+async def get_system_metrics():
+    """
+    In-process performance metrics for this worker (batch sizes, queue waits, ...).
+    """
+    from app.core.metrics import metrics
+    return {"pid": os.getpid(), "metrics": metrics.snapshot()}
+
+@app.get("/admin/model")
+async def get_model_status(current_user: TokenData = Depends(get_current_user)):
+    """
+    Screening model served by this worker, its last swap and the registered versions.
+    """
+    require_role(current_user, ["ADMIN"])
+    from app.agents.screening_ml import model_footprint
+    return {
+        "pid": os.getpid(),
+        "serving": model_footprint(),
+        "swap": MODEL_SWAPPER.status,
+        "registry": MODEL_REGISTRY.manifest()
+    }
+
+@app.post("/admin/model/swap", status_code=202)
+async def swap_model(request: ModelSwapRequest, current_user: TokenData = Depends(get_current_user)):
+    """
+    Activate a registered model version. This worker loads and warms it in the
+    background while the current version keeps serving; other workers follow
+    the manifest on their next registry poll.
+    """
+    require_role(current_user, ["ADMIN"])
+    if MODEL_SWAPPER.swapping:
+        raise HTTPException(status_code=409, detail="A model swap is already in progress on this worker")
+    try:
+        MODEL_REGISTRY.activate(request.version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {request.version}")
+    
+    task = MODEL_SWAPPER.trigger(request.version)
+    
+    if request.wait:
+        await task
+    return {"pid": os.getpid(), "swap": MODEL_SWAPPER.status}
+
+@app.get("/admin/model/shadow")
+async def get_shadow_summary(
+    candidate: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Agreement rate, score deltas and latency cost of the shadow candidate
+    against the primary model, over the newest `limit` samples logged by all
+    workers (default SHADOW_SUMMARY_LIMIT).
+    """
+    require_role(current_user, ["ADMIN"])
+    return await io_pool.run(shadow_evaluator.summary, candidate, limit)
+
+@app.post("/admin/model/shadow")
+async def set_shadow_model(request: ShadowModelRequest, current_user: TokenData = Depends(get_current_user)):
+    """
+    Start (or stop, with version=null) shadow scoring of a registered version.
+    Other workers follow the manifest on their next registry poll.
+    """
+    require_role(current_user, ["ADMIN"])
+    try:
+        await shadow_evaluator.set_candidate(request.version)
+        MODEL_REGISTRY.set_shadow(request.version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {request.version}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return shadow_evaluator.worker_stats()
+
 @app.post("/demo/run")
 async def run_full_demo():
     return demo_agent.run_full_cycle_demo()
@@ -1260,19 +1718,43 @@ async def create_patient_secure(
         org_id=current_user.org_id
     )
     db.add(db_patient)
+    db.flush()
+    ensure_summaries(db, [db_patient.id])
     db.commit()
     db.refresh(db_patient)
     return db_patient
 
 @app.get("/patients", response_model=List[PatientCreate])
 async def get_patients_secure(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    name: Optional[str] = None,
+    phone: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """
-    Returns organization-scoped patient list.
+    Returns organization-scoped patient list, newest first, one keyset page at a
+    time (next page cursor in X-Next-Cursor). name and phone are exact
+    (case-insensitive) matches, looked up on their blind indexes.
     """
-    return db.query(Patient).filter(Patient.org_id == current_user.org_id).all()
+    query = db.query(Patient).filter(Patient.org_id == current_user.org_id)
+    for value, column, field in ((name, Patient.name_bidx, "name"), (phone, Patient.phone_bidx, "phone")):
+        if value is not None:
+            digest = blind_index(value, field)
+            if digest is None:
+                raise HTTPException(status_code=400, detail=f"{field} must not be blank")
+            query = query.filter(column == digest)
+
+    # patients has no created_at: ids are assigned in creation order, so (id) is the key
+    try:
+        query = keyset(query, (Patient.id,), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    patients, next_cursor = split_page(query.all(), limit, lambda p: (p.id,))
+    set_next_cursor(response, next_cursor)
+    return patients
 
 @app.post("/clinical/progress", response_model=TherapyProgressOut)
 async def record_therapy_progress(
@@ -1339,10 +1821,147 @@ async def get_intervention_drift(
 
 # --- AWS POLLY TEXT-TO-SPEECH ENDPOINT ---
 
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _cached_audio_response(path: str, key: str, cache_control: str) -> FileResponse:
+    # FileResponse streams from disk and answers Range / If-Range requests itself
+    return FileResponse(
+        path,
+        media_type="audio/mpeg",
+        headers={
+            "ETag": audio_etag(key),
+            "Content-Location": f"/polly/audio/{key}",
+            "Content-Disposition": "inline; filename=speech.mp3",
+            "Cache-Control": cache_control,
+            "X-Audio-Cache": "hit"
+        }
+    )
+
+def _require_polly_client():
+    polly_client = aws_client_manager.get_polly_client()
+    if not polly_client:
+        if aws_client_manager.credential_status() == "pending":
+            # Cold start: the background credential check has not answered yet
+            raise HTTPException(status_code=503, detail="Amazon Polly is starting up", headers={"Retry-After": "1"})
+        raise HTTPException(
+            status_code=503,
+            detail="Amazon Polly service unavailable. Please check AWS credentials."
+        )
+    return polly_client
+
+def _speech_http_error(e: Exception) -> HTTPException:
+    """Map a failed Polly call to the HTTP error returned to the client."""
+    from botocore.exceptions import ClientError
+    
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, AWSServiceUnavailable):
+        # Breaker open / no capacity / budget spent: fail fast so the client can use on-device speech
+        logger.warning(f"Polly call refused: {e}")
+        return HTTPException(
+            status_code=503,
+            detail="Speech synthesis temporarily unavailable",
+            headers={"Retry-After": str(max(1, int(round(e.retry_after))))}
+        )
+    if isinstance(e, ClientError):
+        error_code = e.response['Error']['Code']
+        logger.error(f"Polly synthesis failed: {error_code} - {e}")
+        return HTTPException(
+            status_code=500,
+            detail=f"Speech synthesis failed: {error_code}"
+        )
+    logger.error(f"Unexpected Polly error: {e}")
+    return HTTPException(
+        status_code=500,
+        detail=f"Speech synthesis error: {str(e)}"
+    )
+
+def _streamed_audio_response(chunks, key: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type="audio/mpeg",
+        headers={
+            "ETag": audio_etag(key),
+            "Content-Location": f"/polly/audio/{key}",
+            "Content-Disposition": "inline; filename=speech.mp3",
+            "Cache-Control": "no-cache",
+            "X-Audio-Cache": "miss"
+        }
+    )
+
+async def _synthesize_sentences(request: Request, text: str, language: str):
+    """mode="sentences": per-sentence clips synthesized concurrently, streamed in order."""
+    if len(text) > settings.POLLY_MAX_REQUEST_CHARS:
+        raise HTTPException(status_code=413,
+                            detail=f"Text longer than {settings.POLLY_MAX_REQUEST_CHARS} characters")
+    sentences = split_sentences(text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Nothing to synthesize")
+    if len(sentences) > settings.POLLY_MAX_SENTENCES:
+        raise HTTPException(status_code=413, detail=f"Text has more than {settings.POLLY_MAX_SENTENCES} sentences")
+    key = sequence_key([speech_key(sentence, language) for sentence in sentences])
+    if _etag_matches(request, audio_etag(key)):
+        return Response(status_code=304, headers={"ETag": audio_etag(key), "Content-Location": f"/polly/audio/{key}"})
+    
+    # The whole sequence is cached too, so a repeat is one file read with Range support
+    if audio_cache is not None:
+        cached_path = await io_pool.run(audio_cache.lookup, key)
+        if cached_path:
+            return _cached_audio_response(cached_path, key, "no-cache")
+    
+    polly_client = _require_polly_client()
+    segments = synthesize_in_order(
+        sentences,
+        lambda sentence: synthesize_segment(polly_client, audio_cache, sentence, language),
+        io_pool.run,
+        concurrency=settings.POLLY_SEGMENT_CONCURRENCY
+    )
+    # Wait for the first sentence only, so a failing Polly still gets a proper error status
+    try:
+        first = await segments.__anext__()
+    except Exception as e:
+        await segments.aclose()
+        raise _speech_http_error(e)
+    
+    async def audio():
+        writer = audio_cache.writer(key) if audio_cache is not None else None
+        complete = False
+        try:
+            segment = first
+            while True:
+                if writer is not None:
+                    await io_pool.run(writer.write, segment)
+                yield segment
+                try:
+                    segment = await segments.__anext__()
+                except StopAsyncIteration:
+                    break
+            complete = True
+        except Exception as e:
+            # Headers are already sent: end the clip after the last good sentence
+            logger.warning(f"Sentence synthesis stopped after a failure: {e}")
+        finally:
+            await segments.aclose()
+            if writer is not None:
+                # A rename or an unlink; done inline so it also runs when the client went away
+                if complete:
+                    writer.commit()
+                else:
+                    writer.abort()
+    
+    return _streamed_audio_response(audio(), key)
+
 @app.post("/polly/synthesize")
 async def synthesize_speech(
+    request: Request,
     text: str = Body(..., embed=True),
     language: str = Body("en-IN", embed=True),
+    mode: str = Body("single", embed=True),
     current_user: TokenData = Depends(get_current_user)
 ):
     """
@@ -1358,70 +1977,76 @@ async def synthesize_speech(
     - kn-IN: Kannada
     - mr-IN: Marathi
     - gu-IN: Gujarati
-    """
-    from app.core.aws_client import aws_client_manager
-    from botocore.exceptions import ClientError
     
-    polly_client = aws_client_manager.get_polly_client()
+    Modes:
+    - single: one Polly request for the whole text (at most 3000 characters)
+    - sentences: the text is split at sentence boundaries, sentences are
+      synthesized concurrently and streamed back in order as MP3 segments;
+      for long instructions (up to POLLY_MAX_REQUEST_CHARS characters and
+      POLLY_MAX_SENTENCES sentences, audio starts after the first sentence,
+      sentences cached individually)
     
-    if not polly_client:
-        raise HTTPException(
-            status_code=503,
-            detail="Amazon Polly service unavailable. Please check AWS credentials."
-        )
+    Texts over the limits are rejected with 413 before any Polly call.
     
-    # Map language codes to Polly voice IDs
-    voice_map = {
-        "en-IN": "Aditi",      # Female English (Indian)
-        "hi-IN": "Aditi",      # Female Hindi
-        "ta-IN": "Aditi",      # Fallback to Aditi for Tamil
-        "te-IN": "Aditi",      # Fallback to Aditi for Telugu
-        "bn-IN": "Aditi",      # Fallback to Aditi for Bengali
-        "kn-IN": "Aditi",      # Fallback to Aditi for Kannada
-        "mr-IN": "Aditi",      # Fallback to Aditi for Marathi
-        "gu-IN": "Aditi",      # Fallback to Aditi for Gujarati
-    }
+    Clips are cached on disk by (text, voice, engine, language): repeats are
+    served from the cache with a strong ETag and Range support, and misses
+    stream Polly's audio to the client while it is written to the cache.
+    Content-Location names the clip's GET /polly/audio/{key} URL.
+    """
+    if mode == "sentences":
+        return await _synthesize_sentences(request, text, language)
+    if mode != "single":
+        raise HTTPException(status_code=400, detail="mode must be 'single' or 'sentences'")
+    if len(text) > POLLY_MAX_TEXT_CHARS:
+        raise HTTPException(status_code=413,
+                            detail=f"Text longer than {POLLY_MAX_TEXT_CHARS} characters, use mode='sentences'")
+    
+    key = speech_key(text, language)
+    etag = audio_etag(key)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Content-Location": f"/polly/audio/{key}"})
     
-    voice_id = voice_map.get(language, "Aditi")
+    if audio_cache is not None:
+        cached_path = await io_pool.run(audio_cache.lookup, key)
+        if cached_path:
+            return _cached_audio_response(cached_path, key, "no-cache")
+    
+    polly_client = _require_polly_client()
     
     try:
-        response = polly_client.synthesize_speech(
-            Text=text,
-            OutputFormat="mp3",
-            VoiceId=voice_id,
-            Engine="neural" if language in ["en-IN", "hi-IN"] else "standard"
-        )
-        
-        # Stream the audio back to the client
-        audio_stream = response.get("AudioStream")
-        if not audio_stream:
+        # Blocking network call: keep it off the event loop
+        audio_stream = await io_pool.run(start_synthesis, polly_client, text, language)
+        if audio_stream is None:
             raise HTTPException(status_code=500, detail="Failed to generate audio")
-        
-        # Read the audio stream
-        audio_data = audio_stream.read()
-        
-        return StreamingResponse(
-            iter([audio_data]),
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline; filename=speech.mp3",
-                "Cache-Control": "no-cache"
-            }
-        )
-        
-    except ClientError as e:
-        error_code = e.response['Error']['Code']
-        logger.error(f"Polly synthesis failed: {error_code} - {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Speech synthesis failed: {error_code}"
-        )
     except Exception as e:
-        logger.error(f"Unexpected Polly error: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Speech synthesis error: {str(e)}"
-        )
+        raise _speech_http_error(e)
+    
+    # Chunks reach the client as Polly produces them, read no faster than the client takes them
+    # (a few chunks buffered); the cache copy is kept only if the stream completes
+    writer = audio_cache.writer(key) if audio_cache is not None else None
+    chunks = stream_blocking(
+        lambda stopped: iter_audio(audio_stream, writer, settings.POLLY_STREAM_CHUNK_BYTES, stopped),
+        io_pool.run
+    )
+    return _streamed_audio_response(chunks, key)
+
+@app.get("/polly/audio/{key}")
+async def get_cached_audio(key: str, request: Request, current_user: TokenData = Depends(get_current_user)):
+    """
+    A previously synthesized clip by its cache key (the Content-Location of
+    /polly/synthesize). The clip for a key never changes, so it is immutable
+    for clients; supports Range and If-None-Match.
+    """
+    if not is_audio_key(key):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    if _etag_matches(request, audio_etag(key)):
+        return Response(status_code=304, headers={"ETag": audio_etag(key)})
+    cached_path = await io_pool.run(audio_cache.lookup, key) if audio_cache is not None else None
+    if not cached_path:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    return _cached_audio_response(cached_path, key, "private, max-age=31536000, immutable")
+
+startup_timer.mark("import")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -13,6 +13,9 @@ class ScreeningBase(BaseModel):
     def sanitize_name(cls, v):
         return re.sub(r"[^\w\s-]", "", v).strip()
 
+class ScreeningBatchCreate(BaseModel):
+    items: List[ScreeningBase] = Field(..., min_length=1, max_length=500)
+
 class CommunityPostCreate(BaseModel):
     author: str = Field(..., min_length=2, max_length=50)
     content: str = Field(..., min_length=1, max_length=1000)
@@ -111,7 +114,9 @@ class CenterAnalyticsOut(BaseModel):
     total_screenings: int
     high_risk_count: int
     risk_distribution: Dict[str, int] # {"Low": 10, "Medium": 5, "High": 2}
-    weekly_activity: List[int] # Last 7 days volume
+    weekly_activity: List[int] # Screenings per day, start_date..end_date (default: last 7 days)
+    start_date: Optional[datetime.date] = None
+    end_date: Optional[datetime.date] = None
 
 class AppointmentCreate(BaseModel):
     patient_id: int
@@ -132,3 +137,10 @@ class AppointmentOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ModelSwapRequest(BaseModel):
+    version: str = Field(..., min_length=1, max_length=64)
+    wait: bool = False  # respond after this worker has swapped instead of immediately
+
+class ShadowModelRequest(BaseModel):
+    version: Optional[str] = Field(None, max_length=64)  # None stops shadow scoring
@@ -10,15 +10,37 @@ Datasets:
 Citation:
 Thabtah, F. (2017). Autistic Spectrum Disorder Screening Data [Dataset]. 
 UCI Machine Learning Repository. https://doi.org/10.24432/C5659W
+
+The preprocessed dataset is cached as a columnar snapshot keyed by its
+content hash (app/core/dataset_snapshot.py), so only the first run (or
+--refresh-data) fetches and encodes the raw data. Model fits and CV folds
+run as independent jobs across cores, and every run ends with a per-stage
+timing report that is also written to the metrics JSON.
+
+Usage:
+    python -m app.train_model                    # default RF vs GB comparison
+    python -m app.train_model --jobs 4           # cap worker processes
+    python -m app.train_model --sweep            # hyperparameter sweep in a process pool
+    python -m app.train_model --refresh-data     # refetch UCI data, rebuild the snapshot if it changed
+    python -m app.train_model --output /tmp/candidate.joblib
 """
 
+import argparse
+import contextlib
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+from joblib import Parallel, delayed
 import os
 
 # Try to import ucimlrepo, fall back to CSV if not available
@@ -29,6 +51,75 @@ except ImportError:
     USE_UCI_REPO = False
     print("ucimlrepo not installed. Using embedded dataset.")
 
+# Bump when preprocess_data changes its output so cached snapshots are rebuilt
+PREPROCESS_VERSION = 1
+UCI_DATASET_IDS = (419, 426)
+SYNTHETIC_SOURCE = 'synthetic:aq10-seed42'
+CV_FOLDS = 5
+
+# Candidates for --sweep; each combination is merged over the default parameters below
+SWEEP_GRID = {
+    'RandomForestClassifier': {
+        'n_estimators': [100, 200],
+        'max_depth': [6, 10, None],
+        'min_samples_leaf': [1, 2, 4],
+    },
+    'GradientBoostingClassifier': {
+        'n_estimators': [100, 200],
+        'max_depth': [3, 5],
+        'learning_rate': [0.05, 0.1],
+    },
+}
+
+BASE_PARAMS = {
+    'RandomForestClassifier': dict(n_estimators=100, max_depth=10, min_samples_split=5, min_samples_leaf=2,
+                                   random_state=42, class_weight='balanced'),
+    'GradientBoostingClassifier': dict(n_estimators=100, max_depth=5, learning_rate=0.1, random_state=42),
+}
+
+ESTIMATORS = {
+    'RandomForestClassifier': RandomForestClassifier,
+    'GradientBoostingClassifier': GradientBoostingClassifier,
+}
+
+
+class StageTimer:
+    """Wall-clock seconds per pipeline stage, in execution order."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def as_dict(self):
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+    def report(self):
+        total = sum(self.stages.values()) or 1.0
+        print("\n" + "="*60)
+        print("Stage timings")
+        print("="*60)
+        for name, seconds in self.stages.items():
+            print(f"  {name:<22} {seconds:>9.3f}s  {seconds / total * 100:5.1f}%")
+        print(f"  {'total':<22} {total:>9.3f}s")
+
+
+def expected_source():
+    """Source key load_datasets() is expected to produce, used to look up the snapshot before fetching."""
+    if USE_UCI_REPO:
+        return 'uci:' + ','.join(str(i) for i in UCI_DATASET_IDS)
+    return SYNTHETIC_SOURCE
+
+
+def snapshot_key(source):
+    return f"{source}|preprocess-v{PREPROCESS_VERSION}"
+
 
 def load_datasets():
     """Load ASD screening datasets from UCI ML Repository"""
@@ -37,6 +128,7 @@ def load_datasets():
         print("Fetching datasets from UCI ML Repository...")
         
         datasets = []
+        loaded_ids = []
         
         # Try to fetch children dataset (id=419)
         try:
@@ -45,6 +137,7 @@ def load_datasets():
             df['Class/ASD'] = children.data.targets
             df['age_group'] = 'child'
             datasets.append(df)
+            loaded_ids.append(419)
             print(f"  ✓ Loaded Children dataset: {len(df)} samples")
         except Exception as e:
             print(f"  ✗ Children dataset unavailable: {e}")
@@ -56,12 +149,14 @@ def load_datasets():
             df['Class/ASD'] = adult.data.targets
             df['age_group'] = 'adult'
             datasets.append(df)
+            loaded_ids.append(426)
             print(f"  ✓ Loaded Adult dataset: {len(df)} samples")
         except Exception as e:
             print(f"  ✗ Adult dataset unavailable: {e}")
         
         if datasets:
             combined = pd.concat(datasets, ignore_index=True)
+            combined.attrs['source'] = 'uci:' + ','.join(str(i) for i in loaded_ids)
             print(f"Total UCI samples: {len(combined)}")
             return combined
         else:
@@ -104,6 +199,7 @@ def create_representative_dataset():
     }
     
     df = pd.DataFrame(data)
+    df.attrs['source'] = SYNTHETIC_SOURCE
     
     # Calculate total score
     score_cols = [f'A{i}_Score' for i in range(1, 11)]
@@ -133,19 +229,17 @@ def preprocess_data(df):
     # Additional features to include
     additional_features = []
     
-    # Encode categorical variables
-    le = LabelEncoder()
-    
+    # Encode categorical variables (one encoder per column, so no fitted state leaks between them)
     if 'gender' in df.columns:
-        df['gender_encoded'] = le.fit_transform(df['gender'].astype(str))
+        df['gender_encoded'] = LabelEncoder().fit_transform(df['gender'].astype(str))
         additional_features.append('gender_encoded')
     
     if 'jaundice' in df.columns:
-        df['jaundice_encoded'] = le.fit_transform(df['jaundice'].astype(str))
+        df['jaundice_encoded'] = LabelEncoder().fit_transform(df['jaundice'].astype(str))
         additional_features.append('jaundice_encoded')
     
     if 'autism' in df.columns:
-        df['family_history_encoded'] = le.fit_transform(df['autism'].astype(str))
+        df['family_history_encoded'] = LabelEncoder().fit_transform(df['autism'].astype(str))
         additional_features.append('family_history_encoded')
     
     if 'age' in df.columns:
@@ -167,15 +261,52 @@ def preprocess_data(df):
         if hasattr(y, 'iloc'):
             y = y.iloc[:, 0] if len(y.shape) > 1 else y
         # Convert to binary
-        y = le.fit_transform(y.astype(str))
+        y = LabelEncoder().fit_transform(y.astype(str))
     else:
         raise ValueError("Target column 'Class/ASD' not found")
     
     return X, y, feature_cols
 
 
-def train_model(X, y):
+def load_training_data(store=None, refresh=False, timer=None):
+    """
+    Preprocessed (X, y, feature_cols, dataset_hash), served from the columnar
+    snapshot when one exists for the expected source. Fetching and encoding
+    only happen on a miss, with --refresh-data, or without a store.
+    """
+    timer = timer or StageTimer()
+
+    if store is not None and not refresh:
+        with timer.stage('snapshot_read'):
+            snapshot = store.get(snapshot_key(expected_source()))
+        if snapshot is not None:
+            print(f"✓ Loaded dataset snapshot {snapshot.content_hash[:12]} ({snapshot.rows} samples)")
+            return snapshot.frame(), snapshot.target, snapshot.feature_columns, snapshot.content_hash
+
+    with timer.stage('fetch'):
+        df = load_datasets()
+    with timer.stage('preprocess'):
+        X, y, feature_cols = preprocess_data(df)
+
+    from app.core.dataset_snapshot import DatasetSnapshot
+    snapshot = DatasetSnapshot.from_frame(X, y, snapshot_key(df.attrs.get('source', 'unknown')))
+    if store is not None:
+        with timer.stage('snapshot_write'):
+            written = store.put(snapshot)
+        state = "saved" if written else "unchanged"
+        print(f"✓ Dataset snapshot {snapshot.content_hash[:12]} {state} ({snapshot.rows} samples)")
+    return X, y, feature_cols, snapshot.content_hash
+
+
+def _fit_predict(estimator, X_fit, y_fit, X_eval):
+    """One independent fit; module-level so joblib can ship it to a worker process."""
+    estimator.fit(X_fit, y_fit)
+    return estimator, estimator.predict(X_eval)
+
+
+def train_model(X, y, n_jobs=-1, timer=None):
     """Train and evaluate the ASD screening model"""
+    timer = timer or StageTimer()
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
@@ -186,48 +317,48 @@ def train_model(X, y):
     print(f"Test set: {len(X_test)} samples")
     print(f"Class distribution: {np.bincount(y)}")
     
-    # Train Random Forest
-    print("\n" + "="*50)
-    print("Training Random Forest Classifier...")
-    print("="*50)
+    rf_model = RandomForestClassifier(**BASE_PARAMS['RandomForestClassifier'])
+    gb_model = GradientBoostingClassifier(**BASE_PARAMS['GradientBoostingClassifier'])
     
-    rf_model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        min_samples_leaf=2,
-        random_state=42,
-        class_weight='balanced'
-    )
+    # The RF fit, its CV folds and the GB fit are independent: run them as one flat
+    # batch of jobs instead of nesting n_jobs inside cross_val_score and the forest.
+    # Folds match cross_val_score(cv=5) for a classifier (unshuffled StratifiedKFold).
+    folds = list(StratifiedKFold(n_splits=CV_FOLDS).split(X_train, y_train))
+    jobs = [delayed(_fit_predict)(rf_model, X_train, y_train, X_test)]
+    jobs += [
+        delayed(_fit_predict)(clone(rf_model), X_train.iloc[train_idx], y_train[train_idx], X_train.iloc[val_idx])
+        for train_idx, val_idx in folds
+    ]
+    jobs.append(delayed(_fit_predict)(gb_model, X_train, y_train, X_test))
+    
+    with timer.stage('fit_and_cv'):
+        results = Parallel(n_jobs=n_jobs)(jobs)
     
-    rf_model.fit(X_train, y_train)
+    (rf_model, y_pred), fold_results, (gb_model, gb_pred) = results[0], results[1:-1], results[-1]
+    
+    print("\n" + "="*50)
+    print("Random Forest Classifier")
+    print("="*50)
     
     # Cross-validation
-    cv_scores = cross_val_score(rf_model, X_train, y_train, cv=5)
+    cv_scores = np.array([
+        accuracy_score(y_train[val_idx], fold_pred)
+        for (_, val_idx), (_, fold_pred) in zip(folds, fold_results)
+    ])
     print(f"Cross-validation accuracy: {cv_scores.mean():.3f} (+/- {cv_scores.std()*2:.3f})")
     
     # Test set evaluation
-    y_pred = rf_model.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
     print(f"Test set accuracy: {accuracy:.3f}")
     
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred, target_names=['No ASD', 'ASD']))
     
-    # Train Gradient Boosting for comparison
+    # Gradient Boosting for comparison
     print("\n" + "="*50)
-    print("Training Gradient Boosting Classifier...")
+    print("Gradient Boosting Classifier")
     print("="*50)
     
-    gb_model = GradientBoostingClassifier(
-        n_estimators=100,
-        max_depth=5,
-        learning_rate=0.1,
-        random_state=42
-    )
-    
-    gb_model.fit(X_train, y_train)
-    gb_pred = gb_model.predict(X_test)
     gb_accuracy = accuracy_score(y_test, gb_pred)
     print(f"Gradient Boosting accuracy: {gb_accuracy:.3f}")
     
@@ -240,8 +371,79 @@ def train_model(X, y):
         return rf_model, accuracy
 
 
-def save_model(model, feature_cols, accuracy, save_path):
+def sweep_candidates(grid=None):
+    """(model_type, params) for every combination in the grid, merged over BASE_PARAMS."""
+    grid = grid or SWEEP_GRID
+    candidates = []
+    for model_type, options in grid.items():
+        names = list(options)
+        for values in itertools.product(*(options[name] for name in names)):
+            candidates.append((model_type, dict(BASE_PARAMS[model_type], **dict(zip(names, values)))))
+    return candidates
+
+
+_sweep_data = {}
+
+
+def _init_sweep_worker(X, y):
+    # Ship the training set once per worker process, not once per candidate
+    _sweep_data['X'], _sweep_data['y'] = X, y
+
+
+def _evaluate_candidate(model_type, params):
+    X, y = _sweep_data['X'], _sweep_data['y']
+    started = time.perf_counter()
+    scores = []
+    for train_idx, val_idx in StratifiedKFold(n_splits=CV_FOLDS).split(X, y):
+        model = ESTIMATORS[model_type](**params).fit(X[train_idx], y[train_idx])
+        scores.append(accuracy_score(y[val_idx], model.predict(X[val_idx])))
+    return {
+        'model_type': model_type,
+        'params': params,
+        'cv_mean': float(np.mean(scores)),
+        'cv_std': float(np.std(scores)),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def run_sweep(X, y, n_jobs=-1, grid=None, timer=None):
+    """
+    Cross-validate every sweep candidate in a process pool, refit the best
+    (by CV mean, never by test accuracy) on the training split and report
+    its held-out accuracy. Returns (model, accuracy, ranked results).
+    """
+    timer = timer or StageTimer()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    candidates = sweep_candidates(grid)
+    workers = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    workers = max(1, min(workers, len(candidates)))
+    print(f"\nSweeping {len(candidates)} candidates ({CV_FOLDS}-fold CV) on {workers} worker processes...")
+
+    with timer.stage('sweep'):
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(X_train.to_numpy(), np.asarray(y_train))) as pool:
+            results = list(pool.map(_evaluate_candidate, *zip(*candidates)))
+    results.sort(key=lambda r: (-r['cv_mean'], r['cv_std']))
+
+    print(f"\n{'rank':<5} {'cv':>6} {'±2sd':>6} {'sec':>7}  candidate")
+    for rank, result in enumerate(results[:10], 1):
+        changed = {k: v for k, v in result['params'].items() if BASE_PARAMS[result['model_type']].get(k) != v}
+        print(f"{rank:<5} {result['cv_mean']:>6.3f} {result['cv_std']*2:>6.3f} {result['seconds']:>7.2f}  "
+              f"{result['model_type']} {changed or '(defaults)'}")
+
+    best = results[0]
+    with timer.stage('refit_best'):
+        model = ESTIMATORS[best['model_type']](**best['params']).fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    print(f"\n✓ Using {best['model_type']} (best CV {best['cv_mean']:.3f}), test set accuracy: {accuracy:.3f}")
+    return model, accuracy, results
+
+
+def save_model(model, feature_cols, accuracy, save_path, extra=None, timer=None, n_jobs=1):
     """Save the trained model and metadata"""
+    timer = timer or StageTimer()
     
     model_data = {
         'model': model,
@@ -253,51 +455,90 @@ def save_model(model, feature_cols, accuracy, save_path):
         'dataset_source': 'UCI ML Repository - ASD Screening Data',
         'citation': 'Thabtah, F. (2017). UCI Machine Learning Repository.'
     }
+    model_data.update(extra or {})
     
-    joblib.dump(model_data, save_path)
+    with timer.stage('save_model'):
+        joblib.dump(model_data, save_path)
+    print(f"\n✓ Model saved to: {save_path}")
     
-    # Save lightweight metrics JSON for dashboard
+    # Precompute the discrete feature-space score table served by ScreeningAgent
+    try:
+        from app.core.score_table import ScoreTable, table_paths
+        with timer.stage('score_table'):
+            ScoreTable.build(model, feature_cols, save_path, n_jobs=n_jobs)
+        print(f"✓ Score table saved to: {table_paths(save_path)[0]}")
+    except Exception as e:
+        print(f"  ✗ Score table not built ({e}); run: python -m app.core.score_table")
+
+    # Export memory-mappable node arrays so API workers can share one copy of the model
+    try:
+        from app.core.forest_runtime import export_model, forest_dir
+        with timer.stage('forest_export'):
+            export_model(model_data, save_path)
+        print(f"✓ Forest arrays saved to: {forest_dir(save_path)}")
+    except Exception as e:
+        print(f"  ✗ Forest arrays not exported ({e}); run: python -m app.core.forest_runtime")
+    
+    # Save lightweight metrics JSON for dashboard (last, so it carries every stage timing)
     metrics_path = save_path.replace('.joblib', '_metrics.json')
-    import json
+    metrics = {
+        'accuracy': accuracy,
+        'features': feature_cols,
+        'timestamp': model_data['training_date'],
+        'version': model_data['version']
+    }
+    metrics.update(extra or {})
+    metrics['stage_seconds'] = timer.as_dict()
     with open(metrics_path, 'w') as f:
-        json.dump({
-            'accuracy': accuracy,
-            'features': feature_cols,
-            'timestamp': model_data['training_date'],
-            'version': model_data['version']
-        }, f, indent=2)
+        json.dump(metrics, f, indent=2)
 
-    print(f"\n✓ Model saved to: {save_path}")
     print(f"✓ Metrics saved to: {metrics_path}")
     print(f"  - Accuracy: {accuracy:.3f}")
     print(f"  - Features: {len(feature_cols)}")
 
 
-def main():
+def main(argv=None):
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description="Train the TARANG ASD screening model")
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes for fits, CV and sweeps (-1: all cores)")
+    parser.add_argument("--sweep", action="store_true", help="run the hyperparameter sweep instead of RF vs GB")
+    parser.add_argument("--refresh-data", action="store_true", help="refetch and re-preprocess, ignoring the snapshot")
+    parser.add_argument("--no-snapshot", action="store_true", help="neither read nor write the dataset snapshot")
+    parser.add_argument("--snapshot-dir", default=None, help="snapshot directory (default: app/models/snapshots)")
+    parser.add_argument("--output", default=None, help="model path (default: app/models/asd_screening_model.joblib)")
+    args = parser.parse_args(argv)
     
     print("="*60)
     print("TARANG ASD Screening Model Training")
     print("="*60)
     
+    timer = StageTimer()
+    
     # Create models directory
     models_dir = os.path.join(os.path.dirname(__file__), 'models')
     os.makedirs(models_dir, exist_ok=True)
-    
-    # Load data
-    df = load_datasets()
-    
-    # Preprocess
-    X, y, feature_cols = preprocess_data(df)
+    model_path = args.output or os.path.join(models_dir, 'asd_screening_model.joblib')
+    
+    # Load (snapshot, or fetch + preprocess)
+    store = None
+    if not args.no_snapshot:
+        from app.core.dataset_snapshot import SnapshotStore, DEFAULT_SNAPSHOT_DIR
+        store = SnapshotStore(args.snapshot_dir or DEFAULT_SNAPSHOT_DIR)
+    X, y, feature_cols, dataset_hash = load_training_data(store, refresh=args.refresh_data, timer=timer)
     print(f"\nFeatures used: {feature_cols}")
     
     # Train
-    model, accuracy = train_model(X, y)
+    extra = {'dataset_hash': dataset_hash, 'dataset_rows': int(len(y))}
+    if args.sweep:
+        model, accuracy, results = run_sweep(X, y, n_jobs=args.jobs, timer=timer)
+        extra['sweep'] = {'candidates': len(results), 'best': results[0]}
+    else:
+        model, accuracy = train_model(X, y, n_jobs=args.jobs, timer=timer)
     
     # Save
-    model_path = os.path.join(models_dir, 'asd_screening_model.joblib')
-    save_model(model, feature_cols, accuracy, model_path)
+    save_model(model, feature_cols, accuracy, model_path, extra=extra, timer=timer, n_jobs=args.jobs)
     
+    timer.report()
     print("\n" + "="*60)
     print("Training Complete!")
     print("="*60)
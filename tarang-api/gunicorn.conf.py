@@ -0,0 +1,35 @@
+"""
+Gunicorn server hooks for TARANG API
+=====================================
+Gunicorn picks this file up automatically from the working directory; the
+CLI flags in start.sh still control bind address, workers and timeouts.
+
+With preloading, app.main (and therefore the screening model, its flat
+forest arrays and the score table) is imported once in the master and
+inherited by every worker through fork, so the model is resident once per
+host instead of once per worker.
+"""
+import gc
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def pre_fork(server, worker):
+    # Move everything imported so far into the permanent generation: the
+    # cyclic GC no longer touches those objects, so their pages are not
+    # dirtied (and copied) in the children.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared across processes
+    try:
+        from app.database import engine
+        engine.dispose(close=False)
+    except Exception as e:
+        server.log.warning(f"Engine dispose after fork failed: {e}")
+
+
+def when_ready(server):
+    server.log.info(f"Gunicorn ready (preload_app={preload_app})")
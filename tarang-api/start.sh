@@ -16,6 +16,8 @@ WORKERS="${WORKERS:-4}"
 WORKER_CLASS="${WORKER_CLASS:-uvicorn.workers.UvicornWorker}"
 TIMEOUT="${TIMEOUT:-120}"
 KEEPALIVE="${KEEPALIVE:-5}"
+# Load the app (and the screening model) once in the master; see gunicorn.conf.py
+export GUNICORN_PRELOAD="${GUNICORN_PRELOAD:-true}"
 
 echo "📊 Configuration:"
 echo "  - Host: $HOST"
@@ -23,8 +25,27 @@ echo "  - Port: $PORT"
 echo "  - Gunicorn Workers: $WORKERS"
 echo "  - Worker Class: $WORKER_CLASS"
 echo "  - Timeout: ${TIMEOUT}s"
+echo "  - Preload App: $GUNICORN_PRELOAD"
 echo "  - Celery Concurrency: $CELERY_CONCURRENCY"
 
+# Apply pending schema migrations once, before any worker boots (no-op when current)
+echo "🗄️  Applying database migrations..."
+python -m app.core.migrations
+
+# Precompute the screening score table if the model changed (no-op when current)
+if [ -f app/models/asd_screening_model.joblib ]; then
+    echo "🧮 Checking screening score table..."
+    python -m app.core.score_table --if-stale || echo "⚠️  Score table build failed. Falling back to model inference."
+    echo "🌲 Checking memory-mapped forest export..."
+    python -m app.core.forest_runtime --if-stale || echo "⚠️  Forest export failed. Workers will load the joblib model."
+fi
+
+# Pre-synthesize the standard therapy / alert / clinical prompts into the audio cache (opt-in, needs AWS)
+if [ "${POLLY_WARMUP_ON_START:-false}" = "true" ]; then
+    echo "🔊 Warming speech audio cache..."
+    python -m app.core.speech_warmup || echo "⚠️  Speech warm-up incomplete. Uncached prompts will be synthesized on demand."
+fi
+
 # Start Celery worker in the background (if Redis is available)
 if [ -n "$REDIS_URL" ]; then
     echo "🔄 Starting Celery worker..."
@@ -0,0 +1,75 @@
+import sys
+import os
+import contextlib
+import tempfile
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.database import async_database_url, Base
+
+
+class ApiDatabaseTestCase(unittest.TestCase):
+    """
+    A fresh SQLite database per test, on a temporary file so that the sync
+    engine (fixtures, get_db) and the async engine (get_async_db) see the same
+    data. api_client() points the app's database and auth dependencies at it as
+    self.user; tearDown restores them.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmpdir.name, 'api.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.async_engine = create_async_engine(async_database_url(self.engine.url), poolclass=NullPool)
+        self.AsyncSession = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        self.user = None
+        self._overrides = None
+
+    def tearDown(self):
+        if self._overrides is not None:
+            self.main.app.dependency_overrides.clear()
+            self.main.app.dependency_overrides.update(self._overrides)
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def api_client(self) -> TestClient:
+        from app import main
+        from app.security import get_current_user
+
+        def override_db():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_async_db():
+            async with self.AsyncSession() as db:
+                yield db
+
+        self.main = main
+        if self._overrides is None:
+            self._overrides = dict(main.app.dependency_overrides)
+        main.app.dependency_overrides[main.get_db] = override_db
+        main.app.dependency_overrides[main.get_async_db] = override_async_db
+        main.app.dependency_overrides[get_current_user] = lambda: self.user
+        return TestClient(main.app)
+
+    @contextlib.contextmanager
+    def async_statements(self):
+        """SQL statements the endpoints run on the async engine inside the block."""
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(self.async_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(self.async_engine.sync_engine, "before_cursor_execute", listener)
@@ -0,0 +1,102 @@
+import sys
+import os
+import datetime
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import select
+from app.database import async_database_url, asyncpg_connect_args, DailyOrgScreeningStats, Patient, PatientSummary, ScreeningSession, User
+from app.core.db_benchmark import run_benchmark
+from api_db import ApiDatabaseTestCase
+
+
+class TestAsyncDatabaseUrl(unittest.TestCase):
+    def test_drivers(self):
+        self.assertEqual(async_database_url("postgresql://u:p@db:5432/tarang").render_as_string(hide_password=False),
+                         "postgresql+asyncpg://u:p@db:5432/tarang")
+        self.assertEqual(async_database_url("postgresql+psycopg2://u@db/tarang").drivername, "postgresql+asyncpg")
+        self.assertEqual(str(async_database_url("sqlite:///./tarang.db")), "sqlite+aiosqlite:///./tarang.db")
+        with self.assertRaises(ValueError):
+            async_database_url("mysql://u@db/tarang")
+
+    def test_libpq_parameters_become_asyncpg_arguments(self):
+        # Heroku / Railway style URL: asyncpg.connect() would raise TypeError on sslmode
+        legacy = "postgresql://u:p@db/tarang?sslmode=require&connect_timeout=5&options=-csearch_path%3Dx" \
+                 "&application_name=tarang&prepared_statement_cache_size=100"
+        url = async_database_url(legacy)
+        self.assertEqual(dict(url.query), {"prepared_statement_cache_size": "100"})
+        self.assertEqual(asyncpg_connect_args(legacy), {
+            "ssl": "require", "timeout": 5.0, "server_settings": {"application_name": "tarang"}
+        })
+        with mock.patch.dict(os.environ, {"DB_SSL": "verify-full"}):
+            self.assertEqual(asyncpg_connect_args("postgresql://u@db/tarang"), {"ssl": "verify-full"})
+            self.assertEqual(asyncpg_connect_args("postgresql://u@db/tarang?sslmode=disable"), {"ssl": "disable"})
+
+        # The dialect hands asyncpg only arguments it accepts
+        from sqlalchemy.ext.asyncio import create_async_engine
+        cargs, cparams = create_async_engine(url).dialect.create_connect_args(url)
+        self.assertFalse(set(cparams) & {"sslmode", "connect_timeout", "options", "application_name"})
+
+
+class TestAsyncEndpoints(ApiDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.api_client()
+
+    def test_batch_persists_sessions_and_projections(self):
+        from app.schemas import TokenData
+
+        with self.Session() as db:
+            patient = Patient(name="Kid", external_id="k1", org_id=1)
+            db.add(patient)
+            db.commit()
+            patient_id = patient.id
+
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        items = [{"patient_name": "Kid", "patient_id": patient_id, "questionnaire_score": score,
+                  "video_metrics": {"eye_contact": 0.5, "motor_coordination": 0.5}} for score in (2, 9)]
+        response = self.client.post("/screening/batch", json={"items": items})
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["count"], 2)
+
+        with self.Session() as db:
+            self.assertEqual(len(db.execute(select(ScreeningSession)).scalars().all()), 2)
+            self.assertEqual(db.get(PatientSummary, patient_id).session_count, 2)
+            self.assertEqual(db.execute(select(DailyOrgScreeningStats.screenings)).scalar(), 2)
+
+    def test_dashboard_loads_care_team_without_lazy_loads(self):
+        from app.schemas import TokenData
+
+        with self.Session() as db:
+            doc = User(email="doc@test.com", role="CLINICIAN", full_name="Dr A", org_id=1)
+            parent = User(email="mum@test.com", role="parent", full_name="Mum", org_id=1)
+            db.add_all([doc, parent])
+            db.flush()
+            child = Patient(name="Kid", external_id="k1", org_id=1, parent_user_id=parent.id, clinician_id=doc.id)
+            db.add(child)
+            db.add(ScreeningSession(patient_name="mum@test.com", risk_score=42.0, breakdown={"behavioral": 10},
+                                    created_at=datetime.datetime(2026, 3, 1)))
+            db.commit()
+            doc_id, child_id = doc.id, child.id
+
+        self.user = TokenData(sub="mum@test.com", role="PARENT", org_id=1)
+        response = self.client.get("/users/dashboard")
+        self.assertEqual(response.status_code, 200, response.text)
+        data = response.json()
+        self.assertEqual((data["total_screenings"], data["latest_risk"]), (1, 42.0))
+        self.assertEqual(data["care_team"], [{"id": doc_id, "name": "Dr A", "role": "Primary Clinician"}])
+        self.assertEqual(data["primary_patient_id"], child_id)
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_async_sessions_do_not_stall_the_worker(self):
+        results = run_benchmark(sessions=500, requests=120, concurrency=8, latency_ms=10)
+        self.assertGreater(results["gain"], 1)
+        self.assertLess(results["async"]["max_loop_stall_ms"], results["sync"]["max_loop_stall_ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+import sys
+import os
+import asyncio
+import functools
+import io
+import threading
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from botocore.response import StreamingBody
+from fastapi.testclient import TestClient
+from app.core.audio_cache import AudioCache, audio_etag
+from app.core.speech import iter_audio, speech_key, split_sentences, synthesize_in_order
+
+AUDIO = bytes(range(256)) * 200     # 51200 bytes of "mp3"
+
+
+class FakePolly:
+    def __init__(self, audio=AUDIO):
+        self.audio = audio
+        self.calls = []
+
+    def synthesize_speech(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"AudioStream": StreamingBody(io.BytesIO(self.audio), len(self.audio))}
+
+
+class SentencePolly:
+    """Audio derived from the text, with a delay that makes later sentences finish first."""
+
+    def __init__(self):
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def synthesize_speech(self, Text, **kwargs):
+        with self._lock:
+            self.calls.append(Text)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05 if Text.startswith("One") else 0.01)
+        with self._lock:
+            self.running -= 1
+        audio = f"<{Text}>".encode()
+        return {"AudioStream": StreamingBody(io.BytesIO(audio), len(audio))}
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_size_bounded_lru(self):
+        cache = AudioCache(self.root, max_bytes=250)
+        for key in ("a" * 64, "b" * 64):
+            cache.put(key, b"x" * 100)
+        self.assertIsNotNone(cache.lookup("a" * 64))     # b is now least recently used
+        cache.put("c" * 64, b"x" * 100)
+        self.assertIsNone(cache.lookup("b" * 64))
+        self.assertIsNotNone(cache.lookup("a" * 64))
+        self.assertFalse(os.path.exists(cache.path("b" * 64)))
+        self.assertEqual(cache.stats()["bytes"], 200)
+
+    def test_recency_survives_restart_and_stale_partial_writes_are_discarded(self):
+        cache = AudioCache(self.root, max_bytes=10_000)
+        cache.put("a" * 64, b"old")
+        os.utime(cache.path("a" * 64), (time.time() - 60, time.time() - 60))
+        cache.put("b" * 64, b"new")
+        crashed = cache.writer("d" * 64)
+        crashed.write(b"abandoned")
+        crashed._file.flush()
+        os.utime(crashed.tmp_path, (time.time() - 7200, time.time() - 7200))
+        writer = cache.writer("c" * 64)
+        writer.write(b"live")
+
+        # Another worker starting up leaves the live write alone
+        reopened = AudioCache(self.root, max_bytes=4)    # room for one clip: the older one goes
+        self.assertIsNone(reopened.lookup("a" * 64))
+        self.assertIsNotNone(reopened.lookup("b" * 64))
+        self.assertIsNone(reopened.lookup("c" * 64))
+        self.assertEqual(os.listdir(reopened.tmp_dir), [os.path.basename(writer.tmp_path)])
+        self.assertEqual(writer.commit(), cache.path("c" * 64))
+        self.assertIsNotNone(reopened.lookup("c" * 64))
+
+        # A write swept from under its writer is dropped, not raised into the response
+        self.assertIsNone(crashed.commit())
+        self.assertIsNone(reopened.lookup("d" * 64))
+
+    def test_stream_is_cached_only_when_read_to_the_end(self):
+        cache = AudioCache(self.root, max_bytes=10 ** 6)
+        key = speech_key("Touch your nose", "en-IN")
+
+        stream = iter_audio(FakePolly().synthesize_speech()["AudioStream"], cache.writer(key), 4096)
+        next(stream)
+        stream.close()
+        self.assertIsNone(cache.lookup(key))
+
+        chunks = list(iter_audio(FakePolly().synthesize_speech()["AudioStream"], cache.writer(key), 4096))
+        self.assertEqual(len(chunks), 13)
+        with open(cache.lookup(key), "rb") as f:
+            self.assertEqual(f.read(), AUDIO)
+
+
+class TestSentenceSynthesis(unittest.TestCase):
+    def test_split_sentences(self):
+        self.assertEqual(split_sentences("Sit down. Look at me!  Clap?"), ["Sit down.", "Look at me!", "Clap?"])
+        self.assertEqual(split_sentences("बैठो। ताली बजाओ।"), ["बैठो।", "ताली बजाओ।"])
+        self.assertTrue(all(len(s) <= 10 for s in split_sentences("word " * 20, max_chars=10)))
+
+    def test_results_come_back_in_order_with_bounded_concurrency(self):
+        running, peak = [0], [0]
+
+        def work(n):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            time.sleep(0.02 * (5 - n))
+            running[0] -= 1
+            return n
+
+        async def run_io(fn, *args):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+        async def collect():
+            return [n async for n in synthesize_in_order([0, 1, 2, 3, 4], work, run_io, concurrency=2)]
+
+        self.assertEqual(asyncio.run(collect()), [0, 1, 2, 3, 4])
+        self.assertLessEqual(peak[0], 2)
+
+    def test_calls_start_in_a_sliding_window(self):
+        started = []
+
+        def run_io(fn, *args):
+            started.append(args[0])
+            return asyncio.sleep(0, result=fn(*args))
+
+        async def take_two():
+            segments = synthesize_in_order(list(range(100)), lambda n: n, run_io, concurrency=3)
+            taken = [await segments.__anext__(), await segments.__anext__()]
+            await segments.aclose()
+            return taken
+
+        self.assertEqual(asyncio.run(take_two()), [0, 1])
+        # Two handed out, three in flight; the other 95 texts never reach Polly
+        self.assertEqual(started, [0, 1, 2, 3, 4])
+
+
+class TestSynthesizeEndpoint(unittest.TestCase):
+    def setUp(self):
+        from app import main
+        from app.security import get_current_user
+        from app.schemas import TokenData
+
+        self.main = main
+        self.root = tempfile.mkdtemp()
+        self.polly = FakePolly()
+        self.overrides = dict(main.app.dependency_overrides)
+        main.app.dependency_overrides[get_current_user] = lambda: TokenData(sub="p@test.com", role="PARENT")
+        self.patches = [
+            mock.patch.object(main, "audio_cache", AudioCache(self.root, max_bytes=10 ** 6)),
+            mock.patch.object(main.aws_client_manager, "get_polly_client", lambda: self.polly),
+        ]
+        for patch in self.patches:
+            patch.start()
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.main.app.dependency_overrides.clear()
+        self.main.app.dependency_overrides.update(self.overrides)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_miss_streams_then_hits_skip_polly(self):
+        body = {"text": "Clap your hands", "language": "hi-IN"}
+        first = self.client.post("/polly/synthesize", json=body)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, AUDIO)
+        self.assertEqual(first.headers["x-audio-cache"], "miss")
+        self.assertEqual(self.polly.calls[0]["Engine"], "neural")
+        etag = first.headers["etag"]
+        self.assertEqual(etag, audio_etag(speech_key("Clap your hands", "hi-IN")))
+
+        second = self.client.post("/polly/synthesize", json=body, headers={"Range": "bytes=100-199"})
+        self.assertEqual(second.status_code, 206)
+        self.assertEqual(second.content, AUDIO[100:200])
+        self.assertEqual(second.headers["etag"], etag)
+        self.assertEqual(second.headers["content-range"], f"bytes 100-199/{len(AUDIO)}")
+
+        revalidated = self.client.post("/polly/synthesize", json=body, headers={"If-None-Match": etag})
+        self.assertEqual(revalidated.status_code, 304)
+
+        by_key = self.client.get(first.headers["content-location"])
+        self.assertEqual(by_key.content, AUDIO)
+        self.assertIn("immutable", by_key.headers["cache-control"])
+        self.assertEqual(len(self.polly.calls), 1)
+
+    def test_sentences_mode_streams_in_order_and_reuses_sentences(self):
+        self.polly = SentencePolly()
+        text = "One, touch your nose. Two, clap your hands. Three, wave."
+        first = self.client.post("/polly/synthesize", json={"text": text, "mode": "sentences"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, b"<One, touch your nose.><Two, clap your hands.><Three, wave.>")
+        self.assertEqual(len(self.polly.calls), 3)
+        self.assertGreater(self.polly.max_running, 1)
+
+        # Shared sentences come from the cache; only the new one goes to Polly
+        second = self.client.post("/polly/synthesize",
+                                  json={"text": "Three, wave. Four, jump.", "mode": "sentences"})
+        self.assertEqual(second.content, b"<Three, wave.><Four, jump.>")
+        self.assertEqual(self.polly.calls[3:], ["Four, jump."])
+
+        # A repeated text is one cached clip
+        again = self.client.post("/polly/synthesize", json={"text": text, "mode": "sentences"},
+                                 headers={"Range": "bytes=0-22"})
+        self.assertEqual(again.status_code, 206)
+        self.assertEqual(again.content, b"<One, touch your nose.>")
+        self.assertEqual(len(self.polly.calls), 4)
+
+    def test_oversized_texts_are_rejected_before_polly(self):
+        self.polly = SentencePolly()
+        with mock.patch.object(self.main.settings, "POLLY_MAX_SENTENCES", 3):
+            response = self.client.post("/polly/synthesize", json={"text": "Clap. " * 4, "mode": "sentences"})
+        self.assertEqual(response.status_code, 413)
+        with mock.patch.object(self.main.settings, "POLLY_MAX_REQUEST_CHARS", 100):
+            response = self.client.post("/polly/synthesize", json={"text": "x" * 101, "mode": "sentences"})
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post("/polly/synthesize", json={"text": "x" * 3001})
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.polly.calls, [])
+
+    def test_unknown_key_is_404(self):
+        self.assertEqual(self.client.get("/polly/audio/" + "0" * 64).status_code, 404)
+        self.assertEqual(self.client.get("/polly/audio/..%2Fsecret").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import sys
+import os
+import asyncio
+import io
+import threading
+import time
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from botocore.exceptions import ClientError, EndpointConnectionError, ResponseStreamingError
+from botocore.response import StreamingBody
+from urllib3.exceptions import ProtocolError
+from app.agents.clinical import ClinicalSupportAgent
+from app.core.aws_client import (
+    CircuitBreaker, CircuitOpenError, ConcurrencyLimitError, DeadlineExceededError,
+    GuardedClient, ServiceGuard, remaining_budget, request_deadline
+)
+from app.core.execution import ExecutionPool
+
+
+def client_error(code, status=400):
+    return ClientError({"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+                       "InvokeModel")
+
+
+class FlakyBedrock:
+    def __init__(self):
+        self.calls = 0
+        self.error = EndpointConnectionError(endpoint_url="https://bedrock")
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+class BrokenRaw(io.RawIOBase):
+    def read(self, amt=-1):
+        raise ProtocolError("Connection broken")
+
+
+class StreamingPolly:
+    def __init__(self, raw=None):
+        self.raw = raw
+
+    def synthesize_speech(self, **kwargs):
+        raw = self.raw or io.BytesIO(b"x" * 100)
+        return {"AudioStream": StreamingBody(raw, 100), "ContentType": "audio/mpeg"}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.breaker = CircuitBreaker("test_svc", failure_threshold=3, reset_seconds=10, clock=lambda: self.now[0])
+
+    def test_opens_half_opens_and_closes(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+
+        self.now[0] = 10.5
+        self.assertTrue(self.breaker.allow())       # the single half-open probe
+        self.assertFalse(self.breaker.allow())      # everyone else still fails fast
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.now[0] = 11
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, "open")
+        self.assertAlmostEqual(self.breaker.retry_after(), 10)
+
+
+class TestServiceGuard(unittest.TestCase):
+    def _guard(self, **kwargs):
+        breaker = CircuitBreaker("guard_svc", failure_threshold=2, reset_seconds=30)
+        return ServiceGuard("guard_svc", kwargs.pop("max_concurrency", 4), breaker, **kwargs)
+
+    def test_dependency_failures_trip_the_breaker_and_short_circuit(self):
+        bedrock = FlakyBedrock()
+        client = GuardedClient(bedrock, self._guard())
+        for _ in range(2):
+            with self.assertRaises(EndpointConnectionError):
+                client.invoke_model(body="{}")
+
+        started = time.perf_counter()
+        with self.assertRaises(CircuitOpenError) as raised:
+            client.invoke_model(body="{}")
+        self.assertLess(time.perf_counter() - started, 0.01)
+        self.assertEqual(bedrock.calls, 2)
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    def test_caller_errors_do_not_trip_the_breaker(self):
+        bedrock = FlakyBedrock()
+        bedrock.error = client_error("ValidationException")
+        client = GuardedClient(bedrock, self._guard())
+        for _ in range(4):
+            with self.assertRaises(ClientError):
+                client.invoke_model(body="{}")
+        self.assertEqual(client.guard.breaker.state, "closed")
+
+        bedrock.error = client_error("ThrottlingException")
+        for _ in range(2):
+            with self.assertRaises(ClientError):
+                client.invoke_model(body="{}")
+        self.assertEqual(client.guard.breaker.state, "open")
+
+    def test_concurrency_limit_refuses_instead_of_queueing(self):
+        guard = self._guard(max_concurrency=1, max_queue_wait=0.05)
+        release = threading.Event()
+        holder = threading.Thread(target=guard.call, args=(release.wait, 5))
+        holder.start()
+        time.sleep(0.02)
+        try:
+            with self.assertRaises(ConcurrencyLimitError):
+                guard.call(lambda: None)
+        finally:
+            release.set()
+            holder.join()
+        self.assertIsNone(guard.call(lambda: None))
+
+    def test_streaming_response_keeps_its_slot_until_read(self):
+        guard = self._guard(max_concurrency=1, max_queue_wait=0.05)
+        polly = GuardedClient(StreamingPolly(), guard)
+        audio = polly.synthesize_speech(Text="Clap.")["AudioStream"]
+        self.assertEqual(guard.in_flight.value, 1)
+        with self.assertRaises(ConcurrencyLimitError):
+            polly.synthesize_speech(Text="Wave.")
+        self.assertEqual(list(audio.iter_chunks(40)), [b"x" * 40, b"x" * 40, b"x" * 20])
+        self.assertEqual(guard.in_flight.value, 0)
+
+        # Closing early also gives the slot back
+        polly.synthesize_speech(Text="Wave.")["AudioStream"].close()
+        self.assertEqual(polly.synthesize_speech(Text="Jump.")["AudioStream"].read(), b"x" * 100)
+
+    def test_failed_stream_reads_trip_the_breaker(self):
+        guard = self._guard()
+        polly = GuardedClient(StreamingPolly(BrokenRaw()), guard)
+        for _ in range(2):
+            audio = polly.synthesize_speech(Text="Clap.")["AudioStream"]
+            self.assertEqual(guard.breaker.state, "closed")   # no verdict before the body is read
+            with self.assertRaises(ResponseStreamingError):
+                audio.read()
+        self.assertEqual(guard.breaker.state, "open")
+        self.assertEqual(guard.in_flight.value, 0)
+
+    def test_spent_deadline_refuses_calls(self):
+        guard = self._guard()
+        with request_deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceededError):
+                guard.call(lambda: None)
+        self.assertIsNone(remaining_budget())
+
+    def test_deadline_propagates_into_io_pool_threads(self):
+        pool = ExecutionPool("deadline_test_io", "thread", max_workers=2, max_queue=4)
+
+        async def run():
+            with request_deadline(5):
+                return await pool.run(remaining_budget)
+
+        try:
+            budget = asyncio.run(run())
+        finally:
+            pool.shutdown()
+        self.assertIsNotNone(budget)
+        self.assertLessEqual(budget, 5)
+
+
+class TestClinicalFallback(unittest.TestCase):
+    def test_open_breaker_falls_back_without_calling_bedrock(self):
+        bedrock = FlakyBedrock()
+        breaker = CircuitBreaker("clinical_test_svc", failure_threshold=1, reset_seconds=60)
+        agent = ClinicalSupportAgent(cache=None)
+        agent.cache = None
+        agent.bedrock = GuardedClient(bedrock, ServiceGuard("clinical_test_svc", 4, breaker))
+        risk = {"risk_score": 80, "confidence": "High", "interpretation": "High Risk", "breakdown": {}}
+
+        first = agent.generate_summary({"name": "P"}, risk)
+        second = agent.generate_summary({"name": "P"}, risk)
+        self.assertEqual(first["agent_status"], "Rule-Based Fallback")
+        self.assertEqual(second["agent_status"], "Rule-Based Fallback")
+        self.assertEqual(bedrock.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import sys
+import os
+import random
+import time
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from botocore.exceptions import ClientError, ReadTimeoutError
+from app.agents.clinical import ClinicalSupportAgent
+from app.config import settings
+from app.core.aws_client import CircuitOpenError, DeadlineExceededError, aws_client_manager, request_deadline
+from app.core.aws_standin import LATENCY_SAMPLES, LatencyModel, StandinState, start_standin
+
+RISK = {"risk_score": 82, "confidence": "High", "interpretation": "High Risk",
+        "breakdown": {"behavioral": 70, "questionnaire": 65}}
+
+
+class TestStandinBehavior(unittest.TestCase):
+    def test_latency_specs(self):
+        rng = random.Random(1)
+        self.assertEqual(LatencyModel.parse("fixed:120").sample_ms(rng), 120)
+        self.assertTrue(all(50 <= LatencyModel.parse("uniform:50:80").sample_ms(rng) <= 80 for _ in range(100)))
+        samples = sorted(LatencyModel.parse("lognormal:900:0.4").sample_ms(rng) for _ in range(2001))
+        self.assertAlmostEqual(samples[1000], 900, delta=60)
+        with self.assertRaises(ValueError):
+            LatencyModel.parse("gamma:1")
+
+    def test_seeded_outcomes_are_reproducible(self):
+        def run():
+            state = StandinState(seed=7)
+            state.configure({"services": {"polly": {"throttle_rate": 0.2, "error_rate": 0.1,
+                                                    "latency": "exponential:40"}}})
+            return [state.decide("polly") for _ in range(200)]
+
+        first = run()
+        self.assertEqual(first, run())
+        outcomes = [outcome for _, outcome in first]
+        self.assertAlmostEqual(outcomes.count("throttled") / 200, 0.2, delta=0.07)
+        self.assertAlmostEqual(outcomes.count("error") / 200, 0.1, delta=0.06)
+
+
+    def test_latency_samples_are_bounded(self):
+        state = StandinState(seed=3)
+        state.configure({"services": {"sts": {"latency": "fixed:900"}}})
+        state.decide("sts")
+        state.configure({"services": {"sts": {"latency": "uniform:1:5"}}})
+        for _ in range(LATENCY_SAMPLES + 500):
+            state.decide("sts")
+        self.assertEqual(len(state._stats["sts"]["latency_ms"]), LATENCY_SAMPLES)
+        stats = state.stats()["services"]["sts"]
+        self.assertEqual(stats["requests"], LATENCY_SAMPLES + 501)
+        self.assertLessEqual(stats["latency_ms"]["p95"], 5)
+        self.assertEqual(stats["latency_ms"]["max"], 900)     # still the all-time worst
+
+
+class TestClientsAgainstStandin(unittest.TestCase):
+    """The real boto3 clients from AWSClientManager, pointed at a stand-in on a free port."""
+
+    def setUp(self):
+        self.server = start_standin()
+        self.patches = [
+            mock.patch.object(settings, "AWS_STANDIN_URL", self.server.url),
+            mock.patch.object(settings, "AWS_POLLY_READ_TIMEOUT_SECONDS", 0.5),
+            mock.patch.object(settings, "AWS_MAX_ATTEMPTS", 1),
+            mock.patch.object(settings, "AWS_BREAKER_FAILURE_THRESHOLD", 2),
+        ]
+        # Fresh clients, guards and credential state on the singleton
+        for name, value in (("_bedrock_client", None), ("_polly_client", None), ("_s3_client", None),
+                            ("_credentials_valid", None), ("_validation_thread", None), ("_guards", {})):
+            self.patches.append(mock.patch.object(aws_client_manager, name, value))
+        for patch in self.patches:
+            patch.start()
+        self.assertTrue(aws_client_manager.wait_for_credentials(timeout=5))
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.server.stop()
+
+    def _agent(self):
+        agent = ClinicalSupportAgent()
+        agent.cache = None
+        return agent
+
+    def test_bedrock_polly_and_s3_round_trips(self):
+        summary = self._agent().generate_summary({"name": "P"}, RISK)
+        self.assertEqual(summary["agent_status"], "Bedrock Claude 3 Sonnet")
+        self.assertIn("neurologist", summary["clinical_recommendation"])
+
+        events = list(self._agent().stream_summary({"name": "P"}, RISK))
+        self.assertIn("token", [e[0] for e in events])
+        self.assertEqual(events[-1][1]["summary_title"], summary["summary_title"])
+
+        audio = aws_client_manager.get_polly_client().synthesize_speech(
+            Text="Touch your nose.", OutputFormat="mp3", VoiceId="Aditi")["AudioStream"].read()
+        self.assertTrue(audio.startswith(b"\xff\xfb"))
+
+        s3 = aws_client_manager.get_s3_client()
+        s3.put_object(Bucket="vids", Key="session/1.mp4", Body=b"frames")
+        self.assertEqual(s3.get_object(Bucket="vids", Key="session/1.mp4")["Body"].read(), b"frames")
+
+        stats = self.server.state.stats()["services"]
+        self.assertEqual(stats["sts"]["ok"], 1)
+        self.assertEqual(stats["bedrock"]["ok"], 2)
+
+    def test_throttling_opens_the_breaker_and_agent_falls_back(self):
+        self.server.state.configure({"services": {"bedrock": {"throttle_rate": 1.0}}})
+        agent = self._agent()
+        for _ in range(3):
+            self.assertEqual(agent.generate_summary({"name": "P"}, RISK)["agent_status"], "Rule-Based Fallback")
+        self.assertEqual(self.server.state.stats()["services"]["bedrock"]["throttled"], 2)
+        with self.assertRaises(CircuitOpenError):
+            agent.generate_bedrock_summary({"name": "P"}, RISK)
+
+    def test_hangs_hit_the_read_timeout(self):
+        self.server.state.configure({"services": {"polly": {"hang_rate": 1.0}}})
+        polly = aws_client_manager.get_polly_client()
+        started = time.perf_counter()
+        with self.assertRaises(ReadTimeoutError):
+            polly.synthesize_speech(Text="Clap.", OutputFormat="mp3", VoiceId="Aditi")
+        self.assertLess(time.perf_counter() - started, 3)
+
+        # A request deadline shorter than the read timeout bounds every attempt, retries included
+        with mock.patch.object(settings, "AWS_POLLY_READ_TIMEOUT_SECONDS", 5), \
+                mock.patch.object(settings, "AWS_MAX_ATTEMPTS", 3), \
+                mock.patch.object(aws_client_manager, "_polly_client", None):
+            polly_with_retries = aws_client_manager.get_polly_client()
+            started = time.perf_counter()
+            with request_deadline(0.5), self.assertRaises((ReadTimeoutError, DeadlineExceededError)):
+                polly_with_retries.synthesize_speech(Text="Clap.", OutputFormat="mp3", VoiceId="Aditi")
+            self.assertLess(time.perf_counter() - started, 1.5)
+
+        self.server.state.configure({"services": {"polly": {"hang_rate": 0, "error_rate": 1.0}}})
+        with self.assertRaises(ClientError) as raised:
+            polly.synthesize_speech(Text="Clap.", OutputFormat="mp3", VoiceId="Aditi")
+        self.assertEqual(raised.exception.response["Error"]["Code"], "ServiceFailureException")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import os
+import datetime
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import insert, select
+from app.config import settings
+from app.database import Patient, ScreeningSession, User
+from app.core import blind_index as bidx
+from app.core.blind_index import backfill_blind_indexes, blind_index
+from api_db import ApiDatabaseTestCase
+
+
+class TestBlindIndex(unittest.TestCase):
+    def tearDown(self):
+        bidx._field_key.cache_clear()
+
+    def test_normalized_keyed_and_separated_by_field(self):
+        self.assertEqual(blind_index("Asha  Rao ", "name"), blind_index("asha rao", "name"))
+        self.assertEqual(blind_index("+91 98765-43210", "phone"), blind_index("919876543210", "phone"))
+        self.assertNotEqual(blind_index("12 Park St", "name"), blind_index("12 Park St", "address"))
+        self.assertEqual(len(blind_index("Asha Rao", "name")), 64)
+        for blank in (None, "", "   "):
+            self.assertIsNone(blind_index(blank, "name"))
+        self.assertIsNone(blind_index("n/a", "phone"))
+        with self.assertRaises(ValueError):
+            blind_index("x", "email")
+
+        before = blind_index("Asha Rao", "name")
+        bidx._field_key.cache_clear()
+        with mock.patch.object(settings, "BLIND_INDEX_KEY", "rotated"):
+            self.assertNotEqual(blind_index("Asha Rao", "name"), before)
+
+
+class TestWritesAndBackfill(ApiDatabaseTestCase):
+    def test_orm_writes_keep_indexes_and_backfill_fills_the_rest(self):
+        with self.Session() as db:
+            patient = Patient(name="Asha Rao", external_id="a1", phone="98765 43210", org_id=1)
+            db.add(patient)
+            db.commit()
+            patient.name = "Asha R"
+            patient.address = None
+            db.commit()
+            self.assertEqual((patient.name_bidx, patient.phone_bidx, patient.address_bidx),
+                             (blind_index("asha r", "name"), blind_index("9876543210", "phone"), None))
+
+            # Core inserts skip the attribute events, like rows written before the columns existed
+            db.execute(insert(User), [{"email": f"u{i}@test.com", "full_name": f"User {i}"} for i in range(3)])
+            db.execute(insert(ScreeningSession), [{"patient_name": "Legacy Kid"}])
+            db.commit()
+            with mock.patch.object(bidx, "BACKFILL_CHUNK", 2):
+                self.assertEqual(backfill_blind_indexes(db), {"patients": 0, "users": 3, "screening_sessions": 1})
+            self.assertEqual(backfill_blind_indexes(db), {"patients": 0, "users": 0, "screening_sessions": 0})
+            self.assertEqual(db.execute(select(User.id).where(User.full_name_bidx == blind_index("user 2", "name")))
+                             .scalar(), 3)
+            self.assertEqual(backfill_blind_indexes(db, rebuild=True)["patients"], 1)
+
+
+class TestLookups(ApiDatabaseTestCase):
+    def setUp(self):
+        from app.schemas import TokenData
+
+        super().setUp()
+        with self.Session() as db:
+            parent = User(email="mum@test.com", role="PARENT", full_name="Priya Shah", org_id=1)
+            db.add(parent)
+            db.add_all([
+                Patient(name="Asha Rao", external_id="a1", phone="98765 43210",
+                        date_of_birth=datetime.datetime(2020, 1, 1), org_id=1),
+                Patient(name="Asha Rao", external_id="a2", date_of_birth=datetime.datetime(2020, 1, 1), org_id=2),
+                Patient(name="Ravi Rao", external_id="r1", date_of_birth=datetime.datetime(2020, 1, 1), org_id=1),
+            ])
+            # Legacy sessions filed under the parent's name, and someone else's
+            db.add_all([ScreeningSession(patient_name=name, risk_score=30.0, created_at=datetime.datetime(2026, 1, 1))
+                        for name in ("priya  shah", "Someone Else")])
+            db.commit()
+
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        self.client = self.api_client()
+
+    def test_patient_lookup_by_name_and_phone(self):
+        found = self.client.get("/patients", params={"name": "ASHA RAO"})
+        self.assertEqual([p["external_id"] for p in found.json()], ["a1"])
+        found = self.client.get("/patients", params={"phone": "+91 98765 43210"})
+        self.assertEqual([p["external_id"] for p in found.json()], [])   # stored without the country code
+        found = self.client.get("/patients", params={"phone": "9876543210", "name": "asha rao"})
+        self.assertEqual([p["external_id"] for p in found.json()], ["a1"])
+        self.assertEqual(self.client.get("/patients", params={"name": "  "}).status_code, 400)
+
+    def test_parent_reports_match_their_name_in_one_query(self):
+        from app.schemas import TokenData
+
+        self.user = TokenData(sub="mum@test.com", role="PARENT", org_id=1)
+        with self.async_statements() as statements:
+            reports = self.client.get("/reports").json()
+        self.assertEqual([r["risk"] for r in reports], ["30%"])
+        self.assertEqual(len(statements), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
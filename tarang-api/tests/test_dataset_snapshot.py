@@ -0,0 +1,84 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.core.dataset_snapshot import DatasetSnapshot, SnapshotStore
+from app import train_model
+
+
+class TestDatasetSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(os.path.join(self.tmpdir.name, 'snapshots'))
+        X, y, _ = train_model.preprocess_data(train_model.create_representative_dataset())
+        self.X, self.y = X, y
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_roundtrip_preserves_columns_and_hash(self):
+        snapshot = DatasetSnapshot.from_frame(self.X, self.y, 'synthetic|preprocess-v1')
+        self.assertTrue(self.store.put(snapshot))
+
+        loaded = self.store.get('synthetic|preprocess-v1')
+        self.assertEqual(loaded.content_hash, snapshot.content_hash)
+        pd.testing.assert_frame_equal(loaded.frame(), self.X.reset_index(drop=True))
+        np.testing.assert_array_equal(loaded.target, self.y)
+
+        # Same content is not rewritten; changed content gets a new hash
+        self.assertFalse(self.store.put(DatasetSnapshot.from_frame(self.X, self.y, 'synthetic|preprocess-v1')))
+        changed = self.X.copy()
+        changed.loc[0, 'age'] += 1
+        self.assertNotEqual(DatasetSnapshot.from_frame(changed, self.y).content_hash, snapshot.content_hash)
+
+    def test_missing_or_corrupt_snapshot_is_a_miss(self):
+        self.assertIsNone(self.store.get('synthetic|preprocess-v1'))
+        snapshot = DatasetSnapshot.from_frame(self.X, self.y, 'synthetic|preprocess-v1')
+        self.store.put(snapshot)
+        with open(self.store.path_for(snapshot.content_hash), 'wb') as f:
+            f.write(b'not an npz')
+        self.assertIsNone(self.store.get('synthetic|preprocess-v1'))
+
+    def test_training_data_served_from_snapshot(self):
+        with mock.patch.object(train_model, 'USE_UCI_REPO', False):
+            timer = train_model.StageTimer()
+            X, y, feature_cols, first_hash = train_model.load_training_data(self.store, timer=timer)
+            self.assertIn('fetch', timer.stages)
+
+            timer = train_model.StageTimer()
+            with mock.patch.object(train_model, 'load_datasets', side_effect=AssertionError("refetched")):
+                X2, y2, feature_cols2, second_hash = train_model.load_training_data(self.store, timer=timer)
+        self.assertEqual(first_hash, second_hash)
+        self.assertEqual(feature_cols, feature_cols2)
+        self.assertNotIn('fetch', timer.stages)
+        np.testing.assert_array_equal(X.to_numpy(), X2.to_numpy())
+
+    def test_flat_parallel_cv_matches_cross_val_score(self):
+        from sklearn.model_selection import cross_val_score, train_test_split
+        from sklearn.ensemble import RandomForestClassifier
+
+        X_train, _, y_train, _ = train_test_split(self.X, self.y, test_size=0.2, random_state=42, stratify=self.y)
+        expected = cross_val_score(
+            RandomForestClassifier(**train_model.BASE_PARAMS['RandomForestClassifier']), X_train, y_train, cv=5
+        )
+
+        output = []
+        with mock.patch('builtins.print', side_effect=lambda *a, **k: output.append(' '.join(map(str, a)))):
+            train_model.train_model(self.X, self.y, n_jobs=2)
+        self.assertIn(f"Cross-validation accuracy: {expected.mean():.3f} (+/- {expected.std()*2:.3f})", output)
+
+    def test_sweep_candidates_merge_base_params(self):
+        candidates = train_model.sweep_candidates({'GradientBoostingClassifier': {'max_depth': [2, 3]}})
+        self.assertEqual([params['max_depth'] for _, params in candidates], [2, 3])
+        self.assertTrue(all(params['random_state'] == 42 for _, params in candidates))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.core import cpu_tasks
+from app.core.execution import ExecutionPool, PoolSaturatedError
+from app.agents.outcome import OutcomeAgent
+
+
+def blocking_sleep(seconds):
+    time.sleep(seconds)
+    return threading.current_thread().name
+
+
+class TestExecutionPool(unittest.TestCase):
+    def test_thread_pool_keeps_event_loop_responsive(self):
+        pool = ExecutionPool("test_io", kind="thread", max_workers=4, max_queue=16)
+
+        async def run():
+            started = time.perf_counter()
+            results = await asyncio.gather(*(pool.run(blocking_sleep, 0.05) for _ in range(4)))
+            return results, time.perf_counter() - started
+
+        results, elapsed = asyncio.run(run())
+        pool.shutdown()
+        self.assertTrue(all(name.startswith("test_io") for name in results))
+        self.assertLess(elapsed, 0.15)
+        self.assertEqual(pool.run_histogram.snapshot()["count"], 4)
+        self.assertEqual(pool.stats()["queue_depth"], 0)
+
+    def test_rejects_calls_beyond_queue_limit(self):
+        pool = ExecutionPool("test_bounded", kind="thread", max_workers=1, max_queue=2)
+
+        async def run():
+            return await asyncio.gather(*(pool.run(blocking_sleep, 0.02) for _ in range(4)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        pool.shutdown()
+        rejected = [r for r in results if isinstance(r, PoolSaturatedError)]
+        self.assertEqual(len(rejected), 2)
+        self.assertEqual(pool.rejected.value, 2)
+
+    def test_disabled_pool_runs_inline(self):
+        pool = ExecutionPool("test_inline", kind="process", max_workers=1, max_queue=1, enabled=False)
+        result = asyncio.run(pool.run(blocking_sleep, 0))
+        self.assertEqual(result, threading.current_thread().name)
+        self.assertIsNone(pool._executor)
+
+    def test_process_pool_matches_inline_agent(self):
+        pool = ExecutionPool("test_cpu", kind="process", max_workers=1, max_queue=4, start_method="forkserver")
+        scores = [40.0, 45.5, 52.0, 58.5, 61.0]
+
+        prediction, alert = asyncio.run(pool.run(cpu_tasks.predict_outcome, scores))
+        pool.shutdown()
+
+        agent = OutcomeAgent()
+        expected = agent.predict_trajectory(scores)
+        self.assertEqual(prediction["trend"], expected["trend"])
+        self.assertAlmostEqual(prediction["velocity"], expected["velocity"], places=6)
+        self.assertEqual(alert, agent.generate_intervention_alert(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
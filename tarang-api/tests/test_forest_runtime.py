@@ -0,0 +1,98 @@
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+import joblib
+from app.core.forest_runtime import FlatForest, export_model, load_exported
+
+
+def make_aq10_dataset(n_samples=600, seed=7):
+    """AQ-10 shaped features: 10 binary scores, 3 flags, age, total score."""
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 2, (n_samples, 10))
+    flags = rng.integers(0, 2, (n_samples, 3))
+    age = rng.integers(1, 60, (n_samples, 1))
+    total = scores.sum(axis=1, keepdims=True)
+    X = np.hstack([scores, flags, age, total]).astype(float)
+    y = (total[:, 0] + 2 * flags[:, 2] + rng.normal(0, 1.5, n_samples) > 6).astype(int)
+    return X, y
+
+
+class TestFlatForestParity(unittest.TestCase):
+    def setUp(self):
+        self.X, self.y = make_aq10_dataset()
+
+    def _assert_parity(self, model):
+        flat = FlatForest.from_estimator(model)
+        np.testing.assert_allclose(flat.predict_proba(self.X), model.predict_proba(self.X), atol=1e-12)
+        np.testing.assert_array_equal(flat.predict(self.X), model.predict(self.X))
+        for row, expected in zip(self.X[:50], model.predict_proba(self.X[:50])[:, 1]):
+            self.assertAlmostEqual(flat.predict_row(row), expected, places=12)
+
+    def test_random_forest_parity(self):
+        model = RandomForestClassifier(
+            n_estimators=30, max_depth=8, min_samples_leaf=2, class_weight='balanced', random_state=0
+        ).fit(self.X, self.y)
+        self._assert_parity(model)
+
+    def test_gradient_boosting_parity(self):
+        model = GradientBoostingClassifier(n_estimators=40, max_depth=3, random_state=0).fit(self.X, self.y)
+        self._assert_parity(model)
+
+    def test_non_integer_thresholds(self):
+        rng = np.random.default_rng(3)
+        X = rng.normal(size=(400, 15))
+        y = (X[:, 0] + X[:, 5] > 0).astype(int)
+        model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+        flat = FlatForest.from_estimator(model)
+        np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+    def test_rejects_wrong_feature_count(self):
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, self.y)
+        flat = FlatForest.from_estimator(model)
+        with self.assertRaises(ValueError):
+            flat.predict_proba(self.X[:, :5])
+
+
+class TestFlatForestExport(unittest.TestCase):
+    def setUp(self):
+        self.X, self.y = make_aq10_dataset(n_samples=300)
+        self.model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(self.X, self.y)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, 'model.joblib')
+        self.model_data = {'model': self.model, 'feature_columns': [f"f{i}" for i in range(15)],
+                           'model_type': 'RandomForestClassifier', 'accuracy': 0.9}
+        joblib.dump(self.model_data, self.model_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_export_round_trip_is_memory_mapped(self):
+        export_model(self.model_data, self.model_path)
+        loaded = load_exported(self.model_path)
+
+        self.assertTrue(loaded.is_memory_mapped)
+        self.assertFalse(loaded.threshold.flags.writeable)
+        self.assertEqual(loaded.metadata['feature_columns'], self.model_data['feature_columns'])
+        self.assertEqual(loaded.metadata['accuracy'], 0.9)
+        np.testing.assert_allclose(loaded.predict_proba(self.X), self.model.predict_proba(self.X), atol=1e-12)
+
+    def test_stale_export_is_rejected(self):
+        export_model(self.model_data, self.model_path)
+        with open(self.model_path, 'ab') as f:
+            f.write(b'retrained')
+        self.assertIsNone(load_exported(self.model_path))
+
+        # Without the .joblib (e.g. a slim image) the export is used as-is
+        os.remove(self.model_path)
+        self.assertIsNotNone(load_exported(self.model_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
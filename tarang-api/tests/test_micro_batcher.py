@@ -0,0 +1,75 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.core.batching import MicroBatcher
+from app.agents.screening_ml import ScreeningAgent
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_calls_share_one_batch(self):
+        calls = []
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=64, max_wait_ms=20, name="test_share")
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [i * 2 for i in range(20)])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(batcher.batch_size_histogram.snapshot()["count"], 1)
+        self.assertEqual(batcher.queue_wait_histogram.snapshot()["count"], 20)
+
+    def test_max_batch_size_splits_batches(self):
+        sizes = []
+
+        def batch_fn(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20, name="test_split")
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(20)))
+
+        results = asyncio.run(run())
+        self.assertEqual(results, list(range(20)))
+        self.assertEqual(sizes, [8, 8, 4])
+
+    def test_errors_propagate_to_every_caller(self):
+        def batch_fn(items):
+            raise RuntimeError("model failure")
+
+        batcher = MicroBatcher(batch_fn, max_wait_ms=5, name="test_error")
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    def test_async_screening_matches_sync(self):
+        agent = ScreeningAgent()
+        video = {"eye_contact": 0.7, "motor_coordination": 0.4}
+
+        async def run():
+            return await asyncio.gather(*(agent.analyze_signals_async(video, q) for q in range(10)))
+
+        results = asyncio.run(run())
+        for q, result in enumerate(results):
+            expected = agent.analyze_signals(video, q)
+            self.assertAlmostEqual(result["risk_score"], expected["risk_score"], places=6)
+            self.assertEqual(result["interpretation"], expected["interpretation"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import StaticPool
+from app.core.blind_index import blind_index
+from app.core.migrations import (
+    BLIND_INDEX_INDEXES, HOT_PATH_INDEXES, LATEST_VERSION, check_query_plans, current_version, migrate, seed_dataset
+)
+
+
+def memory_engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+class TestMigrations(unittest.TestCase):
+    def test_fresh_database_then_boot_is_one_query(self):
+        engine = memory_engine()
+        self.assertEqual(migrate(engine), list(range(1, LATEST_VERSION + 1)))
+        self.assertEqual(current_version(engine), LATEST_VERSION)
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *a: statements.append(statement))
+        self.assertEqual(migrate(engine), [])
+        self.assertEqual(len(statements), 1)
+        self.assertIn("schema_migrations", statements[0])
+
+    def test_legacy_database_gets_columns_indexes_and_backfill(self):
+        engine = memory_engine()
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE patients (id INTEGER PRIMARY KEY, external_id VARCHAR, name BLOB, "
+                              "date_of_birth DATETIME, phone BLOB, address BLOB, org_id INTEGER)"))
+            conn.execute(text("CREATE TABLE screening_sessions (id INTEGER PRIMARY KEY, patient_name VARCHAR, "
+                              "risk_score FLOAT, confidence VARCHAR, breakdown JSON, "
+                              "clinical_recommendation VARCHAR, created_at DATETIME)"))
+            conn.execute(text("INSERT INTO screening_sessions (patient_name, risk_score, breakdown, created_at) "
+                              "VALUES ('legacy', 55.0, '{\"questionnaire\": 40}', '2025-06-01 10:00:00')"))
+
+        migrate(engine)
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("screening_sessions")}
+        self.assertTrue({"patient_id", "modality", "summary_status"} <= columns)
+        self.assertIn("parent_user_id", {c["name"] for c in inspector.get_columns("patients")})
+        indexes = {ix["name"] for table in inspector.get_table_names() for ix in inspector.get_indexes(table)}
+        self.assertTrue(set(HOT_PATH_INDEXES) | set(BLIND_INDEX_INDEXES) <= indexes)
+        with engine.connect() as conn:
+            modality, name_bidx = conn.execute(text("SELECT modality, patient_name_bidx FROM screening_sessions")).one()
+        self.assertEqual((modality, name_bidx), ("Dev. Log", blind_index("Legacy", "name")))
+
+
+class TestQueryPlans(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.engine = create_engine(f"sqlite:///{os.path.join(cls.tmpdir.name, 'plans.db')}")
+        migrate(cls.engine)
+        seed_dataset(cls.engine, sessions=5_000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        cls.tmpdir.cleanup()
+
+    def test_hot_queries_use_indexes_and_a_dropped_index_is_caught(self):
+        results = check_query_plans(self.engine)
+        self.assertEqual([r["endpoint"] for r in results if r["seq_scans"]], [])
+
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_patients_parent_user_id"))
+        self.engine.dispose()   # pooled connections cache the old plans
+        try:
+            failing = {r["endpoint"]: r["seq_scans"] for r in check_query_plans(self.engine) if r["seq_scans"]}
+            self.assertEqual(failing, {"GET /reports (parent)": ["patients"], "GET /appointments (parent)": ["patients"]})
+        finally:
+            with self.engine.begin() as conn:
+                conn.execute(text("CREATE INDEX ix_patients_parent_user_id ON patients (parent_user_id)"))
+
+
+if __name__ == '__main__':
+    unittest.main()
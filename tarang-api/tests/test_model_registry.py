@@ -0,0 +1,96 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from app.core.model_registry import ActiveModel, ModelBundle, ModelRegistry, ModelSwapper
+from app.agents.screening_ml import ScreeningAgent
+
+FEATURE_COLS = ['A1_Score', 'A2_Score', 'A3_Score', 'gender_encoded', 'age', 'total_score']
+
+
+def write_model(path, seed):
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(0, 2, (300, 3))
+    gender = rng.integers(0, 2, (300, 1))
+    age = rng.integers(1, 70, (300, 1))
+    total = scores.sum(axis=1, keepdims=True)
+    X = np.hstack([scores, gender, age, total]).astype(float)
+    y = (total[:, 0] + rng.normal(0, 0.8, 300) > 1.5).astype(int)
+    model = RandomForestClassifier(n_estimators=8, max_depth=5, random_state=seed).fit(X, y)
+    joblib.dump({'model': model, 'feature_columns': FEATURE_COLS, 'model_type': 'RandomForestClassifier',
+                 'accuracy': 0.9, 'version': 'dev'}, path)
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmpdir.name, 'registry'))
+        for seed in (1, 2):
+            path = os.path.join(self.tmpdir.name, f'model_{seed}.joblib')
+            write_model(path, seed)
+            self.registry.register(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _load(self, path, version):
+        return ModelBundle.load(path, version)
+
+    def test_register_writes_manifest_and_exports(self):
+        manifest = self.registry.manifest()
+        self.assertEqual(manifest['active'], 'v1')
+        self.assertEqual(sorted(manifest['versions']), ['v1', 'v2'])
+
+        bundle = self._load(self.registry.artifact_path('v2'), 'v2')
+        self.assertEqual(bundle.load_source, 'mmap')
+        self.assertIsNotNone(bundle.score_table)
+        self.assertGreaterEqual(bundle.warm(), 0)
+
+        self.registry.activate('v2')
+        self.assertEqual(self.registry.active_version(), 'v2')
+        with self.assertRaises(KeyError):
+            self.registry.activate('v9')
+
+    def test_swap_keeps_serving_until_new_version_is_ready(self):
+        slot = ActiveModel(self._load(self.registry.artifact_path('v1'), 'v1'))
+        swapper = ModelSwapper(slot, self.registry, self._load)
+        agent = ScreeningAgent()
+        agent.active_model = slot
+        video = {"eye_contact": 0.6, "motor_coordination": 0.3}
+
+        async def run():
+            task = swapper.trigger('v2')
+            versions = []
+            while not task.done():
+                versions.append(agent.analyze_signals(video, 4)["model_info"]["model_version"])
+                await asyncio.sleep(0)
+            await task
+            versions.append(agent.analyze_signals(video, 4)["model_info"]["model_version"])
+            return versions
+
+        versions = asyncio.run(run())
+        self.assertEqual(versions[0], 'v1')
+        self.assertEqual(versions[-1], 'v2')
+        self.assertTrue(set(versions) <= {'v1', 'v2'})
+        self.assertEqual(swapper.status['state'], 'swapped')
+        self.assertEqual(swapper.status['previous'], 'v1')
+
+    def test_failed_swap_keeps_old_version(self):
+        slot = ActiveModel(self._load(self.registry.artifact_path('v1'), 'v1'))
+        swapper = ModelSwapper(slot, self.registry, lambda path, version: ModelBundle(version))
+
+        status = asyncio.run(swapper.swap_to('v2'))
+        self.assertEqual(status['state'], 'failed')
+        self.assertEqual(slot.current.version, 'v1')
+
+
+if __name__ == '__main__':
+    unittest.main()
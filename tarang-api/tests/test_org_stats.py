@@ -0,0 +1,116 @@
+import sys
+import os
+import datetime
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import select
+from app.database import DailyOrgScreeningStats, Patient, ScreeningSession
+from app.core.org_stats import rebuild_daily_stats, record_daily_stats, shift_daily_stats
+from api_db import ApiDatabaseTestCase
+
+TODAY = datetime.datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+class TestDailyOrgStats(ApiDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.Session()
+        patients = [Patient(name="A", external_id="a", org_id=1), Patient(name="B", external_id="b", org_id=1),
+                    Patient(name="C", external_id="c", org_id=2)]
+        self.db.add_all(patients)
+        self.db.flush()
+        self.ids = [p.id for p in patients]
+
+    def tearDown(self):
+        self.db.close()
+        super().tearDown()
+
+    def screen(self, sessions):
+        """[(patient index or None, risk_score, days ago)] inserted and recorded in one batch."""
+        rows = []
+        for index, risk_score, days_ago in sessions:
+            session = ScreeningSession(patient_id=self.ids[index] if index is not None else None, patient_name="x",
+                                       risk_score=risk_score, created_at=TODAY - datetime.timedelta(days=days_ago))
+            self.db.add(session)
+            rows.append(session)
+        self.db.flush()
+        record_daily_stats(self.db, [{"patient_id": s.patient_id, "risk_score": s.risk_score,
+                                      "created_at": s.created_at} for s in rows])
+        self.db.commit()
+
+    def rollup(self):
+        return {(r.org_id, r.day): (r.screenings, r.low_risk, r.medium_risk, r.high_risk)
+                for r in self.db.execute(select(DailyOrgScreeningStats)).scalars()}
+
+    def test_incremental_rows_match_rebuild(self):
+        self.screen([(0, 12.0, 0), (1, 55.0, 0), (0, 91.0, 1), (2, 85.0, 0), (None, 50.0, 0)])
+        self.screen([(1, 80.0, 0), (0, 39.9, 3)])
+        incremental = self.rollup()
+        self.assertEqual(incremental[(1, TODAY.date())], (3, 1, 1, 1))
+        self.assertEqual(incremental[(2, TODAY.date())], (1, 0, 0, 1))
+        self.assertEqual(len(incremental), 4)
+
+        self.db.query(DailyOrgScreeningStats).delete()
+        self.assertEqual(rebuild_daily_stats(self.db), 4)
+        self.assertEqual(self.rollup(), incremental)
+
+        # A ranged rebuild only replaces its own days
+        self.db.execute(ScreeningSession.__table__.update().values(risk_score=95.0))
+        yesterday = (TODAY - datetime.timedelta(days=1)).date()
+        rebuild_daily_stats(self.db, yesterday, TODAY.date())
+        self.assertEqual(self.rollup()[(1, TODAY.date())], (3, 0, 0, 3))
+        self.assertEqual(self.rollup()[(1, (TODAY - datetime.timedelta(days=3)).date())], (1, 1, 0, 0))
+
+    def test_rescored_sessions_shift_buckets_without_losing_new_screenings(self):
+        self.screen([(0, 12.0, 0), (1, 55.0, 0), (2, 85.0, 0), (0, 91.0, 40)])
+        sessions = self.db.execute(select(ScreeningSession).order_by(ScreeningSession.id)).scalars().all()
+        new_scores = [85.0, 55.0, 20.0, 91.0]   # low -> high, unchanged, high -> low, unchanged
+        changes = [{"patient_id": s.patient_id, "created_at": s.created_at,
+                    "old_risk_score": s.risk_score, "new_risk_score": score} for s, score in zip(sessions, new_scores)]
+        for s, score in zip(sessions, new_scores):
+            s.risk_score = score
+
+        # A live screening lands on the same day row while the rescoring chunk is open
+        self.screen([(1, 10.0, 0)])
+        self.assertEqual(shift_daily_stats(self.db, changes), 2)
+        self.db.commit()
+        rollup = self.rollup()
+        self.assertEqual(rollup[(1, TODAY.date())], (3, 1, 1, 1))
+        self.assertEqual(rollup[(2, TODAY.date())], (1, 1, 0, 0))
+
+        self.db.query(DailyOrgScreeningStats).delete()
+        rebuild_daily_stats(self.db)
+        self.assertEqual(self.rollup(), rollup)
+
+    def test_center_analytics_reads_the_rollup(self):
+        from app.schemas import TokenData
+
+        self.screen([(0, 10.0, 0), (1, 60.0, 0), (0, 90.0, 2), (1, 20.0, 9), (2, 90.0, 0)])
+
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        client = self.api_client()
+        with mock.patch.object(self.main.settings, "DEMO_MODE", False):
+            with self.async_statements() as statements:
+                default = client.get("/analytics/center").json()
+            self.assertEqual(len(statements), 2)      # patient count + rollup rows
+            self.assertEqual((default["total_patients"], default["total_screenings"]), (2, 4))
+            self.assertEqual(default["risk_distribution"], {"Low": 2, "Medium": 1, "High": 1})
+            self.assertEqual(default["weekly_activity"], [0, 0, 0, 0, 1, 0, 2])
+
+            start = (TODAY - datetime.timedelta(days=9)).date()
+            ranged = client.get("/analytics/center", params={"start": start.isoformat(),
+                                                             "end": (start + datetime.timedelta(days=2)).isoformat()}).json()
+            self.assertEqual(ranged["weekly_activity"], [1, 0, 0])
+            self.assertEqual((ranged["total_screenings"], ranged["risk_distribution"]["Low"]), (1, 1))
+
+            backwards = client.get("/analytics/center", params={"start": TODAY.date().isoformat(),
+                                                                "end": start.isoformat()})
+            self.assertEqual(backwards.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
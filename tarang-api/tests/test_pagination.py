@@ -0,0 +1,117 @@
+import sys
+import os
+import datetime
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.database import Appointment, CommunityPost, Patient, ScreeningSession, User, screening_modality
+from app.core.pagination import decode_cursor, encode_cursor
+from api_db import ApiDatabaseTestCase
+
+T0 = datetime.datetime(2026, 3, 1, 9, 0, 0, 123456)
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip_is_exact_and_opaque(self):
+        cursor = encode_cursor((T0, 42))
+        self.assertEqual(decode_cursor(cursor, 2), [T0, 42])
+        self.assertNotIn("2026", cursor)
+        for bad in ("", "abc", encode_cursor((T0,)), encode_cursor((None, 1)), encode_cursor(([1], 2))):
+            with self.assertRaises(ValueError):
+                decode_cursor(bad, 2)
+
+    def test_modality(self):
+        self.assertEqual(screening_modality({"behavioral": 70, "questionnaire": 20}), "Vision Stream")
+        self.assertEqual(screening_modality('{"behavioral": 10, "questionnaire": 20}'), "Dev. Log")
+        self.assertEqual(screening_modality(None), "Hybrid Fusion")
+
+
+class TestListEndpoints(ApiDatabaseTestCase):
+    # /reports runs on the async session, the other lists on the sync one
+    def setUp(self):
+        from app.schemas import TokenData
+
+        super().setUp()
+        db = self.Session()
+        doc = User(email="doc@test.com", role="CLINICIAN", full_name="Dr A", org_id=1)
+        parent = User(email="mum@test.com", role="PARENT", full_name="Mum", org_id=1)
+        db.add_all([doc, parent])
+        db.flush()
+        mine = Patient(name="Kid", external_id="k1", date_of_birth=T0, org_id=1, parent_user_id=parent.id)
+        other = Patient(name="Other", external_id="o1", date_of_birth=T0, org_id=2)
+        db.add_all([mine, other])
+        db.flush()
+        # 30 sessions for org 1 over 30 days (same timestamp pairs to exercise the id tie-break), 5 for org 2
+        for i in range(30):
+            breakdown = {"behavioral": 80, "questionnaire": 10} if i % 3 == 0 else {"behavioral": 10, "questionnaire": 50}
+            db.add(ScreeningSession(patient_id=mine.id, patient_name="Kid", risk_score=float(i * 3),
+                                    breakdown=breakdown, modality=screening_modality(breakdown),
+                                    created_at=T0 + datetime.timedelta(days=i // 2)))
+        for i in range(5):
+            db.add(ScreeningSession(patient_id=other.id, patient_name="Other", risk_score=50.0,
+                                    breakdown={}, modality="Hybrid Fusion", created_at=T0))
+        for i in range(7):
+            db.add(CommunityPost(author="a", content=f"post {i}", is_safe=1, org_id=1,
+                                 created_at=T0 + datetime.timedelta(hours=i)))
+            db.add(Appointment(patient_id=mine.id, clinician_id=doc.id, status="confirmed",
+                               start_time=T0 + datetime.timedelta(days=i), end_time=T0 + datetime.timedelta(days=i, hours=1),
+                               created_at=T0))
+        db.commit()
+        db.close()
+
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        self.client = self.api_client()
+
+    def walk(self, path, **params):
+        items, cursor, pages = [], None, 0
+        while True:
+            response = self.client.get(path, params=dict(params, **({"cursor": cursor} if cursor else {})))
+            self.assertEqual(response.status_code, 200, response.text)
+            items.extend(response.json())
+            pages += 1
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                return items, pages
+
+    def test_reports_pages_are_org_scoped_and_filtered_in_sql(self):
+        reports, pages = self.walk("/reports", limit=7)
+        self.assertEqual((len(reports), pages), (30, 5))
+        ids = [r["id"] for r in reports]
+        self.assertEqual(len(set(ids)), 30)
+        self.assertEqual(ids, sorted(ids, reverse=True))   # created_at then id, both descending
+
+        vision, _ = self.walk("/reports", modality="Vision Stream", min_risk=20, limit=3)
+        self.assertEqual([r["type"] for r in vision], ["Vision Stream"] * 7)
+        ranged, _ = self.walk("/reports", start="2026-03-02", end="2026-03-03", max_risk=10)
+        self.assertEqual([r["risk"] for r in ranged], ["9%", "6%"])
+
+        self.assertEqual(self.client.get("/reports", params={"modality": "EEG"}).status_code, 400)
+        self.assertEqual(self.client.get("/reports", params={"cursor": "bogus"}).status_code, 400)
+
+    def test_parent_sees_only_their_child(self):
+        from app.schemas import TokenData
+
+        self.user = TokenData(sub="mum@test.com", role="PARENT", org_id=1)
+        reports, _ = self.walk("/reports", limit=50)
+        self.assertEqual(len(reports), 30)
+        appointments, pages = self.walk("/appointments", limit=3)
+        self.assertEqual((len(appointments), pages), (7, 3))
+        self.assertEqual({a["clinician_name"] for a in appointments}, {"Dr A"})
+
+    def test_community_appointments_and_patients_page(self):
+        posts, pages = self.walk("/community", limit=2)
+        self.assertEqual([p["content"] for p in posts], [f"post {i}" for i in reversed(range(7))])
+        self.assertEqual(pages, 4)
+
+        upcoming, _ = self.walk("/appointments", start=(T0 + datetime.timedelta(days=5)).date().isoformat())
+        self.assertEqual(len(upcoming), 2)
+        self.assertEqual(upcoming[0]["patient_name"], "Kid")
+
+        patients, pages = self.walk("/patients", limit=1)
+        self.assertEqual(([p["external_id"] for p in patients], pages), (["k1"], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import sys
+import os
+import datetime
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import select
+from app.database import Patient, PatientSummary, ScreeningSession
+from app.core.pagination import decode_cursor
+from app.core.patient_summary import rebuild_summaries, record_screenings, worklist_page
+from api_db import ApiDatabaseTestCase
+
+T0 = datetime.datetime(2026, 1, 1)
+
+
+class ProjectionTestCase(ApiDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db = self.Session()
+
+    def tearDown(self):
+        self.db.close()
+        super().tearDown()
+
+    def add_patients(self, count, org_id=1):
+        patients = [Patient(name=f"Child {i}", external_id=f"org{org_id}-{i}", org_id=org_id) for i in range(count)]
+        self.db.add_all(patients)
+        self.db.flush()
+        return [p.id for p in patients]
+
+    def screen(self, patient_id, risk_score, minutes):
+        session = ScreeningSession(patient_id=patient_id, patient_name="x", risk_score=risk_score,
+                                   created_at=T0 + datetime.timedelta(minutes=minutes))
+        self.db.add(session)
+        self.db.flush()
+        record_screenings(self.db, [{"id": session.id, "patient_id": patient_id, "risk_score": risk_score,
+                                     "created_at": session.created_at}])
+        return session
+
+    def summaries(self):
+        return {s.patient_id: (s.session_count, s.latest_risk_score, s.previous_risk_score, s.trend,
+                               s.risk_rank, s.latest_session_id, s.latest_session_at)
+                for s in self.db.execute(select(PatientSummary)).scalars()}
+
+
+class TestProjection(ProjectionTestCase):
+    def test_record_tracks_latest_count_and_trend(self):
+        first, second = self.add_patients(2)
+        self.screen(first, 40.0, 1)
+        self.assertEqual(self.db.get(PatientSummary, first).trend, "baseline")
+        self.screen(first, 62.0, 2)
+        self.db.commit()
+        summary = self.db.get(PatientSummary, first)
+        self.assertEqual((summary.session_count, summary.latest_risk_score, summary.previous_risk_score),
+                         (2, 62.0, 40.0))
+        self.assertEqual(summary.trend, "worsening")
+        self.assertEqual(summary.latest_session_at, T0 + datetime.timedelta(minutes=2))
+
+        # Patients without a screening are listed, ranked below every score
+        self.assertEqual(self.db.get(PatientSummary, second), None)
+        rebuild_summaries(self.db)
+        self.assertEqual(self.db.get(PatientSummary, second).risk_rank, -1.0)
+
+    def test_rebuild_matches_incremental_updates(self):
+        ids = self.add_patients(4)
+        for minute, (pid, risk) in enumerate([(ids[0], 80.0), (ids[1], 30.0), (ids[0], 78.0),
+                                              (ids[1], 12.0), (ids[2], 55.0), (ids[0], 60.0)]):
+            self.screen(pid, risk, minute)
+        self.db.commit()
+        incremental = self.summaries()
+        self.assertEqual(incremental[ids[0]][3], "improving")
+        self.assertEqual(incremental[ids[1]][3], "improving")
+
+        self.db.query(PatientSummary).delete()
+        self.assertEqual(rebuild_summaries(self.db), 4)
+        rebuilt = self.summaries()
+        for pid in ids[:3]:
+            self.assertEqual(rebuilt[pid], incremental[pid])
+        self.assertEqual(rebuilt[ids[3]][:5], (0, None, None, None, -1.0))
+
+
+class TestWorklist(ProjectionTestCase):
+    def test_keyset_pages_cover_the_org_in_risk_order(self):
+        ids = self.add_patients(9)
+        self.add_patients(3, org_id=2)
+        rebuild_summaries(self.db)
+        for i, pid in enumerate(ids[:7]):
+            self.screen(pid, float([50, 90, 50, 10, 70, 50, 30][i]), i)
+        self.db.commit()
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = worklist_page(self.db, 1, limit=4, cursor=cursor)
+            seen.extend((summary.risk_rank, summary.patient_id) for summary, _, _ in rows)
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(seen[-2:], [(-1.0, ids[8]), (-1.0, ids[7])])
+
+        ascending, _ = worklist_page(self.db, 1, limit=3, sort="risk_asc")
+        self.assertEqual([s.patient_id for s, _, _ in ascending], [ids[7], ids[8], ids[3]])
+        with self.assertRaises(ValueError):
+            decode_cursor("not-a-cursor", 2)
+
+    def test_endpoint_query_count_does_not_grow_with_history(self):
+        from app.schemas import TokenData
+
+        ids = self.add_patients(25)
+        for minute in range(4):
+            for pid in ids:
+                self.screen(pid, float((pid * 7 + minute * 11) % 100), minute)
+        self.db.commit()
+
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        client = self.api_client()
+        with self.async_statements() as statements:
+            first = client.get("/clinical/patients", params={"limit": 20})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(first.json()), 20)
+        top = first.json()[0]
+        self.assertEqual(top["sessions"], 4)
+        self.assertEqual(top["stability"], f"{top['riskScore']:.1f}%")
+        self.assertTrue(top["name"].startswith("Child"))
+
+        rest = client.get("/clinical/patients", params={"cursor": first.headers["x-next-cursor"]})
+        self.assertEqual(len(rest.json()), 5)
+        self.assertNotIn("x-next-cursor", rest.headers)
+        scores = [p["riskScore"] for p in first.json() + rest.json()]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        self.assertEqual(client.get("/clinical/patients", params={"cursor": "zz"}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
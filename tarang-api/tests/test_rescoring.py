@@ -0,0 +1,146 @@
+import sys
+import os
+import datetime
+import tempfile
+import unittest
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sklearn.ensemble import RandomForestClassifier
+from app.database import Base, DailyOrgScreeningStats, Patient, ScreeningSession
+from app.core.model_registry import ActiveModel, ModelBundle
+from app.core.org_stats import rebuild_daily_stats
+from app.core.rescoring import RescoreBackfill, inputs_from_breakdown
+from app.agents.screening_ml import ScreeningAgent
+
+FEATURE_COLS = [f'A{i}_Score' for i in range(1, 11)] + [
+    'gender_encoded', 'jaundice_encoded', 'family_history_encoded', 'age', 'total_score'
+]
+
+
+def make_bundle(version, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2, (400, 15)).astype(float)
+    X[:, 13] = rng.integers(2, 40, 400)
+    X[:, 14] = X[:, :10].sum(axis=1)
+    y = (X[:, 14] + rng.normal(0, 1.5, 400) > 5).astype(int)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=seed).fit(X, y)
+    return ModelBundle(version, model, FEATURE_COLS, {'model_type': 'RandomForestClassifier', 'accuracy': 0.9})
+
+
+class TestRescoreBackfill(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+
+        old_agent = ScreeningAgent()
+        old_agent.active_model = ActiveModel(make_bundle('v1', seed=1))
+        self.agent = ScreeningAgent()
+        self.agent.active_model = ActiveModel(make_bundle('v2', seed=2))
+
+        rng = np.random.default_rng(5)
+        self.inputs = []
+        db = self.Session()
+        patients = [Patient(name="A", external_id="a", org_id=1), Patient(name="B", external_id="b", org_id=2)]
+        db.add_all(patients)
+        db.flush()
+        for i in range(23):
+            video = {"eye_contact": float(rng.uniform()), "motor_coordination": float(rng.uniform())}
+            eeg = {"alpha_theta_ratio": 0.4} if i % 4 == 0 else None
+            score = int(rng.integers(0, 11))
+            old = old_agent.analyze_signals(video, score, eeg_mock=eeg)
+            self.inputs.append((video, score, eeg))
+            db.add(ScreeningSession(patient_name=f"P{i}", patient_id=patients[i % 2].id, risk_score=old["risk_score"],
+                                    confidence=old["confidence"], breakdown=old["breakdown"], model_version='v1',
+                                    created_at=datetime.datetime(2026, 1, 1) + datetime.timedelta(days=i % 3)))
+        db.add(ScreeningSession(patient_name="legacy", risk_score=50.0, breakdown=None))
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _backfill(self, **kwargs):
+        return RescoreBackfill(self.Session, self.agent, chunk_size=5, checkpoint_path=self.checkpoint, **kwargs)
+
+    def test_rescored_rows_match_fresh_analysis(self):
+        stats = self._backfill().run()
+        self.assertTrue(stats["completed"])
+        self.assertEqual((stats["processed"], stats["updated"], stats["skipped"]), (24, 23, 1))
+
+        db = self.Session()
+        rows = db.query(ScreeningSession).filter(ScreeningSession.breakdown.isnot(None)).order_by(ScreeningSession.id).all()
+        for row, (video, score, eeg) in zip(rows, self.inputs):
+            expected = self.agent.analyze_signals(video, score, eeg_mock=eeg)
+            self.assertAlmostEqual(row.risk_score, expected["risk_score"], delta=0.011)
+            self.assertEqual(row.model_version, 'v2')
+        db.close()
+
+        # Everything rescoreable is on v2 now; only the unparseable row is read again
+        second = self._backfill().run()
+        self.assertEqual((second["rows_this_run"], second["updated"]), (1, 0))
+
+    def test_daily_rollup_follows_rescored_buckets(self):
+        db = self.Session()
+        db.query(ScreeningSession).update({"risk_score": 5.0})
+        rebuild_daily_stats(db)
+        db.commit()
+        rollup = lambda: {(r.org_id, r.day): (r.screenings, r.low_risk, r.medium_risk, r.high_risk)
+                          for r in db.execute(select(DailyOrgScreeningStats)).scalars()}
+        before = rollup()
+
+        self._backfill().run()
+        rescored = rollup()
+        self.assertNotEqual(rescored, before)
+        db.query(DailyOrgScreeningStats).delete()
+        rebuild_daily_stats(db)
+        self.assertEqual(rollup(), rescored)
+        db.close()
+
+    def test_resumes_from_checkpoint(self):
+        first = self._backfill(limit=10).run()
+        self.assertFalse(first["completed"])
+        self.assertEqual(first["processed"], 10)
+
+        second = self._backfill().run()
+        self.assertTrue(second["completed"])
+        self.assertEqual(second["rows_this_run"], 14)
+        self.assertEqual(second["processed"], 24)
+
+    def test_throttles_to_target_rate(self):
+        clock = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        stats = self._backfill(rows_per_second=10, sleep=sleep, clock=lambda: clock[0]).run()
+        self.assertAlmostEqual(sum(sleeps), stats["rows_this_run"] / 10, places=6)
+
+    def test_dry_run_writes_nothing(self):
+        stats = self._backfill(dry_run=True).run()
+        self.assertEqual(stats["updated"], 23)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        db = self.Session()
+        self.assertEqual(db.query(ScreeningSession).filter(ScreeningSession.model_version == 'v2').count(), 0)
+        db.close()
+
+    def test_inputs_from_breakdown(self):
+        self.assertIsNone(inputs_from_breakdown(None))
+        self.assertIsNone(inputs_from_breakdown("not json"))
+        submission = inputs_from_breakdown('{"behavioral": 40.0, "questionnaire": 35.0, "physiological": 0}')
+        self.assertEqual(submission["questionnaire_score"], 7)
+        self.assertIsNone(submission["eeg_mock"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from app.core.score_table import ScoreTable
+
+FEATURE_COLS = ['A1_Score', 'A2_Score', 'A3_Score', 'gender_encoded', 'age', 'total_score']
+
+
+class TestScoreTable(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        scores = rng.integers(0, 2, (300, 3))
+        gender = rng.integers(0, 2, (300, 1))
+        age = rng.integers(1, 70, (300, 1))
+        total = scores.sum(axis=1, keepdims=True)
+        self.X = np.hstack([scores, gender, age, total]).astype(float)
+        y = (total[:, 0] + (age[:, 0] > 30) + rng.normal(0, 0.7, 300) > 2).astype(int)
+        self.model = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(self.X, y)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, 'model.joblib')
+        joblib.dump({'model': self.model, 'feature_columns': FEATURE_COLS}, self.model_path)
+        self.table = ScoreTable.build(self.model, FEATURE_COLS, self.model_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _features(self, row):
+        return dict(zip(FEATURE_COLS, row))
+
+    def test_lookup_matches_model(self):
+        expected = self.model.predict_proba(self.X)[:, 1]
+        for row, p in zip(self.X, expected):
+            self.assertAlmostEqual(self.table.lookup(self._features(row)), p, places=12)
+
+        probabilities, hit = self.table.lookup_matrix(self.X)
+        self.assertTrue(hit.all())
+        np.testing.assert_allclose(probabilities, expected, atol=1e-12)
+
+    def test_out_of_range_rows_fall_back(self):
+        row = self._features(self.X[0])
+        self.assertIsNone(self.table.lookup(dict(row, age=200)))
+        self.assertIsNone(self.table.lookup(dict(row, age=4.5)))
+        self.assertIsNone(self.table.lookup(dict(row, A1_Score=2)))
+        self.assertIsNone(self.table.lookup(dict(row, total_score=row['total_score'] + 1)))
+
+        X = self.X[:3].copy()
+        X[1, 4] = 500
+        _, hit = self.table.lookup_matrix(X)
+        self.assertEqual(hit.tolist(), [True, False, True])
+
+    def test_load_is_memory_mapped_and_rejects_stale_model(self):
+        loaded = ScoreTable.load(self.model_path, FEATURE_COLS)
+        self.assertIsInstance(loaded.table, np.memmap)
+        self.assertFalse(loaded.table.flags.writeable)
+
+        self.assertIsNone(ScoreTable.load(self.model_path, FEATURE_COLS[::-1]))
+        with open(self.model_path, 'ab') as f:
+            f.write(b'retrained')
+        self.assertIsNone(ScoreTable.load(self.model_path, FEATURE_COLS))
+
+
+if __name__ == '__main__':
+    unittest.main()
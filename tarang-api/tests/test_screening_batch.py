@@ -0,0 +1,50 @@
+import sys
+import os
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.agents.screening_ml import ScreeningAgent
+
+
+class TestScreeningBatch(unittest.TestCase):
+    def setUp(self):
+        self.agent = ScreeningAgent()
+        self.submissions = [
+            {"video_metrics": {"eye_contact": 0.85, "motor_coordination": 0.9}, "questionnaire_score": 10},
+            {"video_metrics": {"eye_contact": 0.1, "motor_coordination": 0.15}, "questionnaire_score": 2},
+            {"video_metrics": {"eye_contact": 0.5, "motor_coordination": 0.5}, "questionnaire_score": 5},
+            {"video_metrics": {"eye_contact": 0.9, "motor_coordination": 0.9}, "questionnaire_score": 0},
+            {"video_metrics": {}, "questionnaire_score": 7, "eeg_mock": {"alpha_theta_ratio": 0.6}},
+        ]
+
+    def _assert_parity(self):
+        batch = self.agent.analyze_batch(self.submissions)
+        self.assertEqual(len(batch), len(self.submissions))
+
+        for item, result in zip(self.submissions, batch):
+            single = self.agent.analyze_signals(
+                item["video_metrics"], item["questionnaire_score"], eeg_mock=item.get("eeg_mock")
+            )
+            self.assertAlmostEqual(result["risk_score"], single["risk_score"], places=6)
+            self.assertAlmostEqual(result["dissonance_factor"], single["dissonance_factor"], places=6)
+            self.assertEqual(result["confidence"], single["confidence"])
+            self.assertEqual(result["interpretation"], single["interpretation"])
+            self.assertEqual(result["fusion_method"], single["fusion_method"])
+            for key, value in single["breakdown"].items():
+                self.assertAlmostEqual(result["breakdown"][key], value, places=6)
+
+    def test_batch_matches_single_record_path(self):
+        self._assert_parity()
+
+    def test_batch_matches_rule_based_fallback(self):
+        self.agent.model_available = False
+        self._assert_parity()
+
+    def test_empty_batch(self):
+        self.assertEqual(self.agent.analyze_batch([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import unittest
+import numpy as np
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from sklearn.ensemble import RandomForestClassifier
+from app.core.model_registry import ActiveModel, ModelBundle
+from app.core.shadow import ShadowEvaluator
+from app.agents.screening_ml import ScreeningAgent
+
+FEATURE_COLS = [f'A{i}_Score' for i in range(1, 11)] + [
+    'gender_encoded', 'jaundice_encoded', 'family_history_encoded', 'age', 'total_score'
+]
+
+
+def make_bundle(version, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2, (400, 15)).astype(float)
+    X[:, 13] = rng.integers(2, 40, 400)
+    X[:, 14] = X[:, :10].sum(axis=1)
+    y = (X[:, 14] + rng.normal(0, 1.5, 400) > 5).astype(int)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=seed).fit(X, y)
+    return ModelBundle(version, model, FEATURE_COLS, {'model_type': 'RandomForestClassifier', 'accuracy': 0.9})
+
+
+class TestShadowEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmpdir.name, 'shadow.jsonl')
+        self.agent = ScreeningAgent()
+        self.agent.active_model = ActiveModel(make_bundle('v1', seed=1))
+        self.candidate = make_bundle('v2', seed=2)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _evaluator(self, **kwargs):
+        evaluator = ShadowEvaluator(self.agent, registry=None, loader=None, log_path=self.log_path, **kwargs)
+        evaluator.candidate = self.candidate
+        self.agent.shadow = evaluator
+        return evaluator
+
+    def test_candidate_scored_without_changing_responses(self):
+        evaluator = self._evaluator()
+        video = {"eye_contact": 0.6, "motor_coordination": 0.3}
+
+        async def run():
+            results = await asyncio.gather(*(self.agent.analyze_signals_async(video, q) for q in range(10)))
+            while evaluator.scored.value < evaluator.offered.value:
+                await asyncio.sleep(0.01)
+            return results
+
+        scored_before = evaluator.scored.value
+        results = asyncio.run(run())
+        for q, result in enumerate(results):
+            self.assertEqual(result["model_info"]["model_version"], 'v1')
+            self.assertEqual(result["risk_score"], self.agent.analyze_signals(video, q)["risk_score"])
+
+        with open(self.log_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), evaluator.scored.value - scored_before)
+        self.assertEqual({(r["pv"], r["cv"]) for r in records}, {('v1', 'v2')})
+
+        candidate_risk = self.agent._fuse_signals(video, 3, None, self.candidate.model.predict_proba(
+            self.agent._feature_matrix([self.agent._prepare_ml_features(video, self.agent._score_to_responses(3))],
+                                       FEATURE_COLS))[0, 1], self.candidate)["risk_score"]
+        self.assertAlmostEqual(records[3]["cr"], candidate_risk, places=6)
+
+        summary = evaluator.summary()
+        self.assertEqual(summary["samples"], 10)
+        self.assertGreaterEqual(summary["agreement"]["class_rate"], 0)
+        self.assertIn("candidate_to_primary_ratio", summary["latency_ms_per_row"])
+
+    def test_drops_when_queue_is_full(self):
+        evaluator = self._evaluator(queue_size=2)
+        sample = {"features": {}, "primary_bundle": None}
+
+        async def run():
+            # No awaits between offers, so the consumer never drains the queue
+            return [evaluator.offer(sample) for _ in range(10)]
+
+        dropped_before = evaluator.dropped.value
+        accepted = asyncio.run(run())
+        self.assertEqual(accepted.count(True), 2)
+        self.assertEqual(evaluator.dropped.value - dropped_before, 8)
+
+    def test_no_candidate_means_no_work(self):
+        evaluator = self._evaluator()
+        evaluator.candidate = None
+        self.assertFalse(evaluator.offer({"features": {}}))
+        self.assertEqual(evaluator.summary()["samples"], 0)
+
+    def test_log_is_rotated_and_summaries_read_the_tail(self):
+        evaluator = self._evaluator(max_log_bytes=20_000, summary_limit=50)
+        evaluator.candidate = None
+
+        def record(n, cv):
+            return json.dumps({"ts": n, "pv": "v1", "cv": cv, "pp": 0.4, "cp": 0.6, "pr": 40.0, "cr": 45.0,
+                               "pi": "Low Risk", "ci": "Low Risk", "pms": 0.01, "cms": 0.02}, separators=(",", ":"))
+
+        for start in range(0, 300, 10):
+            evaluator._append([record(n, "v3" if n % 3 == 0 else "v2") for n in range(start, start + 10)])
+        self.assertTrue(os.path.exists(self.log_path + ".1"))
+        self.assertLess(os.path.getsize(self.log_path), 20_000)
+
+        # Newest samples first, across the rotated file, oldest first in the window
+        summary = evaluator.summary("v2")
+        self.assertEqual(summary["samples"], 50)
+        self.assertEqual(summary["window"]["last"], 299)
+        self.assertEqual(evaluator.summary("v3", limit=5)["window"], {"first": 285, "last": 297})
+        with open(self.log_path) as f:
+            in_current = sum(1 for line in f if '"cv":"v3"' in line)
+        self.assertEqual(evaluator.summary("v3", limit=in_current + 3)["samples"], in_current + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import io
+import shutil
+import tempfile
+import threading
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from botocore.response import StreamingBody
+from app.core.audio_cache import AudioCache
+from app.core.speech import sequence_key, speech_key, split_sentences
+from app.core.speech_warmup import coverage_report, phrase_catalog, warm_audio_cache
+
+
+class CatalogPolly:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def synthesize_speech(self, Text, VoiceId, Engine, **kwargs):
+        with self._lock:
+            self.calls.append(Text)
+        if self.fail_on and self.fail_on in Text:
+            raise RuntimeError("throttled")
+        audio = f"<{Engine}:{Text}>".encode()
+        return {"AudioStream": StreamingBody(io.BytesIO(audio), len(audio))}
+
+
+class TestSpeechWarmup(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = AudioCache(self.root, max_bytes=10 ** 7)
+        self.catalog = phrase_catalog()
+        self.languages = ["en-IN", "ta-IN"]
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_catalog_comes_from_the_agents(self):
+        self.assertIn("Joint Attention Mosaic", self.catalog["therapy"])
+        self.assertEqual(len(self.catalog["alerts"]), 6)
+        self.assertTrue(any(p.startswith("Status: High Risk.") for p in self.catalog["clinical"]))
+        for phrases in self.catalog.values():
+            self.assertEqual(len(phrases), len(set(phrases)))
+
+    def test_warm_then_rerun_is_free(self):
+        polly = CatalogPolly()
+        stats = warm_audio_cache(polly, self.cache, self.catalog, self.languages, concurrency=4)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["synthesized"], len(polly.calls))
+        self.assertEqual(coverage_report(self.cache, self.catalog, self.languages)["coverage"], 1.0)
+
+        # Both request modes find their clip; the joined clip is the sentences in order
+        phrase = self.catalog["alerts"][0]
+        sentences = split_sentences(phrase)
+        joined = self.cache.lookup(sequence_key([speech_key(s, "ta-IN") for s in sentences]))
+        with open(joined, "rb") as f:
+            self.assertEqual(f.read(), b"".join(f"<standard:{s}>".encode() for s in sentences))
+        self.assertIsNotNone(self.cache.lookup(speech_key(phrase, "en-IN")))
+
+        again = warm_audio_cache(polly, self.cache, self.catalog, self.languages)
+        self.assertEqual((again["synthesized"], again["joined"]), (0, 0))
+        self.assertEqual(again["already_cached"], again["texts"])
+
+    def test_failures_are_reported_in_coverage(self):
+        stats = warm_audio_cache(CatalogPolly(fail_on="plateaued"), self.cache, self.catalog, self.languages)
+        self.assertGreater(stats["failed"], 0)
+        report = coverage_report(self.cache, self.catalog, self.languages)
+        self.assertEqual(report["sources"]["therapy"]["covered"], report["sources"]["therapy"]["pairs"])
+        self.assertEqual(report["sources"]["alerts"]["covered"], report["sources"]["alerts"]["pairs"] - 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.agents.clinical import ClinicalSupportAgent
+from app.core.aws_client import aws_client_manager
+from app.core.startup import StartupTimer
+
+
+class TestStartupTimer(unittest.TestCase):
+    def test_phases_and_marks(self):
+        now = [0.0]
+        timer = StartupTimer(clock=lambda: now[0])
+        with timer.phase("model_load"):
+            now[0] = 1.5
+        now[0] = 4.0
+        timer.mark("import")
+        self.assertEqual(timer.as_dict(), {"model_load": 1.5, "import": 4.0})
+        self.assertIn("import 4.000s", timer.report())
+
+
+class TestBackgroundCredentialValidation(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.probes = 0
+
+        def slow_probe():
+            self.probes += 1
+            self.release.wait(5)
+            return False
+
+        # Fresh, unvalidated state on the singleton with an STS call that hangs until released
+        self.patches = [
+            mock.patch.object(aws_client_manager, "_credentials_valid", None),
+            mock.patch.object(aws_client_manager, "_validation_thread", None),
+            mock.patch.object(aws_client_manager, "_probe_credentials", slow_probe),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        self.release.set()
+        thread = aws_client_manager._validation_thread
+        if thread is not None:
+            thread.join(5)
+        for patch in reversed(self.patches):
+            patch.stop()
+
+    def test_clients_do_not_wait_for_sts(self):
+        started = time.perf_counter()
+        agent = ClinicalSupportAgent(cache=None)
+        self.assertIsNone(agent.bedrock)
+        self.assertIsNone(aws_client_manager.get_polly_client())
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(aws_client_manager.credential_status(), "pending")
+
+        # Rule-based summaries are served while the probe is still out
+        summary = agent.generate_summary({"name": "P"}, {"risk_score": 80, "confidence": "High",
+                                                         "interpretation": "High Risk", "breakdown": {}})
+        self.assertEqual(summary["agent_status"], "Rule-Based Fallback")
+
+        self.release.set()
+        self.assertFalse(aws_client_manager.wait_for_credentials(timeout=5))
+        self.assertEqual(aws_client_manager.credential_status(), "invalid")
+        self.assertEqual(self.probes, 1)
+
+    def test_assigned_client_is_kept_and_deleting_resets(self):
+        agent = ClinicalSupportAgent(cache=None)
+        fake = object()
+        agent.bedrock = fake
+        self.assertIs(agent.bedrock, fake)
+        del agent.bedrock
+        self.assertIsNone(agent.bedrock)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import io
+import json
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from app.agents.clinical import ClinicalSupportAgent
+from app.core.summary_cache import SummaryCache, profile_key, quantize_risk_profile
+
+
+class FakeBedrock:
+    def __init__(self):
+        self.prompts = []
+
+    def invoke_model(self, modelId, contentType, accept, body):
+        self.prompts.append(json.loads(body)["messages"][0]["content"])
+        text = json.dumps({"summary_title": "Summary", "key_findings": ["finding"],
+                           "clinical_recommendation": f"call {len(self.prompts)}"})
+        return {"body": io.BytesIO(json.dumps({"content": [{"text": text}]}).encode())}
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("down")
+
+    def setex(self, key, ttl, value):
+        raise ConnectionError("down")
+
+
+def risk(score, behavioral=43.5):
+    return {"risk_score": score, "confidence": "High", "dissonance_factor": 0.08, "interpretation": "Moderate Risk",
+            "breakdown": {"ml_model": 94.4, "behavioral": behavioral, "questionnaire": 35.0, "physiological": 0.0}}
+
+
+class TestSummaryCache(unittest.TestCase):
+    def _agent(self, cache):
+        agent = ClinicalSupportAgent(cache=cache)
+        agent.bedrock = FakeBedrock()
+        return agent
+
+    def test_similar_profiles_share_one_bedrock_call(self):
+        cache = SummaryCache(max_entries=8)
+        agent = self._agent(cache)
+        hits_before = cache.hits.value
+
+        first = agent.generate_summary({"name": "Asha"}, risk(57.7))
+        second = agent.generate_summary({"name": "Ravi"}, risk(58.9, behavioral=41.0))
+        third = agent.generate_summary({"name": "Ravi"}, risk(81.0))
+
+        self.assertEqual(len(agent.bedrock.prompts), 2)
+        self.assertEqual(first["clinical_recommendation"], second["clinical_recommendation"])
+        self.assertNotEqual(first["clinical_recommendation"], third["clinical_recommendation"])
+        self.assertEqual(cache.hits.value - hits_before, 1)
+        # Bedrock only ever sees the quantized profile, never the patient's identity
+        self.assertNotIn("Asha", agent.bedrock.prompts[0])
+        self.assertIn('"risk_score": 60', agent.bedrock.prompts[0])
+
+    def test_ttl_and_lru_eviction(self):
+        now = [0.0]
+        cache = SummaryCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        self.assertEqual(cache.get("a"), {"v": 1})
+        cache.set("c", {"v": 3})  # evicts b, the least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": 1})
+
+        now[0] = 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_shared_backend_errors_fall_back_to_local(self):
+        cache = SummaryCache(redis_client=BrokenRedis())
+        errors_before = cache.backend_errors.value
+        cache.set("k", {"v": 1})
+        self.assertEqual(cache.get("k"), {"v": 1})
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.backend_errors.value - errors_before, 2)
+
+    def test_key_ignores_noise_below_quantization(self):
+        self.assertEqual(profile_key(quantize_risk_profile(risk(57.7)), "m"),
+                         profile_key(quantize_risk_profile(risk(57.6, behavioral=44.0)), "m"))
+        self.assertNotEqual(profile_key(quantize_risk_profile(risk(57.7)), "m"),
+                            profile_key(quantize_risk_profile(risk(57.7)), "other-model"))
+
+
+if __name__ == '__main__':
+    unittest.main()
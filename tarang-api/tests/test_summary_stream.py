@@ -0,0 +1,228 @@
+import sys
+import os
+import json
+import asyncio
+import functools
+import time
+import unittest
+from unittest import mock
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.agents.clinical import ClinicalSupportAgent
+from app.core.summary_cache import SummaryCache
+from app.core.summary_stream import SummaryStreamParser, stream_blocking
+from app.database import Base, ScreeningSession
+
+SUMMARY_TEXT = '```json\n' + json.dumps({
+    "summary_title": 'Moderate "risk" profile',
+    "key_findings": ["Reduced eye contact", "Questionnaire – elevated"],
+    "clinical_recommendation": "Follow up in 4 weeks.",
+    "agent_status": "Bedrock Claude 3 Sonnet",
+}, indent=2) + '\n```'
+
+
+def text_chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeStreamingBedrock:
+    def __init__(self, chunks=None, fail_after=None):
+        self.chunks = chunks if chunks is not None else text_chunks(SUMMARY_TEXT)
+        self.fail_after = fail_after
+        self.calls = 0
+        self.closed = False
+
+    def invoke_model_with_response_stream(self, modelId, contentType, accept, body):
+        self.calls += 1
+        bedrock = self
+
+        class Stream:
+            def __iter__(self):
+                yield {"chunk": {"bytes": json.dumps({"type": "message_start"}).encode()}}
+                for i, text in enumerate(bedrock.chunks):
+                    if bedrock.fail_after is not None and i >= bedrock.fail_after:
+                        raise ConnectionError("stream reset")
+                    yield {"chunk": {"bytes": json.dumps({
+                        "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}
+                    }).encode()}}
+                yield {"chunk": {"bytes": json.dumps({"type": "message_stop"}).encode()}}
+
+            def close(self):
+                bedrock.closed = True
+
+        return {"body": Stream()}
+
+
+def risk():
+    return {"risk_score": 57.7, "confidence": "High", "dissonance_factor": 0.08, "interpretation": "Moderate Risk",
+            "breakdown": {"behavioral": 43.5, "questionnaire": 35.0, "physiological": 0.0}}
+
+
+class TestSummaryStreamParser(unittest.TestCase):
+    def test_emits_each_value_when_its_closing_quote_arrives(self):
+        parser = SummaryStreamParser()
+        events, consumed_at = [], []
+        for i, char in enumerate(SUMMARY_TEXT):
+            for event in parser.feed(char):
+                events.append(event)
+                consumed_at.append(i)
+
+        self.assertEqual(events, [
+            ("field", "summary_title", 'Moderate "risk" profile'),
+            ("finding", 0, "Reduced eye contact"),
+            ("finding", 1, "Questionnaire – elevated"),
+            ("field", "clinical_recommendation", "Follow up in 4 weeks."),
+            ("field", "agent_status", "Bedrock Claude 3 Sonnet"),
+        ])
+        # The first finding is available long before the document is complete
+        self.assertLess(consumed_at[1], SUMMARY_TEXT.index("Questionnaire"))
+
+
+class TestStreamingAgent(unittest.TestCase):
+    def _agent(self, bedrock, cache=None):
+        agent = ClinicalSupportAgent(cache=cache or SummaryCache())
+        agent.bedrock = bedrock
+        return agent
+
+    def test_stream_then_cache(self):
+        agent = self._agent(FakeStreamingBedrock())
+        events = list(agent.stream_summary({"name": "Asha"}, risk()))
+        kinds = [e[0] for e in events]
+        self.assertEqual(kinds.count("finding"), 2)
+        self.assertLess(kinds.index("finding"), len(kinds) - 1 - kinds[::-1].index("token"))
+        self.assertEqual(events[-1][0], "complete")
+        self.assertEqual(events[-1][1]["key_findings"][1], "Questionnaire – elevated")
+        self.assertTrue(agent.bedrock.closed)
+
+        replay = list(agent.stream_summary({"name": "Ravi"}, risk()))
+        self.assertEqual(agent.bedrock.calls, 1)
+        self.assertNotIn("token", [e[0] for e in replay])
+        self.assertEqual(replay[-1][1]["clinical_recommendation"], "Follow up in 4 weeks.")
+
+    def test_failure_mid_stream_falls_back_to_rule_based(self):
+        agent = self._agent(FakeStreamingBedrock(fail_after=3))
+        events = list(agent.stream_summary({"name": "Asha"}, risk()))
+        self.assertIn("error", [e[0] for e in events])
+        self.assertEqual(events[-1][1]["agent_status"], "Rule-Based Fallback")
+
+    def test_stream_blocking_stops_producer_on_early_exit(self):
+        produced = []
+
+        def factory(stopped):
+            for i in range(1000):
+                if stopped():
+                    return
+                produced.append(i)
+                yield i
+                time.sleep(0.001)   # a slow upstream, so stopping early is observable
+
+        async def run_io(fn, *args):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+        async def consume():
+            items = []
+            stream = stream_blocking(factory, run_io)
+            async for item in stream:
+                items.append(item)
+                if len(items) == 3:
+                    break
+            await stream.aclose()
+            await asyncio.sleep(0.05)
+            return items
+
+        self.assertEqual(asyncio.run(consume()), [0, 1, 2])
+        self.assertLess(len(produced), 1000)
+
+    def test_stream_blocking_holds_producer_back_for_slow_consumer(self):
+        produced = []
+
+        def factory(stopped):
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        async def run_io(fn, *args):
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+        async def consume():
+            items = []
+            async for item in stream_blocking(factory, run_io, max_buffered=4):
+                items.append(item)
+                if len(items) == 2:
+                    await asyncio.sleep(0.1)   # a slow client
+                    self.assertLessEqual(len(produced), 2 + 4 + 1)
+            return items
+
+        self.assertEqual(asyncio.run(consume()), list(range(1000)))
+
+
+class TestStreamEndpoint(unittest.TestCase):
+    def setUp(self):
+        from app import main
+        from app.security import get_current_user
+        from app.schemas import TokenData
+
+        self.main = main
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        db = self.Session()
+        row = ScreeningSession(patient_name="Asha", risk_score=57.7, confidence="High", dissonance_factor=0.08,
+                               interpretation="Moderate Risk", breakdown=risk()["breakdown"],
+                               clinical_recommendation="rule text", summary_status="pending")
+        db.add(row)
+        db.commit()
+        self.session_id = row.id
+        db.close()
+
+        def override_get_db():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        self.overrides = dict(main.app.dependency_overrides)
+        main.app.dependency_overrides[main.get_db] = override_get_db
+        main.app.dependency_overrides[get_current_user] = lambda: TokenData(sub="c@test.com", role="CLINICIAN", org_id=1)
+        self.patches = [
+            mock.patch.object(main, "SessionLocal", self.Session),
+            mock.patch.object(main.clinical_agent, "bedrock", FakeStreamingBedrock()),
+            mock.patch.object(main.clinical_agent, "cache", SummaryCache()),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.main.app.dependency_overrides.clear()
+        self.main.app.dependency_overrides.update(self.overrides)
+
+    def test_streams_findings_and_persists_result(self):
+        client = TestClient(self.main.app)
+        with client.stream("GET", f"/reports/{self.session_id}/summary/stream") as response:
+            self.assertEqual(response.headers["content-type"].split(";")[0], "text/event-stream")
+            body = "".join(response.iter_text())
+
+        events = [block.split("\n", 1)[0][len("event: "):] for block in body.strip().split("\n\n")]
+        self.assertEqual(events[0], "start")
+        self.assertEqual(events[-1], "complete")
+        self.assertEqual(events.count("finding"), 2)
+
+        db = self.Session()
+        row = db.get(ScreeningSession, self.session_id)
+        self.assertEqual(row.summary_status, "bedrock")
+        self.assertEqual(row.clinical_recommendation, "Follow up in 4 weeks.")
+        self.assertEqual(len(row.clinical_summary["key_findings"]), 2)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
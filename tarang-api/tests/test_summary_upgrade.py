@@ -0,0 +1,219 @@
+import sys
+import os
+import asyncio
+import functools
+import threading
+import time
+import unittest
+
+# Add app to path
+sys.path.append(os.path.join(os.getcwd(), 'tarang-api'))
+
+from starlette.websockets import WebSocketDisconnect
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base, Patient, ScreeningSession
+from app.core.summary_upgrade import SummaryUpgrader
+from app.security import create_access_token
+from api_db import ApiDatabaseTestCase
+
+
+class FakeAgent:
+    def __init__(self, delay=0.0, fail=False):
+        self.bedrock = object()
+        self.delay = delay
+        self.fail = fail
+        self.release = threading.Event()
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def generate_bedrock_summary(self, patient_data, risk_results, check_cache=True):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if self.delay:
+                self.release.wait(self.delay)
+            if self.fail:
+                raise RuntimeError("throttled")
+            return {"summary_title": "Bedrock", "key_findings": ["x"], "clinical_recommendation": "upgraded",
+                    "agent_status": "Bedrock Claude 3 Sonnet"}
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+async def run_io(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+
+class TestSummaryUpgrader(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.Session = sessionmaker(bind=engine)
+        db = self.Session()
+        for i in range(6):
+            db.add(ScreeningSession(patient_name=f"P{i}", risk_score=50.0, clinical_recommendation="rule text",
+                                    summary_status="pending"))
+        db.commit()
+        self.ids = [row.id for row in db.query(ScreeningSession).order_by(ScreeningSession.id)]
+        db.close()
+
+    def _rows(self):
+        db = self.Session()
+        try:
+            return {row.id: (row.summary_status, row.clinical_recommendation)
+                    for row in db.query(ScreeningSession)}
+        finally:
+            db.close()
+
+    def test_upgrade_rewrites_session_and_notifies(self):
+        upgrader = SummaryUpgrader(FakeAgent(), self.Session, run_io)
+
+        async def run():
+            self.assertTrue(upgrader.schedule(self.ids[0], {"name": "P0"}, {}))
+            event = await upgrader.wait_for_upgrade(self.ids[0], timeout=5)
+            await upgrader.drain()
+            return event
+
+        event = asyncio.run(run())
+        self.assertEqual(event["summary_status"], "bedrock")
+        self.assertEqual(self._rows()[self.ids[0]], ("bedrock", "upgraded"))
+        self.assertEqual(self._rows()[self.ids[1]], ("pending", "rule text"))
+
+    def test_timeout_keeps_rule_based_text(self):
+        agent = FakeAgent(delay=5)
+        upgrader = SummaryUpgrader(agent, self.Session, run_io, timeout_seconds=0.05)
+
+        async def run():
+            upgrader.schedule(self.ids[0], {}, {})
+            await upgrader.drain()
+            agent.release.set()
+
+        timeouts_before = upgrader.timeouts.value
+        asyncio.run(run())
+        self.assertEqual(upgrader.timeouts.value - timeouts_before, 1)
+        self.assertEqual(self._rows()[self.ids[0]], ("rule_based", "rule text"))
+
+    def test_waiting_for_a_slot_counts_against_the_timeout(self):
+        agent = FakeAgent(delay=5)
+        upgrader = SummaryUpgrader(agent, self.Session, run_io, timeout_seconds=0.2, max_concurrency=1)
+
+        async def run():
+            for session_id in self.ids[:2]:
+                upgrader.schedule(session_id, {}, {})
+            started = time.perf_counter()
+            await upgrader.drain()
+            elapsed = time.perf_counter() - started
+            agent.release.set()
+            return elapsed
+
+        # The second upgrade gives up while the first call still holds the only slot
+        self.assertLess(asyncio.run(run()), 1)
+        self.assertEqual(agent.calls, 1)
+        self.assertEqual(self._rows()[self.ids[1]], ("rule_based", "rule text"))
+
+    def test_failures_fall_back_to_rule_based(self):
+        upgrader = SummaryUpgrader(FakeAgent(fail=True), self.Session, run_io)
+
+        async def run():
+            upgrader.schedule(self.ids[0], {}, {})
+            await upgrader.drain()
+
+        asyncio.run(run())
+        self.assertEqual(self._rows()[self.ids[0]], ("rule_based", "rule text"))
+
+    def test_concurrency_and_pending_caps(self):
+        agent = FakeAgent(delay=0.2)
+        upgrader = SummaryUpgrader(agent, self.Session, run_io, max_concurrency=2, max_pending=4)
+
+        async def run():
+            accepted = [upgrader.schedule(i, {}, {}) for i in self.ids]
+            await upgrader.drain()
+            return accepted
+
+        rejected_before = upgrader.rejected.value
+        accepted = asyncio.run(run())
+        self.assertEqual(accepted, [True] * 4 + [False] * 2)
+        self.assertEqual(upgrader.rejected.value - rejected_before, 2)
+        self.assertEqual(agent.calls, 4)
+        self.assertLessEqual(agent.max_running, 2)
+        statuses = [status for status, _ in self._rows().values()]
+        self.assertEqual(statuses.count("bedrock"), 4)
+
+    def test_no_bedrock_means_no_upgrades(self):
+        agent = FakeAgent()
+        agent.bedrock = None
+        self.assertFalse(SummaryUpgrader(agent, self.Session, run_io).has_capacity())
+
+    def test_rejections_are_counted_once(self):
+        agent = FakeAgent()
+        upgrader = SummaryUpgrader(agent, None, run_io, max_pending=1)
+        upgrader._tasks.add(object())
+        rejected_before = upgrader.rejected.value
+        self.assertFalse(upgrader.has_capacity())
+        self.assertFalse(upgrader.schedule(1, {}, {}))
+        self.assertEqual(upgrader.rejected.value - rejected_before, 1)
+
+
+class TestSummaryWebSocket(ApiDatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            patient = Patient(name="Asha", external_id="a1", org_id=1)
+            db.add(patient)
+            db.flush()
+            row = ScreeningSession(patient_name="Asha", patient_id=patient.id, risk_score=50.0,
+                                   clinical_summary={"clinical_recommendation": "upgraded"}, summary_status="bedrock")
+            db.add(row)
+            db.commit()
+            self.session_id = row.id
+        self.client = self.api_client()
+
+    def url(self, org_id):
+        token = create_access_token({"sub": "doc@test.com", "role": "CLINICIAN", "org_id": org_id})
+        return f"/ws/reports/{self.session_id}/summary?token={token}"
+
+    def test_sends_final_summary_to_same_org(self):
+        with self.client.websocket_connect(self.url(1)) as websocket:
+            event = websocket.receive_json()
+        self.assertEqual(event["summary_status"], "bedrock")
+        self.assertEqual(event["clinical_summary"], {"clinical_recommendation": "upgraded"})
+
+    def test_rejects_other_organizations(self):
+        with self.assertRaises(WebSocketDisconnect) as raised:
+            with self.client.websocket_connect(self.url(2)) as websocket:
+                websocket.receive_json()
+        self.assertEqual(raised.exception.code, 1008)
+
+
+class TestScreeningSchedulesUpgrade(ApiDatabaseTestCase):
+    def test_rejected_upgrade_leaves_a_final_summary(self):
+        from unittest import mock
+        from app.schemas import TokenData
+
+        client = self.api_client()
+        main = self.main
+        self.user = TokenData(sub="doc@test.com", role="CLINICIAN", org_id=1)
+        body = {"patient_name": "Asha", "patient_id": 0, "questionnaire_score": 6,
+                "video_metrics": {"eye_contact": 0.5, "motor_coordination": 0.5}}
+        # Room when the request starts, full by the time the session is stored
+        with mock.patch.object(main.settings, "CLINICAL_SUMMARY_MODE", "background"), \
+                mock.patch.object(main.clinical_agent, "cached_summary", lambda risk_results: None), \
+                mock.patch.object(main.summary_upgrader, "has_capacity", lambda: True), \
+                mock.patch.object(main.summary_upgrader, "schedule", return_value=False) as schedule:
+            response = client.post("/screening/process", json=body)
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(schedule.call_count, 1)
+        self.assertEqual(response.json()["summary_status"], "rule_based")
+        with self.Session() as db:
+            self.assertEqual(db.get(ScreeningSession, response.json()["session_id"]).summary_status, "rule_based")
+
+
+if __name__ == '__main__':
+    unittest.main()